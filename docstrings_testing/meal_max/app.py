@@ -1,9 +1,35 @@
+import os
+import sys
+import time
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, g, jsonify, make_response, Response, request
+from flask.helpers import get_debug_flag
+from flask.logging import default_handler
 # from flask_cors import CORS
 
-from meal_max.models import kitchen_model
+from meal_max.models import kitchen_model, rating_model
 from meal_max.models.battle_model import BattleModel
+from meal_max.models.leaderboard_history_model import get_leaderboard_as_of, leaderboard_snapshotter, parse_as_of
+from meal_max.models.matchmaking_model import matchmaker
+from meal_max.utils.capture import SESSION_HEADER, capture_enabled, capture_request
+from meal_max.utils.json_provider import ModelJSONProvider
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.memory import (
+    compare_snapshots,
+    memory_summary,
+    register_gauge,
+    start_tracing,
+    stop_tracing,
+    take_snapshot,
+    top_allocations
+)
+from meal_max.utils.metrics import render_metrics
+from meal_max.utils.profiling import finish_profile, get_profile_dump, get_profile_report, is_authorized, list_profiles, start_profile
+from meal_max.utils.sampling_profiler import sampling_profiler
+from meal_max.utils.server import on_worker_start, record_request, run_worker_init_hooks, serve
+from meal_max.utils.slow_query import get_slow_queries, index_advice
+from meal_max.utils.sql_trace import finish_trace, get_traces, start_trace
 from meal_max.utils.sql_utils import check_database_connection, check_table_exists
 
 
@@ -11,6 +37,44 @@ from meal_max.utils.sql_utils import check_database_connection, check_table_exis
 load_dotenv()
 
 app = Flask(__name__)
+app.json = ModelJSONProvider(app)
+
+# Send the app's own log lines through the shared background writer as well
+app.logger.removeHandler(default_handler)
+configure_logger(app.logger)
+
+
+@app.before_request
+def start_request_timer() -> None:
+    """
+    Notes the start time of each request for the request latency metrics, starts its SQL trace
+    and, if it asked with ?__profile=1 and a valid X-Profile-Token or is sampled, profiles it.
+    """
+    g.request_start = time.perf_counter()
+    g.route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    start_trace(g.route, request.method)
+    start_profile(request.args.get('__profile'), request.headers.get('X-Profile-Token'))
+
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    """
+    Records each request's route, status code and latency in the request metrics and stores its
+    SQL trace and profile, and captures it if capture is on. A profiled response carries the
+    profile's id in X-Profile-Id.
+    """
+    profile_id = finish_profile(g.route, request.method, response.status_code)
+    if profile_id is not None:
+        response.headers['X-Profile-Id'] = profile_id
+    elapsed = time.perf_counter() - g.request_start
+    record_request(g.route, request.method, response.status_code, elapsed)
+    finish_trace(response.status_code)
+    if capture_enabled():
+        capture_request(request.method, g.route, request.path, request.query_string.decode("latin-1"), request.get_data(),
+                        request.headers.get(SESSION_HEADER) or request.remote_addr or "", response.status_code, elapsed)
+    return response
+
+
 # This bypasses standard security stuff we'll talk about later
 # If you get errors that use words like cross origin or flight,
 # uncomment this
@@ -19,6 +83,32 @@ app = Flask(__name__)
 # Initialize the BattleModel
 battle_model = BattleModel()
 
+# Sizes of the state the models hold in memory, for /api/debug/memory and /api/metrics
+register_gauge("battle_combatants", "Meals prepped as combatants.", lambda: len(battle_model.combatants))
+register_gauge("matchmaking_queue_meals", "Meals waiting in the matchmaking queue.", lambda: matchmaker.queue.depth())
+register_gauge("matchmaking_recent_matches", "Recent matches kept for the matchmaking stats.", lambda: len(matchmaker.recent_matches))
+
+
+@on_worker_start
+def start_background_threads(worker_id: int) -> None:
+    """
+    Starts the background threads in each worker process, since threads do not survive a fork.
+
+    Every worker battles the meals queued with it, but only worker 0 takes leaderboard snapshots.
+
+    Args:
+        worker_id (int): The index of the worker process.
+    """
+    # Start battling meals queued for matchmaking in the background
+    matchmaker.start()
+
+    # Start taking periodic leaderboard snapshots for point-in-time queries
+    if worker_id == 0:
+        leaderboard_snapshotter.start()
+
+    # Sample where this worker's threads spend their time, for /api/debug/flamegraph
+    sampling_profiler.start()
+
 ####################################################
 #
 # Healthchecks
@@ -59,6 +149,302 @@ def db_check() -> Response:
         return make_response(jsonify({'error': str(e)}), 404)
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Route to expose request, database, random.org and cache metrics in the Prometheus text
+    format. Each worker process reports its own metrics.
+
+    Returns:
+        Text response with the metrics.
+    """
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/debug/sql-traces', methods=['GET'])
+def sql_traces() -> Response:
+    """
+    Route to get the SQL statements run by recent requests of this worker, most recent first.
+
+    Query Parameters:
+        - limit (int): The maximum number of traces to return. Default is 20.
+        - flagged (str): 'true' to return only requests over the query budget or that ran the
+          same statement repeatedly. Default is 'false'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the traces, each with its endpoint, query count and statements.
+    Raises:
+        400 error if limit is not an integer.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return make_response(jsonify({'error': 'limit must be an integer'}), 400)
+    flagged_only = request.args.get('flagged', 'false').lower() == 'true'
+
+    return make_response(jsonify({'status': 'success', 'traces': get_traces(limit, flagged_only)}), 200)
+
+
+@app.route('/api/debug/slow-queries', methods=['GET'])
+def slow_queries() -> Response:
+    """
+    Route to get the statements of this worker that ran longer than SLOW_QUERY_MS, with their
+    query plans, and the index advice drawn from those plans.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the slow statements, highest total time first, and one piece of
+        advice per full table scan or temporary B-tree step in their plans.
+    Raises:
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+    return make_response(jsonify({'status': 'success', 'slow_queries': get_slow_queries(), 'index_advice': index_advice()}), 200)
+
+
+@app.route('/api/debug/profiles', methods=['GET'])
+def profiles() -> Response:
+    """
+    Route to list the request profiles stored by this worker, most recent first.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the id, endpoint, status and duration of each profile.
+    Raises:
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+    return make_response(jsonify({'status': 'success', 'profiles': list_profiles()}), 200)
+
+
+@app.route('/api/debug/profiles/<string:profile_id>', methods=['GET'])
+def profile_report(profile_id: str) -> Response:
+    """
+    Route to get a stored request profile.
+
+    Path Parameter:
+        - profile_id (str): The id from the X-Profile-Id header of the profiled response.
+
+    Query Parameters:
+        - format (str): 'text' for a report of the slowest functions and their callers, or
+          'pstats' for the binary profile data that pstats and snakeviz load. Default is 'text'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        The profile in the requested format.
+    Raises:
+        403 error if the token is missing or wrong.
+        404 error if there is no such profile.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    if request.args.get('format', 'text') == 'pstats':
+        dump = get_profile_dump(profile_id)
+        if dump is None:
+            return make_response(jsonify({'error': f'Profile {profile_id} not found'}), 404)
+        return Response(dump, mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename={profile_id}.prof'})
+
+    report = get_profile_report(profile_id)
+    if report is None:
+        return make_response(jsonify({'error': f'Profile {profile_id} not found'}), 404)
+    return Response(report, mimetype='text/plain')
+
+
+@app.route('/api/debug/flamegraph', methods=['GET'])
+def flamegraph() -> Response:
+    """
+    Route to get the stacks sampled by this worker's sampling profiler in the collapsed stack
+    format, which flamegraph.pl, speedscope and inferno turn into a flame graph.
+
+    Query Parameters:
+        - idle (str): 'true' to include samples of threads that were waiting. Default is 'false'.
+        - reset (str): 'true' to start counting afresh after this dump. Default is 'false'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        Text response with one "thread;root;...;leaf count" line per stack, and the number of
+        samples and the fraction of time spent sampling in the X-Samples and
+        X-Sampling-Overhead headers.
+    Raises:
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    include_idle = request.args.get('idle', 'false').lower() == 'true'
+    headers = {
+        'X-Samples': str(sampling_profiler.samples),
+        'X-Sampling-Overhead': f'{sampling_profiler.overhead():.5f}',
+    }
+    collapsed = sampling_profiler.collapsed(include_idle)
+    if request.args.get('reset', 'false').lower() == 'true':
+        sampling_profiler.reset()
+    return Response(collapsed, mimetype='text/plain', headers=headers)
+
+
+@app.route('/api/debug/memory', methods=['GET'])
+def memory() -> Response:
+    """
+    Route to get this worker's resident memory, tracemalloc state, snapshot names and the
+    sizes of the state held in memory by the models.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the memory summary.
+    Raises:
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+    return make_response(jsonify({'status': 'success', 'memory': memory_summary()}), 200)
+
+
+@app.route('/api/debug/memory/tracing', methods=['POST', 'DELETE'])
+def memory_tracing() -> Response:
+    """
+    Route to start (POST) or stop (DELETE) tracing allocations with tracemalloc. Stopping
+    discards the snapshots.
+
+    Expected JSON Input (POST, optional):
+        - frames (int): Frames of call stack recorded per allocation. Default is TRACEMALLOC_FRAMES.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the memory summary.
+    Raises:
+        400 error if frames is not a positive integer.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    if request.method == 'DELETE':
+        stop_tracing()
+    else:
+        data = request.get_json(silent=True) or {}
+        frames = data.get('frames')
+        if frames is not None and (not isinstance(frames, int) or frames < 1):
+            return make_response(jsonify({'error': 'frames must be a positive integer'}), 400)
+        start_tracing(frames)
+    return make_response(jsonify({'status': 'success', 'memory': memory_summary()}), 200)
+
+
+@app.route('/api/debug/memory/snapshots', methods=['POST'])
+def memory_snapshot() -> Response:
+    """
+    Route to take a named tracemalloc snapshot.
+
+    Expected JSON Input:
+        - name (str): The snapshot name. A snapshot with the same name is replaced.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the snapshot's name, traced size and allocation count.
+    Raises:
+        400 error if the name is missing or tracing is off.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    name = (request.get_json(silent=True) or {}).get('name')
+    if not name:
+        return make_response(jsonify({'error': 'A snapshot name is required'}), 400)
+    try:
+        snapshot = take_snapshot(name)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    return make_response(jsonify({'status': 'success', 'snapshot': snapshot}), 201)
+
+
+@app.route('/api/debug/memory/top', methods=['GET'])
+def memory_top() -> Response:
+    """
+    Route to get the allocation sites holding the most memory.
+
+    Query Parameters:
+        - snapshot (str, optional): The snapshot to read. Defaults to a fresh snapshot.
+        - limit (int): The number of sites to return. Default is 20.
+        - group_by (str): 'lineno', 'filename' or 'traceback'. Default is 'lineno'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the allocation sites, largest first.
+    Raises:
+        400 error if tracing is off, the snapshot does not exist or a parameter is invalid.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    try:
+        limit = int(request.args.get('limit', 20))
+        allocations = top_allocations(request.args.get('snapshot'), limit, request.args.get('group_by', 'lineno'))
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    return make_response(jsonify({'status': 'success', 'allocations': allocations}), 200)
+
+
+@app.route('/api/debug/memory/diff', methods=['GET'])
+def memory_diff() -> Response:
+    """
+    Route to get the allocation sites whose memory changed most between two snapshots.
+
+    Query Parameters:
+        - from (str): The earlier snapshot.
+        - to (str, optional): The later snapshot. Defaults to a fresh snapshot.
+        - limit (int): The number of sites to return. Default is 20.
+        - group_by (str): 'lineno', 'filename' or 'traceback'. Default is 'lineno'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the allocation sites, largest change first.
+    Raises:
+        400 error if tracing is off, a snapshot does not exist or a parameter is invalid.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    old = request.args.get('from')
+    if not old:
+        return make_response(jsonify({'error': 'The from snapshot is required'}), 400)
+    try:
+        limit = int(request.args.get('limit', 20))
+        allocations = compare_snapshots(old, request.args.get('to'), limit, request.args.get('group_by', 'lineno'))
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    return make_response(jsonify({'status': 'success', 'allocations': allocations}), 200)
+
+
 ##########################################################
 #
 # Meals
@@ -128,7 +514,7 @@ def clear_catalog() -> Response:
         kitchen_model.clear_meals()
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error clearing catalog: {e}")
+        app.logger.error("Error clearing catalog: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/delete-meal/<int:meal_id>', methods=['DELETE'])
@@ -143,12 +529,12 @@ def delete_meal(meal_id: int) -> Response:
         JSON response indicating success of the operation or error message.
     """
     try:
-        app.logger.info(f"Deleting meal by ID: {meal_id}")
+        app.logger.info("Deleting meal by ID: %s", meal_id)
 
         kitchen_model.delete_meal(meal_id)
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error deleting meal: {e}")
+        app.logger.error("Error deleting meal: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-meal-by-id/<int:meal_id>', methods=['GET'])
@@ -163,12 +549,12 @@ def get_meal_by_id(meal_id: int) -> Response:
         JSON response with the meal details or error message.
     """
     try:
-        app.logger.info(f"Retrieving meal by ID: {meal_id}")
+        app.logger.info("Retrieving meal by ID: %s", meal_id)
 
         meal = kitchen_model.get_meal_by_id(meal_id)
         return make_response(jsonify({'status': 'success', 'meal': meal}), 200)
     except Exception as e:
-        app.logger.error(f"Error retrieving meal by ID: {e}")
+        app.logger.error("Error retrieving meal by ID: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-meal-by-name/<string:meal_name>', methods=['GET'])
@@ -183,7 +569,7 @@ def get_meal_by_name(meal_name: str) -> Response:
         JSON response with the meal details or error message.
     """
     try:
-        app.logger.info(f"Retrieving meal by name: {meal_name}")
+        app.logger.info("Retrieving meal by name: %s", meal_name)
 
         if not meal_name:
             return make_response(jsonify({'error': 'Meal name is required'}), 400)
@@ -191,7 +577,7 @@ def get_meal_by_name(meal_name: str) -> Response:
         meal = kitchen_model.get_meal_by_name(meal_name)
         return make_response(jsonify({'status': 'success', 'meal': meal}), 200)
     except Exception as e:
-        app.logger.error(f"Error retrieving meal by name: {e}")
+        app.logger.error("Error retrieving meal by name: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
@@ -219,7 +605,7 @@ def battle() -> Response:
 
         return make_response(jsonify({'status': 'success', 'winner': winner}), 200)
     except Exception as e:
-        app.logger.error(f"Battle error: {e}")
+        app.logger.error("Battle error: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/clear-combatants', methods=['POST'])
@@ -292,6 +678,87 @@ def prep_combatant() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+############################################################
+#
+# Matchmaking
+#
+############################################################
+
+
+@app.route('/api/enqueue-meal', methods=['POST'])
+def enqueue_meal() -> Response:
+    """
+    Route to queue a meal for matchmaking. Queued meals are paired with the closest rated meal
+    in the queue and battled in the background.
+
+    Expected JSON Input:
+        - meal (str): The name of the meal.
+        - requeue (bool, optional): If true, the meal rejoins the queue after each battle. Default is false.
+
+    Returns:
+        JSON response with the queue entry.
+    Raises:
+        400 error if the meal name is missing.
+        500 error if the meal cannot be found or is already queued.
+    """
+    try:
+        data = request.get_json()
+        meal_name = data.get('meal')
+        requeue = bool(data.get('requeue', False))
+
+        if not meal_name:
+            return make_response(jsonify({'error': 'You must name a meal'}), 400)
+
+        app.logger.info("Queueing meal for matchmaking: %s", meal_name)
+        meal = kitchen_model.get_meal_by_name(meal_name)
+        entry = matchmaker.enqueue(meal, requeue=requeue)
+
+        return make_response(jsonify({
+            'status': 'success',
+            'meal': meal,
+            'rating': entry.rating,
+            'queue_depth': matchmaker.queue.depth()
+        }), 201)
+    except Exception as e:
+        app.logger.error("Failed to queue meal: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/dequeue-meal/<int:meal_id>', methods=['DELETE'])
+def dequeue_meal(meal_id: int) -> Response:
+    """
+    Route to remove a meal from the matchmaking queue.
+
+    Path Parameter:
+        - meal_id (int): The ID of the meal.
+
+    Returns:
+        JSON response indicating success of the operation or error message.
+    """
+    try:
+        app.logger.info("Removing meal %s from the matchmaking queue", meal_id)
+        matchmaker.queue.dequeue(meal_id)
+        return make_response(jsonify({'status': 'success'}), 200)
+    except Exception as e:
+        app.logger.error("Failed to dequeue meal: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/matchmaking-metrics', methods=['GET'])
+def matchmaking_metrics() -> Response:
+    """
+    Route to get the matchmaking queue depth and wait time metrics.
+
+    Returns:
+        JSON response with the metrics and the most recent matches.
+    """
+    try:
+        metrics = matchmaker.get_metrics()
+        recent_matches = list(matchmaker.recent_matches)[-10:]
+        return make_response(jsonify({'status': 'success', 'metrics': metrics, 'recent_matches': recent_matches}), 200)
+    except Exception as e:
+        app.logger.error("Failed to get matchmaking metrics: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
 ############################################################
 #
 # Leaderboard
@@ -302,28 +769,100 @@ def prep_combatant() -> Response:
 @app.route('/api/leaderboard', methods=['GET'])
 def get_leaderboard() -> Response:
     """
-    Route to get the leaderboard of meals sorted by wins, battles, or win percentage.
+    Route to get the leaderboard of meals sorted by wins, win percentage, or rating.
 
     Query Parameters:
-        - sort (str): The field to sort by ('wins', 'battles', or 'win_pct'). Default is 'wins'.
+        - sort (str): The field to sort by ('wins', 'win_pct', or 'rating'). Default is 'wins'.
+        - as_of (str, optional): A unix timestamp or ISO 8601 date/time, in UTC unless it has an
+          offset. If given, the leaderboard is reconstructed from the latest snapshot taken at or
+          before that time.
 
     Returns:
         JSON response with a sorted leaderboard of meals.
     Raises:
+        400 error if sort is invalid or as_of is not a valid timestamp.
+        404 error if no snapshot was taken at or before as_of.
         500 error if there is an issue generating the leaderboard.
     """
     try:
         sort_by = request.args.get('sort', 'wins')  # Default sort by wins
+        as_of = request.args.get('as_of')
+
+        if sort_by not in ('wins', 'win_pct', 'rating'):
+            return make_response(jsonify({'error': f'Invalid sort_by parameter: {sort_by}'}), 400)
+
+        if as_of is not None:
+            try:
+                as_of_timestamp = parse_as_of(as_of)
+            except ValueError:
+                return make_response(jsonify({'error': 'as_of must be a unix timestamp or an ISO 8601 date'}), 400)
+
+            app.logger.info("Reconstructing leaderboard sorted by %s as of %s", sort_by, as_of)
+            try:
+                leaderboard_data = get_leaderboard_as_of(as_of_timestamp, sort_by)
+            except ValueError as e:
+                return make_response(jsonify({'error': str(e)}), 404)
+            return make_response(jsonify({'status': 'success', 'as_of': as_of_timestamp, 'leaderboard': leaderboard_data}), 200)
+
         app.logger.info("Generating leaderboard sorted by %s", sort_by)
 
         leaderboard_data = kitchen_model.get_leaderboard(sort_by)
 
         return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
     except Exception as e:
-        app.logger.error(f"Error generating leaderboard: {e}")
+        app.logger.error("Error generating leaderboard: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/group-leaderboard', methods=['GET'])
+def get_group_leaderboard() -> Response:
+    """
+    Route to get the leaderboard of cuisines or difficulty levels, combining the stats of their meals.
+
+    Query Parameters:
+        - group_by (str): The field to group meals by ('cuisine' or 'difficulty'). Default is 'cuisine'.
+        - sort (str): The field to sort by ('wins', 'win_pct', or 'rating'). Default is 'wins'.
+
+    Returns:
+        JSON response with a sorted leaderboard of groups.
+    Raises:
+        500 error if there is an issue generating the leaderboard.
+    """
+    try:
+        group_by = request.args.get('group_by', 'cuisine')
+        sort_by = request.args.get('sort', 'wins')
+        app.logger.info("Generating leaderboard by %s sorted by %s", group_by, sort_by)
+
+        leaderboard_data = kitchen_model.get_group_leaderboard(group_by, sort_by)
+
+        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+    except Exception as e:
+        app.logger.error("Error generating group leaderboard: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/recompute-ratings', methods=['POST'])
+def recompute_ratings() -> Response:
+    """
+    Route to recompute every meal's rating by replaying the full battle history.
+
+    Returns:
+        JSON response with the number of battles replayed.
+    Raises:
+        500 error if there is an issue recomputing the ratings.
+    """
+    try:
+        app.logger.info("Recomputing ratings from the battle history")
+        replayed = rating_model.recompute_ratings()
+        return make_response(jsonify({'status': 'success', 'battles_replayed': replayed}), 200)
+    except Exception as e:
+        app.logger.error("Error recomputing ratings: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # FLASK_DEBUG=1 runs the development server with the debugger and reloader
+    if get_debug_flag():
+        run_worker_init_hooks(0)
+        app.run(debug=True, host='0.0.0.0', port=int(os.getenv("PORT", "5000")))
+    else:
+        sys.exit(serve(app))
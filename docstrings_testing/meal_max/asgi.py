@@ -0,0 +1,48 @@
+"""
+The asyncio variant of the meal_max API.
+
+Serves the same routes as app.py. /api/battle waits on random.org as a coroutine; every other
+route runs the Flask view on the bounded DB thread pool.
+
+Usage:
+    python asgi.py
+    uvicorn asgi:asgi_app --host 0.0.0.0 --port 5000
+"""
+import os
+from typing import Any, Dict, Tuple
+
+import uvicorn
+
+from app import app, battle_model
+from meal_max.utils.asgi import AsyncApp
+from meal_max.utils.random_utils import get_random_async
+
+
+asgi_app = AsyncApp(app)
+
+
+@asgi_app.route('/api/battle', methods=['GET'])
+async def battle(scope: Dict[str, Any]) -> Tuple[int, dict]:
+    """
+    Route to initiate a battle between the two currently prepared meals without holding a
+    thread while random.org responds.
+
+    Returns:
+        JSON response indicating the result of the battle and the winner.
+    """
+    try:
+        app.logger.info('Two meals enter, one meal leaves!')
+        if len(battle_model.combatants) < 2:
+            raise ValueError("Two combatants must be prepped for a battle.")
+
+        random_number = await get_random_async()
+        winner = await asgi_app.run_sync(battle_model.battle, random_number)
+
+        return 200, {'status': 'success', 'winner': winner}
+    except Exception as e:
+        app.logger.error("Battle error: %s", str(e))
+        return 500, {'error': str(e)}
+
+
+if __name__ == '__main__':
+    uvicorn.run(asgi_app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "5000")), lifespan="on")
@@ -0,0 +1,80 @@
+"""
+Benchmarks rebuilding meal stats from the battle log.
+
+Fills a scratch database with a synthetic battle log, then times a rebuild from scratch and a
+rebuild from a snapshot taken part way through the log.
+
+Usage:
+    python -m benchmarks.battle_replay --battles 100000000 --meals 1000 --tail 0.01
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+
+def fill_battle_log(db_path: str, battles: int, meals: int) -> None:
+    """
+    Inserts meals and a random battle log directly in SQL, which is far faster than going
+    through record_battle for logs this size.
+    """
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+            INSERT INTO meals (meal, cuisine, price, difficulty) SELECT 'Meal ' || n, 'Cuisine', 10.0, 'MED' FROM seq
+        """, (meals,))
+        # Loser is offset from the winner so a meal never battles itself
+        conn.execute("""
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+            INSERT INTO battles (winner_id, loser_id)
+            SELECT winner_id, (winner_id + abs(random()) % (? - 1)) % ? + 1
+            FROM (SELECT abs(random()) % ? + 1 AS winner_id FROM seq)
+        """, (battles, meals, meals, meals))
+        conn.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark rebuilding meal stats from the battle log.")
+    parser.add_argument("--battles", type=int, default=100_000_000, help="number of logged battles")
+    parser.add_argument("--meals", type=int, default=1000, help="number of meals")
+    parser.add_argument("--tail", type=float, default=0.01, help="fraction of the log after the snapshot")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="meal_max_bench_")
+    os.environ["DB_PATH"] = os.path.join(workdir, "meal_max.db")
+    os.environ.setdefault("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql"))
+
+    from meal_max.models import battle_log_model, kitchen_model
+
+    kitchen_model.clear_meals()
+    start = time.perf_counter()
+    fill_battle_log(os.environ["DB_PATH"], args.battles, args.meals)
+    print(f"Generated {args.battles} battles between {args.meals} meals in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    battle_log_model.rebuild_stats(from_scratch=True)
+    full = time.perf_counter() - start
+    print(f"Rebuild from scratch:  {full:.2f}s ({args.battles / full:,.0f} battles/s)")
+
+    # Take a snapshot as of the head of the log, then rewind it to leave a tail of the requested size
+    snapshot_id = battle_log_model.take_snapshot()
+    tail = int(args.battles * args.tail)
+    with sqlite3.connect(os.environ["DB_PATH"]) as conn:
+        conn.execute("UPDATE stat_snapshots SET last_battle_id = ? WHERE id = ?", (args.battles - tail, snapshot_id))
+        conn.execute("""
+            UPDATE meal_stat_snapshots SET
+                battles = battles - (SELECT COUNT(*) FROM battles WHERE id > ? AND (winner_id = meal_id OR loser_id = meal_id)),
+                wins = wins - (SELECT COUNT(*) FROM battles WHERE id > ? AND winner_id = meal_id)
+            WHERE snapshot_id = ?
+        """, (args.battles - tail, args.battles - tail, snapshot_id))
+        conn.commit()
+
+    start = time.perf_counter()
+    _, replayed = battle_log_model.rebuild_stats()
+    incremental = time.perf_counter() - start
+    print(f"Rebuild from snapshot: {incremental:.2f}s ({replayed} tail battles)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Generates a large synthetic meal catalog straight into a SQLite file.
+
+Rows are generated inside SQLite by a recursive query, so no Python runs per row and the load
+goes at SQLite's insert speed. A linear congruential generator carried through the
+query draws each column, and its state is seeded, so the same seed and count always produce the
+same catalog. Each draw indexes a table of QUANTILES points of the column's inverse distribution,
+precomputed here:
+
+- cuisine: weighted towards Italian, American and Mexican.
+- price: log-normal around a median that depends on the cuisine.
+- difficulty: mostly MED, then LOW, then HIGH.
+
+New meals have not battled, so their battles, wins and rating keep the table defaults.
+
+Rows are inserted in transactions of CHUNK_ROWS, with journaling off. The triggers keeping
+cuisine_stats and difficulty_stats current would run for every row, so they are dropped during the
+load and the new meals are added to those totals in one aggregate query at the end. Meals are
+appended after any already in the file; --reset recreates the tables first.
+
+Usage:
+    python -m benchmarks.generate_catalog --db /tmp/meal_max.db --count 10000000 --seed 1
+"""
+import argparse
+from bisect import bisect_left
+from itertools import accumulate
+import logging
+import math
+import os
+import random
+import sqlite3
+from statistics import NormalDist
+import time
+from typing import Callable, List, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+# Points of each inverse distribution; also the range of each draw
+QUANTILES = 1 << 16
+
+# Rows per transaction
+CHUNK_ROWS = 1_000_000
+
+# Share of the meals and median price of each cuisine
+CUISINES = {
+    "Italian": (18, 16.0), "American": (16, 14.0), "Mexican": (14, 11.0), "Chinese": (12, 12.0), "Japanese": (10, 22.0),
+    "Indian": (9, 13.0), "Thai": (7, 13.0), "French": (6, 28.0), "Mediterranean": (5, 17.0), "Korean": (3, 18.0),
+}
+
+# Spread of the log-normal price around the cuisine median, and the price bounds
+PRICE_SIGMA = 0.35
+PRICE_BOUNDS = (2.0, 150.0)
+
+DIFFICULTY_WEIGHTS = {"LOW": 35, "MED": 45, "HIGH": 20}
+
+# The generator: x -> (x * LCG_MULTIPLIER + LCG_INCREMENT) mod LCG_MODULUS. Products stay below 2**63,
+# so SQLite computes them in integers.
+LCG_MODULUS = 1 << 31
+LCG_MULTIPLIER = 1103515245
+LCG_INCREMENT = 12345
+
+# Draws per row: cuisine, price and difficulty
+DRAWS = 3
+
+DEFAULT_CREATE_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql", "create_meal_table.sql")
+
+
+def lcg_jump(steps: int) -> Tuple[int, int]:
+    """
+    Returns (multiplier, increment) of the map that advances the generator by a number of steps.
+    """
+    multiplier, increment = 1, 0
+    step_multiplier, step_increment = LCG_MULTIPLIER, LCG_INCREMENT
+    while steps:
+        if steps & 1:
+            multiplier, increment = (multiplier * step_multiplier) % LCG_MODULUS, (increment * step_multiplier + step_increment) % LCG_MODULUS
+        step_multiplier, step_increment = (step_multiplier * step_multiplier) % LCG_MODULUS, (step_increment * step_multiplier + step_increment) % LCG_MODULUS
+        steps >>= 1
+    return multiplier, increment
+
+
+def draw_sql(draw: int) -> str:
+    """
+    Returns the SQL expression of a row's draw as an integer below QUANTILES, from its state x.
+    The high bits are used, since the low bits of a power-of-two LCG repeat quickly.
+    """
+    multiplier, increment = lcg_jump(draw)
+    return f"(((x * {multiplier} + {increment}) % {LCG_MODULUS}) >> {31 - QUANTILES.bit_length() + 1})"
+
+
+def inverse_cdf(weights: Sequence[float]) -> List[int]:
+    """
+    Returns, for each of QUANTILES evenly spaced probabilities, the index drawn by it from a
+    discrete distribution with the given weights.
+    """
+    cumulative = list(accumulate(weights))
+    return [min(len(weights) - 1, bisect_left(cumulative, (q + 0.5) / QUANTILES * cumulative[-1])) for q in range(QUANTILES)]
+
+
+def continuous_quantiles(inverse: Callable[[float], float]) -> List[float]:
+    return [inverse((q + 0.5) / QUANTILES) for q in range(QUANTILES)]
+
+
+def create_quantiles(conn: sqlite3.Connection) -> None:
+    """
+    Creates the temp table of inverse distributions. The price column holds the factor applied
+    to the cuisine median.
+    """
+    cuisines = list(CUISINES)
+    cuisine = [cuisines[i] for i in inverse_cdf([weight for weight, _ in CUISINES.values()])]
+    log_normal = NormalDist(0.0, PRICE_SIGMA)
+    price_factor = continuous_quantiles(lambda p: math.exp(log_normal.inv_cdf(p)))
+    difficulties = list(DIFFICULTY_WEIGHTS)
+    difficulty = [difficulties[i] for i in inverse_cdf(list(DIFFICULTY_WEIGHTS.values()))]
+
+    conn.execute("DROP TABLE IF EXISTS temp.quantiles")
+    conn.execute("""
+        CREATE TEMP TABLE quantiles (
+            q INTEGER PRIMARY KEY, cuisine TEXT, cuisine_price REAL, price_factor REAL, difficulty TEXT
+        )
+    """)
+    conn.executemany("INSERT INTO quantiles VALUES (?, ?, ?, ?, ?)", (
+        (q, cuisine[q], CUISINES[cuisine[q]][1], price_factor[q], difficulty[q]) for q in range(QUANTILES)
+    ))
+
+
+def add_group_stats(conn: sqlite3.Connection, group_by: str, after_id: int) -> None:
+    """
+    Adds the meals with ids above after_id to the per-group totals kept by the triggers.
+    """
+    conn.execute(f"""
+        INSERT INTO {group_by}_stats ({group_by}, meals, battles, wins, rating_total)
+        SELECT {group_by}, COUNT(*), SUM(battles), SUM(wins), SUM(rating)
+        FROM meals WHERE id > ? AND deleted = FALSE GROUP BY {group_by}
+        ON CONFLICT ({group_by}) DO UPDATE SET
+            meals = meals + excluded.meals, battles = battles + excluded.battles, wins = wins + excluded.wins,
+            rating_total = rating_total + excluded.rating_total
+    """, (after_id,))
+
+
+def generate_meals(db_path: str, count: int, seed: int = 1, reset: bool = False,
+                   create_table_path: str = DEFAULT_CREATE_TABLE_PATH) -> None:
+    """
+    Appends synthetic meals to the catalog in a SQLite file.
+
+    Args:
+        db_path (str): The SQLite file, created if missing.
+        count (int): The number of meals.
+        seed (int): Seed of the generator.
+        reset (bool): Whether to recreate the tables first, discarding existing meals and battles.
+        create_table_path (str): The script creating the tables, run if reset or the file has none.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -262144")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if reset or not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meals'").fetchone():
+            with open(create_table_path) as fh:
+                conn.executescript(fh.read())
+
+        offset = conn.execute("SELECT COALESCE(MAX(id), 0) FROM meals").fetchone()[0]
+        create_quantiles(conn)
+
+        triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'meals'").fetchall()
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+
+        row_multiplier, row_increment = lcg_jump(DRAWS)
+        state = random.Random(seed).randrange(LCG_MODULUS)
+        for start in range(0, count, CHUNK_ROWS):
+            rows = min(CHUNK_ROWS, count - start)
+            began = time.perf_counter()
+            conn.execute("BEGIN")
+            conn.execute(f"""
+                WITH RECURSIVE draws(i, x) AS (
+                    SELECT ?, ?
+                    UNION ALL
+                    SELECT i + 1, (x * {row_multiplier} + {row_increment}) % {LCG_MODULUS} FROM draws WHERE i < ?
+                )
+                INSERT INTO meals (meal, cuisine, price, difficulty)
+                SELECT 'Meal ' || (? + i), c.cuisine,
+                       MIN(MAX(ROUND(c.cuisine_price * p.price_factor, 2), {PRICE_BOUNDS[0]}), {PRICE_BOUNDS[1]}), d.difficulty
+                FROM draws
+                JOIN quantiles AS c ON c.q = {draw_sql(0)}
+                JOIN quantiles AS p ON p.q = {draw_sql(1)}
+                JOIN quantiles AS d ON d.q = {draw_sql(2)}
+            """, (start, state, start + rows - 1, offset + 1))
+            conn.execute("COMMIT")
+            multiplier, increment = lcg_jump(DRAWS * rows)
+            state = (state * multiplier + increment) % LCG_MODULUS
+            logger.info("Inserted meals %d to %d in %.1fs", offset + start + 1, offset + start + rows, time.perf_counter() - began)
+
+        began = time.perf_counter()
+        conn.execute("BEGIN")
+        add_group_stats(conn, "cuisine", offset)
+        add_group_stats(conn, "difficulty", offset)
+        for _, sql in triggers:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+        logger.info("Updated the group stats in %.1fs", time.perf_counter() - began)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic meal catalog in a SQLite file.")
+    parser.add_argument("--db", default=os.getenv("DB_PATH"), required=os.getenv("DB_PATH") is None,
+                        help="SQLite file to write (default: DB_PATH)")
+    parser.add_argument("--count", type=int, required=True, help="number of meals")
+    parser.add_argument("--seed", type=int, default=1, help="generator seed")
+    parser.add_argument("--reset", action="store_true", help="recreate the tables first, discarding existing meals")
+    parser.add_argument("--sql", default=os.getenv("SQL_CREATE_TABLE_PATH", DEFAULT_CREATE_TABLE_PATH),
+                        help="table creation script (default: SQL_CREATE_TABLE_PATH)")
+    args = parser.parse_args()
+    if args.count < 1:
+        parser.error("--count must be positive")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    began = time.perf_counter()
+    generate_meals(args.db, args.count, args.seed, args.reset, args.sql)
+    logger.info("Generated %d meals in %s in %.1fs", args.count, args.db, time.perf_counter() - began)
+
+
+if __name__ == "__main__":
+    main()
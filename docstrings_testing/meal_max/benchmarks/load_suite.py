@@ -0,0 +1,320 @@
+"""
+Drives a realistic mix of requests against the meal_max service and reports latency per route.
+
+The service is started as a subprocess on a fresh set of meals, with random.org replaced by the
+local stub in benchmarks.random_org_stub. Concurrent client processes then pick operations from
+MIX by weight until the time is up: meal lookups, battles, and leaderboard and matchmaking
+polling. Every request is timed under its route pattern, and the report gives each
+route's throughput and p50/p95/p99 latency.
+
+The combatants live in worker memory, so the suite runs a single worker by default. A battle
+clears the combatants, preps two meals and battles them while holding a lock shared by the
+clients, so concurrent battles never conflict and any non-2xx response is a real error.
+
+Results can be saved with --output and compared with an earlier run with --baseline.
+
+Usage:
+    python -m benchmarks.load_suite --seconds 30 --clients 8 --output before.json
+    python -m benchmarks.load_suite --seconds 30 --clients 8 --baseline before.json
+"""
+import argparse
+import http.client
+import json
+import math
+from multiprocessing import Lock, Pool
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from benchmarks.random_org_stub import start_stub
+
+
+PORT = 5094
+STUB_PORT = 5093
+
+CUISINES = ["Italian", "Mexican", "American", "Japanese", "Indian", "French"]
+DIFFICULTIES = ["LOW", "MED", "HIGH"]
+
+
+def meal_name(i: int) -> str:
+    return f"Meal {i}"
+
+
+class Client:
+    """
+    Issues requests to the service and records their latencies and failures by route.
+
+    Attributes:
+        random (random.Random): The client's seeded generator.
+        latencies (Dict[str, List[float]]): Latencies in ms of successful requests, by route.
+        errors (Dict[str, Dict[str, int]]): Failed requests by route and status.
+    """
+
+    def __init__(self, port: int, seed: int):
+        self.port = port
+        self.random = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def request(self, method: str, route: str, path: Optional[str] = None, body: Optional[dict] = None) -> bool:
+        """
+        Sends one request and records it under "METHOD route".
+
+        Args:
+            method (str): The HTTP method.
+            route (str): The route pattern, used as the path if no path is given.
+            path (str, optional): The path with parameters filled in.
+            body (dict, optional): A JSON body.
+
+        Returns:
+            bool: Whether the response was a 2xx.
+        """
+        key = f"{method} {route}"
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            conn.request(method, path or route, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            status = str(response.status)
+        except OSError as e:
+            status = type(e).__name__
+        if status.startswith("2"):
+            self.latencies.setdefault(key, []).append((time.perf_counter() - start) * 1000)
+            return True
+        errors = self.errors.setdefault(key, {})
+        errors[status] = errors.get(status, 0) + 1
+        return False
+
+
+class Session:
+    """
+    The state of one simulated user.
+    """
+
+    def __init__(self, client: Client, meals: int):
+        self.client = client
+        self.meals = meals
+
+    def meal_by_id(self) -> None:
+        meal_id = self.client.random.randint(1, self.meals)
+        self.client.request("GET", "/api/get-meal-by-id/<id>", f"/api/get-meal-by-id/{meal_id}")
+
+    def meal_by_name(self) -> None:
+        name = quote(meal_name(self.client.random.randint(1, self.meals)))
+        self.client.request("GET", "/api/get-meal-by-name/<name>", f"/api/get-meal-by-name/{name}")
+
+    def battle(self) -> None:
+        first, second = self.client.random.sample(range(1, self.meals + 1), 2)
+        # The combatants live in worker memory, so battles from different clients take turns
+        with _arena:
+            self.client.request("POST", "/api/clear-combatants")
+            self.client.request("POST", "/api/prep-combatant", body={'meal': meal_name(first)})
+            self.client.request("POST", "/api/prep-combatant", body={'meal': meal_name(second)})
+            self.client.request("GET", "/api/battle")
+
+    def combatants(self) -> None:
+        self.client.request("GET", "/api/get-combatants")
+
+    def leaderboard(self) -> None:
+        sort = self.client.random.choice(["wins", "win_pct", "rating"])
+        self.client.request("GET", "/api/leaderboard", f"/api/leaderboard?sort={sort}")
+
+    def group_leaderboard(self) -> None:
+        group_by = self.client.random.choice(["cuisine", "difficulty"])
+        self.client.request("GET", "/api/group-leaderboard", f"/api/group-leaderboard?group_by={group_by}")
+
+    def matchmaking_metrics(self) -> None:
+        self.client.request("GET", "/api/matchmaking-metrics")
+
+
+# Operations and their relative weights
+MIX: List[Tuple[Callable[[Session], None], int]] = [
+    (Session.meal_by_id, 25),
+    (Session.meal_by_name, 15),
+    (Session.battle, 10),
+    (Session.combatants, 5),
+    (Session.leaderboard, 30),
+    (Session.group_leaderboard, 10),
+    (Session.matchmaking_metrics, 5),
+]
+
+# Shared by the client processes; set by init_client
+_arena = None
+
+
+def init_client(arena) -> None:
+    global _arena
+    _arena = arena
+
+
+def client_loop(args: tuple) -> tuple:
+    """
+    Runs operations from MIX until the deadline and returns (latencies, errors) by route.
+    """
+    index, meals, port, deadline, seed = args
+    client = Client(port, seed * 1000 + index)
+    session = Session(client, meals)
+    operations, weights = zip(*MIX)
+    while time.time() < deadline:
+        client.random.choices(operations, weights)[0](session)
+    return client.latencies, client.errors
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Returns the nearest-rank percentile of sorted values.
+    """
+    return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    summary: Dict[str, Any] = {'requests': len(latencies), 'errors': errors, 'throughput': round(len(latencies) / seconds, 2)}
+    if latencies:
+        summary.update({
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(latencies[-1], 3),
+        })
+    return summary
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    workdir = tempfile.mkdtemp(prefix="meal_max_load_suite_")
+    env = dict(
+        os.environ,
+        DB_PATH=os.path.join(workdir, "meal_max.db"),
+        SQL_CREATE_TABLE_PATH=os.path.join(root, "sql", "create_meal_table.sql"),
+        RANDOM_ORG_URL=f"http://127.0.0.1:{STUB_PORT}",
+        PORT=str(PORT),
+        PYTHONPATH=root,
+        LOG_LEVEL="WARNING",
+    )
+    subprocess.run([sys.executable, "-c", (
+        "from meal_max.models import kitchen_model\n"
+        "kitchen_model.clear_meals()\n"
+        f"for i in range(1, {args.meals + 1}):\n"
+        f"    kitchen_model.create_meal(f'Meal {{i}}', {CUISINES!r}[i % {len(CUISINES)}], 5.0 + i % 30, {DIFFICULTIES!r}[i % 3])\n"
+    )], env=env, cwd=root, check=True, stderr=subprocess.DEVNULL)
+
+    stub = start_stub(STUB_PORT, args.delay, args.seed)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "meal_max.utils.server", "app:app",
+         "--workers", str(args.workers), "--threads", str(args.threads)],
+        env=env, cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(PORT)
+        deadline = time.time() + args.seconds
+        with Pool(args.clients, initializer=init_client, initargs=(Lock(),)) as pool:
+            results = pool.map(client_loop, [
+                (index, args.meals, PORT, deadline, args.seed) for index in range(args.clients)
+            ])
+    finally:
+        process.terminate()
+        process.wait()
+        stub.shutdown()
+
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, Dict[str, int]] = {}
+    for client_latencies, client_errors in results:
+        for route, values in client_latencies.items():
+            latencies.setdefault(route, []).extend(values)
+        for route, statuses in client_errors.items():
+            route_errors = errors.setdefault(route, {})
+            for status, count in statuses.items():
+                route_errors[status] = route_errors.get(status, 0) + count
+
+    routes = {}
+    for route in sorted(set(latencies) | set(errors)):
+        routes[route] = summarize(latencies.get(route, []), sum(errors.get(route, {}).values()), args.seconds)
+        if route in errors:
+            routes[route]['error_statuses'] = errors[route]
+    return {
+        'service': 'meal_max',
+        'started_at': int(deadline - args.seconds),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'mix': {operation.__name__: weight for operation, weight in MIX},
+        'total': summarize([value for values in latencies.values() for value in values],
+                           sum(sum(statuses.values()) for statuses in errors.values()), args.seconds),
+        'routes': routes,
+    }
+
+
+def wait_until_up(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Prints a line per route, and the change in throughput and p95 from a baseline run if given.
+    """
+    rows = list(result['routes'].items()) + [("total", result['total'])]
+    width = max(len(route) for route, _ in rows)
+    print(f"{'route':<{width}}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'errors':>6}"
+          + ("  vs baseline" if baseline else ""))
+    for route, summary in rows:
+        line = (f"{route:<{width}}  {summary['throughput']:8.1f}  {summary.get('p50_ms', math.nan):8.2f}  "
+                f"{summary.get('p95_ms', math.nan):8.2f}  {summary.get('p99_ms', math.nan):8.2f}  {summary['errors']:6d}")
+        before = (baseline['total'] if route == "total" else baseline['routes'].get(route)) if baseline else None
+        if before and before.get('p95_ms') and summary.get('p95_ms'):
+            line += (f"  req/s {_change(summary['throughput'], before['throughput'])}"
+                     f"  p95 {_change(summary['p95_ms'], before['p95_ms'])}")
+        print(line)
+
+
+def _change(now: float, before: float) -> str:
+    return f"{(now - before) / before * 100:+6.1f}%" if before else "   n/a"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the meal_max service with a realistic request mix.")
+    parser.add_argument("--seconds", type=float, default=30, help="load duration")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client processes")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="threads per worker")
+    parser.add_argument("--meals", type=int, default=200, help="meals in the database")
+    parser.add_argument("--delay", type=float, default=0.05, help="random.org stub response delay in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the clients and the random.org stub")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with the results of an earlier run")
+    args = parser.parse_args()
+    if args.meals < 2:
+        parser.error("--meals must be at least 2 for battles")
+
+    result = run(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
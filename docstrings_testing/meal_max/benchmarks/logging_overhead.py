@@ -0,0 +1,132 @@
+"""
+Benchmarks the request latency cost of logging.
+
+Runs the same requests through the Flask test client twice: once with every logger set up the
+way configure_logger used to do it (DEBUG level, a synchronous stderr handler per logger) and
+once with the queue-based configuration.
+
+stderr is redirected either to a file or (the default) to a pipe drained by a log collector
+that stalls periodically, the way container log drivers do under load. With the synchronous
+handlers a request blocks whenever the pipe buffer is full; with the queue only the writer
+thread does.
+
+Usage:
+    python -m benchmarks.logging_overhead --requests 2000 --sink pipe
+"""
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# Reads 64 KiB at a time and pauses 250 ms after each read, about 256 KB/s with stalls
+STALLING_COLLECTOR = """
+import sys, time
+while sys.stdin.buffer.read1(65536):
+    time.sleep(0.25)
+"""
+
+
+def legacy_configure(logger: logging.Logger) -> None:
+    """
+    Reproduces the previous configure_logger: DEBUG level and a synchronous stderr handler.
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setLevel(logging.DEBUG)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+
+def run_requests(client, count: int) -> list:
+    """
+    Issues count meal lookups and leaderboard reads and returns each request's latency in ms.
+    """
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        if i % 2:
+            client.get('/api/get-meal-by-id/1')
+        else:
+            client.get('/api/leaderboard?sort=wins')
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(label: str, latencies: list) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{label:<8} mean {statistics.mean(latencies):.3f} ms  p50 {statistics.median(latencies):.3f} ms  "
+          f"p99 {p99:.3f} ms  max {latencies[-1]:.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark request latency with legacy and queue-based logging.")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per configuration")
+    parser.add_argument("--sink", choices=["pipe", "file"], default="pipe", help="where stderr goes")
+    parser.add_argument("--rounds", type=int, default=5, help="alternating rounds per configuration")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="meal_max_bench_")
+    os.environ["DB_PATH"] = os.path.join(workdir, "meal_max.db")
+    os.environ.setdefault("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql"))
+    os.environ.setdefault("LEADERBOARD_SNAPSHOT_SECONDS", "86400")
+
+    saved_stderr = os.dup(2)
+    collector = None
+    if args.sink == "pipe":
+        read_fd, write_fd = os.pipe()
+        collector = subprocess.Popen([sys.executable, "-c", STALLING_COLLECTOR], stdin=read_fd)
+        os.close(read_fd)
+        os.dup2(write_fd, 2)
+        os.close(write_fd)
+    else:
+        log_file = open(os.path.join(workdir, "stderr.log"), "w")
+        os.dup2(log_file.fileno(), 2)
+        log_file.close()
+
+    try:
+        import app as meal_max_app
+        from meal_max.models import kitchen_model
+        from meal_max.utils import logger as logger_utils
+
+        kitchen_model.clear_meals()
+        kitchen_model.create_meal("Meal 1", "Italian", 10.0, "MED")
+        client = meal_max_app.app.test_client()
+
+        loggers = [meal_max_app.app.logger] + [
+            logging.getLogger(name) for name in list(logging.root.manager.loggerDict) if name.startswith("meal_max")
+        ]
+        run_requests(client, 200)
+
+        # Alternate the configurations so drift on the machine affects both equally
+        legacy, queued = [], []
+        for _ in range(args.rounds):
+            for logger in loggers:
+                legacy_configure(logger)
+            legacy += run_requests(client, args.requests // args.rounds)
+
+            for logger in loggers:
+                for handler in list(logger.handlers):
+                    logger.removeHandler(handler)
+                logger_utils.configure_logger(logger)
+            queued += run_requests(client, args.requests // args.rounds)
+            logger_utils.stop_logging()
+    finally:
+        os.dup2(saved_stderr, 2)
+        if collector is not None:
+            collector.wait()
+
+    summarize("legacy", legacy)
+    summarize("queued", queued)
+    print(f"mean latency reduction: {1 - statistics.mean(queued) / statistics.mean(legacy):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Microbenchmarks of the meal_max models against a real SQLite file.
+
+For each scale, a scratch database is filled with that many synthetic meals and battle stats,
+drawn from a seeded generator so that every run sees the same data. Every BattleModel operation
+is then timed, battle and get_battle_score included, along with the leaderboards and meal lookups
+of kitchen_model. Operations that change the combatants are given the combatants they need before
+each call, outside the timed region. Battles are passed a seeded random number rather than
+calling random.org, and each one records its result in the database as in production.
+
+Each benchmark runs for at least --min-time seconds and is reported by its median time per call.
+--save-baseline stores the results; later runs compare each median with the baseline and exit
+with status 1 if any is slower by more than --threshold, so the suite can gate a CI job.
+Baselines are only comparable on the machine that recorded them.
+
+Usage:
+    python -m benchmarks.model_bench --scales 1000 10000 100000 1000000 --save-baseline
+    python -m benchmarks.model_bench --threshold 0.2
+"""
+import argparse
+from dataclasses import dataclass
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Slowdowns smaller than this are timer noise and never count as regressions
+NOISE_FLOOR_US = 5.0
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "model_bench.json")
+
+CUISINES = ["Italian", "Mexican", "American", "Japanese", "Indian", "French", "Thai", "Greek"]
+DIFFICULTIES = ["LOW", "MED", "HIGH"]
+
+
+@dataclass
+class Case:
+    """
+    A benchmarked call.
+
+    Attributes:
+        name (str): The benchmark name.
+        run (Callable[[], Any]): The timed call.
+        reset (Callable[[], None], optional): Restores the state before each call, untimed.
+        size (int, optional): The size the call works on, if not the scale.
+        setup (Callable[[], None], optional): Sets up the state once before the calls, untimed.
+    """
+    name: str
+    run: Callable[[], Any]
+    reset: Optional[Callable[[], None]] = None
+    size: Optional[int] = None
+    setup: Optional[Callable[[], None]] = None
+
+
+def fill_meals(db_path: str, meals: int, seed: int) -> None:
+    """
+    Inserts synthetic meals with battle stats directly in SQL, which is far faster than going
+    through create_meal and record_battle at these sizes.
+    """
+    generator = random.Random(seed)
+
+    def meal(i: int) -> tuple:
+        battles = generator.randrange(1, 200)
+        return (f"Meal {i}", generator.choice(CUISINES), round(generator.uniform(5, 50), 2), generator.choice(DIFFICULTIES),
+                battles, generator.randint(0, battles), round(generator.gauss(1500, 200), 1))
+
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins, rating) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (meal(i) for i in range(1, meals + 1))
+        )
+        conn.commit()
+
+
+def meal_cases(scale: int, seed: int) -> List[Case]:
+    """
+    Returns the benchmarks of one scale, on a database already filled with that many meals.
+    """
+    from meal_max.models import kitchen_model
+    from meal_max.models.battle_model import BattleModel
+
+    model = BattleModel()
+    first = kitchen_model.get_meal_by_id(1)
+    middle = kitchen_model.get_meal_by_id(scale // 2 + 1)
+    # Passed to battle so that it does not call random.org
+    random_number = random.Random(seed).random()
+
+    def two_combatants() -> None:
+        model.clear_combatants()
+        model.prep_combatant(first)
+        model.prep_combatant(middle)
+
+    return [
+        Case("BattleModel.battle", lambda: model.battle(random_number), two_combatants),
+        Case("BattleModel.get_battle_score", lambda: model.get_battle_score(middle)),
+        Case("BattleModel.prep_combatant", lambda: model.prep_combatant(middle), model.clear_combatants),
+        Case("BattleModel.get_combatants", model.get_combatants, setup=two_combatants),
+        Case("BattleModel.clear_combatants", model.clear_combatants, two_combatants),
+        Case("kitchen_model.get_leaderboard(wins)", lambda: kitchen_model.get_leaderboard("wins")),
+        Case("kitchen_model.get_leaderboard(win_pct)", lambda: kitchen_model.get_leaderboard("win_pct")),
+        Case("kitchen_model.get_leaderboard(rating)", lambda: kitchen_model.get_leaderboard("rating")),
+        Case("kitchen_model.get_group_leaderboard(cuisine)", lambda: kitchen_model.get_group_leaderboard("cuisine")),
+        Case("kitchen_model.get_meal_by_id", lambda: kitchen_model.get_meal_by_id(middle.id)),
+        Case("kitchen_model.get_meal_by_name", lambda: kitchen_model.get_meal_by_name(middle.meal)),
+    ]
+
+
+def time_case(case: Case, min_time: float, min_runs: int = 5) -> Dict[str, Any]:
+    """
+    Calls a benchmark until its calls add up to min_time, and returns the timings in microseconds.
+    Stops early, after min_runs calls, if untimed resets make the wall time exceed ten times that.
+    """
+    if case.setup is not None:
+        case.setup()
+    times = []
+    timed = 0.0
+    deadline = time.perf_counter() + 10 * min_time
+    while len(times) < min_runs or (timed < min_time and time.perf_counter() < deadline):
+        if case.reset is not None:
+            case.reset()
+        start = time.perf_counter()
+        case.run()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        timed += elapsed
+    times.sort()
+    return {
+        'runs': len(times),
+        'median_us': round(times[len(times) // 2] * 1e6, 3),
+        'min_us': round(times[0] * 1e6, 3),
+        'p95_us': round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1e6, 3),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Returns a line for each benchmark slower than its baseline by more than the threshold.
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        slowdown = result['median_us'] - before['median_us']
+        if slowdown > NOISE_FLOOR_US and slowdown > before['median_us'] * threshold:
+            regressions.append(f"{key}: {before['median_us']:.1f} us -> {result['median_us']:.1f} us "
+                               f"({slowdown / before['median_us'] * 100:+.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the meal_max models against a real SQLite file.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000, 1000000], help="meals in the database")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds of calls per benchmark")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic catalog")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="fractional slowdown that fails the run")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="meal_max_model_bench_")
+    os.environ["DB_PATH"] = os.path.join(workdir, "meal_max.db")
+    os.environ.setdefault("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # The slow-query log would run EXPLAIN for slow statements inside the timed calls
+    os.environ.setdefault("SLOW_QUERY_MS", "inf")
+
+    from meal_max.models import kitchen_model
+
+    results: Dict[str, Any] = {}
+    for scale in args.scales:
+        kitchen_model.clear_meals()
+        start = time.perf_counter()
+        fill_meals(os.environ["DB_PATH"], scale, args.seed)
+        print(f"Generated {scale} meals in {time.perf_counter() - start:.1f}s")
+        for case in meal_cases(scale, args.seed):
+            if args.filter not in case.name:
+                continue
+            result = dict(time_case(case, args.min_time), size=case.size or scale)
+            results[f"{case.name}@{scale}"] = result
+            print(f"  {case.name:<50} {result['size']:>8}  median {result['median_us']:12.1f} us  "
+                  f"min {result['min_us']:12.1f} us  runs {result['runs']}", flush=True)
+
+    report = {
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {'scales': args.scales, 'min_time': args.min_time, 'seed': args.seed},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        compared = len(set(results) & set(baseline))
+        if regressions:
+            print(f"{len(regressions)} of {compared} benchmarks regressed by more than {args.threshold:.0%}:")
+            print("\n".join(f"  {line}" for line in regressions))
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} in {compared} benchmarks compared with {args.baseline}")
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Measures the memory taken by the leaderboard's meals.
+
+A scratch database is filled with --meals synthetic meals that have battled, by model_bench's
+fill_meals, and the leaderboard is read once per representation: the slotted LeaderboardEntry
+built by the model's row factory, the same dataclass with a per-instance __dict__, and the dict
+per row the leaderboard used to return. tracemalloc measures the memory each list of meals holds
+once read, including its strings. Finally, serializing the meals to JSON is timed through each
+model's to_dict and through dataclasses.asdict, which Flask would otherwise use.
+
+Usage:
+    python -m benchmarks.model_memory --meals 1000000
+    python -m benchmarks.model_memory --meals 100000 --output memory.json
+"""
+import argparse
+from dataclasses import asdict, dataclass
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.model_bench import fill_meals
+
+
+# Meals serialized per timing of to_dict and asdict
+SERIALIZED_MEALS = 100000
+
+LEADERBOARD_QUERY = """
+    SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct, rating
+    FROM meals WHERE deleted = false AND battles > 0
+    ORDER BY wins DESC
+"""
+
+COLUMNS = ("id", "meal", "cuisine", "price", "difficulty", "battles", "wins", "win_pct", "rating")
+
+
+@dataclass
+class UnslottedLeaderboardEntry:
+    """
+    A leaderboard entry as it would be without slots, for comparison.
+    """
+    id: int
+    meal: str
+    cuisine: str
+    price: float
+    difficulty: str
+    battles: int
+    wins: int
+    win_pct: float
+    rating: float
+
+
+def read_leaderboard(row_factory: Callable[[Any, tuple], Any]) -> List[Any]:
+    from meal_max.utils.sql_utils import get_db_connection
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = row_factory
+        cursor.execute(LEADERBOARD_QUERY)
+        return cursor.fetchall()
+
+
+def rounded(row: tuple) -> tuple:
+    return row[:7] + (round(row[7] * 100, 1), round(row[8], 1))
+
+
+def traced_bytes(build: Callable[[], Any]) -> tuple:
+    """
+    Returns what build returns and the bytes it still holds once it has returned.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, held
+
+
+def measure(name: str, read: Callable[[], List[Any]]) -> Dict[str, Any]:
+    meals, held = traced_bytes(read)
+    result = {
+        'meals': len(meals),
+        'mb': round(held / 2**20, 1),
+        'bytes_per_meal': round(held / len(meals), 1),
+    }
+    print(f"  {name:<24} {result['mb']:10.1f} MB  {result['bytes_per_meal']:8.1f} B/meal", flush=True)
+    return result
+
+
+def time_serialization(name: str, meals: List[Any], to_dict: Callable[[Any], Dict[str, Any]]) -> float:
+    start = time.perf_counter()
+    for meal in meals:
+        to_dict(meal)
+    us = (time.perf_counter() - start) / len(meals) * 1e6
+    print(f"  {name:<24} {us:8.2f} us/meal", flush=True)
+    return round(us, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the memory held by leaderboard meals.")
+    parser.add_argument("--meals", type=int, default=1000000, help="meals in the catalog")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic meals")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="meal_max_model_memory_")
+    os.environ["DB_PATH"] = os.path.join(workdir, "meal_max.db")
+    os.environ.setdefault("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("SLOW_QUERY_MS", "inf")
+
+    from meal_max.models import kitchen_model
+
+    kitchen_model.clear_meals()
+    fill_meals(os.environ["DB_PATH"], args.meals, args.seed)
+
+    print(f"Memory held by a leaderboard of {args.meals} meals")
+    memory = {
+        'slotted': measure("slotted LeaderboardEntry", kitchen_model.get_leaderboard),
+        'unslotted': measure("unslotted dataclass", lambda: read_leaderboard(lambda _, row: UnslottedLeaderboardEntry(*rounded(row)))),
+        'dict': measure("dict per row", lambda: read_leaderboard(lambda _, row: dict(zip(COLUMNS, rounded(row))))),
+    }
+
+    print(f"Serialization of {SERIALIZED_MEALS} meals")
+    meals = kitchen_model.get_leaderboard()[:SERIALIZED_MEALS]
+    serialization = {
+        'to_dict_us': time_serialization("to_dict", meals, lambda meal: meal.to_dict()),
+        'asdict_us': time_serialization("dataclasses.asdict", meals, asdict),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+                'config': {'meals': args.meals, 'seed': args.seed},
+                'memory': memory,
+                'serialization': serialization,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
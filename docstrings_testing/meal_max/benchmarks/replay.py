@@ -0,0 +1,227 @@
+"""
+Replays traffic captured by meal_max.utils.capture against a running instance.
+
+The records of the given capture files, or of every capture file in the given directories, are
+merged in arrival order and grouped by session. Each session is an asyncio client that sends its
+requests one after another, so the order within a session is kept, while sessions run
+concurrently. With --speed 1 every request is sent at its captured offset from the first one,
+with --speed N the offsets are divided by N, and with --speed max each session sends its next
+request as soon as the previous one is answered. --connections caps the requests in flight.
+
+The report gives, for each route, the captured and replayed p50 and p95 latencies and their
+change, and counts the replayed requests whose status differs from the captured one, which
+usually means the target's data differs from production's. Captured latencies are measured in
+the server and replayed ones by the client, so replayed ones also include opening the connection
+and parsing the request, a millisecond or two on loopback. Results can be saved with --output.
+
+Usage:
+    python -m benchmarks.replay /var/capture --target http://127.0.0.1:5000 --speed 1
+    python -m benchmarks.replay /var/capture/requests-*.jsonl* --speed 10 --output replay.json
+    python -m benchmarks.replay /var/capture --speed max --connections 64
+"""
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import platform
+import time
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.load_suite import percentile
+
+
+# Seconds a replayed request may take before it counts as failed
+REQUEST_TIMEOUT = 30.0
+
+# A replayed request answered with status 0 was never answered
+NO_RESPONSE = 0
+
+
+def load_records(paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    Returns the records of capture files, and of the capture files in directories, in arrival
+    order. Lines that are not complete records, such as one cut off by a crash, are skipped.
+    """
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "requests-*.jsonl*"))) if os.path.isdir(path) else [path])
+    records, skipped = [], 0
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if not all(key in record for key in ('ts', 'session', 'method', 'route', 'path', 'status', 'ms')):
+                        raise ValueError(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                records.append(record)
+    if skipped:
+        print(f"Skipped {skipped} malformed lines")
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """
+    Reads a response up to the end of its body and returns its status. The body is read by its
+    Content-Length rather than to the end of the stream, since the server may close late.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(head.split(b" ", 2)[1])
+
+
+async def send(host: str, port: int, record: Dict[str, Any]) -> Tuple[int, float]:
+    """
+    Sends a captured request and returns the response status and the latency in milliseconds.
+    """
+    target = record['path'] + ("?" + record['query'] if record.get('query') else "")
+    body = record.get('body', "").encode("utf-8")
+    head = (f"{record['method']} {target} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n"
+            f"X-Session-Id: {record['session']}\r\n")
+    if body:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), REQUEST_TIMEOUT)
+        try:
+            writer.write(head.encode("latin-1") + b"\r\n" + body)
+            await writer.drain()
+            status = await asyncio.wait_for(read_response(reader), REQUEST_TIMEOUT)
+        finally:
+            writer.close()
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, IndexError, ValueError):
+        status = NO_RESPONSE
+    return status, (time.perf_counter() - start) * 1000
+
+
+async def replay_session(records: List[Dict[str, Any]], host: str, port: int, speed: float, start: float, first_ts: float,
+                         limit: asyncio.Semaphore, results: List[Tuple[Dict[str, Any], int, float]]) -> None:
+    loop = asyncio.get_running_loop()
+    for record in records:
+        if speed != math.inf:
+            delay = start + (record['ts'] - first_ts) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        async with limit:
+            status, ms = await send(host, port, record)
+        results.append((record, status, ms))
+
+
+async def replay(records: List[Dict[str, Any]], host: str, port: int, speed: float,
+                 connections: int) -> List[Tuple[Dict[str, Any], int, float]]:
+    """
+    Replays records in per-session order and returns (record, replayed status, replayed ms) for each.
+    """
+    sessions: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        sessions.setdefault(record['session'], []).append(record)
+    results: List[Tuple[Dict[str, Any], int, float]] = []
+    limit = asyncio.Semaphore(connections)
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(*(
+        replay_session(session, host, port, speed, start, records[0]['ts'], limit, results) for session in sessions.values()
+    ))
+    return results
+
+
+def summarize(captured: List[float], replayed: List[float], status_changes: int, failures: int) -> Dict[str, Any]:
+    captured, replayed = sorted(captured), sorted(replayed)
+    summary: Dict[str, Any] = {'requests': len(replayed), 'status_changes': status_changes, 'no_response': failures}
+    for name, values in (('captured', captured), ('replayed', replayed)):
+        summary[f'{name}_p50_ms'] = round(percentile(values, 50), 3)
+        summary[f'{name}_p95_ms'] = round(percentile(values, 95), 3)
+    return summary
+
+
+def report(results: List[Tuple[Dict[str, Any], int, float]]) -> Dict[str, Any]:
+    """
+    Groups replayed requests by method and route and compares their latencies with the capture.
+    """
+    groups: Dict[str, List[Tuple[Dict[str, Any], int, float]]] = {}
+    for result in results:
+        groups.setdefault(f"{result[0]['method']} {result[0]['route']}", []).append(result)
+
+    def group_summary(group: List[Tuple[Dict[str, Any], int, float]]) -> Dict[str, Any]:
+        return summarize([record['ms'] for record, _, _ in group], [ms for _, _, ms in group],
+                         sum(1 for record, status, _ in group if status not in (record['status'], NO_RESPONSE)),
+                         sum(1 for _, status, _ in group if status == NO_RESPONSE))
+
+    return {
+        'routes': {route: group_summary(groups[route]) for route in sorted(groups)},
+        'total': group_summary(results),
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    """
+    Prints a line per route with the captured and replayed latencies and the change in p95.
+    """
+    rows = list(result['routes'].items()) + [("total", result['total'])]
+    width = max(len(route) for route, _ in rows)
+    print(f"{'route':<{width}}  {'requests':>8}  {'p50 capt':>9}  {'p50 repl':>9}  {'p95 capt':>9}  {'p95 repl':>9}  "
+          f"{'p95 change':>10}  {'status !=':>9}  {'no resp':>7}")
+    for route, summary in rows:
+        change = ((summary['replayed_p95_ms'] - summary['captured_p95_ms']) / summary['captured_p95_ms'] * 100
+                  if summary['captured_p95_ms'] else math.nan)
+        print(f"{route:<{width}}  {summary['requests']:8d}  {summary['captured_p50_ms']:9.2f}  {summary['replayed_p50_ms']:9.2f}  "
+              f"{summary['captured_p95_ms']:9.2f}  {summary['replayed_p95_ms']:9.2f}  {change:+9.1f}%  "
+              f"{summary['status_changes']:9d}  {summary['no_response']:7d}")
+
+
+def speed_label(speed: float) -> str:
+    return "max" if speed == math.inf else f"{speed:g}x"
+
+
+def parse_speed(value: str) -> float:
+    speed = math.inf if value == "max" else float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or max")
+    return speed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay captured traffic against a running instance.")
+    parser.add_argument("captures", nargs="+", help="capture files, or directories of capture files")
+    parser.add_argument("--target", default="http://127.0.0.1:5000", help="base URL of the instance")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="time scale: 1, N, or max")
+    parser.add_argument("--connections", type=int, default=256, help="requests in flight at most")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    records = load_records(args.captures)
+    if not records:
+        parser.error("no captured requests found")
+    target = urlsplit(args.target)
+    captured_seconds = records[-1]['ts'] - records[0]['ts']
+    print(f"Replaying {len(records)} requests in {len({record['session'] for record in records})} sessions, "
+          f"captured over {captured_seconds:.1f}s, at {speed_label(args.speed)}", flush=True)
+
+    start = time.perf_counter()
+    results = asyncio.run(replay(records, target.hostname or "127.0.0.1", target.port or 80, args.speed, args.connections))
+    seconds = time.perf_counter() - start
+    result: Dict[str, Any] = dict(report(results), **{
+        'config': {'captures': args.captures, 'target': args.target, 'speed': speed_label(args.speed), 'connections': args.connections},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'captured_seconds': round(captured_seconds, 3),
+        'replayed_seconds': round(seconds, 3),
+    })
+    print_report(result)
+    print(f"Replayed in {seconds:.1f}s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmarks request throughput of the development server against the pre-forking server.
+
+Each configuration is started as a subprocess on a fresh database with a few meals, then
+loaded by concurrent client processes for a fixed time. The clients alternate between meal
+lookups and leaderboard reads, which do not depend on per-worker state, so results are
+comparable across worker counts.
+
+Usage:
+    python -m benchmarks.serving_throughput --seconds 10 --clients 16
+"""
+import argparse
+import http.client
+from multiprocessing import Pool
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+PORT = 5099
+
+
+def wait_until_up(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def client(args: tuple) -> tuple:
+    """
+    Issues requests until the deadline and returns (latencies in ms, error count).
+    """
+    port, deadline = args
+    latencies, errors, i = [], 0, 0
+    while time.time() < deadline:
+        path = "/api/get-meal-by-id/1" if i % 2 else "/api/leaderboard?sort=wins"
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status != 200:
+                errors += 1
+                continue
+        except OSError:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, errors
+
+
+def run_config(label: str, command: list, env: dict, seconds: float, clients: int) -> None:
+    # A new session so the development server's reloader child is stopped with it
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        wait_until_up(PORT)
+        deadline = time.time() + seconds
+        with Pool(clients) as pool:
+            results = pool.map(client, [(PORT, deadline)] * clients)
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    print(f"{label:<22} {len(latencies) / seconds:8.0f} req/s  p50 {statistics.median(latencies):6.2f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99)]:7.2f} ms  errors {errors}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare development server and pre-forking server throughput.")
+    parser.add_argument("--seconds", type=float, default=10, help="load duration per configuration")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client processes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="worker counts to compare")
+    parser.add_argument("--threads", type=int, default=8, help="threads per worker")
+    args = parser.parse_args()
+
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    workdir = tempfile.mkdtemp(prefix="meal_max_serving_")
+    env = dict(
+        os.environ,
+        DB_PATH=os.path.join(workdir, "meal_max.db"),
+        SQL_CREATE_TABLE_PATH=os.path.join(root, "sql", "create_meal_table.sql"),
+        PORT=str(PORT),
+        PYTHONPATH=root,
+        LEADERBOARD_SNAPSHOT_SECONDS="86400",
+    )
+    subprocess.run([sys.executable, "-c", (
+        "from meal_max.models import kitchen_model\n"
+        "kitchen_model.clear_meals()\n"
+        "for i in range(1, 21): kitchen_model.create_meal(f'Meal {i}', 'Italian', 10.0, 'MED')\n"
+    )], env=env, cwd=root, check=True, stderr=subprocess.DEVNULL)
+
+    app_path = os.path.join(root, "app.py")
+    run_config("debug server", [sys.executable, app_path], dict(env, FLASK_DEBUG="1"), args.seconds, args.clients)
+    for workers in args.workers:
+        run_config(
+            f"prefork {workers}x{args.threads}",
+            [sys.executable, "-m", "meal_max.utils.server", "app:app", "--workers", str(workers), "--threads", str(args.threads)],
+            env, args.seconds, args.clients
+        )
+
+
+if __name__ == "__main__":
+    main()
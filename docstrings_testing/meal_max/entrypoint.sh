@@ -13,5 +13,6 @@ else
     echo "Skipping database creation."
 fi
 
-# Start the Python application
-exec python app.py
+# Start the Python application on the pre-forking server, configured by WORKERS, THREADS,
+# GRACEFUL_TIMEOUT and PRELOAD_APP. Send SIGHUP to reload the workers.
+exec python -m meal_max.utils.server app:app
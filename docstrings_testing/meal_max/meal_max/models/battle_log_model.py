@@ -0,0 +1,181 @@
+import logging
+import os
+import sqlite3
+from typing import Optional, Tuple
+
+from meal_max.models.rating_model import elo_update
+from meal_max.utils.sql_utils import get_db_connection
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# A stat snapshot is taken after every this many battles
+BATTLE_SNAPSHOT_INTERVAL = int(os.getenv("BATTLE_SNAPSHOT_INTERVAL", "10000"))
+
+# Number of most recent stat snapshots kept
+SNAPSHOTS_KEPT = int(os.getenv("SNAPSHOTS_KEPT", "10"))
+
+
+def record_battle(winner_id: int, loser_id: int) -> Tuple[float, float]:
+    """
+    Records the result of a battle in one transaction.
+
+    The battle is appended to the battles log, both meals' battles and wins counters and
+    ratings are updated, and every BATTLE_SNAPSHOT_INTERVAL battles a stat snapshot is taken,
+    so the log, the snapshots and the counters never disagree. The write lock is taken before
+    the ratings are read, so concurrent battles between the same meals are applied one after
+    the other instead of overwriting each other's rating.
+
+    Args:
+        winner_id (int): The ID of the winning meal.
+        loser_id (int): The ID of the losing meal.
+
+    Returns:
+        Tuple[float, float]: The new winner and loser ratings.
+
+    Raises:
+        ValueError: If either meal is deleted or not found.
+        sqlite3.Error: For database-related errors.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT id, rating, deleted FROM meals WHERE id IN (?, ?)", (winner_id, loser_id))
+            meals = {row[0]: row for row in cursor.fetchall()}
+            for meal_id in (winner_id, loser_id):
+                if meal_id not in meals:
+                    logger.info("Meal with ID %s not found", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} not found")
+                if meals[meal_id][2]:
+                    logger.info("Meal with ID %s has been deleted", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
+
+            winner_rating, loser_rating = elo_update(meals[winner_id][1], meals[loser_id][1])
+
+            cursor.execute("INSERT INTO battles (winner_id, loser_id) VALUES (?, ?)", (winner_id, loser_id))
+            battle_id = cursor.lastrowid
+            cursor.executemany(
+                "UPDATE meals SET battles = battles + 1, wins = wins + ?, rating = ? WHERE id = ?",
+                [(1, winner_rating, winner_id), (0, loser_rating, loser_id)]
+            )
+            if battle_id % BATTLE_SNAPSHOT_INTERVAL == 0:
+                _write_snapshot(cursor, battle_id)
+            conn.commit()
+
+            logger.info("Recorded battle %s: meal %s beat meal %s", battle_id, winner_id, loser_id)
+            return winner_rating, loser_rating
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def take_snapshot() -> int:
+    """
+    Takes a stat snapshot of every meal as of the latest logged battle.
+
+    Returns:
+        int: The ID of the new snapshot.
+
+    Raises:
+        sqlite3.Error: For database-related errors.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM battles")
+            snapshot_id = _write_snapshot(cursor, cursor.fetchone()[0])
+            conn.commit()
+            return snapshot_id
+
+    except sqlite3.Error as e:
+        logger.error("Database error while taking stat snapshot: %s", str(e))
+        raise e
+
+
+def rebuild_stats(from_scratch: bool = False) -> Tuple[Optional[int], int]:
+    """
+    Rebuilds every meal's battles and wins counters from the latest stat snapshot plus the
+    battles logged after it.
+
+    The log tail is aggregated by SQLite in one pass per side (winners, then losers) over the
+    battles primary key, so memory use depends on the number of meals rather than the length
+    of the log. The rebuild runs in a single write transaction, so battles fought meanwhile
+    wait for it instead of being lost.
+
+    Args:
+        from_scratch (bool): If True, ignores the snapshots and replays the whole log.
+
+    Returns:
+        Tuple[Optional[int], int]: The ID of the snapshot the rebuild started from (None if it
+            started from zero) and the number of logged battles replayed on top of it.
+
+    Raises:
+        sqlite3.Error: For database-related errors.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+
+            snapshot_id, last_battle_id = None, 0
+            if not from_scratch:
+                cursor.execute("SELECT id, last_battle_id FROM stat_snapshots ORDER BY id DESC LIMIT 1")
+                row = cursor.fetchone()
+                if row:
+                    snapshot_id, last_battle_id = row
+
+            cursor.execute("SELECT id FROM meals")
+            stats = {meal_id: [0, 0] for meal_id, in cursor.fetchall()}
+
+            if snapshot_id is not None:
+                cursor.execute("SELECT meal_id, battles, wins FROM meal_stat_snapshots WHERE snapshot_id = ?", (snapshot_id,))
+                for meal_id, battles, wins in cursor.fetchall():
+                    stats[meal_id] = [battles, wins]
+
+            replayed = 0
+            cursor.execute("SELECT winner_id, COUNT(*) FROM battles WHERE id > ? GROUP BY winner_id", (last_battle_id,))
+            for meal_id, count in cursor.fetchall():
+                meal_stats = stats.setdefault(meal_id, [0, 0])
+                meal_stats[0] += count
+                meal_stats[1] += count
+                replayed += count
+            cursor.execute("SELECT loser_id, COUNT(*) FROM battles WHERE id > ? GROUP BY loser_id", (last_battle_id,))
+            for meal_id, count in cursor.fetchall():
+                stats.setdefault(meal_id, [0, 0])[0] += count
+
+            cursor.executemany(
+                "UPDATE meals SET battles = ?, wins = ? WHERE id = ?",
+                [(battles, wins, meal_id) for meal_id, (battles, wins) in stats.items()]
+            )
+            conn.commit()
+
+            logger.info("Rebuilt stats for %d meals from snapshot %s plus %d logged battles", len(stats), snapshot_id, replayed)
+            return snapshot_id, replayed
+
+    except sqlite3.Error as e:
+        logger.error("Database error while rebuilding stats: %s", str(e))
+        raise e
+
+
+def _write_snapshot(cursor: sqlite3.Cursor, last_battle_id: int) -> int:
+    """
+    Copies every meal's counters into a new snapshot using the caller's cursor and drops all
+    but the SNAPSHOTS_KEPT most recent snapshots.
+    """
+    cursor.execute("INSERT INTO stat_snapshots (last_battle_id) VALUES (?)", (last_battle_id,))
+    snapshot_id = cursor.lastrowid
+    cursor.execute("""
+        INSERT INTO meal_stat_snapshots (snapshot_id, meal_id, battles, wins)
+        SELECT ?, id, battles, wins FROM meals
+    """, (snapshot_id,))
+    cursor.execute("DELETE FROM meal_stat_snapshots WHERE snapshot_id <= ?", (snapshot_id - SNAPSHOTS_KEPT,))
+    cursor.execute("DELETE FROM stat_snapshots WHERE id <= ?", (snapshot_id - SNAPSHOTS_KEPT,))
+
+    logger.info("Took stat snapshot %s as of battle %s", snapshot_id, last_battle_id)
+    return snapshot_id
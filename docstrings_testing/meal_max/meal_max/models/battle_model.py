@@ -1,7 +1,8 @@
 import logging
-from typing import List
+from typing import List, Optional
 
-from meal_max.models.kitchen_model import Meal, update_meal_stats
+from meal_max.models.battle_log_model import record_battle
+from meal_max.models.kitchen_model import Meal
 from meal_max.utils.logger import configure_logger
 from meal_max.utils.random_utils import get_random
 
@@ -25,13 +26,18 @@ class BattleModel:
         """
         self.combatants: List[Meal] = []
 
-    def battle(self) -> str:
+    def battle(self, random_number: Optional[float] = None) -> str:
         """
         Initiates a battle between two combatants, calculates their battle scores, and determines the winner.
 
         The battle involves calculating scores for both combatants, comparing the scores with a random number,
         and determining the winner based on the difference between the scores and the random number.
-        The battle results are logged, and the winner's stats are updated.
+        The battle results are logged, and the battle is recorded in the battle history along with
+        both meals' updated stats and ratings.
+
+        Args:
+            random_number (float, optional): The random number to decide the battle with, for callers
+                that fetched it from random.org themselves. Defaults to fetching one.
 
         Returns:
             str: The name of the winning meal.
@@ -67,7 +73,8 @@ class BattleModel:
         logger.info("Delta between scores: %.3f", delta)
 
         # Get random number from random.org
-        random_number = get_random()
+        if random_number is None:
+            random_number = get_random()
 
         # Log the random number
         logger.info("Random number from random.org: %.3f", random_number)
@@ -83,9 +90,8 @@ class BattleModel:
         # Log the winner
         logger.info("The winner is: %s", winner.meal)
 
-        # Update stats for both combatants
-        update_meal_stats(winner.id, 'win')
-        update_meal_stats(loser.id, 'loss')
+        # Record the battle and update stats for both combatants
+        record_battle(winner.id, loser.id)
 
         # Remove the losing combatant from combatants
         self.combatants.remove(loser)
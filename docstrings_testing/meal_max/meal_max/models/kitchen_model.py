@@ -2,7 +2,7 @@ from dataclasses import dataclass
 import logging
 import os
 import sqlite3
-from typing import Any
+from typing import Any, Optional
 
 from meal_max.utils.sql_utils import get_db_connection
 from meal_max.utils.logger import configure_logger
@@ -17,6 +17,8 @@ class Meal:
     """
     Represents a meal with specific properties including its name, cuisine, price, and difficulty.
     """
+    # Slots instead of a per-instance __dict__, since the leaderboard holds a meal per row
+    __slots__ = ("id", "meal", "cuisine", "price", "difficulty")
 
     id: int
     meal: str
@@ -37,6 +39,57 @@ class Meal:
         if self.difficulty not in ['LOW', 'MED', 'HIGH']:
             raise ValueError("Difficulty must be 'LOW', 'MED', or 'HIGH'.")
 
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the meal's fields as a dict, which is how it is serialized to JSON.
+        """
+        return {name: getattr(self, name) for name in Meal.__slots__}
+
+
+@dataclass
+class LeaderboardEntry:
+    """
+    A meal as listed on the leaderboard, with its battle statistics.
+
+    Unlike Meal, its fields are not validated: it lists meals as they are stored, and a row the
+    schema allows, such as one without a difficulty, must not fail the whole leaderboard.
+    """
+    __slots__ = ("id", "meal", "cuisine", "price", "difficulty", "battles", "wins", "win_pct", "rating")
+
+    id: int
+    meal: str
+    cuisine: str
+    price: float
+    difficulty: Optional[str]
+    battles: int
+    wins: int
+    win_pct: Optional[float]  # as a percentage
+    rating: Optional[float]
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the entry's fields as a dict, which is how it is serialized to JSON.
+        """
+        return {name: getattr(self, name) for name in LeaderboardEntry.__slots__}
+
+
+def meal_row_factory(cursor: sqlite3.Cursor, row: tuple) -> Meal:
+    """
+    Builds a Meal from a row starting with id, meal, cuisine, price and difficulty. Set as a
+    cursor's row_factory, the cursor returns Meals instead of tuples.
+    """
+    return Meal(*row[:5])
+
+
+def leaderboard_row_factory(cursor: sqlite3.Cursor, row: tuple) -> LeaderboardEntry:
+    """
+    Builds a LeaderboardEntry from a row of the Meal columns followed by battles, wins, the win
+    fraction and rating, rounding the win percentage and rating to one decimal place.
+    """
+    win_fraction, rating = row[7], row[8]
+    return LeaderboardEntry(*row[:7], None if win_fraction is None else round(win_fraction * 100, 1),
+                            None if rating is None else round(rating, 1))
+
 
 def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
     """
@@ -131,15 +184,15 @@ def delete_meal(meal_id: int) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+def get_leaderboard(sort_by: str="wins") -> list[LeaderboardEntry]:
     """
-    Retrieves the leaderboard of meals based on win statistics.
+    Retrieves the leaderboard of meals based on win statistics or rating.
 
     Args:
-        sort_by (str): The criteria to sort by, either "wins" or "win_pct".
+        sort_by (str): The criteria to sort by, either "wins", "win_pct" or "rating".
 
     Returns:
-        dict[str, Any]: A list of dictionaries containing meal information and win statistics.
+        list[LeaderboardEntry]: The meals that have battled, with their win statistics.
 
     Raises:
         ValueError: If sort_by parameter is invalid.
@@ -147,7 +200,7 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
     """
 
     query = """
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct, rating
         FROM meals WHERE deleted = false AND battles > 0
     """
 
@@ -155,6 +208,61 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
         query += " ORDER BY win_pct DESC"
     elif sort_by == "wins":
         query += " ORDER BY wins DESC"
+    elif sort_by == "rating":
+        query += " ORDER BY rating DESC"
+    else:
+        logger.error("Invalid sort_by parameter: %s", sort_by)
+        raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = leaderboard_row_factory
+            cursor.execute(query)
+            leaderboard = cursor.fetchall()
+
+        logger.info("Leaderboard retrieved successfully")
+        return leaderboard
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def get_group_leaderboard(group_by: str, sort_by: str="wins") -> list[dict[str, Any]]:
+    """
+    Retrieves the leaderboard of cuisines or difficulty levels based on the combined statistics
+    of their meals.
+
+    The totals are read from summary tables that triggers on the meals table keep current, so
+    this reads one row per group however many meals or battles there are.
+
+    Args:
+        group_by (str): The field to group meals by, either "cuisine" or "difficulty".
+        sort_by (str): The criteria to sort by, either "wins", "win_pct" or "rating".
+
+    Returns:
+        list[dict[str, Any]]: A list of dictionaries containing each group's meal count, win
+            statistics and average rating.
+
+    Raises:
+        ValueError: If group_by or sort_by parameter is invalid.
+        sqlite3.Error: For database errors during query execution.
+    """
+    if group_by not in ("cuisine", "difficulty"):
+        logger.error("Invalid group_by parameter: %s", group_by)
+        raise ValueError("Invalid group_by parameter: %s" % group_by)
+
+    query = f"""
+        SELECT {group_by}, meals, battles, wins, (wins * 1.0 / battles) AS win_pct, (rating_total / meals) AS rating
+        FROM {group_by}_stats WHERE meals > 0 AND battles > 0
+    """
+
+    if sort_by == "win_pct":
+        query += " ORDER BY win_pct DESC"
+    elif sort_by == "wins":
+        query += " ORDER BY wins DESC"
+    elif sort_by == "rating":
+        query += " ORDER BY rating DESC"
     else:
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
@@ -165,21 +273,19 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
             cursor.execute(query)
             rows = cursor.fetchall()
 
-        leaderboard = []
-        for row in rows:
-            meal = {
-                'id': row[0],
-                'meal': row[1],
-                'cuisine': row[2],
-                'price': row[3],
-                'difficulty': row[4],
-                'battles': row[5],
-                'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
+        leaderboard = [
+            {
+                group_by: row[0],
+                'meals': row[1],
+                'battles': row[2],
+                'wins': row[3],
+                'win_pct': round(row[4] * 100, 1),  # Convert to percentage
+                'rating': round(row[5], 1)
             }
-            leaderboard.append(meal)
+            for row in rows
+        ]
 
-        logger.info("Leaderboard retrieved successfully")
+        logger.info("Leaderboard by %s retrieved successfully", group_by)
         return leaderboard
 
     except sqlite3.Error as e:
@@ -211,7 +317,7 @@ def get_meal_by_id(meal_id: int) -> Meal:
                 if row[5]:
                     logger.info("Meal with ID %s has been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                return meal_row_factory(cursor, row)
             else:
                 logger.info("Meal with ID %s not found", meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
@@ -245,7 +351,7 @@ def get_meal_by_name(meal_name: str) -> Meal:
                 if row[5]:
                     logger.info("Meal with name %s has been deleted", meal_name)
                     raise ValueError(f"Meal with name {meal_name} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                return meal_row_factory(cursor, row)
             else:
                 logger.info("Meal with name %s not found", meal_name)
                 raise ValueError(f"Meal with name {meal_name} not found")
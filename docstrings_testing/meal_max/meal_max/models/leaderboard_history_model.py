@@ -0,0 +1,241 @@
+from datetime import datetime, timezone
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from meal_max.models.kitchen_model import LeaderboardEntry
+from meal_max.utils.sql_utils import get_db_connection
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Seconds between leaderboard snapshots taken by the background thread
+LEADERBOARD_SNAPSHOT_SECONDS = float(os.getenv("LEADERBOARD_SNAPSHOT_SECONDS", "3600"))
+
+# A full snapshot is taken after at most this many delta snapshots
+LEADERBOARD_KEYFRAME_INTERVAL = int(os.getenv("LEADERBOARD_KEYFRAME_INTERVAL", "24"))
+
+# (battles, wins, rating, deleted) per meal ID
+MealState = Dict[int, Tuple[int, int, float, bool]]
+
+
+def take_leaderboard_snapshot(taken_at: Optional[int] = None) -> int:
+    """
+    Records the current stats of every meal as a leaderboard snapshot.
+
+    Only the meals whose stats changed since the previous snapshot are stored. A full snapshot
+    is stored instead when there is no previous one, after LEADERBOARD_KEYFRAME_INTERVAL delta
+    snapshots, or once the deltas since the last full snapshot hold as many rows as a full
+    snapshot would. Reconstructing any point in time therefore reads at most about twice the
+    rows of one full snapshot.
+
+    Args:
+        taken_at (int, optional): The unix timestamp to record the snapshot at. Defaults to now.
+
+    Returns:
+        int: The ID of the new snapshot.
+
+    Raises:
+        sqlite3.Error: For database-related errors.
+    """
+    if taken_at is None:
+        taken_at = int(time.time())
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT id, battles, wins, rating, deleted FROM meals")
+            current = {row[0]: (row[1], row[2], row[3], bool(row[4])) for row in cursor.fetchall()}
+
+            cursor.execute("SELECT MAX(id) FROM leaderboard_snapshots WHERE is_full = TRUE")
+            keyframe_id = cursor.fetchone()[0]
+            is_full = keyframe_id is None
+            if not is_full:
+                cursor.execute(
+                    "SELECT MAX(id), COUNT(*), SUM(row_count) FROM leaderboard_snapshots WHERE id > ?", (keyframe_id,)
+                )
+                previous_id, deltas, delta_rows = cursor.fetchone()
+                is_full = deltas >= LEADERBOARD_KEYFRAME_INTERVAL or (delta_rows or 0) >= len(current)
+
+            if is_full:
+                rows = current
+            else:
+                previous = _load_state(cursor, keyframe_id, previous_id or keyframe_id)
+                rows = {meal_id: state for meal_id, state in current.items() if previous.get(meal_id) != state}
+
+            cursor.execute(
+                "INSERT INTO leaderboard_snapshots (taken_at, is_full, row_count) VALUES (?, ?, ?)",
+                (taken_at, is_full, len(rows))
+            )
+            snapshot_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO leaderboard_snapshot_rows (snapshot_id, meal_id, battles, wins, rating, deleted) VALUES (?, ?, ?, ?, ?, ?)",
+                [(snapshot_id, meal_id, *state) for meal_id, state in rows.items()]
+            )
+            conn.commit()
+
+            logger.info("Took %s leaderboard snapshot %s with %d rows", "full" if is_full else "delta", snapshot_id, len(rows))
+            return snapshot_id
+
+    except sqlite3.Error as e:
+        logger.error("Database error while taking leaderboard snapshot: %s", str(e))
+        raise e
+
+
+def parse_as_of(value: str) -> int:
+    """
+    Parses a point in time given as a unix timestamp or an ISO 8601 date or date/time.
+
+    A trailing Z is read as UTC, which datetime.fromisoformat only accepts from Python 3.11, and a
+    date/time without an offset is taken as UTC rather than the server's local time.
+
+    Args:
+        value (str): The unix timestamp or ISO 8601 date/time.
+
+    Returns:
+        int: The unix timestamp.
+
+    Raises:
+        ValueError: If value is neither a unix timestamp nor an ISO 8601 date/time.
+    """
+    if value.isdigit():
+        return int(value)
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def get_leaderboard_as_of(as_of: int, sort_by: str = "wins") -> list[LeaderboardEntry]:
+    """
+    Reconstructs the leaderboard as of the latest snapshot taken at or before a point in time.
+
+    The nearest full snapshot is loaded and the delta snapshots after it are applied in memory,
+    oldest first.
+
+    Args:
+        as_of (int): The unix timestamp to reconstruct the leaderboard at.
+        sort_by (str): The criteria to sort by, either "wins", "win_pct" or "rating".
+
+    Returns:
+        list[LeaderboardEntry]: The meals that had battled, with their win statistics, as
+            returned by kitchen_model.get_leaderboard.
+
+    Raises:
+        ValueError: If sort_by is invalid or no snapshot was taken at or before as_of.
+        sqlite3.Error: For database errors during query execution.
+    """
+    sort_keys = {
+        "wins": lambda meal: meal.wins,
+        "win_pct": lambda meal: meal.win_pct,
+        "rating": lambda meal: meal.rating,
+    }
+    if sort_by not in sort_keys:
+        logger.error("Invalid sort_by parameter: %s", sort_by)
+        raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(id) FROM leaderboard_snapshots WHERE taken_at <= ?", (as_of,))
+            snapshot_id = cursor.fetchone()[0]
+            if snapshot_id is None:
+                logger.info("No leaderboard snapshot at or before %s", as_of)
+                raise ValueError(f"No leaderboard snapshot at or before {as_of}")
+
+            cursor.execute("SELECT MAX(id) FROM leaderboard_snapshots WHERE is_full = TRUE AND id <= ?", (snapshot_id,))
+            keyframe_id = cursor.fetchone()[0]
+            state = _load_state(cursor, keyframe_id, snapshot_id)
+
+            cursor.execute("SELECT id, meal, cuisine, price, difficulty FROM meals")
+            meals = {row[0]: row for row in cursor.fetchall()}
+
+        leaderboard = []
+        for meal_id, (battles, wins, rating, deleted) in state.items():
+            if deleted or battles == 0 or meal_id not in meals:
+                continue
+            leaderboard.append(LeaderboardEntry(*meals[meal_id], battles, wins,
+                                                round(wins * 100 / battles, 1),  # Convert to percentage
+                                                round(rating, 1)))
+        leaderboard.sort(key=sort_keys[sort_by], reverse=True)
+
+        logger.info("Leaderboard as of %s reconstructed from snapshots %s to %s", as_of, keyframe_id, snapshot_id)
+        return leaderboard
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def _load_state(cursor: sqlite3.Cursor, keyframe_id: int, snapshot_id: int) -> MealState:
+    """
+    Returns the meal stats as of a snapshot by applying the snapshots from a full snapshot up
+    to it in order, using the caller's cursor.
+    """
+    cursor.execute("""
+        SELECT meal_id, battles, wins, rating, deleted FROM leaderboard_snapshot_rows
+        WHERE snapshot_id BETWEEN ? AND ?
+        ORDER BY snapshot_id
+    """, (keyframe_id, snapshot_id))
+    return {row[0]: (row[1], row[2], row[3], bool(row[4])) for row in cursor.fetchall()}
+
+
+class LeaderboardSnapshotter:
+    """
+    A class to take leaderboard snapshots periodically on a background thread.
+    """
+
+    def __init__(self):
+        """
+        Initializes the LeaderboardSnapshotter without starting it.
+        """
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, interval: float = LEADERBOARD_SNAPSHOT_SECONDS) -> None:
+        """
+        Starts the background thread that takes leaderboard snapshots.
+
+        Args:
+            interval (float): Seconds between snapshots.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._snapshot_loop, args=(interval,), name="leaderboard-snapshots", daemon=True)
+        self._thread.start()
+        logger.info("Started leaderboard snapshots every %.0f seconds", interval)
+
+    def stop(self) -> None:
+        """
+        Stops the background snapshot thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _snapshot_loop(self, interval: float) -> None:
+        """
+        Takes a leaderboard snapshot right away, so the leaderboard can be looked up as of any
+        time after startup, then every interval seconds until stopped.
+        """
+        while True:
+            try:
+                take_leaderboard_snapshot()
+            except Exception as e:
+                logger.error("Error taking leaderboard snapshot: %s", str(e))
+            if self._stop.wait(interval):
+                return
+
+
+leaderboard_snapshotter = LeaderboardSnapshotter()
@@ -0,0 +1,372 @@
+from bisect import bisect_left, insort
+from collections import deque
+from dataclasses import dataclass, field
+import heapq
+import logging
+import os
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.rating_model import get_rating
+from meal_max.utils.logger import SampledLogger, configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Errors raised on every pass of the matchmaking loop
+loop_error_logger = SampledLogger(logger)
+
+
+# Largest rating gap two freshly queued meals may be paired across
+MATCH_RATING_GAP = float(os.getenv("MATCH_RATING_GAP", "100"))
+
+# Rating points the allowed gap widens by for every second a meal has waited
+MATCH_GAP_GROWTH = float(os.getenv("MATCH_GAP_GROWTH", "10"))
+
+# Seconds the matchmaking loop sleeps when no pair can be made
+MATCHMAKING_INTERVAL = float(os.getenv("MATCHMAKING_INTERVAL", "1"))
+
+# Number of recent matches (and their wait times) kept for the metrics
+RECENT_MATCHES_KEPT = 1000
+
+
+@dataclass
+class QueueEntry:
+    """
+    Represents a meal waiting in the matchmaking queue.
+    """
+
+    meal: Meal
+    rating: float
+    requeue: bool = False
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class MatchmakingQueue:
+    """
+    A class to pair queued meals with the closest rated meal in the queue.
+
+    Entries are kept in a list sorted by (rating, meal_id), found with a binary search, and
+    only entries next to each other in that order are paired. The rating gap a pair accepts
+    widens by gap_growth for every second its older entry has waited, so a pair can be matched
+    once gap - gap_growth * (now - enqueued_at) <= rating_gap, that is once
+    gap + gap_growth * enqueued_at <= rating_gap + gap_growth * now. The left side does not
+    change while the pair waits, so adjacent pairs are kept in a heap by it and the pair that
+    became matchable first is popped in O(log n). Pairs that are no longer adjacent are
+    discarded when they reach the top of the heap. Every entry is eventually paired once anyone
+    else is queued.
+
+    Attributes:
+        entries (Dict[int, QueueEntry]): The queued entries by meal ID, oldest first.
+    """
+
+    def __init__(self, rating_gap: float = MATCH_RATING_GAP, gap_growth: float = MATCH_GAP_GROWTH):
+        """
+        Initializes the MatchmakingQueue with no entries.
+
+        Args:
+            rating_gap (float): The largest rating gap accepted on entry.
+            gap_growth (float): Rating points the accepted gap widens by per second waited.
+        """
+        self.rating_gap = rating_gap
+        self.gap_growth = gap_growth
+        self.entries: Dict[int, QueueEntry] = {}
+        self._ranked: List[Tuple[float, int]] = []  # (rating, meal_id), ascending
+        self._pairs: List[Tuple[float, int, int]] = []  # heap of (match key, lower meal_id, higher meal_id)
+        self._lock = threading.Lock()
+
+    def enqueue(self, meal: Meal, rating: float, requeue: bool = False) -> QueueEntry:
+        """
+        Adds a meal to the queue.
+
+        Args:
+            meal (Meal): The meal to queue.
+            rating (float): The meal's rating.
+            requeue (bool): If True, the meal rejoins the queue after each of its battles.
+
+        Returns:
+            QueueEntry: The new entry.
+
+        Raises:
+            ValueError: If the meal is already queued.
+        """
+        with self._lock:
+            if meal.id in self.entries:
+                logger.info("Meal %s is already queued", meal.meal)
+                raise ValueError(f"Meal '{meal.meal}' is already queued")
+            entry = QueueEntry(meal=meal, rating=rating, requeue=requeue)
+            self.entries[meal.id] = entry
+            insort(self._ranked, (rating, meal.id))
+            position = bisect_left(self._ranked, (rating, meal.id))
+            self._push_pair(position - 1)
+            self._push_pair(position)
+
+        logger.info("Queued meal %s with rating %.1f", meal.meal, rating)
+        return entry
+
+    def dequeue(self, meal_id: int) -> QueueEntry:
+        """
+        Removes a meal from the queue.
+
+        Args:
+            meal_id (int): The ID of the meal to remove.
+
+        Returns:
+            QueueEntry: The removed entry.
+
+        Raises:
+            ValueError: If the meal is not queued.
+        """
+        with self._lock:
+            entry = self.entries.get(meal_id)
+            if entry is None:
+                logger.info("Meal with ID %s is not queued", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} is not queued")
+            self._remove(entry)
+
+        logger.info("Removed meal %s from the queue", entry.meal.meal)
+        return entry
+
+    def pop_match(self, now: Optional[float] = None) -> Optional[Tuple[QueueEntry, QueueEntry]]:
+        """
+        Removes and returns the pair of neighboring entries that became matchable first.
+
+        Args:
+            now (float, optional): The monotonic time to compute waits at. Defaults to now.
+
+        Returns:
+            Optional[Tuple[QueueEntry, QueueEntry]]: The older entry and its opponent, or None if
+                no pair is within its accepted rating gap.
+        """
+        if now is None:
+            now = time.monotonic()
+        threshold = self.rating_gap + self.gap_growth * now
+
+        with self._lock:
+            while self._pairs:
+                key, lower_id, upper_id = self._pairs[0]
+                if not self._is_current_pair(key, lower_id, upper_id):
+                    heapq.heappop(self._pairs)
+                    continue
+                if key > threshold:
+                    return None
+                heapq.heappop(self._pairs)
+                entry, opponent = sorted((self.entries[lower_id], self.entries[upper_id]), key=lambda queued: queued.enqueued_at)
+                self._remove(entry)
+                self._remove(opponent)
+                return entry, opponent
+        return None
+
+    def depth(self) -> int:
+        """
+        Returns the number of queued meals.
+        """
+        return len(self.entries)
+
+    def oldest_wait(self, now: Optional[float] = None) -> float:
+        """
+        Returns how long in seconds the oldest queued meal has waited, or 0 if the queue is empty.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            oldest = next(iter(self.entries.values()), None)
+        return now - oldest.enqueued_at if oldest is not None else 0.0
+
+    def _match_key(self, lower: QueueEntry, upper: QueueEntry) -> float:
+        return upper.rating - lower.rating + self.gap_growth * min(lower.enqueued_at, upper.enqueued_at)
+
+    def _push_pair(self, position: int) -> None:
+        """
+        Adds the pair of entries at position and position + 1 of the rating index to the heap.
+        Must hold _lock.
+        """
+        if position < 0 or position + 1 >= len(self._ranked):
+            return
+        lower, upper = self.entries[self._ranked[position][1]], self.entries[self._ranked[position + 1][1]]
+        heapq.heappush(self._pairs, (self._match_key(lower, upper), lower.meal.id, upper.meal.id))
+        # Rebuild once discarded pairs outnumber the current ones, so the heap stays O(n)
+        if len(self._pairs) > 2 * len(self._ranked) + 16:
+            self._pairs = [
+                (self._match_key(self.entries[lower_id], self.entries[upper_id]), lower_id, upper_id)
+                for (_, lower_id), (_, upper_id) in zip(self._ranked, self._ranked[1:])
+            ]
+            heapq.heapify(self._pairs)
+
+    def _is_current_pair(self, key: float, lower_id: int, upper_id: int) -> bool:
+        """
+        Returns whether a pair from the heap is still two neighboring entries, queued when it was
+        pushed. Must hold _lock.
+        """
+        lower, upper = self.entries.get(lower_id), self.entries.get(upper_id)
+        if lower is None or upper is None or self._match_key(lower, upper) != key:
+            return False
+        position = bisect_left(self._ranked, (lower.rating, lower_id))
+        return position + 1 < len(self._ranked) and self._ranked[position + 1][1] == upper_id
+
+    def _remove(self, entry: QueueEntry) -> None:
+        """
+        Removes an entry from the queue and the rating index. Must hold _lock.
+        """
+        del self.entries[entry.meal.id]
+        position = bisect_left(self._ranked, (entry.rating, entry.meal.id))
+        del self._ranked[position]
+        # Its neighbors are now next to each other
+        self._push_pair(position - 1)
+
+
+class MatchmakingService:
+    """
+    A class to run battles between matched meals continuously on a background thread.
+
+    Attributes:
+        queue (MatchmakingQueue): The queue meals wait in.
+        recent_matches (Deque[dict]): The results of the most recent matches, newest last.
+    """
+
+    def __init__(self, queue: Optional[MatchmakingQueue] = None):
+        """
+        Initializes the MatchmakingService with an empty queue and no match history.
+
+        Args:
+            queue (MatchmakingQueue, optional): The queue to match from. Defaults to a new queue.
+        """
+        self.queue = queue if queue is not None else MatchmakingQueue()
+        self.recent_matches: Deque[dict] = deque(maxlen=RECENT_MATCHES_KEPT)
+        self.matches_played = 0
+        self.matches_failed = 0
+        self._waits: Deque[float] = deque(maxlen=RECENT_MATCHES_KEPT)
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, meal: Meal, requeue: bool = False) -> QueueEntry:
+        """
+        Adds a meal to the queue at its current rating and wakes the matchmaking loop.
+
+        Args:
+            meal (Meal): The meal to queue.
+            requeue (bool): If True, the meal rejoins the queue after each of its battles.
+
+        Returns:
+            QueueEntry: The new entry.
+
+        Raises:
+            ValueError: If the meal is already queued, deleted or not found.
+        """
+        entry = self.queue.enqueue(meal, get_rating(meal.id), requeue)
+        self._wake.set()
+        return entry
+
+    def run_once(self) -> Optional[dict]:
+        """
+        Pairs the next matchable entries and battles them. Meals queued with requeue rejoin the
+        queue after a battle, unless the battle failed: a meal that cannot battle, such as one
+        deleted while queued, would otherwise fail again on every pass.
+
+        Returns:
+            Optional[dict]: The match result, with no winner if the battle failed, or None if no
+                pair could be made.
+        """
+        match = self.queue.pop_match()
+        if match is None:
+            return None
+
+        now = time.monotonic()
+        entries = list(match)
+        self._waits.extend(now - entry.enqueued_at for entry in entries)
+
+        battle_model = BattleModel()
+        for entry in entries:
+            battle_model.prep_combatant(entry.meal)
+
+        try:
+            winner = battle_model.battle()
+        except Exception as e:
+            self.matches_failed += 1
+            loop_error_logger.log(logging.ERROR, "Battle between %s and %s failed, dropping both from the queue: %s",
+                                  entries[0].meal.meal, entries[1].meal.meal, str(e))
+            winner = None
+
+        result = {
+            'combatants': [entry.meal.meal for entry in entries],
+            'winner': winner,
+            'waited': [round(now - entry.enqueued_at, 3) for entry in entries],
+        }
+        if winner is None:
+            return result
+        self.matches_played += 1
+        self.recent_matches.append(result)
+
+        for entry in entries:
+            if entry.requeue:
+                try:
+                    self.enqueue(entry.meal, requeue=True)
+                except ValueError as e:
+                    logger.info("Could not requeue meal %s: %s", entry.meal.meal, str(e))
+        return result
+
+    def get_metrics(self) -> dict[str, Any]:
+        """
+        Returns the queue depth and wait time metrics.
+
+        Returns:
+            dict[str, Any]: The queue depth, the oldest entry's wait, match counts, and the mean,
+                median and 95th percentile wait of recently matched meals, in seconds.
+        """
+        waits = sorted(self._waits)
+        return {
+            'queue_depth': self.queue.depth(),
+            'oldest_wait': round(self.queue.oldest_wait(), 3),
+            'matches_played': self.matches_played,
+            'matches_failed': self.matches_failed,
+            'mean_wait': round(sum(waits) / len(waits), 3) if waits else 0.0,
+            'p50_wait': round(waits[len(waits) // 2], 3) if waits else 0.0,
+            'p95_wait': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+        }
+
+    def start(self, interval: float = MATCHMAKING_INTERVAL) -> None:
+        """
+        Starts the background thread that battles matched meals.
+
+        Args:
+            interval (float): Seconds to sleep when no pair can be made.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._match_loop, args=(interval,), name="matchmaking", daemon=True)
+        self._thread.start()
+        logger.info("Started matchmaking loop")
+
+    def stop(self) -> None:
+        """
+        Stops the background matchmaking thread.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _match_loop(self, interval: float) -> None:
+        """
+        Battles matched meals back to back, sleeping up to interval seconds (or until a meal is
+        queued) whenever no pair can be made or a battle fails.
+        """
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                result = self.run_once()
+                if result is not None and result['winner'] is not None:
+                    continue
+            except Exception as e:
+                loop_error_logger.log(logging.ERROR, "Error in matchmaking loop: %s", str(e))
+            self._wake.wait(interval)
+
+
+matchmaker = MatchmakingService()
@@ -0,0 +1,154 @@
+import logging
+import os
+import sqlite3
+from typing import Dict, Iterable, Tuple
+
+from meal_max.utils.sql_utils import get_db_connection
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Rating every meal starts at, and the rating all meals return to before a full recomputation
+INITIAL_RATING = 1500.0
+
+# Maximum rating change from a single battle
+ELO_K_FACTOR = float(os.getenv("ELO_K_FACTOR", "32"))
+
+# Battles read from the history per fetch during a full recomputation
+REPLAY_BATCH_SIZE = 100_000
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """
+    Returns the probability that a meal beats its opponent under the Elo model.
+
+    Args:
+        rating (float): The rating of the meal.
+        opponent_rating (float): The rating of the opponent.
+
+    Returns:
+        float: The expected score of the meal, between 0 and 1.
+    """
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def elo_update(winner_rating: float, loser_rating: float, k_factor: float = ELO_K_FACTOR) -> Tuple[float, float]:
+    """
+    Returns the new ratings of the winner and loser of a battle.
+
+    Args:
+        winner_rating (float): The winner's rating before the battle.
+        loser_rating (float): The loser's rating before the battle.
+        k_factor (float): The maximum rating change from the battle.
+
+    Returns:
+        Tuple[float, float]: The new winner and loser ratings.
+    """
+    delta = k_factor * (1.0 - expected_score(winner_rating, loser_rating))
+    return winner_rating + delta, loser_rating - delta
+
+
+def replay_battles(battles: Iterable[Tuple[int, int]], ratings: Dict[int, float], k_factor: float = ELO_K_FACTOR) -> int:
+    """
+    Applies a sequence of battles to a rating table in place.
+
+    This is the inner loop of a full recomputation, so the Elo update is inlined rather than
+    calling elo_update once per battle.
+
+    Args:
+        battles (Iterable[Tuple[int, int]]): (winner_id, loser_id) pairs in the order they were fought.
+        ratings (Dict[int, float]): The current rating per meal ID. Meals not present start at INITIAL_RATING.
+
+    Returns:
+        int: The number of battles applied.
+    """
+    get = ratings.get
+    count = 0
+    for winner_id, loser_id in battles:
+        winner_rating = get(winner_id, INITIAL_RATING)
+        loser_rating = get(loser_id, INITIAL_RATING)
+        # k * (1 - expected winner score) simplifies to k * expected loser score
+        delta = k_factor / (1.0 + 10.0 ** ((winner_rating - loser_rating) / 400.0))
+        ratings[winner_id] = winner_rating + delta
+        ratings[loser_id] = loser_rating - delta
+        count += 1
+    return count
+
+
+def recompute_ratings(batch_size: int = REPLAY_BATCH_SIZE) -> int:
+    """
+    Recomputes every meal's rating from scratch by replaying the full battle history.
+
+    Battles are streamed from the history in batches of batch_size and folded into an in-memory
+    rating table, then all ratings are written back at once. The whole recomputation runs in a
+    single write transaction, so battles fought meanwhile wait for it instead of being lost.
+
+    Args:
+        batch_size (int): The number of battles read per fetch.
+
+    Returns:
+        int: The number of battles replayed.
+
+    Raises:
+        sqlite3.Error: For database-related errors.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT id FROM meals")
+            ratings = {meal_id: INITIAL_RATING for meal_id, in cursor.fetchall()}
+
+            replayed = 0
+            cursor.execute("SELECT winner_id, loser_id FROM battles ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                replayed += replay_battles(rows, ratings)
+
+            cursor.executemany("UPDATE meals SET rating = ? WHERE id = ?", [(rating, meal_id) for meal_id, rating in ratings.items()])
+            conn.commit()
+
+            logger.info("Recomputed ratings for %d meals from %d battles", len(ratings), replayed)
+            return replayed
+
+    except sqlite3.Error as e:
+        logger.error("Database error while recomputing ratings: %s", str(e))
+        raise e
+
+
+def get_rating(meal_id: int) -> float:
+    """
+    Retrieves the current rating of a meal, if it exists and has not been deleted.
+
+    Args:
+        meal_id (int): The unique identifier of the meal.
+
+    Returns:
+        float: The meal's rating.
+
+    Raises:
+        ValueError: If the meal has been deleted or is not found.
+        sqlite3.Error: For database-related errors.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT rating, deleted FROM meals WHERE id = ?", (meal_id,))
+            row = cursor.fetchone()
+
+        if row is None:
+            logger.info("Meal with ID %s not found", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} not found")
+        if row[1]:
+            logger.info("Meal with ID %s has been deleted", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} has been deleted")
+        return row[0]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
@@ -0,0 +1,44 @@
+"""
+Rebuilds meals.battles and meals.wins from the battle log.
+
+Usage:
+    python -m meal_max.tools.rebuild_stats              # latest snapshot plus the log tail
+    python -m meal_max.tools.rebuild_stats --from-scratch
+    python -m meal_max.tools.rebuild_stats --snapshot   # only take a new snapshot
+"""
+import argparse
+import logging
+import time
+
+from dotenv import load_dotenv
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild meal battle stats from the battle log.")
+    parser.add_argument("--from-scratch", action="store_true", help="ignore snapshots and replay the whole log")
+    parser.add_argument("--snapshot", action="store_true", help="take a new stat snapshot instead of rebuilding")
+    args = parser.parse_args()
+
+    # DB_PATH is read when sql_utils is imported, so load the .env file first
+    load_dotenv()
+    from meal_max.models import battle_log_model
+
+    start = time.perf_counter()
+    if args.snapshot:
+        snapshot_id = battle_log_model.take_snapshot()
+        print(f"Took stat snapshot {snapshot_id} in {time.perf_counter() - start:.2f}s")
+        return
+
+    snapshot_id, replayed = battle_log_model.rebuild_stats(from_scratch=args.from_scratch)
+    source = f"snapshot {snapshot_id}" if snapshot_id is not None else "an empty snapshot"
+    print(f"Rebuilt stats from {source} plus {replayed} logged battles in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
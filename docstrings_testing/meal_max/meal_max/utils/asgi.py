@@ -0,0 +1,216 @@
+"""
+An asyncio (ASGI) front end for the Flask app.
+
+Routes registered with AsyncApp.route run as coroutines on the event loop, so a request that
+waits on random.org holds no thread while it waits. Every other request is handed to the
+Flask app unchanged on a bounded pool of DB_THREADS threads, which is what limits how many
+requests touch SQLite at once; the event loop itself can hold many more open connections.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import io
+import logging
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask
+
+from meal_max.utils.capture import SESSION_HEADER, capture_enabled, capture_request
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.server import POOL_WAIT_SECONDS, record_request, run_worker_init_hooks
+from meal_max.utils.sql_trace import finish_trace, start_trace
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Threads running the synchronous Flask handlers and model calls
+DB_THREADS = int(os.getenv("DB_THREADS", "16"))
+
+# Largest request body read into memory
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(16 * 1024 * 1024)))
+
+AsyncHandler = Callable[[Dict[str, Any]], Awaitable[Tuple[int, Any]]]
+
+
+class AsyncApp:
+    """
+    An ASGI app that serves a Flask app, with selected routes replaced by coroutines.
+
+    Attributes:
+        flask_app (Flask): The app serving every route without an async handler.
+        executor (ThreadPoolExecutor): The bounded pool that synchronous work runs on.
+    """
+
+    def __init__(self, flask_app: Flask, threads: int = DB_THREADS):
+        """
+        Initializes the AsyncApp with no async routes.
+
+        Args:
+            flask_app (Flask): The app serving every route without an async handler.
+            threads (int): The number of threads for synchronous work.
+        """
+        self.flask_app = flask_app
+        self.threads = threads
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="db")
+        self._routes: Dict[Tuple[str, str], AsyncHandler] = {}
+
+    def route(self, path: str, methods: List[str]) -> Callable[[AsyncHandler], AsyncHandler]:
+        """
+        Registers a coroutine to serve a path in place of the Flask view.
+
+        The coroutine receives the ASGI scope and returns (status code, JSON-serializable body).
+
+        Args:
+            path (str): The exact request path.
+            methods (List[str]): The HTTP methods to serve.
+        """
+        def decorator(handler: AsyncHandler) -> AsyncHandler:
+            for method in methods:
+                self._routes[(method.upper(), path)] = handler
+            return handler
+        return decorator
+
+    async def run_sync(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Runs a blocking call, such as a model function that queries SQLite, on the thread pool.
+        The call sees the caller's context, so its statements join the request's SQL trace.
+
+        Args:
+            func (Callable): The function to call.
+            *args: Positional arguments for func.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            Any: The function's return value.
+        """
+        queued_at = time.perf_counter()
+
+        def run() -> Any:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - queued_at, "db")
+            return func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, contextvars.copy_context().run, run)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        handler = self._routes.get((scope["method"], scope["path"]))
+        if handler is not None:
+            start = time.perf_counter()
+            start_trace(scope["path"], scope["method"])
+            status, payload = await handler(scope)
+            body = self.flask_app.json.dumps(payload).encode("utf-8") + b"\n"
+            headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("ascii"))]
+            # Flask views record, trace and capture their own requests
+            elapsed = time.perf_counter() - start
+            record_request(scope["path"], scope["method"], status, elapsed)
+            finish_trace(status)
+            if capture_enabled():
+                session = dict(scope.get("headers", [])).get(SESSION_HEADER.lower().encode("latin-1"), b"").decode("latin-1")
+                session = session or (scope.get("client") or ("",))[0]
+                capture_request(scope["method"], scope["path"], scope["path"], scope.get("query_string", b"").decode("latin-1"), None,
+                                session, status, elapsed)
+        else:
+            request_body = await self._read_body(receive)
+            if request_body is None:
+                status, headers, body = 413, [(b"content-length", b"0")], b""
+            else:
+                status, headers, body = await self.run_sync(self._call_flask, scope, request_body)
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        """
+        Runs the worker initialization hooks on startup and stops the thread pool on shutdown.
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # A single event loop process stands in for worker 0
+                run_worker_init_hooks(0)
+                logger.info("Serving async app with %d DB threads", self.threads)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive: Callable) -> Optional[bytes]:
+        """
+        Reads the whole request body, or returns None if it exceeds MAX_BODY_BYTES.
+        """
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    def _call_flask(self, scope: Dict[str, Any], request_body: bytes) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+        """
+        Serves a request with the Flask app through its WSGI interface. Runs on the thread pool.
+        """
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+            "REMOTE_ADDR": client[0],
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(request_body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in scope.get("headers", []):
+            key = name.decode("latin-1").upper().replace("-", "_")
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                key = "HTTP_" + key
+            value = value.decode("latin-1")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        # The body is already buffered, so its length is known even for chunked requests
+        environ["CONTENT_LENGTH"] = str(len(request_body))
+
+        response_start = []
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None) -> None:
+            response_start[:] = [status, headers]
+
+        result = self.flask_app(environ, start_response)
+        try:
+            body = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+        status, headers = response_start
+        return (
+            int(status.split(" ", 1)[0]),
+            [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+            body
+        )
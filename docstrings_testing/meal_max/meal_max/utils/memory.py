@@ -0,0 +1,250 @@
+"""
+Memory diagnostics: tracemalloc snapshots and diffs, and gauges of what the process holds.
+
+tracemalloc is off unless started, since tracing every allocation slows the process down
+noticeably. Once started, named snapshots can be taken and compared, so that growth between
+two points in time can be attributed to the lines that allocated it. Gauges read the sizes
+of the in-memory structures of the models; they are also exported on /api/metrics.
+"""
+from collections import OrderedDict
+import logging
+import os
+import threading
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from meal_max.utils.logger import configure_logger, get_queue_handler
+from meal_max.utils.metrics import Gauge
+from meal_max.utils.sql_utils import open_connection_count
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Frames recorded per allocation when tracing is started without a frame count
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "1"))
+
+# Snapshots kept; taking another discards the oldest
+MAX_SNAPSHOTS = 10
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+_snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+_snapshots_lock = threading.Lock()
+_gauges: Dict[str, Callable[[], float]] = {}
+
+# Allocations made by tracemalloc and the import system are not the app's
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def register_gauge(name: str, documentation: str, function: Callable[[], float]) -> None:
+    """
+    Registers a gauge for the memory report and /api/metrics.
+
+    Args:
+        name (str): The metric name.
+        documentation (str): The HELP text.
+        function (Callable[[], float]): Returns the current value.
+    """
+    Gauge(name, documentation, function)
+    _gauges[name] = function
+
+
+def read_gauges() -> Dict[str, Optional[float]]:
+    """
+    Returns the current value of every registered gauge, or None for a gauge that failed.
+    """
+    values = {}
+    for name, function in _gauges.items():
+        try:
+            values[name] = function()
+        except Exception as e:
+            logger.error("Error reading gauge %s: %s", name, str(e))
+            values[name] = None
+    return values
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """
+    Returns the resident set size of the process, or None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def start_tracing(frames: Optional[int] = None) -> None:
+    """
+    Starts tracing allocations. Does nothing if tracing is already on.
+
+    Args:
+        frames (int, optional): Frames of call stack recorded per allocation; more give deeper
+            tracebacks but use more memory. Defaults to TRACEMALLOC_FRAMES.
+    """
+    if frames is None:
+        frames = TRACEMALLOC_FRAMES
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.info("Started tracemalloc with %d frames", frames)
+
+
+def stop_tracing() -> None:
+    """
+    Stops tracing allocations and discards the snapshots.
+    """
+    tracemalloc.stop()
+    with _snapshots_lock:
+        _snapshots.clear()
+    logger.info("Stopped tracemalloc")
+
+
+def take_snapshot(name: str) -> Dict[str, Any]:
+    """
+    Takes a named snapshot of the traced allocations, replacing any with the same name.
+
+    Args:
+        name (str): The snapshot name.
+
+    Returns:
+        Dict[str, Any]: The name and the total traced size and count of the snapshot.
+
+    Raises:
+        ValueError: If tracing is off.
+    """
+    if not tracemalloc.is_tracing():
+        raise ValueError("tracemalloc is not tracing; start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    with _snapshots_lock:
+        _snapshots.pop(name, None)
+        _snapshots[name] = snapshot
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    stats = snapshot.statistics("filename")
+    logger.info("Took tracemalloc snapshot %s", name)
+    return {'name': name, 'size_bytes': sum(stat.size for stat in stats), 'count': sum(stat.count for stat in stats)}
+
+
+def top_allocations(name: Optional[str] = None, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+    """
+    Returns the allocation sites holding the most memory.
+
+    Args:
+        name (str, optional): The snapshot to read. Defaults to a fresh snapshot.
+        limit (int): The number of sites to return.
+        group_by (str): 'lineno', 'filename' or 'traceback'.
+
+    Returns:
+        List[Dict[str, Any]]: Per site, largest first: its location, size and allocation count.
+
+    Raises:
+        ValueError: If tracing is off, the snapshot does not exist or group_by is invalid.
+    """
+    _check_group_by(group_by)
+    snapshot = _get_snapshot(name) if name is not None else _fresh_snapshot()
+    return [
+        {'location': _location(stat.traceback, group_by), 'size_bytes': stat.size, 'count': stat.count}
+        for stat in snapshot.statistics(group_by)[:limit]
+    ]
+
+
+def compare_snapshots(old: str, new: Optional[str] = None, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+    """
+    Returns the allocation sites whose memory changed most between two snapshots.
+
+    Args:
+        old (str): The earlier snapshot.
+        new (str, optional): The later snapshot. Defaults to a fresh snapshot.
+        limit (int): The number of sites to return.
+        group_by (str): 'lineno', 'filename' or 'traceback'.
+
+    Returns:
+        List[Dict[str, Any]]: Per site, largest change first: its location, size, count and
+            their change since the earlier snapshot.
+
+    Raises:
+        ValueError: If tracing is off, a snapshot does not exist or group_by is invalid.
+    """
+    _check_group_by(group_by)
+    old_snapshot = _get_snapshot(old)
+    new_snapshot = _get_snapshot(new) if new is not None else _fresh_snapshot()
+    return [
+        {
+            'location': _location(stat.traceback, group_by),
+            'size_bytes': stat.size,
+            'size_diff_bytes': stat.size_diff,
+            'count': stat.count,
+            'count_diff': stat.count_diff,
+        }
+        for stat in new_snapshot.compare_to(old_snapshot, group_by)[:limit]
+    ]
+
+
+def memory_summary() -> Dict[str, Any]:
+    """
+    Returns the resident memory, the tracemalloc state, the snapshot names and the gauges.
+    """
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    with _snapshots_lock:
+        snapshots = list(_snapshots)
+    return {
+        'resident_memory_bytes': resident_memory_bytes(),
+        'tracemalloc': {
+            'tracing': tracing,
+            'frames': tracemalloc.get_traceback_limit() if tracing else 0,
+            'traced_bytes': current,
+            'peak_traced_bytes': peak,
+        },
+        'snapshots': snapshots,
+        'gauges': read_gauges(),
+    }
+
+
+def _get_snapshot(name: str) -> tracemalloc.Snapshot:
+    with _snapshots_lock:
+        snapshot = _snapshots.get(name)
+    if snapshot is None:
+        raise ValueError(f"Snapshot {name} not found")
+    return snapshot
+
+
+def _fresh_snapshot() -> tracemalloc.Snapshot:
+    if not tracemalloc.is_tracing():
+        raise ValueError("tracemalloc is not tracing; start it first")
+    return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+
+def _check_group_by(group_by: str) -> None:
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+
+
+def _location(traceback: tracemalloc.Traceback, group_by: str) -> Any:
+    if group_by == "traceback":
+        return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+    if group_by == "filename":
+        return traceback[0].filename
+    return f"{traceback[0].filename}:{traceback[0].lineno}"
+
+
+def _log_handler_count() -> int:
+    loggers = [logging.getLogger()] + [
+        logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger)
+    ]
+    return sum(len(logger.handlers) for logger in loggers)
+
+
+register_gauge("process_resident_memory_bytes", "Resident memory of this worker process.", lambda: resident_memory_bytes() or 0)
+register_gauge("tracemalloc_traced_bytes", "Memory held by allocations traced by tracemalloc, 0 when not tracing.",
+               lambda: tracemalloc.get_traced_memory()[0])
+register_gauge("db_connections_open", "SQLite connections currently open through get_db_connection.", open_connection_count)
+register_gauge("log_queue_records", "Log records waiting for the background log writer.", lambda: get_queue_handler().queue.qsize())
+register_gauge("log_handlers", "Handlers attached to all loggers; growth means handlers are being leaked.", _log_handler_count)
@@ -0,0 +1,250 @@
+"""
+Counters and histograms rendered in the Prometheus text format.
+
+Recording never takes a lock: every thread adds to its own store, and the stores are only
+summed when the metrics are rendered. Stores of threads that have exited are folded into a
+shared total at that point, so short-lived threads do not accumulate.
+"""
+from bisect import bisect_left
+import math
+import os
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from 0.5 ms to 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Values per (metric, label values): a float for counters, a list of bucket counts followed
+# by the sum for histograms
+Store = Dict[Tuple["Metric", Tuple[str, ...]], object]
+
+_local = threading.local()
+_stores: List[Tuple[threading.Thread, Store]] = []
+_retired: Store = {}
+_stores_lock = threading.Lock()
+_registry: List["Metric"] = []
+
+
+def _thread_store() -> Store:
+    """
+    Returns the calling thread's store, creating and registering it on first use.
+    """
+    try:
+        return _local.store
+    except AttributeError:
+        store: Store = {}
+        with _stores_lock:
+            _stores.append((threading.current_thread(), store))
+        _local.store = store
+        return store
+
+
+class Metric:
+    """
+    A named metric with optional labels, registered for rendering when created.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The HELP text.
+        labelnames (Tuple[str, ...]): The label names, in the order values are passed.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _key(self, labelvalues: Tuple) -> Tuple["Metric", Tuple[str, ...]]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+        return (self, tuple(str(value) for value in labelvalues))
+
+    def _labels(self, labelvalues: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing count.
+    """
+
+    type_name = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        """
+        Adds to the count for the given label values.
+
+        Args:
+            *labelvalues: One value per label name.
+            amount (float): The amount to add.
+        """
+        store = _thread_store()
+        key = self._key(labelvalues)
+        store[key] = store.get(key, 0.0) + amount
+
+    def _merge(self, total, values):
+        return (total or 0.0) + values
+
+    def _render(self, labelvalues: Tuple[str, ...], value: float) -> List[str]:
+        return [f"{self.name}{self._labels(labelvalues)} {_format(value)}"]
+
+
+class Histogram(Metric):
+    """
+    A distribution of observed values, counted in cumulative buckets.
+
+    Attributes:
+        buckets (Tuple[float, ...]): The bucket upper bounds, ascending, without +Inf.
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labelvalues) -> None:
+        """
+        Records one observation for the given label values.
+
+        Args:
+            value (float): The observed value, in seconds for latencies.
+            *labelvalues: One value per label name.
+        """
+        store = _thread_store()
+        key = self._key(labelvalues)
+        values = store.get(key)
+        if values is None:
+            values = store[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def _merge(self, total, values):
+        if total is None:
+            return list(values)
+        return [a + b for a, b in zip(total, values)]
+
+    def _render(self, labelvalues: Tuple[str, ...], values: List) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), values):
+            cumulative += count
+            le = 'le="%s"' % ("+Inf" if bound == math.inf else _format(bound))
+            lines.append(f"{self.name}_bucket{self._labels(labelvalues, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._labels(labelvalues)} {_format(values[-1])}")
+        lines.append(f"{self.name}_count{self._labels(labelvalues)} {cumulative}")
+        return lines
+
+
+class Gauge(Metric):
+    """
+    A current value, read from a function each time the metrics are rendered.
+
+    Attributes:
+        function (Callable[[], float]): Returns the current value.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def _render(self, labelvalues: Tuple[str, ...], value: float) -> List[str]:
+        return [f"{self.name} {_format(value)}"]
+
+
+# Shared by the in-memory caches and indexes, labelled by cache name
+CACHE_REQUESTS = Counter("cache_requests_total", "Lookups in in-memory caches, by cache and result (hit or miss).", ["cache", "result"])
+
+
+def collect() -> Store:
+    """
+    Sums the stores of every thread, folding those of exited threads into the retired total.
+
+    Returns:
+        Store: The totals per (metric, label values).
+    """
+    global _stores
+    with _stores_lock:
+        live = []
+        for thread, store in _stores:
+            if thread.is_alive():
+                live.append((thread, store))
+            else:
+                _merge_into(_retired, store)
+        _stores = live
+        totals: Store = {}
+        _merge_into(totals, _retired)
+        for _, store in live:
+            # dict.copy runs without releasing the GIL, so the owner cannot resize it mid-copy
+            _merge_into(totals, store.copy())
+    return totals
+
+
+def _merge_into(totals: Store, store: Store) -> None:
+    for key, values in store.items():
+        totals[key] = key[0]._merge(totals.get(key), values)
+
+
+def render_metrics() -> str:
+    """
+    Renders every registered metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics page.
+    """
+    totals = collect()
+    by_metric: Dict[Metric, List[Tuple[Tuple[str, ...], object]]] = {}
+    for (metric, labelvalues), values in totals.items():
+        by_metric.setdefault(metric, []).append((labelvalues, values))
+
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        metric_series = by_metric.get(metric, [])
+        if isinstance(metric, Gauge):
+            try:
+                metric_series = [((), metric.function())]
+            except Exception:
+                metric_series = []
+        for labelvalues, values in sorted(metric_series, key=lambda series: series[0]):
+            lines.extend(metric._render(labelvalues, values))
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    """
+    Clears every recorded value. Intended for tests.
+    """
+    with _stores_lock:
+        _retired.clear()
+        for _, store in _stores:
+            store.clear()
+
+
+def _reset_after_fork() -> None:
+    """
+    Gives a forked child a fresh lock and zeroed metrics, since it serves its own requests.
+    """
+    global _stores_lock
+    _stores_lock = threading.Lock()
+    reset_metrics()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
@@ -0,0 +1,196 @@
+"""
+On-demand profiling of single requests.
+
+A request with ?__profile=1 and an X-Profile-Token header matching PROFILE_TOKEN runs under
+cProfile, and its report is stored under the id returned in the X-Profile-Id response header.
+PROFILE_SAMPLE_RATE additionally profiles that fraction of ordinary requests. With no token
+configured and a sample rate of 0, the default, each request costs one query-string lookup.
+
+cProfile's default timer is the wall clock, so time spent waiting on SQLite or random.org
+shows up under the calls that waited. Only one request per worker is profiled at a time;
+others asking meanwhile are served without profiling.
+"""
+import cProfile
+from collections import OrderedDict
+from contextvars import ContextVar
+import hmac
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import uuid
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Token a request must send in X-Profile-Token to ask for profiling; unset disables ?__profile=1
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
+# Fraction of ordinary requests profiled without asking
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Profiles kept per worker
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "20"))
+
+# Functions listed in each report
+PROFILE_TOP = 30
+
+_current_profile: ContextVar[Optional["_ActiveProfile"]] = ContextVar("current_profile", default=None)
+_profiling = threading.Lock()
+_profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+class _ActiveProfile:
+    def __init__(self, sampled: bool):
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.profiler = cProfile.Profile()
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """
+    Returns whether a token matches PROFILE_TOKEN. Always False if no token is configured.
+    """
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def start_profile(flag: Optional[str], token: Optional[str]) -> None:
+    """
+    Starts profiling the current request if it asked to be profiled or is sampled.
+
+    Args:
+        flag (Optional[str]): The value of the __profile query parameter.
+        token (Optional[str]): The value of the X-Profile-Token header.
+    """
+    if flag == "1":
+        if not is_authorized(token):
+            logger.warning("Ignoring profiling request without a valid X-Profile-Token")
+            return
+        sampled = False
+    elif PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        sampled = True
+    else:
+        return
+
+    # Profilers of concurrent requests would see each other's calls and slow everyone down
+    if not _profiling.acquire(blocking=False):
+        logger.info("Another request is being profiled; serving this one without profiling")
+        return
+    active = _ActiveProfile(sampled)
+    _current_profile.set(active)
+    active.profiler.enable()
+
+
+def finish_profile(endpoint: str, method: str, status: int) -> Optional[str]:
+    """
+    Stops profiling the current request and stores its report.
+
+    Args:
+        endpoint (str): The route pattern of the request.
+        method (str): The HTTP method.
+        status (int): The response status code.
+
+    Returns:
+        Optional[str]: The profile id, or None if the request was not profiled.
+    """
+    active = _current_profile.get()
+    if active is None:
+        return None
+    active.profiler.disable()
+    _current_profile.set(None)
+    _profiling.release()
+
+    duration_ms = round((time.time() - active.started_at) * 1000, 3)
+    profile_id = uuid.uuid4().hex[:16]
+    active.profiler.create_stats()
+    profile = {
+        'id': profile_id,
+        'endpoint': endpoint,
+        'method': method,
+        'status': status,
+        'sampled': active.sampled,
+        'started_at': active.started_at,
+        'duration_ms': duration_ms,
+        'stats': active.profiler.stats,
+    }
+    with _profiles_lock:
+        _profiles[profile_id] = profile
+        while len(_profiles) > PROFILE_HISTORY:
+            _profiles.popitem(last=False)
+    logger.info("Profiled %s %s in %.1f ms as %s", method, endpoint, duration_ms, profile_id)
+    return profile_id
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """
+    Returns a summary of each stored profile, most recent first.
+    """
+    with _profiles_lock:
+        profiles = list(_profiles.values())
+    return [{key: value for key, value in profile.items() if key != 'stats'} for profile in reversed(profiles)]
+
+
+def get_profile_report(profile_id: str) -> Optional[str]:
+    """
+    Returns a stored profile as text: the PROFILE_TOP functions by cumulative time, then the
+    callers of each, which together give the call graph of the slow paths.
+
+    Args:
+        profile_id (str): The id returned when the profile was stored.
+
+    Returns:
+        Optional[str]: The report, or None if there is no such profile.
+    """
+    with _profiles_lock:
+        profile = _profiles.get(profile_id)
+    if profile is None:
+        return None
+
+    out = io.StringIO()
+    out.write(f"{profile['method']} {profile['endpoint']} -> {profile['status']} in {profile['duration_ms']} ms\n")
+    stats = _load_stats(profile['stats'], out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(PROFILE_TOP)
+    stats.print_callers(PROFILE_TOP)
+    return out.getvalue()
+
+
+def get_profile_dump(profile_id: str) -> Optional[bytes]:
+    """
+    Returns a stored profile in the binary format written by cProfile's dump_stats, for
+    loading into pstats, snakeviz or gprof2dot.
+
+    Args:
+        profile_id (str): The id returned when the profile was stored.
+
+    Returns:
+        Optional[bytes]: The profile data, or None if there is no such profile.
+    """
+    with _profiles_lock:
+        profile = _profiles.get(profile_id)
+    return marshal.dumps(profile['stats']) if profile is not None else None
+
+
+def clear_profiles() -> None:
+    """
+    Discards the stored profiles.
+    """
+    with _profiles_lock:
+        _profiles.clear()
+
+
+def _load_stats(stats: Dict, stream: io.StringIO) -> pstats.Stats:
+    loaded = pstats.Stats(stream=stream)
+    loaded.stats = stats
+    loaded.get_top_level_stats()
+    return loaded
@@ -1,12 +1,25 @@
+import asyncio
 import logging
+import os
+import time
+from urllib.parse import urlsplit
+
 import requests
 
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import Counter, Histogram
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Base URL of the random.org API, overridable to point load tests at a local stub
+RANDOM_ORG_URL = os.getenv("RANDOM_ORG_URL", "https://www.random.org").rstrip("/")
+
+RANDOM_ORG_SECONDS = Histogram("random_org_request_duration_seconds", "Latency of requests to random.org, including failed ones.")
+RANDOM_ORG_FAILURES = Counter("random_org_failures_total", "Failed random.org requests, by reason.", ["reason"])
+
+
 def get_random() -> float:
     """
     Fetches a random decimal number from random.org with two decimal precision.
@@ -18,13 +31,17 @@ def get_random() -> float:
         ValueError: If the response from random.org cannot be converted to a float.
         RuntimeError: If the request to random.org fails due to timeout or other request errors.
     """
-    url = "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+    url = f"{RANDOM_ORG_URL}/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
 
     try:
         # Log the request to random.org
         logger.info("Fetching random number from %s", url)
 
-        response = requests.get(url, timeout=5)
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, timeout=5)
+        finally:
+            RANDOM_ORG_SECONDS.observe(time.perf_counter() - start)
 
         # Check if the request was successful
         response.raise_for_status()
@@ -34,15 +51,85 @@ def get_random() -> float:
         try:
             random_number = float(random_number_str)
         except ValueError:
+            RANDOM_ORG_FAILURES.inc("invalid")
             raise ValueError("Invalid response from random.org: %s" % random_number_str)
 
         logger.info("Received random number: %.3f", random_number)
         return random_number
 
     except requests.exceptions.Timeout:
+        RANDOM_ORG_FAILURES.inc("timeout")
         logger.error("Request to random.org timed out.")
         raise RuntimeError("Request to random.org timed out.")
 
     except requests.exceptions.RequestException as e:
+        RANDOM_ORG_FAILURES.inc("error")
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+async def get_random_async() -> float:
+    """
+    Fetches a random decimal number from random.org with two decimal precision without blocking
+    the event loop.
+
+    Returns:
+        float: A randomly generated decimal number between 0 and 1.
+
+    Raises:
+        ValueError: If the response from random.org cannot be converted to a float.
+        RuntimeError: If the request to random.org fails due to timeout or other request errors.
+    """
+    url = f"{RANDOM_ORG_URL}/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+
+    try:
+        logger.info("Fetching random number from %s", url)
+        start = time.perf_counter()
+        try:
+            random_number_str = (await asyncio.wait_for(_fetch_text(url), timeout=5)).strip()
+        finally:
+            RANDOM_ORG_SECONDS.observe(time.perf_counter() - start)
+    except asyncio.TimeoutError:
+        RANDOM_ORG_FAILURES.inc("timeout")
+        logger.error("Request to random.org timed out.")
+        raise RuntimeError("Request to random.org timed out.")
+    except OSError as e:
+        RANDOM_ORG_FAILURES.inc("error")
+        logger.error("Request to random.org failed: %s", e)
+        raise RuntimeError("Request to random.org failed: %s" % e)
+
+    try:
+        random_number = float(random_number_str)
+    except ValueError:
+        RANDOM_ORG_FAILURES.inc("invalid")
+        raise ValueError("Invalid response from random.org: %s" % random_number_str)
+
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
+
+
+async def _fetch_text(url: str) -> str:
+    """
+    Issues a plain HTTP/1.0 GET over asyncio streams and returns the response body. The server
+    closes the connection after the response, so the body is everything after the headers.
+
+    Raises:
+        OSError: If the connection fails or the server responds with an error status.
+    """
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or (443 if secure else 80), ssl=secure or None)
+    try:
+        target = parts.path + ("?" + parts.query if parts.query else "")
+        writer.write(f"GET {target} HTTP/1.0\r\nHost: {parts.netloc}\r\nAccept: text/plain\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    status_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+    status = status_line.split(" ", 2)
+    if len(status) < 2 or not status[1].isdigit() or int(status[1]) >= 400:
+        raise OSError(f"Unexpected response: {status_line}")
+    return body.decode("utf-8")
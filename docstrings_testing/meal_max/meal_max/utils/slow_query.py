@@ -0,0 +1,253 @@
+"""
+A slow-query log with query plans and index advice.
+
+Statements run through get_db_connection that take longer than SLOW_QUERY_MS are logged with
+the shapes of their bound parameters and their EXPLAIN QUERY PLAN output, and aggregated by
+statement with literals removed. index_advice reads the captured plans for steps that read a
+whole table (SCAN) or sort into a temporary B-tree, and suggests an index for each.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_trace import normalize_sql
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Statements slower than this many milliseconds are logged
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "50"))
+
+# Distinct slow statements kept; later new ones are only logged
+MAX_SLOW_QUERIES = 500
+
+_slow_queries: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(.*)$")
+_TABLE_STEP = re.compile(r"^(?:SCAN|SEARCH) (?:TABLE )?(\w+)")
+_TEMP_B_TREE = re.compile(r"USE TEMP B-TREE FOR (.+)$")
+_WHERE = re.compile(r"\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bRETURNING\b|$)", re.IGNORECASE | re.DOTALL)
+_GROUP_BY = re.compile(r"\bGROUP BY\b(.*?)(?:\bHAVING\b|\bORDER BY\b|\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_ORDER_BY = re.compile(r"\bORDER BY\b(.*?)(?:\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_COMPARED_COLUMN = re.compile(r"(?:\b\w+\.)?\b([A-Za-z_]\w*)\s*(==?|<=?|>=?|!=|<>|\bIN\b|\bLIKE\b|\bIS\b|\bBETWEEN\b)", re.IGNORECASE)
+_EQUALITY = {"=", "==", "IN", "IS"}
+_SELECT_LIST = re.compile(r"\bSELECT\b(.*?)\bFROM\b", re.IGNORECASE | re.DOTALL)
+_ALIAS = re.compile(r"^(.*?)\s+AS\s+(\w+)$", re.IGNORECASE | re.DOTALL)
+_KEYWORDS = {"AND", "OR", "NOT", "NULL", "TRUE", "FALSE"}
+
+
+def describe_parameters(parameters: Any) -> str:
+    """
+    Returns the types of bound parameters without their values, such as (str, str, int).
+    """
+    if parameters is None:
+        return ""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+
+def explain(conn: sqlite3.Connection, sql: str, parameters: Any = ()) -> List[str]:
+    """
+    Returns the EXPLAIN QUERY PLAN steps of a statement, indented by depth.
+
+    Args:
+        conn (sqlite3.Connection): The connection the statement ran on.
+        sql (str): The statement.
+        parameters: Bound parameters of the right shape.
+
+    Returns:
+        List[str]: The plan steps, or an empty list if the statement cannot be explained.
+    """
+    try:
+        # A plain cursor, so explaining is not itself timed or logged as a slow query
+        rows = sqlite3.Connection.cursor(conn, sqlite3.Cursor).execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except (sqlite3.Error, ValueError) as e:
+        logger.debug("Could not explain %s: %s", sql, e)
+        return []
+
+    depths: Dict[int, int] = {0: -1}
+    steps = []
+    for step_id, parent_id, _, detail in rows:
+        depths[step_id] = depths.get(parent_id, -1) + 1
+        steps.append("  " * depths[step_id] + detail)
+    return steps
+
+
+def record_statement(conn: sqlite3.Connection, sql: str, parameters: Any, seconds: float) -> None:
+    """
+    Logs and aggregates a statement if it ran longer than SLOW_QUERY_MS.
+
+    Args:
+        conn (sqlite3.Connection): The connection the statement ran on.
+        sql (str): The statement.
+        parameters: Its bound parameters (for executemany, those of the first row), or None
+            for a script, which is not explained.
+        seconds (float): The time the statement took.
+    """
+    ms = seconds * 1000
+    if ms < SLOW_QUERY_MS:
+        return
+
+    plan = explain(conn, sql, parameters) if parameters is not None else []
+    shape = describe_parameters(parameters)
+    logger.warning("Slow query (%.1f ms): %s %s\n%s", ms, " ".join(sql.split()), shape, "\n".join(plan))
+
+    key = normalize_sql(sql)
+    with _lock:
+        entry = _slow_queries.get(key)
+        if entry is None:
+            if len(_slow_queries) >= MAX_SLOW_QUERIES:
+                return
+            entry = _slow_queries[key] = {
+                'sql': key, 'example_sql': sql, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'parameter_shapes': []
+            }
+        entry['count'] += 1
+        entry['total_ms'] += ms
+        entry['max_ms'] = max(entry['max_ms'], ms)
+        entry['last_seen'] = time.time()
+        if shape not in entry['parameter_shapes']:
+            entry['parameter_shapes'].append(shape)
+        if plan:
+            entry['plan'] = plan
+
+
+def get_slow_queries() -> List[Dict[str, Any]]:
+    """
+    Returns the aggregated slow statements, highest total time first.
+
+    Returns:
+        List[Dict[str, Any]]: Per statement: the normalized SQL, count, total, mean and maximum
+            milliseconds, parameter shapes and latest query plan.
+    """
+    with _lock:
+        entries = [dict(entry, parameter_shapes=list(entry['parameter_shapes'])) for entry in _slow_queries.values()]
+    for entry in entries:
+        entry['mean_ms'] = round(entry['total_ms'] / entry['count'], 3)
+        entry['total_ms'] = round(entry['total_ms'], 3)
+        entry['max_ms'] = round(entry['max_ms'], 3)
+        entry.setdefault('plan', [])
+        del entry['example_sql']
+    return sorted(entries, key=lambda entry: entry['total_ms'], reverse=True)
+
+
+def index_advice() -> List[Dict[str, Any]]:
+    """
+    Flags the full table scans and temporary B-tree sorts in the plans of slow statements.
+
+    Returns:
+        List[Dict[str, Any]]: One item per flagged plan step, with the statement, the step, the
+            problem and a suggested CREATE INDEX statement, or None where no index would help.
+    """
+    with _lock:
+        entries = sorted(_slow_queries.values(), key=lambda entry: entry['total_ms'], reverse=True)
+        entries = [(entry['sql'], entry['example_sql'], list(entry.get('plan', []))) for entry in entries]
+
+    advice = []
+    for key, sql, plan in entries:
+        tables = [match.group(1) for match in (_TABLE_STEP.match(step.strip()) for step in plan) if match]
+        for step in plan:
+            step = step.strip()
+            scan = _SCAN.match(step)
+            temp_b_tree = _TEMP_B_TREE.search(step)
+            if scan:
+                problem = "full table scan" if "USING" not in scan.group(2) else "full index scan"
+                table = scan.group(1)
+                equality, ranges = _where_columns(sql)
+                columns = equality + ranges
+            elif temp_b_tree and tables:
+                problem, table = f"temporary B-tree for {temp_b_tree.group(1)}", tables[0]
+                # Rows must be read in index order, so only equality columns can come first
+                columns = _where_columns(sql)[0] + _sort_columns(sql, temp_b_tree.group(1))
+            else:
+                continue
+            advice.append({
+                'sql': key,
+                'step': step,
+                'problem': problem,
+                'suggestion': _create_index(table, columns) if columns else None,
+            })
+    return advice
+
+
+def clear_slow_queries() -> None:
+    """
+    Discards the aggregated slow statements.
+    """
+    with _lock:
+        _slow_queries.clear()
+
+
+def _where_columns(sql: str) -> Tuple[List[str], List[str]]:
+    """
+    Returns the columns compared in the WHERE clause, in order: those compared for equality
+    and those compared by range.
+    """
+    where = _WHERE.search(sql)
+    if not where:
+        return [], []
+    equality, ranges = [], []
+    for column, operator in _COMPARED_COLUMN.findall(where.group(1)):
+        if column.upper() in _KEYWORDS or column in equality or column in ranges:
+            continue
+        (equality if operator.upper() in _EQUALITY else ranges).append(column)
+    return equality, ranges
+
+
+def _sort_columns(sql: str, purpose: str) -> List[str]:
+    """
+    Returns the GROUP BY or ORDER BY terms, with select-list aliases replaced by their
+    expressions, which SQLite can index directly.
+    """
+    clause = (_GROUP_BY if purpose.upper().startswith("GROUP BY") else _ORDER_BY).search(sql)
+    if not clause:
+        return []
+    aliases = _select_aliases(sql)
+    terms = []
+    for term in clause.group(1).split(","):
+        words = term.split()
+        if not words:
+            continue
+        direction = " DESC" if words[-1].upper() == "DESC" else ""
+        if words[-1].upper() in ("ASC", "DESC"):
+            words = words[:-1]
+        expression = " ".join(words)
+        terms.append(aliases.get(expression.lower(), expression) + direction)
+    return terms
+
+
+def _select_aliases(sql: str) -> Dict[str, str]:
+    """
+    Returns the expression of each aliased select-list item, by lowercase alias.
+    """
+    select_list = _SELECT_LIST.search(sql)
+    if not select_list:
+        return {}
+    items, depth, start = [], 0, 0
+    text = select_list.group(1)
+    for i, char in enumerate(text):
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if char == "," and depth == 0:
+            items.append(text[start:i])
+            start = i + 1
+    items.append(text[start:])
+
+    aliases = {}
+    for item in items:
+        alias = _ALIAS.match(item.strip())
+        if alias:
+            aliases[alias.group(2).lower()] = " ".join(alias.group(1).split())
+    return aliases
+
+
+def _create_index(table: str, columns: List[str]) -> str:
+    name = "_".join(word for word in re.findall(r"[A-Za-z_]\w*", " ".join(columns)) if word.upper() not in ("ASC", "DESC"))
+    return f"CREATE INDEX idx_{table}_{name} ON {table} ({', '.join(columns)})"
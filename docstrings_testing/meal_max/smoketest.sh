@@ -19,7 +19,7 @@ done
 # Function to check the health of the service
 check_health() {
   echo "Checking health status..."
-  curl -s -X GET "$BASE_URL/health" | grep -q '"status": "healthy"'  # Check the health status endpoint
+  curl -s -X GET "$BASE_URL/health" | grep -q '"status": *"healthy"'  # Check the health status endpoint
   if [ $? -eq 0 ]; then
     echo "Service is healthy."
   else
@@ -31,7 +31,7 @@ check_health() {
 # Function to check the database connection
 check_db() {
   echo "Checking database connection..."
-  curl -s -X GET "$BASE_URL/db-check" | grep -q '"database_status": "healthy"'  # Check DB connection
+  curl -s -X GET "$BASE_URL/db-check" | grep -q '"database_status": *"healthy"'  # Check DB connection
   if [ $? -eq 0 ]; then
     echo "Database connection is healthy."
   else
@@ -43,7 +43,7 @@ check_db() {
 # Function to delete all meals from the catalog
 delete_meals() {
   echo "Deleting the meals..."
-  curl -s -X DELETE "$BASE_URL/clear-catalog" | grep -q '"status": "success"'
+  curl -s -X DELETE "$BASE_URL/clear-meals" | grep -q '"status": *"success"'
 }
 
 # Function to add a new meal to the catalog
@@ -55,7 +55,7 @@ create_meal() {
 
   echo "Adding meal ($meal - $cuisine, $price, $difficulty) to the meal catalog..."
   curl -s -X POST "$BASE_URL/create-meal" -H "Content-Type: application/json" \
-    -d "{\"meal\":\"$meal\", \"cuisine\":\"$cuisine\", \"price\":$price, \"difficulty\":\"$difficulty\"}" | grep -q '"status": "success"'
+    -d "{\"meal\":\"$meal\", \"cuisine\":\"$cuisine\", \"price\":$price, \"difficulty\":\"$difficulty\"}" | grep -q '"status": *"success"'
 
   if [ $? -eq 0 ]; then
     echo "Meal added successfully."
@@ -71,7 +71,7 @@ delete_meal_by_id() {
 
   echo "Deleting meal by ID ($meal_id)..."
   response=$(curl -s -X DELETE "$BASE_URL/delete-meal/$meal_id")  # Send DELETE request with meal ID
-  if echo "$response" | grep -q '"status": "success"'; then
+  if echo "$response" | grep -q '"status": *"success"'; then
     echo "Meal deleted successfully by ID ($meal_id)."
   else
     echo "Failed to delete meal by ID ($meal_id)."
@@ -83,7 +83,7 @@ delete_meal_by_id() {
 get_all_meals() {
   echo "Getting all meals..."
   response=$(curl -s -X GET "$BASE_URL/get-all-meals")  # Send GET request to fetch all meals
-  if echo "$response" | grep -q '"status": "success"'; then
+  if echo "$response" | grep -q '"status": *"success"'; then
     echo "Meals retrieved successfully."
     if [ "$ECHO_JSON" = true ]; then
       echo "Meals JSON:"
@@ -101,7 +101,7 @@ get_meal_by_id() {
 
   echo "Getting meal by ID ($meal_id)..."
   response=$(curl -s -X GET "$BASE_URL/get-meal-by-id/$meal_id")  # Send GET request with meal ID
-  if echo "$response" | grep -q '"status": "success"'; then
+  if echo "$response" | grep -q '"status": *"success"'; then
     echo "Meal retrieved successfully by ID ($meal_id)."
     if [ "$ECHO_JSON" = true ]; then
       echo "Meal JSON (ID $meal_id):"
@@ -118,11 +118,11 @@ get_meal_by_name() {
   meal_name=$1
 
   echo "Getting meal by name ($meal_name)..."
-  response=$(curl -s -X GET "$BASE_URL/get-meal-by-id/$meal_name")  # Send GET request with meal name
-  if echo "$response" | grep -q '"status": "success"'; then
+  response=$(curl -s -X GET "$BASE_URL/get-meal-by-name/${meal_name// /%20}")  # Send GET request with meal name
+  if echo "$response" | grep -q '"status": *"success"'; then
     echo "Meal retrieved successfully by name ($meal_name)."
     if [ "$ECHO_JSON" = true ]; then
-      echo "Meal JSON (ID $meal_name):"
+      echo "Meal JSON (name $meal_name):"
       echo "$response" | jq .  # If echo flag is set, print the JSON response
     fi
   else
@@ -136,7 +136,7 @@ delete_combatants() {
   echo "Delete all combatants..."
   outcome=$(curl -s -X POST "$BASE_URL/clear-combatants")  # Send POST request to delete combatants
 
-  if echo "$outcome" | grep -q '"status": "combatants deleted"'; then
+  if echo "$outcome" | grep -q '"status": *"success"'; then
     echo "All combatants deleted successfully."
   else
     echo "Error: Could not delete combatants."
@@ -150,7 +150,7 @@ add_combatant() {
   echo "Adding meal '$meal_title' as combatant"
   feedback=$(curl -s -X POST "$BASE_URL/prep-combatant" -H "Content-Type: application/json" \
     -d "{\"meal\": \"$meal_title\"}")  # Send POST request to prepare combatant
-  if echo "$feedback" | grep -q '"status": "combatant ready"'; then
+  if echo "$feedback" | grep -q '"status": *"success"'; then
     echo "Meal '$meal_title' successfully added to list of combatants."
   else
     echo "Error: Could not add meal '$meal_title' as a combatant."
@@ -162,7 +162,7 @@ add_combatant() {
 list_combatants() {
   echo "Getting list of combatants..."
   result=$(curl -s -X GET "$BASE_URL/get-combatants")  # Send GET request to fetch combatants
-  if echo "$result" | grep -q '"status": "success"'; then
+  if echo "$result" | grep -q '"status": *"success"'; then
     echo "Got list of combatants."
     if [ "$ECHO_JSON" = true ]; then
       echo "Combatants in JSON:"
@@ -178,7 +178,7 @@ list_combatants() {
 start_battle() {
   echo "Starting a new battle"
   battle_result=$(curl -s -X GET "$BASE_URL/battle")  # Send GET request to start battle
-  if echo "$battle_result" | grep -q '"status": "battle complete"'; then
+  if echo "$battle_result" | grep -q '"status": *"success"'; then
     winner=$(echo "$battle_result" | jq -r '.winner')  # Extract the winner from the JSON response
     echo "Battle is finished. Winner: $winner"
   else
@@ -192,7 +192,7 @@ get_score() {
   order=$1 
   echo "Getting score on leaderboard, ordered by $order..."
   leaderboard_data=$(curl -s -X GET "$BASE_URL/leaderboard?sort=$order")  # Send GET request for leaderboard
-  if echo "$leaderboard_data" | grep -q '"status": "success"'; then
+  if echo "$leaderboard_data" | grep -q '"status": *"success"'; then
     echo "Received Leaderboard score successfully (ordered by $order)."
     if [ "$ECHO_JSON" = true ]; then
       echo "Leaderboard JSON data (ordered by $order):"
@@ -215,9 +215,9 @@ delete_meals
 delete_combatants
 
 echo "Adding test meals..."
-add_new_meal "Taco" "Mexican" 12.50 "MED"
-add_new_meal "Hot Dog" "American" 10.00 "LOW"
-add_new_meal "Pizza" "Italian" 25.00 "HIGH"
+create_meal "Taco" "Mexican" 12.50 "MED"
+create_meal "Hot Dog" "American" 10.00 "LOW"
+create_meal "Pizza" "Italian" 25.00 "HIGH"
 
 echo "Getting meals to confirm the addition of test meals..."
 get_meal_by_id 1
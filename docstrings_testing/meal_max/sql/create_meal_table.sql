@@ -7,5 +7,106 @@ CREATE TABLE meals (
     difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')),
     battles INTEGER DEFAULT 0,
     wins INTEGER DEFAULT 0,
+    rating REAL DEFAULT 1500,
     deleted BOOLEAN DEFAULT FALSE
-);
\ No newline at end of file
+);
+
+DROP TABLE IF EXISTS battles;
+CREATE TABLE battles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    winner_id INTEGER NOT NULL,
+    loser_id INTEGER NOT NULL,
+    fought_at INTEGER NOT NULL DEFAULT (strftime('%s', 'now'))
+);
+
+DROP TABLE IF EXISTS stat_snapshots;
+CREATE TABLE stat_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    last_battle_id INTEGER NOT NULL,
+    taken_at INTEGER NOT NULL DEFAULT (strftime('%s', 'now'))
+);
+
+DROP TABLE IF EXISTS meal_stat_snapshots;
+CREATE TABLE meal_stat_snapshots (
+    snapshot_id INTEGER NOT NULL,
+    meal_id INTEGER NOT NULL,
+    battles INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, meal_id)
+) WITHOUT ROWID;
+
+-- Per-cuisine and per-difficulty totals over non-deleted meals, kept current by the triggers below
+DROP TABLE IF EXISTS cuisine_stats;
+CREATE TABLE cuisine_stats (
+    cuisine TEXT PRIMARY KEY,
+    meals INTEGER NOT NULL DEFAULT 0,
+    battles INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    rating_total REAL NOT NULL DEFAULT 0
+);
+
+DROP TABLE IF EXISTS difficulty_stats;
+CREATE TABLE difficulty_stats (
+    difficulty TEXT PRIMARY KEY,
+    meals INTEGER NOT NULL DEFAULT 0,
+    battles INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    rating_total REAL NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER meals_group_stats_insert AFTER INSERT ON meals WHEN NEW.deleted = FALSE
+BEGIN
+    INSERT INTO cuisine_stats (cuisine, meals, battles, wins, rating_total)
+    VALUES (NEW.cuisine, 1, NEW.battles, NEW.wins, NEW.rating)
+    ON CONFLICT (cuisine) DO UPDATE SET
+        meals = meals + 1, battles = battles + excluded.battles, wins = wins + excluded.wins, rating_total = rating_total + excluded.rating_total;
+
+    INSERT INTO difficulty_stats (difficulty, meals, battles, wins, rating_total)
+    VALUES (NEW.difficulty, 1, NEW.battles, NEW.wins, NEW.rating)
+    ON CONFLICT (difficulty) DO UPDATE SET
+        meals = meals + 1, battles = battles + excluded.battles, wins = wins + excluded.wins, rating_total = rating_total + excluded.rating_total;
+END;
+
+-- Moves the meal's contribution from its old values to its new ones; a soft delete only removes it
+CREATE TRIGGER meals_group_stats_update AFTER UPDATE OF cuisine, difficulty, battles, wins, rating, deleted ON meals
+BEGIN
+    UPDATE cuisine_stats SET
+        meals = meals - 1, battles = battles - OLD.battles, wins = wins - OLD.wins, rating_total = rating_total - OLD.rating
+    WHERE cuisine = OLD.cuisine AND OLD.deleted = FALSE;
+
+    UPDATE difficulty_stats SET
+        meals = meals - 1, battles = battles - OLD.battles, wins = wins - OLD.wins, rating_total = rating_total - OLD.rating
+    WHERE difficulty = OLD.difficulty AND OLD.deleted = FALSE;
+
+    INSERT INTO cuisine_stats (cuisine, meals, battles, wins, rating_total)
+    SELECT NEW.cuisine, 1, NEW.battles, NEW.wins, NEW.rating WHERE NEW.deleted = FALSE
+    ON CONFLICT (cuisine) DO UPDATE SET
+        meals = meals + 1, battles = battles + excluded.battles, wins = wins + excluded.wins, rating_total = rating_total + excluded.rating_total;
+
+    INSERT INTO difficulty_stats (difficulty, meals, battles, wins, rating_total)
+    SELECT NEW.difficulty, 1, NEW.battles, NEW.wins, NEW.rating WHERE NEW.deleted = FALSE
+    ON CONFLICT (difficulty) DO UPDATE SET
+        meals = meals + 1, battles = battles + excluded.battles, wins = wins + excluded.wins, rating_total = rating_total + excluded.rating_total;
+END;
+
+-- Leaderboard history: full snapshots (keyframes) hold every meal, the others only the meals
+-- whose stats changed since the previous snapshot
+DROP TABLE IF EXISTS leaderboard_snapshots;
+CREATE TABLE leaderboard_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    taken_at INTEGER NOT NULL,
+    is_full BOOLEAN NOT NULL,
+    row_count INTEGER NOT NULL
+);
+CREATE INDEX idx_leaderboard_snapshots_taken_at ON leaderboard_snapshots (taken_at);
+
+DROP TABLE IF EXISTS leaderboard_snapshot_rows;
+CREATE TABLE leaderboard_snapshot_rows (
+    snapshot_id INTEGER NOT NULL,
+    meal_id INTEGER NOT NULL,
+    battles INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    deleted BOOLEAN NOT NULL,
+    PRIMARY KEY (snapshot_id, meal_id)
+) WITHOUT ROWID;
@@ -0,0 +1,101 @@
+import pytest
+
+import app as meal_max_app
+from meal_max.models.kitchen_model import LeaderboardEntry
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def client():
+    return meal_max_app.app.test_client()
+
+######################################################
+#
+#    Leaderboard
+#
+######################################################
+
+def test_get_leaderboard(client, mocker):
+    """Test that the current leaderboard is returned sorted as requested."""
+    entry = LeaderboardEntry(1, "Meal 1", "Cuisine 1", 20.0, "LOW", 2, 1, 50.0, 1500.0)
+    get_leaderboard = mocker.patch("meal_max.models.kitchen_model.get_leaderboard", return_value=[entry])
+
+    response = client.get("/api/leaderboard?sort=rating")
+
+    assert response.status_code == 200
+    assert response.get_json()['leaderboard'] == [entry.to_dict()]
+    get_leaderboard.assert_called_once_with("rating")
+
+@pytest.mark.parametrize("as_of", [None, "100"])
+def test_get_leaderboard_invalid_sort(client, mocker, as_of):
+    """Test that an unknown sort field is rejected as a bad request, with or without as_of."""
+    get_leaderboard = mocker.patch("meal_max.models.kitchen_model.get_leaderboard")
+    get_leaderboard_as_of = mocker.patch.object(meal_max_app, "get_leaderboard_as_of")
+    query = {'sort': "battles"} if as_of is None else {'sort': "battles", 'as_of': as_of}
+
+    response = client.get("/api/leaderboard", query_string=query)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Invalid sort_by parameter: battles"
+    get_leaderboard.assert_not_called()
+    get_leaderboard_as_of.assert_not_called()
+
+def test_get_leaderboard_as_of(client, mocker):
+    """Test that the leaderboard is reconstructed as of the requested time."""
+    get_leaderboard_as_of = mocker.patch.object(meal_max_app, "get_leaderboard_as_of", return_value=[])
+
+    response = client.get("/api/leaderboard?as_of=3500&sort=wins")
+
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'success', 'as_of': 3500, 'leaderboard': []}
+    get_leaderboard_as_of.assert_called_once_with(3500, "wins")
+
+def test_get_leaderboard_as_of_utc_date(client, mocker):
+    """Test that an ISO 8601 date/time ending in Z is read as UTC."""
+    get_leaderboard_as_of = mocker.patch.object(meal_max_app, "get_leaderboard_as_of", return_value=[])
+
+    response = client.get("/api/leaderboard?as_of=2026-10-19T06:00:00Z")
+
+    assert response.status_code == 200
+    get_leaderboard_as_of.assert_called_once_with(1792389600, "wins")
+
+def test_get_leaderboard_as_of_before_first_snapshot(client, mocker):
+    """Test that a time before the first snapshot is reported as not found."""
+    mocker.patch.object(meal_max_app, "get_leaderboard_as_of", side_effect=ValueError("No leaderboard snapshot at or before 100"))
+
+    response = client.get("/api/leaderboard?as_of=100")
+
+    assert response.status_code == 404
+    assert response.get_json()['error'] == "No leaderboard snapshot at or before 100"
+
+def test_get_leaderboard_invalid_as_of(client):
+    """Test that an unparseable as_of is rejected as a bad request."""
+    response = client.get("/api/leaderboard?as_of=yesterday")
+
+    assert response.status_code == 400
+
+######################################################
+#
+#    Debug routes
+#
+######################################################
+
+@pytest.mark.parametrize("route", ["/api/debug/sql-traces", "/api/debug/slow-queries"])
+def test_sql_debug_routes_require_token(client, mocker, route):
+    """Test that the SQL debug routes, which show the statements this worker ran, need a valid X-Profile-Token."""
+    mocker.patch("meal_max.utils.profiling.PROFILE_TOKEN", "secret")
+
+    assert client.get(route).status_code == 403
+    assert client.get(route, headers={'X-Profile-Token': "wrong"}).status_code == 403
+    assert client.get(route, headers={'X-Profile-Token': "secret"}).status_code == 200
+
+def test_sql_debug_routes_disabled_without_token(client, mocker):
+    """Test that the SQL debug routes are closed when no PROFILE_TOKEN is configured."""
+    mocker.patch("meal_max.utils.profiling.PROFILE_TOKEN", "")
+
+    assert client.get("/api/debug/sql-traces", headers={'X-Profile-Token': ""}).status_code == 403
@@ -0,0 +1,186 @@
+from contextlib import contextmanager
+import os
+import random
+import re
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.models.battle_log_model import (
+    record_battle,
+    rebuild_stats,
+    take_snapshot
+)
+from meal_max.models.rating_model import replay_battles
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+def normalize_whitespace(sql_query: str) -> str:
+    return re.sub(r'\s+', ' ', sql_query).strip()
+
+# Mocking the database connection for tests
+@pytest.fixture
+def mock_cursor(mocker):
+    mock_conn = mocker.Mock()
+    mock_cursor = mocker.Mock()
+
+    # Mock the connection's cursor
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None  # Default return for queries
+    mock_cursor.fetchall.return_value = []
+    mock_cursor.lastrowid = 7
+    mock_conn.commit.return_value = None
+
+    # Mock the get_db_connection context manager from sql_utils
+    @contextmanager
+    def mock_get_db_connection():
+        yield mock_conn  # Yield the mocked connection object
+
+    mocker.patch("meal_max.models.battle_log_model.get_db_connection", mock_get_db_connection)
+
+    return mock_cursor  # Return the mock cursor so we can set expectations per test
+
+def executed_queries(mock_cursor):
+    return [normalize_whitespace(call[0][0]) for call in mock_cursor.execute.call_args_list]
+
+######################################################
+#
+#    Record battle
+#
+######################################################
+
+def test_record_battle(mock_cursor):
+    """Test recording a battle logs it and updates both meals' stats and ratings together."""
+    mock_cursor.fetchall.return_value = [(1, 1500.0, False), (2, 1500.0, False)]
+
+    assert record_battle(1, 2) == (1516.0, 1484.0)
+
+    assert executed_queries(mock_cursor)[0] == "BEGIN IMMEDIATE"
+    assert "INSERT INTO battles (winner_id, loser_id) VALUES (?, ?)" in executed_queries(mock_cursor)
+
+    update_query = normalize_whitespace(mock_cursor.executemany.call_args[0][0])
+    assert update_query == "UPDATE meals SET battles = battles + 1, wins = wins + ?, rating = ? WHERE id = ?"
+    assert mock_cursor.executemany.call_args[0][1] == [(1, 1516.0, 1), (0, 1484.0, 2)]
+
+    # Battle 7 is not on a snapshot boundary
+    assert not any("stat_snapshots" in query for query in executed_queries(mock_cursor))
+
+def test_record_battle_takes_snapshot(mock_cursor, mocker):
+    """Test that a snapshot is taken in the same transaction on every interval boundary."""
+    mocker.patch("meal_max.models.battle_log_model.BATTLE_SNAPSHOT_INTERVAL", 7)
+    mock_cursor.fetchall.return_value = [(1, 1500.0, False), (2, 1500.0, False)]
+
+    record_battle(1, 2)
+
+    assert "INSERT INTO stat_snapshots (last_battle_id) VALUES (?)" in executed_queries(mock_cursor)
+    assert "INSERT INTO meal_stat_snapshots (snapshot_id, meal_id, battles, wins) SELECT ?, id, battles, wins FROM meals" in executed_queries(mock_cursor)
+
+def test_record_battle_bad_id(mock_cursor):
+    """Test error when recording a battle for a meal that does not exist."""
+    mock_cursor.fetchall.return_value = [(1, 1500.0, False)]
+
+    with pytest.raises(ValueError, match="Meal with ID 2 not found"):
+        record_battle(1, 2)
+
+    mock_cursor.executemany.assert_not_called()
+
+def test_record_battle_deleted_meal(mock_cursor):
+    """Test error when recording a battle for a deleted meal."""
+    mock_cursor.fetchall.return_value = [(1, 1500.0, True), (2, 1500.0, False)]
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        record_battle(1, 2)
+
+    mock_cursor.executemany.assert_not_called()
+
+def test_concurrent_battles_not_lost(tmp_path, mocker):
+    """Test that battles recorded from many threads at once all count towards stats and ratings."""
+    db_path = str(tmp_path / "meal_max.db")
+    mocker.patch("meal_max.utils.sql_utils.DB_PATH", db_path)
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql")) as f:
+        create_table_script = f.read()
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(create_table_script)
+        conn.executemany("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, ?, ?, ?)",
+                         [(f"Meal {i}", "Italian", 10.0, "LOW") for i in range(1, 5)])
+
+    threads, battles_per_thread = 8, 25
+
+    def fight(seed):
+        generator = random.Random(seed)
+        for _ in range(battles_per_thread):
+            winner_id, loser_id = generator.sample(range(1, 5), 2)
+            record_battle(winner_id, loser_id)
+
+    workers = [threading.Thread(target=fight, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    total = threads * battles_per_thread
+    with sqlite3.connect(db_path) as conn:
+        battles, wins, rating_sum = conn.execute("SELECT SUM(battles), SUM(wins), SUM(rating) FROM meals").fetchone()
+        ratings = dict(conn.execute("SELECT id, rating FROM meals").fetchall())
+        log = conn.execute("SELECT winner_id, loser_id FROM battles ORDER BY id").fetchall()
+
+    assert (battles, wins, len(log)) == (2 * total, total, total)
+    assert rating_sum == pytest.approx(4 * 1500.0)
+    # Every battle was applied to the ratings left by the one logged before it
+    replayed = {meal_id: 1500.0 for meal_id in ratings}
+    replay_battles(log, replayed)
+    assert ratings == pytest.approx(replayed)
+
+######################################################
+#
+#    Snapshot and rebuild
+#
+######################################################
+
+def test_take_snapshot(mock_cursor):
+    """Test taking a snapshot as of the latest logged battle."""
+    mock_cursor.fetchone.return_value = (42,)
+
+    assert take_snapshot() == 7
+
+    assert mock_cursor.execute.call_args_list[2][0][1] == (42,)
+
+def test_rebuild_stats_from_snapshot(mock_cursor):
+    """Test rebuilding stats adds the log tail after the latest snapshot to the snapshot's counters."""
+    mock_cursor.fetchone.return_value = (3, 100)
+    mock_cursor.fetchall.side_effect = [
+        [(1,), (2,), (3,)],   # meals
+        [(1, 10, 6), (2, 10, 4)],  # snapshot counters
+        [(1, 2), (3, 1)],     # tail wins
+        [(2, 2), (1, 1)],     # tail losses
+    ]
+
+    assert rebuild_stats() == (3, 3)
+
+    tail_query = executed_queries(mock_cursor)[4]
+    assert tail_query == "SELECT winner_id, COUNT(*) FROM battles WHERE id > ? GROUP BY winner_id"
+    assert mock_cursor.execute.call_args_list[4][0][1] == (100,)
+
+    written = {meal_id: (battles, wins) for battles, wins, meal_id in mock_cursor.executemany.call_args[0][1]}
+    assert written == {1: (13, 8), 2: (12, 4), 3: (1, 1)}
+
+def test_rebuild_stats_from_scratch(mock_cursor):
+    """Test rebuilding stats from scratch replays the whole log and ignores snapshots."""
+    mock_cursor.fetchall.side_effect = [
+        [(1,), (2,)],  # meals
+        [(1, 1)],      # wins
+        [(2, 1)],      # losses
+    ]
+
+    assert rebuild_stats(from_scratch=True) == (None, 1)
+
+    assert not any("stat_snapshots" in query for query in executed_queries(mock_cursor))
+    assert mock_cursor.execute.call_args_list[2][0][1] == (0,)
+
+    written = {meal_id: (battles, wins) for battles, wins, meal_id in mock_cursor.executemany.call_args[0][1]}
+    assert written == {1: (1, 1), 2: (1, 0)}
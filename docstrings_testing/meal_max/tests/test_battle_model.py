@@ -9,10 +9,10 @@ def create_battle():
     return BattleModel()
 
 @pytest.fixture
-def mock_count(mocker):
+def mock_record_battle(mocker):
 
-     # Mocks the update_meal_stats method for testing.
-    return mocker.patch("meal_max.models.battle_model.update_meal_stats") 
+    # Mocks the record_battle method for testing.
+    return mocker.patch("meal_max.models.battle_model.record_battle")
 
 @pytest.fixture
 def sample_meal_1():
@@ -32,7 +32,7 @@ def collection(sample_meal_1, sample_meal_2):
     # Returns a list containing the two sample meals for use in tests
     return [sample_meal_1, sample_meal_2]  
 
-def test_first_win(create_battle, sample_meal_1, sample_meal_2, mock_count, mocker):
+def test_first_win(create_battle, sample_meal_1, sample_meal_2, mock_record_battle, mocker):
     """Confirm that sample_meal_1 is the battle's winner."""
 
     # Sets the fighters for the battle
@@ -50,11 +50,8 @@ def test_first_win(create_battle, sample_meal_1, sample_meal_2, mock_count, mock
     # Asserts that sample_meal_1 won
     assert winner == sample_meal_1.meal, f"Predicted winner is {sample_meal_1.meal}, but got {winner}" 
 
-    # Asserts that sample_meal_1's win count was updated
-    mock_count.assert_any_call(sample_meal_1.id, 'win')
-
-    # Asserts that sample_meal_2's loss count was updated
-    mock_count.assert_any_call(sample_meal_2.id, 'loss')
+    # Asserts that the battle was recorded with sample_meal_1 as the winner
+    mock_record_battle.assert_called_once_with(sample_meal_1.id, sample_meal_2.id)
 
     # Asserts that only one fighter remains
     assert len(create_battle.combatants) == 1 
@@ -62,7 +59,19 @@ def test_first_win(create_battle, sample_meal_1, sample_meal_2, mock_count, mock
     # Asserts that the remaining fighter is sample_meal_1
     assert create_battle.combatants[0] == sample_meal_1 
 
-def test_second_win(create_battle, sample_meal_1, sample_meal_2, mock_count, mocker):
+def test_battle_with_given_random_number(create_battle, sample_meal_1, sample_meal_2, mock_record_battle, mocker):
+    """Confirm that a random number passed in decides the battle without calling random.org."""
+    create_battle.combatants = [sample_meal_1, sample_meal_2]
+    mocker.patch.object(create_battle, 'get_battle_score', side_effect=[90, 85])
+    mock_random = mocker.patch("meal_max.models.battle_model.get_random")
+
+    winner = create_battle.battle(random_number=0.5)
+
+    assert winner == sample_meal_2.meal
+    mock_random.assert_not_called()
+    mock_record_battle.assert_called_once_with(sample_meal_2.id, sample_meal_1.id)
+
+def test_second_win(create_battle, sample_meal_1, sample_meal_2, mock_record_battle, mocker):
     """Confirm that sample_meal_2 is the battle's winner."""
 
     # Sets the fighters for the battle
@@ -80,11 +89,8 @@ def test_second_win(create_battle, sample_meal_1, sample_meal_2, mock_count, moc
     # Asserts that sample_meal_2 won
     assert winner == sample_meal_2.meal, f"Predicted winner is {sample_meal_2.meal}, but got {winner}" 
 
-    # Asserts that sample_meal_2's win count was updated
-    mock_count.assert_any_call(sample_meal_2.id, 'win') 
-
-    # Asserts that sample_meal_1's loss count was updated
-    mock_count.assert_any_call(sample_meal_1.id, 'loss') 
+    # Asserts that the battle was recorded with sample_meal_2 as the winner
+    mock_record_battle.assert_called_once_with(sample_meal_2.id, sample_meal_1.id)
     
     # Asserts that only one fighter remains
     assert len(create_battle.combatants) == 1
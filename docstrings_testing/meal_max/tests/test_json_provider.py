@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+import json
+
+from flask import Flask, jsonify
+import pytest
+
+from meal_max.models.kitchen_model import LeaderboardEntry, Meal
+from meal_max.utils.json_provider import ModelJSONProvider
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.json = ModelJSONProvider(app)
+    return app
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+######################################################
+#
+#    Serialization
+#
+######################################################
+
+def test_models_serialized_with_to_dict(app, mocker):
+    """Test that models in a response are serialized by their to_dict method."""
+    to_dict = mocker.spy(LeaderboardEntry, "to_dict")
+    leaderboard = [LeaderboardEntry(1, "Meal 1", "Cuisine 1", 20.0, "LOW", 3, 2, 66.7, 1516.0),
+                   LeaderboardEntry(2, "Meal 2", "Cuisine 2", 12.5, "MED", 3, 1, 33.3, 1484.0)]
+
+    with app.app_context():
+        body = json.loads(jsonify({'status': 'success', 'leaderboard': leaderboard}).get_data())
+
+    assert to_dict.call_count == 2
+    assert body['leaderboard'] == [meal.to_dict() for meal in leaderboard]
+
+def test_meal_json(app):
+    """Test that a meal serializes to the same JSON as its dataclass fields."""
+    meal = Meal(1, "Meal 1", "Cuisine 1", 20.0, "LOW")
+
+    assert json.loads(app.json.dumps(meal)) == {
+        "id": 1, "meal": "Meal 1", "cuisine": "Cuisine 1", "price": 20.0, "difficulty": "LOW"
+    }
+
+def test_other_dataclasses_unchanged(app):
+    """Test that dataclasses without to_dict are still serialized by Flask's default."""
+    assert json.loads(app.json.dumps(Point(1, 2))) == {"x": 1, "y": 2}
@@ -1,17 +1,22 @@
 from contextlib import contextmanager
+import os
 import re
 import sqlite3
 
 import pytest
 
 from meal_max.models.kitchen_model import (
+    LeaderboardEntry,
     Meal,
     create_meal,
     clear_meals,
     delete_meal,
+    get_group_leaderboard,
     get_leaderboard,
     get_meal_by_id,
     get_meal_by_name,
+    leaderboard_row_factory,
+    meal_row_factory,
     update_meal_stats
 )
 
@@ -34,6 +39,11 @@ def mock_cursor(mocker):
     mock_conn.cursor.return_value = mock_cursor
     mock_cursor.fetchone.return_value = None  # Default return for queries
     mock_cursor.fetchall.return_value = []
+    # Like sqlite3, pass the fetched rows through the cursor's row_factory when one is set
+    mock_cursor.row_factory = None
+    mock_cursor.fetchall.side_effect = lambda: [
+        mock_cursor.row_factory(mock_cursor, row) if mock_cursor.row_factory else row for row in mock_cursor.fetchall.return_value
+    ]
     mock_conn.commit.return_value = None
 
     # Mock the get_db_connection context manager from sql_utils
@@ -241,8 +251,8 @@ def test_get_leaderboard(mock_cursor):
 
     # Simulate that there are multiple songs in the database
     mock_cursor.fetchall.return_value = [
-        (1, "Meal 1", "Cuisine 1", 20.0, "LOW", 3, 1, .33),
-        (2, "Meal 2", "Cuisine 2", 20.0, "MED", 3, 2, .66)
+        (1, "Meal 1", "Cuisine 1", 20.0, "LOW", 3, 1, .33, 1484.04),
+        (2, "Meal 2", "Cuisine 2", 20.0, "MED", 3, 2, .66, 1515.96)
     ]
 
     # Call the get_all_songs function with sort_by_play_count = True
@@ -250,8 +260,8 @@ def test_get_leaderboard(mock_cursor):
 
     # Ensure the results are sorted by play count
     expected_result = [
- {'id': 1, 'meal': 'Meal 1', 'cuisine': 'Cuisine 1', 'price': 20.0, 'difficulty': 'LOW', 'battles': 3, 'wins': 1, 'win_pct': 33.0},
- {'id': 2, 'meal': 'Meal 2', 'cuisine': 'Cuisine 2', 'price': 20.0, 'difficulty': 'MED', 'battles': 3, 'wins': 2, 'win_pct': 66.0}
+ LeaderboardEntry(1, "Meal 1", "Cuisine 1", 20.0, "LOW", 3, 1, 33.0, 1484.0),
+ LeaderboardEntry(2, "Meal 2", "Cuisine 2", 20.0, "MED", 3, 2, 66.0, 1516.0)
     ]
 
     assert leaderboard == expected_result, f"Expected {expected_result}, but got {leaderboard}"
@@ -259,7 +269,7 @@ def test_get_leaderboard(mock_cursor):
     # Ensure the SQL query was executed correctly
     expected_query = normalize_whitespace("""
         SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles)
-        AS win_pct 
+        AS win_pct, rating
         FROM meals
         WHERE deleted = false
         AND battles > 0 ORDER
@@ -270,6 +280,68 @@ def test_get_leaderboard(mock_cursor):
 
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
+def test_get_leaderboard_by_rating(mock_cursor):
+    """Test that the leaderboard can be sorted by rating."""
+    get_leaderboard(sort_by="rating")
+
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query.endswith("ORDER BY rating DESC"), "The leaderboard should be sorted by rating."
+
+def test_get_leaderboard_invalid_sort(mock_cursor):
+    """Test error when sorting the leaderboard by an unknown field."""
+    with pytest.raises(ValueError, match="Invalid sort_by parameter: battles"):
+        get_leaderboard(sort_by="battles")
+
+def test_get_group_leaderboard(mock_cursor):
+    """Test retrieving the cuisine leaderboard from the summary table."""
+    mock_cursor.fetchall.return_value = [
+        ("Italian", 2, 6, 4, 4 / 6, 1510.25),
+        ("Mexican", 1, 6, 2, 2 / 6, 1479.5)
+    ]
+
+    leaderboard = get_group_leaderboard("cuisine", sort_by="win_pct")
+
+    expected_result = [
+        {'cuisine': 'Italian', 'meals': 2, 'battles': 6, 'wins': 4, 'win_pct': 66.7, 'rating': 1510.2},
+        {'cuisine': 'Mexican', 'meals': 1, 'battles': 6, 'wins': 2, 'win_pct': 33.3, 'rating': 1479.5}
+    ]
+    assert leaderboard == expected_result, f"Expected {expected_result}, but got {leaderboard}"
+
+    expected_query = normalize_whitespace("""
+        SELECT cuisine, meals, battles, wins, (wins * 1.0 / battles) AS win_pct, (rating_total / meals) AS rating
+        FROM cuisine_stats WHERE meals > 0 AND battles > 0 ORDER BY win_pct DESC
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+def test_get_group_leaderboard_invalid_group(mock_cursor):
+    """Test error when grouping the leaderboard by an unknown field."""
+    with pytest.raises(ValueError, match="Invalid group_by parameter: price"):
+        get_group_leaderboard("price")
+
+def test_group_stats_triggers():
+    """Test that the summary tables follow inserts, stat updates and soft deletes of meals."""
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql")) as fh:
+        create_table_script = fh.read()
+
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(create_table_script)
+    conn.executemany("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, ?, ?, ?)", [
+        ("Meal 1", "Italian", 10.0, "LOW"),
+        ("Meal 2", "Italian", 12.0, "HIGH"),
+        ("Meal 3", "Mexican", 8.0, "LOW"),
+    ])
+    conn.execute("UPDATE meals SET battles = battles + 1, wins = wins + 1, rating = 1516 WHERE id = 1")
+    conn.execute("UPDATE meals SET battles = battles + 1, rating = 1484 WHERE id = 3")
+    conn.execute("UPDATE meals SET deleted = TRUE WHERE id = 2")
+
+    cuisine_stats = conn.execute("SELECT cuisine, meals, battles, wins, rating_total FROM cuisine_stats ORDER BY cuisine").fetchall()
+    difficulty_stats = conn.execute("SELECT difficulty, meals, battles, wins, rating_total FROM difficulty_stats ORDER BY difficulty").fetchall()
+
+    assert cuisine_stats == [("Italian", 1, 1, 1, 1516.0), ("Mexican", 1, 1, 0, 1484.0)]
+    assert difficulty_stats == [("HIGH", 0, 0, 0, 0.0), ("LOW", 2, 2, 1, 3000.0)]
+
 def test_get_meal_by_name(mock_cursor):
     # Simulate that the song exists (artist = "Artist Name", title = "Song Title", year = 2022)
     mock_cursor.fetchone.return_value = (1, "Meal 1", "Cuisine 1", 20.0, "LOW", False)
@@ -296,3 +368,54 @@ def test_get_meal_by_name(mock_cursor):
     # Assert that the SQL query was executed with the correct arguments
     expected_arguments = ("Meal 1",)
     assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
+
+######################################################
+#
+#    Row mapping and serialization
+#
+######################################################
+
+def test_meal_has_no_instance_dict():
+    """Test that meals store their fields in slots rather than a per-instance dict."""
+    meal = LeaderboardEntry(1, "Meal 1", "Cuisine 1", 20.0, "LOW", 3, 1, 33.3, 1484.0)
+
+    assert not hasattr(meal, "__dict__")
+    with pytest.raises(AttributeError):
+        meal.chef = "Chef"
+
+def test_meal_to_dict():
+    """Test that a meal serializes to its fields, with the battle statistics for leaderboard entries."""
+    assert Meal(1, "Meal 1", "Cuisine 1", 20.0, "LOW").to_dict() == {
+        'id': 1, 'meal': 'Meal 1', 'cuisine': 'Cuisine 1', 'price': 20.0, 'difficulty': 'LOW'
+    }
+    assert LeaderboardEntry(1, "Meal 1", "Cuisine 1", 20.0, "LOW", 3, 1, 33.3, 1484.0).to_dict() == {
+        'id': 1, 'meal': 'Meal 1', 'cuisine': 'Cuisine 1', 'price': 20.0, 'difficulty': 'LOW',
+        'battles': 3, 'wins': 1, 'win_pct': 33.3, 'rating': 1484.0
+    }
+
+def test_row_factories():
+    """Test that a sqlite3 cursor with a meal row factory returns meals."""
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    row = "SELECT 1, 'Meal 1', 'Cuisine 1', 20.0, 'LOW', 3, 1, 1.0 / 3, 1484.04"
+
+    cursor.row_factory = meal_row_factory
+    assert cursor.execute(row).fetchall() == [Meal(1, "Meal 1", "Cuisine 1", 20.0, "LOW")]
+
+    cursor.row_factory = leaderboard_row_factory
+    assert cursor.execute(row).fetchone() == LeaderboardEntry(1, "Meal 1", "Cuisine 1", 20.0, "LOW", 3, 1, 33.3, 1484.0)
+
+def test_leaderboard_row_factory_does_not_validate():
+    """Test that leaderboard rows the schema allows are listed even when they would not make a valid Meal."""
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.row_factory = leaderboard_row_factory
+
+    entry = cursor.execute("SELECT 1, 'Meal 1', 'Cuisine 1', -20.0, NULL, 3, 1, 1.0 / 3, NULL").fetchone()
+
+    assert entry == LeaderboardEntry(1, "Meal 1", "Cuisine 1", -20.0, None, 3, 1, 33.3, None)
+
+def test_row_factory_validates():
+    """Test that rows are validated like meals built by hand."""
+    with pytest.raises(ValueError, match="Difficulty must be 'LOW', 'MED', or 'HIGH'."):
+        meal_row_factory(None, (1, "Meal 1", "Cuisine 1", 20.0, "EASY"))
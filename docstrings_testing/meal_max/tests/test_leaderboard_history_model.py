@@ -0,0 +1,167 @@
+from contextlib import contextmanager
+import threading
+
+import pytest
+
+from meal_max.models.kitchen_model import LeaderboardEntry
+from meal_max.models.leaderboard_history_model import LeaderboardSnapshotter, get_leaderboard_as_of, parse_as_of, take_leaderboard_snapshot
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+# Mocking the database connection for tests
+@pytest.fixture
+def mock_cursor(mocker):
+    mock_conn = mocker.Mock()
+    mock_cursor = mocker.Mock()
+
+    # Mock the connection's cursor
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None  # Default return for queries
+    mock_cursor.fetchall.return_value = []
+    mock_cursor.lastrowid = 5
+    mock_conn.commit.return_value = None
+
+    # Mock the get_db_connection context manager from sql_utils
+    @contextmanager
+    def mock_get_db_connection():
+        yield mock_conn  # Yield the mocked connection object
+
+    mocker.patch("meal_max.models.leaderboard_history_model.get_db_connection", mock_get_db_connection)
+
+    return mock_cursor  # Return the mock cursor so we can set expectations per test
+
+CURRENT_MEALS = [
+    (1, 3, 2, 1510.0, False),
+    (2, 3, 1, 1490.0, False),
+    (3, 0, 0, 1500.0, False),
+]
+
+def snapshot_rows(mock_cursor):
+    return [row[1:] for row in mock_cursor.executemany.call_args[0][1]]
+
+######################################################
+#
+#    Snapshots
+#
+######################################################
+
+def test_first_snapshot_is_full(mock_cursor):
+    """Test that the first snapshot stores every meal."""
+    mock_cursor.fetchall.return_value = CURRENT_MEALS
+    mock_cursor.fetchone.return_value = (None,)
+
+    assert take_leaderboard_snapshot(taken_at=1000) == 5
+
+    assert mock_cursor.execute.call_args_list[-1][0][1] == (1000, True, 3)
+    assert snapshot_rows(mock_cursor) == [meal[:4] + (False,) for meal in CURRENT_MEALS]
+
+def test_delta_snapshot_stores_changed_meals(mock_cursor):
+    """Test that a delta snapshot stores only the meals that changed or are new."""
+    mock_cursor.fetchall.side_effect = [
+        CURRENT_MEALS,
+        [(1, 2, 1, 1495.0, False), (2, 3, 1, 1490.0, False)],  # state as of the previous snapshot
+    ]
+    mock_cursor.fetchone.side_effect = [(1,), (2, 1, 1)]
+
+    take_leaderboard_snapshot(taken_at=2000)
+
+    assert mock_cursor.execute.call_args_list[-1][0][1] == (2000, False, 2)
+    assert snapshot_rows(mock_cursor) == [(1, 3, 2, 1510.0, False), (3, 0, 0, 1500.0, False)]
+
+def test_keyframe_after_interval(mock_cursor, mocker):
+    """Test that a full snapshot is taken once the keyframe interval is reached."""
+    mocker.patch("meal_max.models.leaderboard_history_model.LEADERBOARD_KEYFRAME_INTERVAL", 2)
+    mock_cursor.fetchall.return_value = CURRENT_MEALS
+    mock_cursor.fetchone.side_effect = [(1,), (3, 2, 0)]
+
+    take_leaderboard_snapshot(taken_at=3000)
+
+    assert mock_cursor.execute.call_args_list[-1][0][1] == (3000, True, 3)
+
+def test_keyframe_when_deltas_outgrow_full_snapshot(mock_cursor):
+    """Test that a full snapshot is taken once the deltas hold as many rows as a full one."""
+    mock_cursor.fetchall.return_value = CURRENT_MEALS
+    mock_cursor.fetchone.side_effect = [(1,), (3, 2, 3)]
+
+    take_leaderboard_snapshot(taken_at=3000)
+
+    assert mock_cursor.execute.call_args_list[-1][0][1] == (3000, True, 3)
+
+######################################################
+#
+#    Point-in-time leaderboard
+#
+######################################################
+
+def test_get_leaderboard_as_of(mock_cursor):
+    """Test reconstructing a leaderboard by applying deltas to the nearest full snapshot."""
+    mock_cursor.fetchone.side_effect = [(3,), (1,)]
+    mock_cursor.fetchall.side_effect = [
+        [
+            (1, 1, 0, 1484.0, False), (2, 1, 1, 1516.0, False), (3, 0, 0, 1500.0, False),  # full snapshot 1
+            (1, 2, 1, 1500.0, False),  # delta snapshot 2
+            (3, 1, 0, 1484.0, True),   # delta snapshot 3
+        ],
+        [(1, "Meal 1", "Cuisine 1", 20.0, "LOW"), (2, "Meal 2", "Cuisine 2", 20.0, "MED"), (3, "Meal 3", "Cuisine 3", 20.0, "HIGH")],
+    ]
+
+    leaderboard = get_leaderboard_as_of(3500, sort_by="rating")
+
+    assert leaderboard == [
+        LeaderboardEntry(2, "Meal 2", "Cuisine 2", 20.0, "MED", 1, 1, 100.0, 1516.0),
+        LeaderboardEntry(1, "Meal 1", "Cuisine 1", 20.0, "LOW", 2, 1, 50.0, 1500.0),
+    ]
+    assert mock_cursor.execute.call_args_list[2][0][1] == (1, 3)
+
+def test_get_leaderboard_as_of_before_first_snapshot(mock_cursor):
+    """Test error when no snapshot was taken before the requested time."""
+    mock_cursor.fetchone.return_value = (None,)
+
+    with pytest.raises(ValueError, match="No leaderboard snapshot at or before 100"):
+        get_leaderboard_as_of(100)
+
+def test_get_leaderboard_as_of_invalid_sort(mock_cursor):
+    """Test error when sorting a point-in-time leaderboard by an unknown field."""
+    with pytest.raises(ValueError, match="Invalid sort_by parameter: battles"):
+        get_leaderboard_as_of(100, sort_by="battles")
+
+@pytest.mark.parametrize("value, expected", [
+    ("1792389600", 1792389600),
+    ("2026-10-19T06:00:00Z", 1792389600),
+    ("2026-10-19T06:00:00+00:00", 1792389600),
+    ("2026-10-19T08:00:00+02:00", 1792389600),
+    ("2026-10-19T06:00:00", 1792389600),
+    ("2026-10-19", 1792368000),
+])
+def test_parse_as_of(value, expected):
+    """Test that as_of accepts unix timestamps and ISO 8601 dates, reading Z and naive times as UTC."""
+    assert parse_as_of(value) == expected
+
+def test_parse_as_of_invalid():
+    """Test error when as_of is neither a unix timestamp nor an ISO 8601 date."""
+    with pytest.raises(ValueError):
+        parse_as_of("yesterday")
+
+######################################################
+#
+#    Snapshotter
+#
+######################################################
+
+def test_snapshotter_snapshots_at_start(mocker):
+    """Test that a snapshot is taken as soon as the snapshotter starts, not one interval later."""
+    snapshots = threading.Event()
+    take = mocker.patch("meal_max.models.leaderboard_history_model.take_leaderboard_snapshot", side_effect=lambda: snapshots.set())
+    snapshotter = LeaderboardSnapshotter()
+
+    snapshotter.start(interval=3600)
+    try:
+        assert snapshots.wait(5)
+    finally:
+        snapshotter.stop()
+
+    take.assert_called_once_with()
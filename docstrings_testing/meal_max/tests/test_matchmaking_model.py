@@ -0,0 +1,214 @@
+import random
+
+import pytest
+
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.matchmaking_model import MatchmakingQueue, MatchmakingService
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def queue():
+    """Fixture to provide a queue that accepts a 100 point gap, widening by 10 points a second."""
+    return MatchmakingQueue(rating_gap=100, gap_growth=10)
+
+@pytest.fixture
+def service(queue, mocker):
+    """Fixture to provide a matchmaking service whose meals are all rated 1500."""
+    mocker.patch("meal_max.models.matchmaking_model.get_rating", return_value=1500.0)
+    return MatchmakingService(queue)
+
+@pytest.fixture
+def mock_battle(mocker):
+    """Fixture to make every battle won by the first combatant."""
+    def battle(battle_model):
+        return battle_model.combatants[0].meal
+    return mocker.patch("meal_max.models.matchmaking_model.BattleModel.battle", autospec=True, side_effect=battle)
+
+def make_meal(meal_id: int) -> Meal:
+    return Meal(meal_id, f"Meal {meal_id}", "Cuisine", 10.0, "MED")
+
+######################################################
+#
+#    Queue
+#
+######################################################
+
+def test_pop_match_pairs_closest_rating(queue):
+    """Test that the oldest meal is paired with the closest rated meal, not the next queued one."""
+    queue.enqueue(make_meal(1), 1500)
+    queue.enqueue(make_meal(2), 1590)
+    queue.enqueue(make_meal(3), 1520)
+
+    entry, opponent = queue.pop_match()
+
+    assert (entry.meal.id, opponent.meal.id) == (1, 3)
+    assert queue.depth() == 1
+    assert list(queue.entries) == [2]
+
+def test_pop_match_outside_gap(queue):
+    """Test that meals further apart than the accepted gap are not paired."""
+    first = queue.enqueue(make_meal(1), 1500)
+    queue.enqueue(make_meal(2), 1700)
+
+    assert queue.pop_match(now=first.enqueued_at) is None
+    assert queue.depth() == 2
+
+def test_pop_match_gap_widens_with_wait(queue):
+    """Test that the accepted gap widens the longer a meal waits."""
+    first = queue.enqueue(make_meal(1), 1500)
+    queue.enqueue(make_meal(2), 1700)
+
+    # 100 point base gap plus 10 points a second for 10 seconds covers the 200 point gap
+    match = queue.pop_match(now=first.enqueued_at + 10)
+
+    assert match is not None
+    assert {entry.meal.id for entry in match} == {1, 2}
+
+def test_pop_match_younger_pair(queue):
+    """Test that a close pair is matched even when the oldest meal has no opponent within its gap."""
+    first = queue.enqueue(make_meal(1), 1000)
+    queue.enqueue(make_meal(2), 1500)
+    queue.enqueue(make_meal(3), 1510)
+
+    entry, opponent = queue.pop_match(now=first.enqueued_at)
+
+    assert (entry.meal.id, opponent.meal.id) == (2, 3)
+    assert list(queue.entries) == [1]
+
+def test_pop_match_matches_brute_force(queue):
+    """Test that queueing, removing and matching in any order pops the pair that became matchable first."""
+    generator = random.Random(7)
+    start = queue.enqueue(make_meal(0), 1500).enqueued_at
+    next_id = 1
+    for step in range(500):
+        now = start + step * 0.1
+        action = generator.random()
+        if action < 0.5:
+            queue.enqueue(make_meal(next_id), generator.uniform(1000, 2000))
+            next_id += 1
+        elif action < 0.6 and queue.entries:
+            queue.dequeue(generator.choice(list(queue.entries)))
+        else:
+            ranked = sorted(queue.entries.values(), key=lambda entry: (entry.rating, entry.meal.id))
+            pairs = [
+                (upper.rating - lower.rating - 10 * (now - min(lower.enqueued_at, upper.enqueued_at)), {lower.meal.id, upper.meal.id})
+                for lower, upper in zip(ranked, ranked[1:])
+            ]
+            matchable = [pair for pair in pairs if pair[0] <= 100]
+            match = queue.pop_match(now=now)
+            if not matchable:
+                assert match is None
+            else:
+                assert {entry.meal.id for entry in match} == min(matchable, key=lambda pair: pair[0])[1]
+    assert len(queue._pairs) <= 2 * len(queue.entries) + 16
+
+def test_pop_match_single_meal(queue):
+    """Test that a lone meal is not matched."""
+    queue.enqueue(make_meal(1), 1500)
+
+    assert queue.pop_match() is None
+
+def test_enqueue_twice(queue):
+    """Test error when queueing a meal that is already queued."""
+    queue.enqueue(make_meal(1), 1500)
+
+    with pytest.raises(ValueError, match="Meal 'Meal 1' is already queued"):
+        queue.enqueue(make_meal(1), 1500)
+
+def test_dequeue(queue):
+    """Test removing a meal from the queue."""
+    queue.enqueue(make_meal(1), 1500)
+    queue.enqueue(make_meal(2), 1500)
+
+    queue.dequeue(1)
+
+    assert list(queue.entries) == [2]
+    assert queue.pop_match() is None
+
+def test_dequeue_not_queued(queue):
+    """Test error when removing a meal that is not queued."""
+    with pytest.raises(ValueError, match="Meal with ID 1 is not queued"):
+        queue.dequeue(1)
+
+######################################################
+#
+#    Service
+#
+######################################################
+
+def test_run_once_battles_match(service, mock_battle):
+    """Test that a matched pair is battled and the result recorded in the metrics."""
+    service.enqueue(make_meal(1))
+    service.enqueue(make_meal(2))
+
+    result = service.run_once()
+
+    assert result['combatants'] == ['Meal 1', 'Meal 2']
+    assert result['winner'] == 'Meal 1'
+    assert list(service.recent_matches) == [result]
+
+    metrics = service.get_metrics()
+    assert metrics['queue_depth'] == 0
+    assert metrics['matches_played'] == 1
+    assert metrics['matches_failed'] == 0
+
+def test_run_once_no_match(service, mock_battle):
+    """Test that nothing is battled when no pair can be made."""
+    service.enqueue(make_meal(1))
+
+    assert service.run_once() is None
+    mock_battle.assert_not_called()
+
+def test_run_once_requeue(service, mock_battle):
+    """Test that meals queued with requeue rejoin the queue after their battle."""
+    service.enqueue(make_meal(1), requeue=True)
+    service.enqueue(make_meal(2))
+
+    service.run_once()
+
+    assert list(service.queue.entries) == [1]
+
+def test_run_once_failed_battle(service, mocker):
+    """Test that a failed battle is counted and its meals are dropped rather than requeued."""
+    mocker.patch("meal_max.models.matchmaking_model.BattleModel.battle", side_effect=ValueError("Meal with ID 2 has been deleted"))
+    service.enqueue(make_meal(1), requeue=True)
+    service.enqueue(make_meal(2), requeue=True)
+
+    result = service.run_once()
+
+    assert result['winner'] is None
+    assert service.get_metrics()['matches_failed'] == 1
+    assert not service.recent_matches
+    assert service.queue.depth() == 0
+
+def test_enqueue_deleted_meal(service, mocker):
+    """Test that a meal whose rating cannot be read, such as a deleted one, is not queued."""
+    mocker.patch("meal_max.models.matchmaking_model.get_rating", side_effect=ValueError("Meal with ID 1 has been deleted"))
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        service.enqueue(make_meal(1))
+    assert service.queue.depth() == 0
+
+def test_match_loop_backs_off_after_failed_battle(service, mocker):
+    """Test that the loop waits for the interval after a failed battle instead of retrying at once."""
+    battle = mocker.patch("meal_max.models.matchmaking_model.BattleModel.battle", side_effect=RuntimeError("random.org is down"))
+    for meal_id in range(1, 5):
+        service.enqueue(make_meal(meal_id))
+
+    service.start(interval=60)
+    try:
+        for _ in range(200):
+            if service.matches_failed:
+                break
+            service._stop.wait(0.01)
+        service._stop.wait(0.1)
+    finally:
+        service.stop()
+
+    assert battle.call_count == 1
+    assert service.queue.depth() == 2
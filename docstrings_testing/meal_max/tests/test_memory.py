@@ -0,0 +1,140 @@
+import pytest
+
+from meal_max.utils.memory import (
+    compare_snapshots,
+    memory_summary,
+    read_gauges,
+    register_gauge,
+    start_tracing,
+    stop_tracing,
+    take_snapshot,
+    top_allocations
+)
+from meal_max.utils.metrics import render_metrics
+from meal_max.utils import sql_utils
+from meal_max.utils.sql_utils import get_db_connection, open_connection_count
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def tracing():
+    """Traces allocations for the test, then stops tracing and discards the snapshots."""
+    start_tracing(5)
+    yield
+    stop_tracing()
+
+@pytest.fixture
+def gauges(mocker):
+    """Registers gauges into empty registries, restored after the test."""
+    mocker.patch("meal_max.utils.memory._gauges", {})
+    mocker.patch("meal_max.utils.metrics._registry", [])
+
+def allocate_blocks():
+    return [bytearray(1000) for _ in range(100)]
+
+######################################################
+#
+#    Gauges
+#
+######################################################
+
+def test_read_gauges(gauges):
+    """Test that gauges are read when asked for, and a failing gauge reads as None."""
+    sizes = [1, 2]
+    register_gauge("test_list_size", "Size of a list.", lambda: len(sizes))
+    register_gauge("test_broken", "Always fails.", lambda: 1 / 0)
+
+    sizes.append(3)
+
+    assert read_gauges() == {'test_list_size': 3, 'test_broken': None}
+
+def test_gauges_in_metrics(gauges):
+    """Test that gauges are exported on /api/metrics, and a failing one is left out."""
+    register_gauge("test_answer", "The answer.", lambda: 42)
+    register_gauge("test_broken_metric", "Always fails.", lambda: 1 / 0)
+
+    text = render_metrics()
+
+    assert text == (
+        "# HELP test_answer The answer.\n# TYPE test_answer gauge\ntest_answer 42\n"
+        "# HELP test_broken_metric Always fails.\n# TYPE test_broken_metric gauge\n"
+    )
+
+def test_open_connection_count(tmp_path, monkeypatch):
+    """Test that connections are counted while open."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "memory.db"))
+    before = open_connection_count()
+
+    with get_db_connection():
+        assert open_connection_count() == before + 1
+
+    assert open_connection_count() == before
+
+def test_memory_summary_not_tracing():
+    """Test that the summary reports tracemalloc as off by default."""
+    summary = memory_summary()
+
+    assert summary['tracemalloc']['tracing'] is False
+    assert summary['snapshots'] == []
+    assert summary['gauges']['db_connections_open'] == open_connection_count()
+
+######################################################
+#
+#    Snapshots
+#
+######################################################
+
+def test_snapshot_requires_tracing():
+    """Test that snapshots cannot be taken while tracing is off."""
+    with pytest.raises(ValueError, match="not tracing"):
+        take_snapshot("before")
+    with pytest.raises(ValueError, match="not tracing"):
+        top_allocations()
+
+def test_compare_snapshots(tracing):
+    """Test that the allocations made between two snapshots are attributed to their line."""
+    take_snapshot("before")
+    blocks = allocate_blocks()
+    take_snapshot("after")
+
+    diff = compare_snapshots("before", "after", limit=1)
+
+    assert "test_memory.py" in diff[0]['location']
+    assert diff[0]['size_diff_bytes'] >= 100 * 1000
+    assert diff[0]['count_diff'] >= 100
+    assert len(blocks) == 100
+
+def test_top_allocations_traceback(tracing):
+    """Test that grouping by traceback reports the calling frames."""
+    blocks = allocate_blocks()
+    take_snapshot("now")
+
+    top = top_allocations("now", limit=1, group_by="traceback")
+
+    assert isinstance(top[0]['location'], list)
+    assert any("test_memory.py" in frame for frame in top[0]['location'])
+    assert len(blocks) == 100
+
+def test_snapshot_limit(tracing, mocker):
+    """Test that only the most recent MAX_SNAPSHOTS snapshots are kept."""
+    mocker.patch("meal_max.utils.memory.MAX_SNAPSHOTS", 2)
+
+    for name in ("one", "two", "three"):
+        take_snapshot(name)
+
+    assert memory_summary()['snapshots'] == ["two", "three"]
+
+def test_unknown_snapshot(tracing):
+    """Test that comparing with an unknown snapshot raises an error."""
+    with pytest.raises(ValueError, match="Snapshot missing not found"):
+        compare_snapshots("missing")
+
+def test_invalid_group_by(tracing):
+    """Test that an unknown grouping raises an error."""
+    with pytest.raises(ValueError, match="group_by must be one of"):
+        top_allocations(group_by="module")
@@ -0,0 +1,122 @@
+import marshal
+import threading
+
+import pytest
+
+from meal_max.utils.profiling import (
+    clear_profiles,
+    finish_profile,
+    get_profile_dump,
+    get_profile_report,
+    is_authorized,
+    list_profiles,
+    start_profile
+)
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def profiling(mocker):
+    """Configures a profiling token and no sampling, with no stored profiles."""
+    mocker.patch("meal_max.utils.profiling.PROFILE_TOKEN", "secret")
+    mocker.patch("meal_max.utils.profiling.PROFILE_SAMPLE_RATE", 0)
+    clear_profiles()
+    yield
+    clear_profiles()
+
+def slow_handler():
+    return sum(i * i for i in range(10000))
+
+def profile_request(flag, token, status=200):
+    """Runs slow_handler between the profiling hooks, as a request would, and returns the profile id."""
+    start_profile(flag, token)
+    slow_handler()
+    return finish_profile("/api/test", "GET", status)
+
+######################################################
+#
+#    Access
+#
+######################################################
+
+def test_is_authorized(profiling):
+    """Test that only the configured token is accepted."""
+    assert is_authorized("secret")
+    assert not is_authorized("wrong")
+    assert not is_authorized(None)
+
+def test_is_authorized_without_token(mocker):
+    """Test that no token is accepted when none is configured."""
+    mocker.patch("meal_max.utils.profiling.PROFILE_TOKEN", "")
+
+    assert not is_authorized("")
+
+def test_profile_requires_token(profiling):
+    """Test that ?__profile=1 without a valid token does not profile the request."""
+    assert profile_request("1", "wrong") is None
+    assert profile_request(None, "secret") is None
+    assert list_profiles() == []
+
+######################################################
+#
+#    Profiles
+#
+######################################################
+
+def test_profile_report(profiling):
+    """Test that a profiled request stores a report naming its functions."""
+    profile_id = profile_request("1", "secret", status=201)
+
+    assert [profile['id'] for profile in list_profiles()] == [profile_id]
+    assert list_profiles()[0]['status'] == 201
+    assert list_profiles()[0]['sampled'] is False
+
+    report = get_profile_report(profile_id)
+    assert report.startswith("GET /api/test -> 201 in ")
+    assert "slow_handler" in report
+    assert "was called by" in report
+
+def test_profile_dump(profiling):
+    """Test that the binary dump holds the pstats data."""
+    profile_id = profile_request("1", "secret")
+
+    stats = marshal.loads(get_profile_dump(profile_id))
+
+    assert any(function == "slow_handler" for _, _, function in stats)
+
+def test_profile_sampled(profiling, mocker):
+    """Test that sampled requests are profiled without asking."""
+    mocker.patch("meal_max.utils.profiling.PROFILE_SAMPLE_RATE", 1.0)
+
+    profile_id = profile_request(None, None)
+
+    assert list_profiles()[0]['id'] == profile_id
+    assert list_profiles()[0]['sampled'] is True
+
+def test_profile_one_at_a_time(profiling):
+    """Test that a request asking while another is profiled is served without profiling."""
+    results = []
+    start_profile("1", "secret")
+    try:
+        other = threading.Thread(target=lambda: results.append(profile_request("1", "secret")))
+        other.start()
+        other.join()
+    finally:
+        profile_id = finish_profile("/api/test", "GET", 200)
+
+    assert results == [None]
+    assert [profile['id'] for profile in list_profiles()] == [profile_id]
+
+def test_profile_history_limit(profiling, mocker):
+    """Test that only the most recent PROFILE_HISTORY profiles are kept."""
+    mocker.patch("meal_max.utils.profiling.PROFILE_HISTORY", 2)
+
+    profile_ids = [profile_request("1", "secret") for _ in range(3)]
+
+    assert [profile['id'] for profile in list_profiles()] == profile_ids[:0:-1]
+    assert get_profile_report(profile_ids[0]) is None
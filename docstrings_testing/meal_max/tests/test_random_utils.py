@@ -1,6 +1,8 @@
+import asyncio
+
 import pytest
 import requests
-from meal_max.utils.random_utils import get_random
+from meal_max.utils.random_utils import get_random, get_random_async
 
 
 RANDOM_NUMBER = 15  # Expected random value for testing purposes
@@ -50,4 +52,27 @@ def test_get_random_number_invalid_response(mock_random_service):
     mock_random_service.text = "invalid_response" 
     # Makes sure that a ValueError is raised with the correct error message for invalid response
     with pytest.raises(ValueError, match=r"Invalid response from random\.org: invalid_response"):
-        get_random()
\ No newline at end of file
+        get_random()
+
+def test_get_random_number_async(mocker):
+    """Verify retrieval of the random number from random.org without blocking the event loop."""
+    mock_fetch = mocker.patch("meal_max.utils.random_utils._fetch_text", mocker.AsyncMock(return_value="0.42\n"))
+
+    assert asyncio.run(get_random_async()) == 0.42
+    mock_fetch.assert_called_once_with("https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new")
+
+
+def test_get_random_number_async_timeout(mocker):
+    """Simulate a timeout error in the async client."""
+    mocker.patch("meal_max.utils.random_utils._fetch_text", mocker.AsyncMock(side_effect=asyncio.TimeoutError))
+
+    with pytest.raises(RuntimeError, match=r"Request to random\.org timed out\."):
+        asyncio.run(get_random_async())
+
+
+def test_get_random_number_async_invalid_response(mocker):
+    """Handle non-numeric response from random.org in the async client."""
+    mocker.patch("meal_max.utils.random_utils._fetch_text", mocker.AsyncMock(return_value="invalid_response"))
+
+    with pytest.raises(ValueError, match=r"Invalid response from random\.org: invalid_response"):
+        asyncio.run(get_random_async())
@@ -0,0 +1,132 @@
+from contextlib import contextmanager
+import re
+
+import pytest
+
+from meal_max.models.rating_model import (
+    INITIAL_RATING,
+    elo_update,
+    expected_score,
+    get_rating,
+    recompute_ratings,
+    replay_battles
+)
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+def normalize_whitespace(sql_query: str) -> str:
+    return re.sub(r'\s+', ' ', sql_query).strip()
+
+# Mocking the database connection for tests
+@pytest.fixture
+def mock_cursor(mocker):
+    mock_conn = mocker.Mock()
+    mock_cursor = mocker.Mock()
+
+    # Mock the connection's cursor
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None  # Default return for queries
+    mock_cursor.fetchall.return_value = []
+    mock_conn.commit.return_value = None
+
+    # Mock the get_db_connection context manager from sql_utils
+    @contextmanager
+    def mock_get_db_connection():
+        yield mock_conn  # Yield the mocked connection object
+
+    mocker.patch("meal_max.models.rating_model.get_db_connection", mock_get_db_connection)
+
+    return mock_cursor  # Return the mock cursor so we can set expectations per test
+
+######################################################
+#
+#    Elo math
+#
+######################################################
+
+def test_expected_score_equal_ratings():
+    """Test that equally rated meals are even odds."""
+    assert expected_score(1500, 1500) == 0.5
+
+def test_expected_score_400_point_gap():
+    """Test that a 400 point favourite is expected to win 10 battles for every one it loses."""
+    assert expected_score(1900, 1500) == pytest.approx(10 / 11)
+    assert expected_score(1500, 1900) == pytest.approx(1 / 11)
+
+def test_elo_update_is_zero_sum():
+    """Test that the winner gains exactly what the loser gives up."""
+    winner_rating, loser_rating = elo_update(1500, 1500, k_factor=32)
+
+    assert winner_rating == 1516
+    assert loser_rating == 1484
+
+def test_elo_update_upset_moves_more():
+    """Test that beating a stronger meal earns more rating than beating a weaker one."""
+    upset_gain = elo_update(1400, 1600)[0] - 1400
+    expected_gain = elo_update(1600, 1400)[0] - 1600
+
+    assert upset_gain > expected_gain
+
+def test_replay_battles_matches_elo_update():
+    """Test that the inlined replay loop gives the same ratings as repeated elo_update calls."""
+    battles = [(1, 2), (1, 3), (3, 2), (2, 1)]
+    ratings = {}
+
+    replayed = replay_battles(battles, ratings)
+
+    expected = {1: INITIAL_RATING, 2: INITIAL_RATING, 3: INITIAL_RATING}
+    for winner_id, loser_id in battles:
+        expected[winner_id], expected[loser_id] = elo_update(expected[winner_id], expected[loser_id])
+
+    assert replayed == 4
+    assert ratings == pytest.approx(expected)
+
+######################################################
+#
+#    Recompute
+#
+######################################################
+
+def test_recompute_ratings(mock_cursor):
+    """Test recomputing ratings replays the history in batches and resets unplayed meals."""
+    mock_cursor.fetchall.return_value = [(1,), (2,), (3,)]
+    mock_cursor.fetchmany.side_effect = [[(1, 2)], [(1, 2)], []]
+
+    assert recompute_ratings(batch_size=1) == 2
+
+    mock_cursor.fetchmany.assert_called_with(1)
+
+    expected = {1: INITIAL_RATING, 2: INITIAL_RATING}
+    for _ in range(2):
+        expected[1], expected[2] = elo_update(expected[1], expected[2])
+
+    written = {meal_id: rating for rating, meal_id in mock_cursor.executemany.call_args[0][1]}
+    assert written == pytest.approx({1: expected[1], 2: expected[2], 3: INITIAL_RATING})
+
+######################################################
+#
+#    Get rating
+#
+######################################################
+
+def test_get_rating(mock_cursor):
+    """Test retrieving the rating of a meal."""
+    mock_cursor.fetchone.return_value = (1516.0, False)
+
+    assert get_rating(1) == 1516.0
+
+def test_get_rating_deleted_meal(mock_cursor):
+    """Test error when retrieving the rating of a deleted meal."""
+    mock_cursor.fetchone.return_value = (1516.0, True)
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        get_rating(1)
+
+def test_get_rating_bad_id(mock_cursor):
+    """Test error when retrieving the rating of a meal that does not exist."""
+    with pytest.raises(ValueError, match="Meal with ID 1 not found"):
+        get_rating(1)
@@ -0,0 +1,117 @@
+import glob
+import http.client
+import os
+import signal
+import socket
+import threading
+import time
+
+import pytest
+
+from meal_max.utils import capture, server
+from meal_max.utils.server import PooledWSGIServer, load_app, on_worker_start, run_worker_init_hooks
+
+
+def test_load_app():
+    """Test importing an app from a module:attribute spec."""
+    assert load_app("os.path:join") is os.path.join
+
+def test_load_app_invalid_spec():
+    """Test error when the app spec has no attribute."""
+    with pytest.raises(ValueError, match="Invalid app spec: app, expected module:attribute"):
+        load_app("app")
+
+def test_worker_init_hooks(mocker):
+    """Test that registered hooks run in order with the worker index."""
+    mocker.patch.object(server, "_worker_init_hooks", [])
+    calls = []
+
+    @on_worker_start
+    def first(worker_id):
+        calls.append(("first", worker_id))
+
+    on_worker_start(lambda worker_id: calls.append(("second", worker_id)))
+    run_worker_init_hooks(2)
+
+    assert calls == [("first", 2), ("second", 2)]
+
+def test_pooled_server_drains_in_flight_requests():
+    """Test that shutting the server down waits for a request that is still running."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow_app(environ, start_response):
+        started.set()
+        release.wait(5)
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"done"]
+
+    pooled = PooledWSGIServer("127.0.0.1", 0, slow_app, threads=2)
+    serve_thread = threading.Thread(target=pooled.serve_forever, kwargs={"poll_interval": 0.05})
+    serve_thread.start()
+
+    responses = []
+
+    def request():
+        conn = http.client.HTTPConnection("127.0.0.1", pooled.socket.getsockname()[1], timeout=5)
+        conn.request("GET", "/")
+        response = conn.getresponse()
+        responses.append((response.status, response.read()))
+
+    client_thread = threading.Thread(target=request)
+    client_thread.start()
+    assert started.wait(5)
+
+    pooled.shutdown()
+    serve_thread.join(0.2)
+    assert serve_thread.is_alive()  # still waiting for the in-flight request
+
+    release.set()
+    serve_thread.join(5)
+    client_thread.join(5)
+    assert responses == [(200, b"done")]
+
+def test_worker_flushes_capture_on_drain(tmp_path, mocker):
+    """Test that a draining worker writes every request still queued for capture before it exits."""
+    mocker.patch("meal_max.utils.capture.CAPTURE_DIR", str(tmp_path))
+    # A slow writer leaves records queued when the worker is told to drain
+    format_record = capture._JsonLineFormatter.format
+    mocker.patch.object(capture._JsonLineFormatter, "format", lambda self, record: time.sleep(0.01) or format_record(self, record))
+
+    def capturing_app(environ, start_response):
+        for i in range(100):
+            capture.capture_request("GET", "/api/health", "/api/health", f"i={i}", None, "client", 200, 0.001)
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"captured"]
+
+    with socket.create_server(("127.0.0.1", 0)) as probe:
+        port = probe.getsockname()[1]
+
+    pid = os.fork()
+    if not pid:
+        exit_code = 1
+        try:
+            exit_code = server.PreforkServer(capturing_app, host="127.0.0.1", port=port, workers=1, graceful_timeout=10).run()
+        finally:
+            os._exit(exit_code)
+
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", "/api/health")
+                assert conn.getresponse().read() == b"captured"
+                break
+            except ConnectionRefusedError:
+                assert time.monotonic() < deadline, "the server did not start"
+                time.sleep(0.05)
+    finally:
+        os.kill(pid, signal.SIGTERM)
+        _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    lines = 0
+    for path in glob.glob(os.path.join(str(tmp_path), "requests-*.jsonl")):
+        with open(path) as f:
+            lines += len(f.readlines())
+    assert lines == 100
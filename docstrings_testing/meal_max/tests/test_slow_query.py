@@ -0,0 +1,95 @@
+import pytest
+
+from meal_max.utils import sql_utils
+from meal_max.utils.slow_query import clear_slow_queries, describe_parameters, get_slow_queries, index_advice
+from meal_max.utils.sql_utils import get_db_connection
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def database(tmp_path, monkeypatch, mocker):
+    """Points get_db_connection at a meals table and logs every statement as slow."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "slow.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, cuisine TEXT, meal TEXT, price REAL, wins INTEGER)")
+        conn.execute("CREATE INDEX idx_meals_cuisine ON meals (cuisine)")
+        conn.commit()
+    mocker.patch("meal_max.utils.slow_query.SLOW_QUERY_MS", 0)
+    clear_slow_queries()
+    yield
+    clear_slow_queries()
+
+def run(sql, parameters=()):
+    with get_db_connection() as conn:
+        conn.execute(sql, parameters).fetchall()
+
+######################################################
+#
+#    Slow query log
+#
+######################################################
+
+def test_describe_parameters():
+    """Test that parameter shapes hold types but not values."""
+    assert describe_parameters(("Italian", 12)) == "(str, int)"
+    assert describe_parameters({"meal": "Pasta"}) == "{meal: str}"
+    assert describe_parameters(None) == ""
+
+def test_fast_statements_not_logged(database, mocker):
+    """Test that statements under the threshold are not recorded."""
+    mocker.patch("meal_max.utils.slow_query.SLOW_QUERY_MS", 1000)
+
+    run("SELECT * FROM meals WHERE id = ?", (1,))
+
+    assert get_slow_queries() == []
+
+def test_slow_queries_aggregated(database):
+    """Test that slow statements are aggregated by normalized SQL with their shapes and plans."""
+    run("SELECT * FROM meals WHERE id = ?", (1,))
+    run("SELECT * FROM meals WHERE id = ?", ("1",))
+    run("SELECT * FROM meals WHERE id = 2")
+
+    slow_queries = {entry['sql']: entry for entry in get_slow_queries()}
+    by_id = slow_queries["SELECT * FROM meals WHERE id = ?"]
+    assert by_id['count'] == 3
+    assert by_id['parameter_shapes'] == ["(int)", "(str)", "()"]
+    assert by_id['plan'][0].startswith("SEARCH meals USING INTEGER PRIMARY KEY")
+    assert by_id['max_ms'] >= by_id['mean_ms'] > 0
+
+######################################################
+#
+#    Index advice
+#
+######################################################
+
+def test_index_advice_scan(database):
+    """Test that a full table scan is flagged with an index on the compared columns, equality first."""
+    run("SELECT * FROM meals WHERE price > ? AND meal = ?", (9.5, "Pasta"))
+
+    assert index_advice() == [{
+        'sql': "SELECT * FROM meals WHERE price > ? AND meal = ?",
+        'step': "SCAN meals",
+        'problem': "full table scan",
+        'suggestion': "CREATE INDEX idx_meals_meal_price ON meals (meal, price)",
+    }]
+
+def test_index_advice_temp_b_tree(database):
+    """Test that a sort into a temporary B-tree is flagged with an index on the filter and sort columns."""
+    run("SELECT id, wins * 2 AS score FROM meals WHERE cuisine = ? ORDER BY score DESC", ("Italian",))
+
+    advice = index_advice()
+
+    assert len(advice) == 1
+    assert advice[0]['problem'] == "temporary B-tree for ORDER BY"
+    assert advice[0]['suggestion'] == "CREATE INDEX idx_meals_cuisine_wins ON meals (cuisine, wins * 2 DESC)"
+
+def test_index_advice_indexed_lookup(database):
+    """Test that statements using an index are not flagged."""
+    run("SELECT * FROM meals WHERE cuisine = ?", ("Italian",))
+
+    assert index_advice() == []
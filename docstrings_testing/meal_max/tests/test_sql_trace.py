@@ -0,0 +1,100 @@
+import pytest
+
+from meal_max.utils import sql_utils
+from meal_max.utils.sql_trace import clear_traces, finish_trace, get_traces, normalize_sql, start_trace
+from meal_max.utils.sql_utils import get_db_connection
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Points get_db_connection at an empty database with a meals table and no stored traces."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "trace.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT, battles INTEGER DEFAULT 0)")
+        conn.execute("CREATE TABLE battles (meal_id INTEGER)")
+        conn.execute("CREATE TRIGGER count_battle AFTER INSERT ON battles BEGIN "
+                     "UPDATE meals SET battles = battles + 1 WHERE id = new.meal_id; END")
+        conn.executemany("INSERT INTO meals (id, meal) VALUES (?, ?)", [(i, f"Meal {i}") for i in range(1, 11)])
+        conn.commit()
+    clear_traces()
+    yield
+    clear_traces()
+
+def run_request(statements, status=200):
+    """Runs each statement on its own connection inside a traced request and returns the trace."""
+    start_trace("/api/test", "GET")
+    for sql, parameters in statements:
+        with get_db_connection() as conn:
+            conn.execute(sql, parameters)
+            conn.commit()
+    finish_trace(status)
+    return get_traces(1)[0]
+
+######################################################
+#
+#    Tracing
+#
+######################################################
+
+def test_normalize_sql():
+    """Test that literals are replaced and whitespace collapsed."""
+    assert normalize_sql("SELECT *\n  FROM meals WHERE id = 12 AND meal = 'It''s'") == "SELECT * FROM meals WHERE id = ? AND meal = ?"
+
+def test_trace_statements(database):
+    """Test that a request's statements are recorded with bound values, durations and connections."""
+    trace = run_request([
+        ("SELECT meal FROM meals WHERE id = ?", (1,)),
+        ("INSERT INTO battles (meal_id) VALUES (?)", (1,)),
+    ], status=201)
+
+    assert trace['endpoint'] == "/api/test"
+    assert trace['status'] == 201
+    assert trace['connections'] == 2
+    assert trace['query_count'] == 2
+    assert trace['over_budget'] is False
+    assert trace['repeated_statements'] == []
+
+    statements = [statement['sql'] for statement in trace['statements']]
+    assert statements[0] == "SELECT meal FROM meals WHERE id = 1"
+    assert "INSERT INTO battles (meal_id) VALUES (1)" in statements
+    assert "COMMIT" in statements
+    assert trace['statements'][0]['duration_ms'] is not None
+
+def test_trace_flags_repeated_statements(database, mocker):
+    """Test that a statement repeated per row is flagged as an N+1 pattern."""
+    mocker.patch("meal_max.utils.sql_trace.N_PLUS_ONE_THRESHOLD", 5)
+
+    trace = run_request([("SELECT meal FROM meals WHERE id = ?", (i,)) for i in range(1, 7)])
+
+    assert trace['repeated_statements'] == [{'sql': "SELECT meal FROM meals WHERE id = ?", 'count': 6}]
+    assert get_traces(flagged_only=True) == [trace]
+
+def test_trace_flags_over_budget(database, mocker):
+    """Test that a request running more queries than the budget is flagged."""
+    mocker.patch("meal_max.utils.sql_trace.QUERY_BUDGET", 2)
+
+    trace = run_request([("SELECT count(*) FROM meals", ()), ("SELECT count(*) FROM battles", ()), ("SELECT 1", ())])
+
+    assert trace['query_count'] == 3
+    assert trace['over_budget'] is True
+
+def test_no_trace_outside_requests(database):
+    """Test that statements run outside a traced request are not recorded."""
+    with get_db_connection() as conn:
+        conn.execute("SELECT 1")
+
+    assert get_traces() == []
+
+def test_get_traces_most_recent_first(database):
+    """Test that traces are returned most recent first, up to the limit."""
+    run_request([("SELECT 1", ())], status=200)
+    run_request([("SELECT 2", ())], status=404)
+
+    assert [trace['status'] for trace in get_traces()] == [404, 200]
+    assert [trace['status'] for trace in get_traces(1)] == [404]
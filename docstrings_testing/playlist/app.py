@@ -1,8 +1,35 @@
+import os
+import sys
+import time
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, g, jsonify, make_response, Response, request
+from flask.helpers import get_debug_flag
+from flask.logging import default_handler
 
-from music_collection.models import song_model
+from music_collection.models import play_event_model, playlist_builder, song_model, trending_model
+from music_collection.models.playback_model import PlaybackJobManager
 from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.recommendation_model import recommender
+from music_collection.models.trending_model import trending_index
+from music_collection.utils.capture import SESSION_HEADER, capture_enabled, capture_request
+from music_collection.utils.json_provider import ModelJSONProvider
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.memory import (
+    compare_snapshots,
+    memory_summary,
+    register_gauge,
+    start_tracing,
+    stop_tracing,
+    take_snapshot,
+    top_allocations
+)
+from music_collection.utils.metrics import render_metrics
+from music_collection.utils.profiling import finish_profile, get_profile_dump, get_profile_report, is_authorized, list_profiles, start_profile
+from music_collection.utils.sampling_profiler import sampling_profiler
+from music_collection.utils.server import on_worker_start, record_request, run_worker_init_hooks, serve
+from music_collection.utils.slow_query import get_slow_queries, index_advice
+from music_collection.utils.sql_trace import finish_trace, get_traces, start_trace
 from music_collection.utils.sql_utils import check_database_connection, check_table_exists
 
 
@@ -10,8 +37,65 @@ from music_collection.utils.sql_utils import check_database_connection, check_ta
 load_dotenv()
 
 app = Flask(__name__)
+app.json = ModelJSONProvider(app)
+
+# Send the app's own log lines through the shared background writer as well
+app.logger.removeHandler(default_handler)
+configure_logger(app.logger)
+
+
+@app.before_request
+def start_request_timer() -> None:
+    """
+    Notes the start time of each request for the request latency metrics, starts its SQL trace
+    and, if it asked with ?__profile=1 and a valid X-Profile-Token or is sampled, profiles it.
+    """
+    g.request_start = time.perf_counter()
+    g.route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    start_trace(g.route, request.method)
+    start_profile(request.args.get('__profile'), request.headers.get('X-Profile-Token'))
+
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    """
+    Records each request's route, status code and latency in the request metrics and stores its
+    SQL trace and profile, and captures it if capture is on. A profiled response carries the
+    profile's id in X-Profile-Id.
+    """
+    profile_id = finish_profile(g.route, request.method, response.status_code)
+    if profile_id is not None:
+        response.headers['X-Profile-Id'] = profile_id
+    elapsed = time.perf_counter() - g.request_start
+    record_request(g.route, request.method, response.status_code, elapsed)
+    finish_trace(response.status_code)
+    if capture_enabled():
+        capture_request(request.method, g.route, request.path, request.query_string.decode("latin-1"), request.get_data(),
+                        request.headers.get(SESSION_HEADER) or request.remote_addr or "", response.status_code, elapsed)
+    return response
+
 
 playlist_model = PlaylistModel()
+playback_jobs = PlaybackJobManager(playlist_model)
+
+# Sizes of the state the models hold in memory, for /api/debug/memory and /api/metrics
+register_gauge("playlist_songs", "Songs in the current playlist.", lambda: len(playlist_model.playlist))
+register_gauge("playback_jobs", "Playback jobs kept by the job manager.", lambda: len(playback_jobs.jobs))
+register_gauge("recommendation_index_songs", "Songs with precomputed recommendation neighbors.", lambda: len(recommender.neighbors))
+register_gauge("trending_index_songs", "Songs with a trending score held in memory.", lambda: len(trending_index))
+
+
+@on_worker_start
+def start_background_threads(worker_id: int) -> None:
+    """
+    Starts the recommendation index refresh and the sampling profiler in each worker process,
+    since threads do not survive a fork.
+
+    Args:
+        worker_id (int): The index of the worker process.
+    """
+    recommender.start()
+    sampling_profiler.start()
 
 
 ####################################################
@@ -54,6 +138,302 @@ def db_check() -> Response:
         return make_response(jsonify({'error': str(e)}), 404)
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics() -> Response:
+    """
+    Route to expose request, database, random.org and cache metrics in the Prometheus text
+    format. Each worker process reports its own metrics.
+
+    Returns:
+        Text response with the metrics.
+    """
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/debug/sql-traces', methods=['GET'])
+def sql_traces() -> Response:
+    """
+    Route to get the SQL statements run by recent requests of this worker, most recent first.
+
+    Query Parameters:
+        - limit (int): The maximum number of traces to return. Default is 20.
+        - flagged (str): 'true' to return only requests over the query budget or that ran the
+          same statement repeatedly. Default is 'false'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the traces, each with its endpoint, query count and statements.
+    Raises:
+        400 error if limit is not an integer.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return make_response(jsonify({'error': 'limit must be an integer'}), 400)
+    flagged_only = request.args.get('flagged', 'false').lower() == 'true'
+
+    return make_response(jsonify({'status': 'success', 'traces': get_traces(limit, flagged_only)}), 200)
+
+
+@app.route('/api/debug/slow-queries', methods=['GET'])
+def slow_queries() -> Response:
+    """
+    Route to get the statements of this worker that ran longer than SLOW_QUERY_MS, with their
+    query plans, and the index advice drawn from those plans.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the slow statements, highest total time first, and one piece of
+        advice per full table scan or temporary B-tree step in their plans.
+    Raises:
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+    return make_response(jsonify({'status': 'success', 'slow_queries': get_slow_queries(), 'index_advice': index_advice()}), 200)
+
+
+@app.route('/api/debug/profiles', methods=['GET'])
+def profiles() -> Response:
+    """
+    Route to list the request profiles stored by this worker, most recent first.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the id, endpoint, status and duration of each profile.
+    Raises:
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+    return make_response(jsonify({'status': 'success', 'profiles': list_profiles()}), 200)
+
+
+@app.route('/api/debug/profiles/<string:profile_id>', methods=['GET'])
+def profile_report(profile_id: str) -> Response:
+    """
+    Route to get a stored request profile.
+
+    Path Parameter:
+        - profile_id (str): The id from the X-Profile-Id header of the profiled response.
+
+    Query Parameters:
+        - format (str): 'text' for a report of the slowest functions and their callers, or
+          'pstats' for the binary profile data that pstats and snakeviz load. Default is 'text'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        The profile in the requested format.
+    Raises:
+        403 error if the token is missing or wrong.
+        404 error if there is no such profile.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    if request.args.get('format', 'text') == 'pstats':
+        dump = get_profile_dump(profile_id)
+        if dump is None:
+            return make_response(jsonify({'error': f'Profile {profile_id} not found'}), 404)
+        return Response(dump, mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename={profile_id}.prof'})
+
+    report = get_profile_report(profile_id)
+    if report is None:
+        return make_response(jsonify({'error': f'Profile {profile_id} not found'}), 404)
+    return Response(report, mimetype='text/plain')
+
+
+@app.route('/api/debug/flamegraph', methods=['GET'])
+def flamegraph() -> Response:
+    """
+    Route to get the stacks sampled by this worker's sampling profiler in the collapsed stack
+    format, which flamegraph.pl, speedscope and inferno turn into a flame graph.
+
+    Query Parameters:
+        - idle (str): 'true' to include samples of threads that were waiting. Default is 'false'.
+        - reset (str): 'true' to start counting afresh after this dump. Default is 'false'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        Text response with one "thread;root;...;leaf count" line per stack, and the number of
+        samples and the fraction of time spent sampling in the X-Samples and
+        X-Sampling-Overhead headers.
+    Raises:
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    include_idle = request.args.get('idle', 'false').lower() == 'true'
+    headers = {
+        'X-Samples': str(sampling_profiler.samples),
+        'X-Sampling-Overhead': f'{sampling_profiler.overhead():.5f}',
+    }
+    collapsed = sampling_profiler.collapsed(include_idle)
+    if request.args.get('reset', 'false').lower() == 'true':
+        sampling_profiler.reset()
+    return Response(collapsed, mimetype='text/plain', headers=headers)
+
+
+@app.route('/api/debug/memory', methods=['GET'])
+def memory() -> Response:
+    """
+    Route to get this worker's resident memory, tracemalloc state, snapshot names and the
+    sizes of the state held in memory by the models.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the memory summary.
+    Raises:
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+    return make_response(jsonify({'status': 'success', 'memory': memory_summary()}), 200)
+
+
+@app.route('/api/debug/memory/tracing', methods=['POST', 'DELETE'])
+def memory_tracing() -> Response:
+    """
+    Route to start (POST) or stop (DELETE) tracing allocations with tracemalloc. Stopping
+    discards the snapshots.
+
+    Expected JSON Input (POST, optional):
+        - frames (int): Frames of call stack recorded per allocation. Default is TRACEMALLOC_FRAMES.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the memory summary.
+    Raises:
+        400 error if frames is not a positive integer.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    if request.method == 'DELETE':
+        stop_tracing()
+    else:
+        data = request.get_json(silent=True) or {}
+        frames = data.get('frames')
+        if frames is not None and (not isinstance(frames, int) or frames < 1):
+            return make_response(jsonify({'error': 'frames must be a positive integer'}), 400)
+        start_tracing(frames)
+    return make_response(jsonify({'status': 'success', 'memory': memory_summary()}), 200)
+
+
+@app.route('/api/debug/memory/snapshots', methods=['POST'])
+def memory_snapshot() -> Response:
+    """
+    Route to take a named tracemalloc snapshot.
+
+    Expected JSON Input:
+        - name (str): The snapshot name. A snapshot with the same name is replaced.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the snapshot's name, traced size and allocation count.
+    Raises:
+        400 error if the name is missing or tracing is off.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    name = (request.get_json(silent=True) or {}).get('name')
+    if not name:
+        return make_response(jsonify({'error': 'A snapshot name is required'}), 400)
+    try:
+        snapshot = take_snapshot(name)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    return make_response(jsonify({'status': 'success', 'snapshot': snapshot}), 201)
+
+
+@app.route('/api/debug/memory/top', methods=['GET'])
+def memory_top() -> Response:
+    """
+    Route to get the allocation sites holding the most memory.
+
+    Query Parameters:
+        - snapshot (str, optional): The snapshot to read. Defaults to a fresh snapshot.
+        - limit (int): The number of sites to return. Default is 20.
+        - group_by (str): 'lineno', 'filename' or 'traceback'. Default is 'lineno'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the allocation sites, largest first.
+    Raises:
+        400 error if tracing is off, the snapshot does not exist or a parameter is invalid.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    try:
+        limit = int(request.args.get('limit', 20))
+        allocations = top_allocations(request.args.get('snapshot'), limit, request.args.get('group_by', 'lineno'))
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    return make_response(jsonify({'status': 'success', 'allocations': allocations}), 200)
+
+
+@app.route('/api/debug/memory/diff', methods=['GET'])
+def memory_diff() -> Response:
+    """
+    Route to get the allocation sites whose memory changed most between two snapshots.
+
+    Query Parameters:
+        - from (str): The earlier snapshot.
+        - to (str, optional): The later snapshot. Defaults to a fresh snapshot.
+        - limit (int): The number of sites to return. Default is 20.
+        - group_by (str): 'lineno', 'filename' or 'traceback'. Default is 'lineno'.
+
+    Headers:
+        - X-Profile-Token (str): Must match the PROFILE_TOKEN environment variable.
+
+    Returns:
+        JSON response with the allocation sites, largest change first.
+    Raises:
+        400 error if tracing is off, a snapshot does not exist or a parameter is invalid.
+        403 error if the token is missing or wrong.
+    """
+    if not is_authorized(request.headers.get('X-Profile-Token')):
+        return make_response(jsonify({'error': 'A valid X-Profile-Token header is required'}), 403)
+
+    old = request.args.get('from')
+    if not old:
+        return make_response(jsonify({'error': 'The from snapshot is required'}), 400)
+    try:
+        limit = int(request.args.get('limit', 20))
+        allocations = compare_snapshots(old, request.args.get('to'), limit, request.args.get('group_by', 'lineno'))
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    return make_response(jsonify({'status': 'success', 'allocations': allocations}), 200)
+
+
 ##########################################################
 #
 # Song Management
@@ -113,7 +493,7 @@ def clear_catalog() -> Response:
         song_model.clear_catalog()
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error clearing catalog: {e}")
+        app.logger.error("Error clearing catalog: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/delete-song/<int:song_id>', methods=['DELETE'])
@@ -128,11 +508,11 @@ def delete_song(song_id: int) -> Response:
         JSON response indicating success of the operation or error message.
     """
     try:
-        app.logger.info(f"Deleting song by ID: {song_id}")
+        app.logger.info("Deleting song by ID: %s", song_id)
         song_model.delete_song(song_id)
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error deleting song: {e}")
+        app.logger.error("Error deleting song: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
@@ -156,7 +536,7 @@ def get_all_songs() -> Response:
 
         return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
     except Exception as e:
-        app.logger.error(f"Error retrieving songs: {e}")
+        app.logger.error("Error retrieving songs: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
@@ -172,11 +552,11 @@ def get_song_by_id(song_id: int) -> Response:
         JSON response with the song details or error message.
     """
     try:
-        app.logger.info(f"Retrieving song by ID: {song_id}")
+        app.logger.info("Retrieving song by ID: %s", song_id)
         song = song_model.get_song_by_id(song_id)
         return make_response(jsonify({'status': 'success', 'song': song}), 200)
     except Exception as e:
-        app.logger.error(f"Error retrieving song by ID: {e}")
+        app.logger.error("Error retrieving song by ID: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-song-from-catalog-by-compound-key', methods=['GET'])
@@ -207,12 +587,12 @@ def get_song_by_compound_key() -> Response:
         except ValueError:
             return make_response(jsonify({'error': 'Year must be an integer'}), 400)
 
-        app.logger.info(f"Retrieving song by compound key: {artist}, {title}, {year}")
+        app.logger.info("Retrieving song by compound key: %s, %s, %s", artist, title, year)
         song = song_model.get_song_by_compound_key(artist, title, year)
         return make_response(jsonify({'status': 'success', 'song': song}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error retrieving song by compound key: {e}")
+        app.logger.error("Error retrieving song by compound key: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-random-song', methods=['GET'])
@@ -228,7 +608,7 @@ def get_random_song() -> Response:
         song = song_model.get_random_song()
         return make_response(jsonify({'status': 'success', 'song': song}), 200)
     except Exception as e:
-        app.logger.error(f"Error retrieving a random song: {e}")
+        app.logger.error("Error retrieving a random song: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
@@ -267,11 +647,82 @@ def add_song_to_playlist() -> Response:
         # Add song to playlist
         playlist_model.add_song_to_playlist(song)
 
-        app.logger.info(f"Song added to playlist: {artist} - {title} ({year})")
+        app.logger.info("Song added to playlist: %s - %s (%s)", artist, title, year)
         return make_response(jsonify({'status': 'success', 'message': 'Song added to playlist'}), 201)
 
     except Exception as e:
-        app.logger.error(f"Error adding song to playlist: {e}")
+        app.logger.error("Error adding song to playlist: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/add-songs-to-playlist', methods=['POST'])
+def add_songs_to_playlist() -> Response:
+    """
+    Route to add a list of songs to the playlist by compound key (artist, title, year) in one request.
+
+    All songs are looked up with a single batched catalog query. Songs that cannot be added are
+    reported individually and do not stop the rest of the list from being added.
+
+    Expected JSON Input:
+        - songs (list): A list of objects, each with:
+            - artist (str): The artist's name.
+            - title (str): The song title.
+            - year (int): The year the song was released.
+
+    Returns:
+        JSON response with the songs that were added and the per-song errors.
+    Raises:
+        400 error if the input is not a list of songs, or if none of the songs could be added.
+        500 error if there is an issue looking up the songs.
+    """
+    try:
+        data = request.get_json()
+        songs = data.get('songs')
+
+        if not isinstance(songs, list) or not songs:
+            return make_response(jsonify({'error': 'Invalid input. A non-empty list of songs is required.'}), 400)
+
+        keys = []
+        errors = []
+        for index, item in enumerate(songs):
+            if not isinstance(item, dict):
+                errors.append({'index': index, 'error': 'Invalid input. Artist, title, and year are required.'})
+                continue
+            artist = item.get('artist')
+            title = item.get('title')
+            year = item.get('year')
+            if not artist or not title or not year:
+                errors.append({'index': index, 'error': 'Invalid input. Artist, title, and year are required.'})
+                continue
+            try:
+                keys.append((index, (artist, title, int(year))))
+            except (TypeError, ValueError):
+                errors.append({'index': index, 'error': 'Year must be an integer'})
+
+        # Resolve every compound key with one batched lookup
+        found = song_model.get_songs_by_compound_keys([key for _, key in keys])
+
+        added = []
+        for index, (artist, title, year) in keys:
+            song = found.get((artist, title, year))
+            if song is None:
+                errors.append({'index': index, 'error': f"Song with artist '{artist}', title '{title}', and year {year} not found or has been deleted"})
+                continue
+            try:
+                playlist_model.add_song_to_playlist(song)
+                added.append({'index': index, 'id': song.id, 'artist': artist, 'title': title, 'year': year})
+            except Exception as e:
+                errors.append({'index': index, 'error': str(e)})
+
+        errors.sort(key=lambda error: error['index'])
+        if not added:
+            app.logger.info("None of the %d songs could be added to the playlist", len(songs))
+            return make_response(jsonify({'error': 'None of the songs could be added to the playlist', 'added': added, 'errors': errors}), 400)
+
+        app.logger.info("Added %d of %d songs to playlist", len(added), len(songs))
+        return make_response(jsonify({'status': 'success', 'added': added, 'errors': errors}), 201)
+
+    except Exception as e:
+        app.logger.error("Error adding songs to playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/remove-song-from-playlist', methods=['DELETE'])
@@ -303,11 +754,11 @@ def remove_song_by_song_id() -> Response:
         # Remove song from playlist
         playlist_model.remove_song_by_song_id(song.id)
 
-        app.logger.info(f"Song removed from playlist: {artist} - {title} ({year})")
+        app.logger.info("Song removed from playlist: %s - %s (%s)", artist, title, year)
         return make_response(jsonify({'status': 'success', 'message': 'Song removed from playlist'}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error removing song from playlist: {e}")
+        app.logger.error("Error removing song from playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/remove-song-from-playlist-by-track-number/<int:track_number>', methods=['DELETE'])
@@ -322,7 +773,7 @@ def remove_song_by_track_number(track_number: int) -> Response:
         JSON response indicating success of the removal or an error message.
     """
     try:
-        app.logger.info(f"Removing song from playlist by track number: {track_number}")
+        app.logger.info("Removing song from playlist by track number: %s", track_number)
 
         # Remove song by track number
         playlist_model.remove_song_by_track_number(track_number)
@@ -330,10 +781,10 @@ def remove_song_by_track_number(track_number: int) -> Response:
         return make_response(jsonify({'status': 'success', 'message': f'Song at track number {track_number} removed from playlist'}), 200)
 
     except ValueError as e:
-        app.logger.error(f"Error removing song by track number: {e}")
+        app.logger.error("Error removing song by track number: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 404)
     except Exception as e:
-        app.logger.error(f"Error removing song from playlist: {e}")
+        app.logger.error("Error removing song from playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/clear-playlist', methods=['POST'])
@@ -353,7 +804,65 @@ def clear_playlist() -> Response:
         return make_response(jsonify({'status': 'success', 'message': 'Playlist cleared'}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error clearing the playlist: {e}")
+        app.logger.error("Error clearing the playlist: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/generate-playlist', methods=['POST'])
+def generate_playlist() -> Response:
+    """
+    Route to replace the playlist with songs from the catalog that match filters and fit a target.
+
+    Expected JSON Input:
+        - genre (str, optional): Only use songs of this genre.
+        - min_year (int, optional): Only use songs released in or after this year.
+        - max_year (int, optional): Only use songs released in or before this year.
+        - min_play_count (int, optional): Only use songs played at least this many times.
+        - max_play_count (int, optional): Only use songs played at most this many times.
+        - target_duration (int, optional): The total duration to aim for in seconds.
+        - target_length (int, optional): The maximum number of songs in the playlist.
+
+    At least one of target_duration or target_length is required.
+
+    Returns:
+        JSON response with the generated playlist or an error message.
+    Raises:
+        400 error if input validation fails or no songs match.
+        500 error if there is an issue generating the playlist.
+    """
+    try:
+        data = request.get_json()
+
+        genre = data.get('genre')
+        filters = {}
+        for field in ('min_year', 'max_year', 'min_play_count', 'max_play_count', 'target_duration', 'target_length'):
+            value = data.get(field)
+            if value is not None:
+                try:
+                    filters[field] = int(value)
+                except (TypeError, ValueError):
+                    return make_response(jsonify({'error': f'{field} must be an integer'}), 400)
+
+        if 'target_duration' not in filters and 'target_length' not in filters:
+            return make_response(jsonify({'error': 'Invalid input. target_duration or target_length is required.'}), 400)
+
+        app.logger.info("Generating playlist: genre=%s, %s", genre, filters)
+        try:
+            songs = playlist_builder.build_smart_playlist(genre=genre, **filters)
+        except ValueError as e:
+            app.logger.error("Error generating playlist: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        playlist_model.load_playlist(songs)
+
+        return make_response(jsonify({
+            'status': 'success',
+            'songs': songs,
+            'playlist_length': playlist_model.get_playlist_length(),
+            'playlist_duration': playlist_model.get_playlist_duration()
+        }), 201)
+
+    except Exception as e:
+        app.logger.error("Error generating playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 ############################################################
@@ -389,44 +898,87 @@ def play_current_song() -> Response:
             }
         }), 200)
     except Exception as e:
-        app.logger.error(f"Error playing current song: {e}")
+        app.logger.error("Error playing current song: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
 @app.route('/api/play-entire-playlist', methods=['POST'])
 def play_entire_playlist() -> Response:
     """
-    Route to play all songs in the playlist.
+    Route to start a background job that plays all songs in the playlist.
 
     Returns:
-        JSON response indicating success of the operation.
+        JSON response with the playback job, which can be polled with /api/playback-jobs/<job_id>.
     Raises:
-        500 error if there is an issue playing the playlist.
+        500 error if there is an issue starting the playback job.
     """
     try:
         app.logger.info('Playing entire playlist')
-        playlist_model.play_entire_playlist()
-        return make_response(jsonify({'status': 'success'}), 200)
+        job = playback_jobs.play_entire_playlist()
+        return make_response(jsonify({'status': 'success', 'job': job}), 202)
     except Exception as e:
-        app.logger.error(f"Error playing playlist: {e}")
+        app.logger.error("Error playing playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/play-rest-of-playlist', methods=['POST'])
 def play_rest_of_playlist() -> Response:
     """
-    Route to play the rest of the playlist from the current track.
+    Route to start a background job that plays the rest of the playlist from the current track.
 
     Returns:
-        JSON response indicating success of the operation.
+        JSON response with the playback job, which can be polled with /api/playback-jobs/<job_id>.
     Raises:
-        500 error if there is an issue playing the rest of the playlist.
+        500 error if there is an issue starting the playback job.
     """
     try:
         app.logger.info('Playing rest of the playlist')
-        playlist_model.play_rest_of_playlist()
-        return make_response(jsonify({'status': 'success'}), 200)
+        job = playback_jobs.play_rest_of_playlist()
+        return make_response(jsonify({'status': 'success', 'job': job}), 202)
     except Exception as e:
-        app.logger.error(f"Error playing rest of the playlist: {e}")
+        app.logger.error("Error playing rest of the playlist: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/playback-jobs/<string:job_id>', methods=['GET'])
+def get_playback_job(job_id: str) -> Response:
+    """
+    Route to get the status and progress of a playback job.
+
+    Path Parameter:
+        - job_id (str): The ID of the playback job.
+
+    Returns:
+        JSON response with the playback job or an error message.
+    """
+    try:
+        job = playback_jobs.get_job(job_id)
+        return make_response(jsonify({'status': 'success', 'job': job}), 200)
+    except ValueError as e:
+        app.logger.error("Error retrieving playback job: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 404)
+    except Exception as e:
+        app.logger.error("Error retrieving playback job: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/playback-jobs/<string:job_id>/cancel', methods=['POST'])
+def cancel_playback_job(job_id: str) -> Response:
+    """
+    Route to cancel a running playback job. The job stops before its next track.
+
+    Path Parameter:
+        - job_id (str): The ID of the playback job.
+
+    Returns:
+        JSON response with the playback job or an error message.
+    """
+    try:
+        app.logger.info("Cancelling playback job %s", job_id)
+        job = playback_jobs.cancel_job(job_id)
+        return make_response(jsonify({'status': 'success', 'job': job}), 200)
+    except ValueError as e:
+        app.logger.error("Error cancelling playback job: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 404)
+    except Exception as e:
+        app.logger.error("Error cancelling playback job: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/rewind-playlist', methods=['POST'])
@@ -444,7 +996,7 @@ def rewind_playlist() -> Response:
         playlist_model.rewind_playlist()
         return make_response(jsonify({'status': 'success'}), 200)
     except Exception as e:
-        app.logger.error(f"Error rewinding playlist: {e}")
+        app.logger.error("Error rewinding playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-all-songs-from-playlist', methods=['GET'])
@@ -464,7 +1016,7 @@ def get_all_songs_from_playlist() -> Response:
         return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error retrieving songs from playlist: {e}")
+        app.logger.error("Error retrieving songs from playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-song-from-playlist-by-track-number/<int:track_number>', methods=['GET'])
@@ -479,7 +1031,7 @@ def get_song_by_track_number(track_number: int) -> Response:
         JSON response with the song details or error message.
     """
     try:
-        app.logger.info(f"Retrieving song from playlist by track number: {track_number}")
+        app.logger.info("Retrieving song from playlist by track number: %s", track_number)
 
         # Get the song by track number
         song = playlist_model.get_song_by_track_number(track_number)
@@ -487,10 +1039,10 @@ def get_song_by_track_number(track_number: int) -> Response:
         return make_response(jsonify({'status': 'success', 'song': song}), 200)
 
     except ValueError as e:
-        app.logger.error(f"Error retrieving song by track number: {e}")
+        app.logger.error("Error retrieving song by track number: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 404)
     except Exception as e:
-        app.logger.error(f"Error retrieving song from playlist: {e}")
+        app.logger.error("Error retrieving song from playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-current-song', methods=['GET'])
@@ -510,7 +1062,7 @@ def get_current_song() -> Response:
         return make_response(jsonify({'status': 'success', 'current_song': current_song}), 200)
 
     except Exception as e:
-        app.logger.error(f"Error retrieving current song: {e}")
+        app.logger.error("Error retrieving current song: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-playlist-length-duration', methods=['GET'])
@@ -535,7 +1087,7 @@ def get_playlist_length_and_duration() -> Response:
         }), 200)
 
     except Exception as e:
-        app.logger.error(f"Error retrieving playlist length and duration: {e}")
+        app.logger.error("Error retrieving playlist length and duration: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/go-to-track-number/<int:track_number>', methods=['POST'])
@@ -550,17 +1102,17 @@ def go_to_track_number(track_number: int) -> Response:
         JSON response indicating success or an error message.
     """
     try:
-        app.logger.info(f"Going to track number: {track_number}")
+        app.logger.info("Going to track number: %s", track_number)
 
         # Set the playlist to start at the given track number
         playlist_model.go_to_track_number(track_number)
 
         return make_response(jsonify({'status': 'success', 'track_number': track_number}), 200)
     except ValueError as e:
-        app.logger.error(f"Error going to track number {track_number}: {e}")
+        app.logger.error("Error going to track number %s: %s", track_number, str(e))
         return make_response(jsonify({'error': str(e)}), 400)
     except Exception as e:
-        app.logger.error(f"Error going to track number: {e}")
+        app.logger.error("Error going to track number: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 ############################################################
@@ -589,7 +1141,7 @@ def move_song_to_beginning() -> Response:
         title = data.get('title')
         year = data.get('year')
 
-        app.logger.info(f"Moving song to beginning: {artist} - {title} ({year})")
+        app.logger.info("Moving song to beginning: %s - %s (%s)", artist, title, year)
 
         # Retrieve song by compound key and move it to the beginning
         song = song_model.get_song_by_compound_key(artist, title, year)
@@ -597,7 +1149,7 @@ def move_song_to_beginning() -> Response:
 
         return make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}'}), 200)
     except Exception as e:
-        app.logger.error(f"Error moving song to beginning: {e}")
+        app.logger.error("Error moving song to beginning: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/move-song-to-end', methods=['POST'])
@@ -620,7 +1172,7 @@ def move_song_to_end() -> Response:
         title = data.get('title')
         year = data.get('year')
 
-        app.logger.info(f"Moving song to end: {artist} - {title} ({year})")
+        app.logger.info("Moving song to end: %s - %s (%s)", artist, title, year)
 
         # Retrieve song by compound key and move it to the end
         song = song_model.get_song_by_compound_key(artist, title, year)
@@ -628,7 +1180,7 @@ def move_song_to_end() -> Response:
 
         return make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}'}), 200)
     except Exception as e:
-        app.logger.error(f"Error moving song to end: {e}")
+        app.logger.error("Error moving song to end: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/move-song-to-track-number', methods=['POST'])
@@ -653,7 +1205,7 @@ def move_song_to_track_number() -> Response:
         year = data.get('year')
         track_number = data.get('track_number')
 
-        app.logger.info(f"Moving song to track number {track_number}: {artist} - {title} ({year})")
+        app.logger.info("Moving song to track number %s: %s - %s (%s)", track_number, artist, title, year)
 
         # Retrieve song by compound key and move it to the specified track number
         song = song_model.get_song_by_compound_key(artist, title, year)
@@ -661,7 +1213,7 @@ def move_song_to_track_number() -> Response:
 
         return make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}', 'track_number': track_number}), 200)
     except Exception as e:
-        app.logger.error(f"Error moving song to track number: {e}")
+        app.logger.error("Error moving song to track number: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/swap-songs-in-playlist', methods=['POST'])
@@ -682,7 +1234,7 @@ def swap_songs_in_playlist() -> Response:
         track_number_1 = data.get('track_number_1')
         track_number_2 = data.get('track_number_2')
 
-        app.logger.info(f"Swapping songs at track numbers {track_number_1} and {track_number_2}")
+        app.logger.info("Swapping songs at track numbers %s and %s", track_number_1, track_number_2)
 
         # Retrieve songs by track numbers and swap them
         song_1 = playlist_model.get_song_by_track_number(track_number_1)
@@ -697,9 +1249,45 @@ def swap_songs_in_playlist() -> Response:
             }
         }), 200)
     except Exception as e:
-        app.logger.error(f"Error swapping songs in playlist: {e}")
+        app.logger.error("Error swapping songs in playlist: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+############################################################
+#
+# Recommendations
+#
+############################################################
+
+@app.route('/api/recommend', methods=['GET'])
+def recommend() -> Response:
+    """
+    Route to get the songs most often played together with a song, from the precomputed index.
+
+    Query Parameters:
+        - song_id (int): The ID of the song to recommend from.
+        - limit (int, optional): The maximum number of songs to return. Default is 10.
+
+    Returns:
+        JSON response with the recommended song IDs and their similarity scores.
+    Raises:
+        400 error if the query parameters are invalid or the limit is not positive.
+    """
+    try:
+        song_id = int(request.args['song_id'])
+        limit = int(request.args.get('limit', 10))
+    except (KeyError, ValueError):
+        return make_response(jsonify({'error': 'song_id is required and song_id and limit must be integers'}), 400)
+
+    try:
+        recommendations = recommender.recommend(song_id, limit)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    return make_response(jsonify({
+        'status': 'success',
+        'song_id': song_id,
+        'recommendations': [{'song_id': other_id, 'score': score} for other_id, score in recommendations]
+    }), 200)
+
 ############################################################
 #
 # Leaderboard / Stats
@@ -721,9 +1309,78 @@ def get_song_leaderboard() -> Response:
         leaderboard_data = song_model.get_all_songs(sort_by_play_count=True)
         return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
     except Exception as e:
-        app.logger.error(f"Error generating leaderboard: {e}")
+        app.logger.error("Error generating leaderboard: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/trending-leaderboard', methods=['GET'])
+def get_trending_leaderboard() -> Response:
+    """
+    Route to get the songs with the highest trending score, where older plays count exponentially less.
+
+    Query Parameters:
+        - limit (int, optional): The number of songs to return. Default is 10.
+
+    Returns:
+        JSON response with the trending songs, highest score first.
+    Raises:
+        400 error if the limit is invalid.
+        500 error if there is an issue generating the leaderboard.
+    """
+    try:
+        try:
+            limit = int(request.args.get('limit', 10))
+            app.logger.info("Generating trending leaderboard of %d songs", limit)
+            leaderboard_data = trending_model.get_trending_songs(limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+    except Exception as e:
+        app.logger.error("Error generating trending leaderboard: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/top-songs', methods=['GET'])
+def get_top_songs() -> Response:
+    """
+    Route to get the most played songs over a time window, read from the play rollups.
+
+    Query Parameters:
+        - window (int, optional): The window length in seconds, ending at 'end'. Default is 3600.
+        - start (int, optional): The unix timestamp the window starts at. Overrides 'window'.
+        - end (int, optional): The unix timestamp the window ends at. Default is now.
+        - limit (int, optional): The number of songs to return. Default is 10.
+
+    Returns:
+        JSON response with the top songs and their play counts in the window.
+    Raises:
+        400 error if the window or limit is invalid.
+        500 error if there is an issue retrieving the top songs.
+    """
+    try:
+        try:
+            end = int(request.args.get('end', time.time()))
+            start = int(request.args['start']) if 'start' in request.args else end - int(request.args.get('window', 3600))
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return make_response(jsonify({'error': 'window, start, end and limit must be integers'}), 400)
+
+        app.logger.info("Retrieving top %d songs between %d and %d", limit, start, end)
+        try:
+            top_songs = play_event_model.get_top_songs(start, end, limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        return make_response(jsonify({'status': 'success', 'start': start, 'end': end, 'songs': top_songs}), 200)
+    except Exception as e:
+        app.logger.error("Error retrieving top songs: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # FLASK_DEBUG=1 runs the development server with the debugger and reloader
+    if get_debug_flag():
+        run_worker_init_hooks(0)
+        app.run(debug=True, host='0.0.0.0', port=int(os.getenv("PORT", "5000")))
+    else:
+        sys.exit(serve(app))
@@ -0,0 +1,48 @@
+"""
+The asyncio variant of the playlist API.
+
+Serves the same routes as app.py. /api/get-random-song waits on random.org as a coroutine;
+every other route runs the Flask view on the bounded DB thread pool.
+
+Usage:
+    python asgi.py
+    uvicorn asgi:asgi_app --host 0.0.0.0 --port 5000
+"""
+import os
+from typing import Any, Dict, Tuple
+
+import uvicorn
+
+from app import app
+from music_collection.models import song_model
+from music_collection.utils.asgi import AsyncApp
+from music_collection.utils.random_utils import get_random_async
+
+
+asgi_app = AsyncApp(app)
+
+
+@asgi_app.route('/api/get-random-song', methods=['GET'])
+async def get_random_song(scope: Dict[str, Any]) -> Tuple[int, dict]:
+    """
+    Route to retrieve a random song from the catalog without holding a thread while random.org
+    responds.
+
+    Returns:
+        JSON response with the details of a random song or error message.
+    """
+    try:
+        app.logger.info("Retrieving a random song from the catalog")
+        all_songs = await asgi_app.run_sync(song_model.get_all_songs)
+        if not all_songs:
+            raise ValueError("The song catalog is empty.")
+        random_index = await get_random_async(len(all_songs))
+        song = song_model.get_song_at_random_index(all_songs, random_index)
+        return 200, {'status': 'success', 'song': song}
+    except Exception as e:
+        app.logger.error("Error retrieving a random song: %s", str(e))
+        return 500, {'error': str(e)}
+
+
+if __name__ == '__main__':
+    uvicorn.run(asgi_app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "5000")), lifespan="on")
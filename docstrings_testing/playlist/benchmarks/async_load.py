@@ -0,0 +1,157 @@
+"""
+Load tests the sync Flask app against the asyncio variant at increasing connection counts.
+
+random.org is replaced by a local stub that answers after a fixed delay, the way a slow
+upstream does. Each server is started as a subprocess on a fresh catalog and loaded with
+/api/get-random-song from a pool of concurrent connections for a fixed time. The sync app can
+only have as many random.org calls in flight as it has request threads; the async app waits on
+them as coroutines.
+
+Usage:
+    python -m benchmarks.async_load --connections 64 256 1024 --seconds 10 --delay 0.1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+PORT = 5098
+STUB_PORT = 5097
+
+# Answers every request with the random index 1 after the delay given as argv[2]
+RANDOM_ORG_STUB = """
+import asyncio, sys
+
+async def handle(reader, writer):
+    try:
+        await reader.readuntil(b"\\r\\n\\r\\n")
+        await asyncio.sleep(float(sys.argv[2]))
+        writer.write(b"HTTP/1.1 200 OK\\r\\nContent-Length: 2\\r\\nConnection: close\\r\\n\\r\\n1\\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def main():
+    server = await asyncio.start_server(handle, "127.0.0.1", int(sys.argv[1]), backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+asyncio.run(main())
+"""
+
+
+async def request(path: str) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+async def wait_until_up(timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if await request("/api/health") == 200:
+                return
+        except (OSError, IndexError):
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server on port {PORT} did not start")
+
+
+async def load(connections: int, seconds: float) -> tuple:
+    """
+    Keeps `connections` requests in flight until the time is up and returns
+    (latencies in ms, error count).
+    """
+    latencies, errors = [], 0
+    deadline = time.monotonic() + seconds
+
+    async def connection_loop():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(request("/api/get-random-song"), timeout=30)
+            except (OSError, IndexError, asyncio.TimeoutError):
+                errors += 1
+                continue
+            if status != 200:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(connection_loop() for _ in range(connections)))
+    return latencies, errors
+
+
+def run_server(label: str, command: list, env: dict, connections: list, seconds: float) -> None:
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_until_up())
+        for count in connections:
+            start = time.perf_counter()
+            latencies, errors = asyncio.run(load(count, seconds))
+            elapsed = time.perf_counter() - start
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99)] if latencies else float("nan")
+            p50 = statistics.median(latencies) if latencies else float("nan")
+            print(f"{label:<6} {count:5d} conns  {len(latencies) / elapsed:7.0f} req/s  p50 {p50:8.1f} ms  "
+                  f"p99 {p99:8.1f} ms  errors {errors}", flush=True)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the sync and async apps at high connection counts.")
+    parser.add_argument("--connections", type=int, nargs="+", default=[64, 256, 1024], help="concurrent connections")
+    parser.add_argument("--seconds", type=float, default=10, help="load duration per connection count")
+    parser.add_argument("--delay", type=float, default=0.1, help="random.org stub response delay in seconds")
+    parser.add_argument("--threads", type=int, default=8, help="request threads (sync) and DB threads (async)")
+    args = parser.parse_args()
+
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    workdir = tempfile.mkdtemp(prefix="playlist_async_load_")
+    env = dict(
+        os.environ,
+        DB_PATH=os.path.join(workdir, "song_catalog.db"),
+        SQL_CREATE_TABLE_PATH=os.path.join(root, "sql", "create_song_table.sql"),
+        RANDOM_ORG_URL=f"http://127.0.0.1:{STUB_PORT}",
+        PORT=str(PORT),
+        PYTHONPATH=root,
+        LOG_LEVEL="WARNING",
+    )
+    subprocess.run([sys.executable, "-c", (
+        "from music_collection.models import song_model\n"
+        "song_model.clear_catalog()\n"
+        "for i in range(1, 101): song_model.create_song(f'Artist {i}', f'Song {i}', 2000, 'Rock', 180)\n"
+    )], env=env, cwd=root, check=True, stderr=subprocess.DEVNULL)
+
+    stub = subprocess.Popen([sys.executable, "-c", RANDOM_ORG_STUB, str(STUB_PORT), str(args.delay)])
+    try:
+        run_server(
+            "sync",
+            [sys.executable, "-m", "music_collection.utils.server", "app:app", "--workers", "1", "--threads", str(args.threads)],
+            env, args.connections, args.seconds
+        )
+        run_server(
+            "async",
+            [sys.executable, os.path.join(root, "asgi.py")],
+            dict(env, DB_THREADS=str(args.threads)), args.connections, args.seconds
+        )
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Generates a large synthetic song catalog straight into a SQLite file.
+
+Rows are generated inside SQLite by a recursive query, so no Python runs per row and the load
+goes at SQLite's insert speed. A linear congruential generator carried through the
+query draws each column, and its state is seeded, so the same seed and count always produce the
+same catalog. Each draw indexes a table of QUANTILES points of the column's inverse distribution,
+precomputed here:
+
+- artist: Zipf-Mandelbrot, a few artists have thousands of songs and most have one or two.
+- genre: weighted towards Pop, Rock and Hip-Hop.
+- year: 1950 to 2024, weighted towards recent years.
+- duration: log-normal around three and a half minutes.
+- play_count: Zipfian over songs, the most popular song has PLAYS_SCALE plays and the song of
+  popularity rank r has PLAYS_SCALE / r.
+
+Rows are inserted in transactions of CHUNK_ROWS, with journaling off and the secondary indexes
+dropped until the end. Songs are appended after any already in the file; --reset recreates the
+tables first.
+
+Usage:
+    python -m benchmarks.generate_catalog --db /tmp/song_catalog.db --count 10000000 --seed 1
+"""
+import argparse
+from bisect import bisect_left
+from itertools import accumulate
+import logging
+import math
+import os
+import random
+import sqlite3
+from statistics import NormalDist
+import time
+from typing import Callable, List, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+# Points of each inverse distribution; also the range of each draw
+QUANTILES = 1 << 16
+
+# Rows per transaction
+CHUNK_ROWS = 1_000_000
+
+# Plays of the most popular song; the song of popularity rank r has PLAYS_SCALE / r
+PLAYS_SCALE = 10_000_000
+
+# Songs per artist on average
+SONGS_PER_ARTIST = 12
+
+# Artist of popularity rank r has a share of the songs proportional to 1 / (r + ARTIST_ZIPF_OFFSET) ** ARTIST_ZIPF_EXPONENT,
+# so that the biggest artists have a few thousand songs in a million rather than a tenth of the catalog
+ARTIST_ZIPF_EXPONENT = 1.1
+ARTIST_ZIPF_OFFSET = 100
+
+GENRE_WEIGHTS = {
+    "Pop": 25, "Rock": 20, "Hip-Hop": 18, "Electronic": 12, "R&B": 8, "Country": 7, "Jazz": 5, "Classical": 3, "Folk": 2,
+}
+
+YEARS = range(1950, 2025)
+
+# Median duration and spread of the log-normal duration distribution, and its bounds, in seconds
+DURATION_MEDIAN = 210
+DURATION_SIGMA = 0.3
+DURATION_BOUNDS = (30, 1200)
+
+# The generator: x -> (x * LCG_MULTIPLIER + LCG_INCREMENT) mod LCG_MODULUS. Products stay below 2**63,
+# so SQLite computes them in integers.
+LCG_MODULUS = 1 << 31
+LCG_MULTIPLIER = 1103515245
+LCG_INCREMENT = 12345
+
+# Draws per row: artist bucket, artist within the bucket, genre, year and duration
+DRAWS = 5
+
+DEFAULT_CREATE_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql", "create_song_table.sql")
+
+
+def lcg_jump(steps: int) -> Tuple[int, int]:
+    """
+    Returns (multiplier, increment) of the map that advances the generator by a number of steps.
+    """
+    multiplier, increment = 1, 0
+    step_multiplier, step_increment = LCG_MULTIPLIER, LCG_INCREMENT
+    while steps:
+        if steps & 1:
+            multiplier, increment = (multiplier * step_multiplier) % LCG_MODULUS, (increment * step_multiplier + step_increment) % LCG_MODULUS
+        step_multiplier, step_increment = (step_multiplier * step_multiplier) % LCG_MODULUS, (step_increment * step_multiplier + step_increment) % LCG_MODULUS
+        steps >>= 1
+    return multiplier, increment
+
+
+def draw_sql(draw: int) -> str:
+    """
+    Returns the SQL expression of a row's draw as an integer below QUANTILES, from its state x.
+    The high bits are used, since the low bits of a power-of-two LCG repeat quickly.
+    """
+    multiplier, increment = lcg_jump(draw)
+    return f"(((x * {multiplier} + {increment}) % {LCG_MODULUS}) >> {31 - QUANTILES.bit_length() + 1})"
+
+
+def inverse_cdf(weights: Sequence[float]) -> List[int]:
+    """
+    Returns, for each of QUANTILES evenly spaced probabilities, the index drawn by it from a
+    discrete distribution with the given weights.
+    """
+    cumulative = list(accumulate(weights))
+    return [min(len(weights) - 1, bisect_left(cumulative, (q + 0.5) / QUANTILES * cumulative[-1])) for q in range(QUANTILES)]
+
+
+def continuous_quantiles(inverse: Callable[[float], float], bounds: Tuple[int, int]) -> List[int]:
+    return [max(bounds[0], min(bounds[1], round(inverse((q + 0.5) / QUANTILES)))) for q in range(QUANTILES)]
+
+
+def create_quantiles(conn: sqlite3.Connection, artists: int) -> None:
+    """
+    Creates the temp table of inverse distributions. An artist bucket covers a range of artists
+    of equal popularity rank weight, since there can be more artists than quantiles.
+    """
+    zipf = [1 / (rank + ARTIST_ZIPF_OFFSET) ** ARTIST_ZIPF_EXPONENT for rank in range(1, artists + 1)]
+    artist_low = inverse_cdf(zipf)
+    artist_high = [max(low, artist_low[q + 1] - 1) if q + 1 < QUANTILES else artists - 1 for q, low in enumerate(artist_low)]
+    genres = list(GENRE_WEIGHTS)
+    genre = [genres[i] for i in inverse_cdf(list(GENRE_WEIGHTS.values()))]
+    year = [YEARS[i] for i in inverse_cdf([(year - YEARS[0] + 5) ** 1.5 for year in YEARS])]
+    log_normal = NormalDist(math.log(DURATION_MEDIAN), DURATION_SIGMA)
+    duration = continuous_quantiles(lambda p: math.exp(log_normal.inv_cdf(p)), DURATION_BOUNDS)
+
+    conn.execute("DROP TABLE IF EXISTS temp.quantiles")
+    conn.execute("""
+        CREATE TEMP TABLE quantiles (
+            q INTEGER PRIMARY KEY, artist_low INTEGER, artist_span INTEGER, genre TEXT, year INTEGER, duration INTEGER
+        )
+    """)
+    conn.executemany("INSERT INTO quantiles VALUES (?, ?, ?, ?, ?, ?)", (
+        (q, artist_low[q], artist_high[q] - artist_low[q] + 1, genre[q], year[q], duration[q]) for q in range(QUANTILES)
+    ))
+
+
+def popularity_stride(count: int, seed: int) -> int:
+    """
+    Returns a stride coprime with count, so that (i * stride) mod count visits every popularity rank once.
+    """
+    stride = random.Random(seed).randrange(count // 3 + 1, count) if count > 2 else 1
+    while math.gcd(stride, count) != 1:
+        stride += 1
+    return stride
+
+
+def generate_songs(db_path: str, count: int, seed: int = 1, reset: bool = False,
+                   create_table_path: str = DEFAULT_CREATE_TABLE_PATH) -> None:
+    """
+    Appends synthetic songs to the catalog in a SQLite file.
+
+    Args:
+        db_path (str): The SQLite file, created if missing.
+        count (int): The number of songs.
+        seed (int): Seed of the generator.
+        reset (bool): Whether to recreate the tables first, discarding existing songs.
+        create_table_path (str): The script creating the tables, run if reset or the file has none.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -262144")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if reset or not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'songs'").fetchone():
+            with open(create_table_path) as fh:
+                conn.executescript(fh.read())
+
+        offset = conn.execute("SELECT COALESCE(MAX(id), 0) FROM songs").fetchone()[0]
+        artists = max(1, count // SONGS_PER_ARTIST)
+        stride = popularity_stride(count, seed)
+        create_quantiles(conn, artists)
+
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'songs' AND sql IS NOT NULL"
+        ).fetchall()
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {name}")
+
+        row_multiplier, row_increment = lcg_jump(DRAWS)
+        state = random.Random(seed).randrange(LCG_MODULUS)
+        for start in range(0, count, CHUNK_ROWS):
+            rows = min(CHUNK_ROWS, count - start)
+            began = time.perf_counter()
+            conn.execute("BEGIN")
+            conn.execute(f"""
+                WITH RECURSIVE draws(i, x) AS (
+                    SELECT ?, ?
+                    UNION ALL
+                    SELECT i + 1, (x * {row_multiplier} + {row_increment}) % {LCG_MODULUS} FROM draws WHERE i < ?
+                )
+                INSERT INTO songs (artist, title, year, genre, duration, play_count)
+                SELECT 'Artist ' || (a.artist_low + {draw_sql(1)} % a.artist_span), 'Song ' || (? + i),
+                       y.year, g.genre, d.duration, {PLAYS_SCALE} / ((i * ?) % ? + 1)
+                FROM draws
+                JOIN quantiles AS a ON a.q = {draw_sql(0)}
+                JOIN quantiles AS g ON g.q = {draw_sql(2)}
+                JOIN quantiles AS y ON y.q = {draw_sql(3)}
+                JOIN quantiles AS d ON d.q = {draw_sql(4)}
+            """, (start, state, start + rows - 1, offset + 1, stride, count))
+            conn.execute("COMMIT")
+            multiplier, increment = lcg_jump(DRAWS * rows)
+            state = (state * multiplier + increment) % LCG_MODULUS
+            logger.info("Inserted songs %d to %d in %.1fs", offset + start + 1, offset + start + rows, time.perf_counter() - began)
+
+        began = time.perf_counter()
+        for _, sql in indexes:
+            conn.execute(sql)
+        logger.info("Rebuilt %d indexes in %.1fs", len(indexes), time.perf_counter() - began)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic song catalog in a SQLite file.")
+    parser.add_argument("--db", default=os.getenv("DB_PATH"), required=os.getenv("DB_PATH") is None,
+                        help="SQLite file to write (default: DB_PATH)")
+    parser.add_argument("--count", type=int, required=True, help="number of songs")
+    parser.add_argument("--seed", type=int, default=1, help="generator seed")
+    parser.add_argument("--reset", action="store_true", help="recreate the tables first, discarding existing songs")
+    parser.add_argument("--sql", default=os.getenv("SQL_CREATE_TABLE_PATH", DEFAULT_CREATE_TABLE_PATH),
+                        help="table creation script (default: SQL_CREATE_TABLE_PATH)")
+    args = parser.parse_args()
+    if args.count < 1:
+        parser.error("--count must be positive")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    began = time.perf_counter()
+    generate_songs(args.db, args.count, args.seed, args.reset, args.sql)
+    logger.info("Generated %d songs in %s in %.1fs", args.count, args.db, time.perf_counter() - began)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Microbenchmarks of the playlist models against a real SQLite file.
+
+For each scale, a scratch database is filled with that many synthetic songs by generate_catalog,
+seeded so that every run sees the same catalog, and the playlist is loaded with all of them.
+Every PlaylistModel operation is then timed, along with the catalog queries get_all_songs and
+get_song_by_compound_key. Operations that change the playlist are given a fresh copy of it before
+each call, outside the timed region. Playback writes a play per track, so the playback operations
+run on a playlist of the first PLAYBACK_TRACKS songs at every scale.
+
+Each benchmark runs for at least --min-time seconds and is reported by its median time per call.
+--save-baseline stores the results; later runs compare each median with the baseline and exit
+with status 1 if any is slower by more than --threshold, so the suite can gate a CI job.
+Baselines are only comparable on the machine that recorded them.
+
+Usage:
+    python -m benchmarks.model_bench --scales 1000 10000 100000 1000000 --save-baseline
+    python -m benchmarks.model_bench --threshold 0.2
+"""
+import argparse
+from dataclasses import dataclass
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.generate_catalog import generate_songs
+
+
+# Tracks in the playlist for the playback benchmarks
+PLAYBACK_TRACKS = 100
+
+# Slowdowns smaller than this are timer noise and never count as regressions
+NOISE_FLOOR_US = 5.0
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "model_bench.json")
+
+@dataclass
+class Case:
+    """
+    A benchmarked call.
+
+    Attributes:
+        name (str): The benchmark name.
+        run (Callable[[], Any]): The timed call.
+        reset (Callable[[], None], optional): Restores the state before each call, untimed.
+        size (int, optional): The size the call works on, if not the scale.
+        setup (Callable[[], None], optional): Sets up the state once before the calls, untimed.
+    """
+    name: str
+    run: Callable[[], Any]
+    reset: Optional[Callable[[], None]] = None
+    size: Optional[int] = None
+    setup: Optional[Callable[[], None]] = None
+
+
+def playlist_cases(scale: int) -> List[Case]:
+    """
+    Returns the benchmarks of one scale, on a catalog already filled with that many songs.
+    """
+    from music_collection.models import song_model
+    from music_collection.models.playlist_model import PlaylistModel
+
+    songs = song_model.get_all_songs()
+    model = PlaylistModel()
+    middle = songs[len(songs) // 2]
+    middle_track = len(songs) // 2 + 1
+    last = songs[-1]
+
+    def full() -> None:
+        model.playlist = list(songs)
+        model.current_track_number = 1
+
+    def without_last() -> None:
+        model.playlist = songs[:-1]
+
+    def playback() -> None:
+        model.playlist = songs[:PLAYBACK_TRACKS]
+        model.current_track_number = 1
+
+    def halfway_through_playback() -> None:
+        playback()
+        model.current_track_number = len(model.playlist) // 2
+
+    def read(name: str, run: Callable[[], Any]) -> Case:
+        return Case(name, run, setup=full)
+
+    return [
+        Case("PlaylistModel.add_song_to_playlist", lambda: model.add_song_to_playlist(last), without_last),
+        Case("PlaylistModel.load_playlist", lambda: model.load_playlist(songs)),
+        Case("PlaylistModel.remove_song_by_song_id", lambda: model.remove_song_by_song_id(middle.id), full),
+        Case("PlaylistModel.remove_song_by_track_number", lambda: model.remove_song_by_track_number(middle_track), full),
+        Case("PlaylistModel.clear_playlist", model.clear_playlist, full),
+        read("PlaylistModel.get_all_songs", model.get_all_songs),
+        read("PlaylistModel.get_song_by_song_id", lambda: model.get_song_by_song_id(middle.id)),
+        read("PlaylistModel.get_song_by_track_number", lambda: model.get_song_by_track_number(middle_track)),
+        read("PlaylistModel.get_current_song", model.get_current_song),
+        read("PlaylistModel.get_playlist_length", model.get_playlist_length),
+        read("PlaylistModel.get_playlist_duration", model.get_playlist_duration),
+        read("PlaylistModel.go_to_track_number", lambda: model.go_to_track_number(middle_track)),
+        Case("PlaylistModel.move_song_to_beginning", lambda: model.move_song_to_beginning(middle.id), full),
+        Case("PlaylistModel.move_song_to_end", lambda: model.move_song_to_end(middle.id), full),
+        Case("PlaylistModel.move_song_to_track_number", lambda: model.move_song_to_track_number(middle.id, 1), full),
+        Case("PlaylistModel.swap_songs_in_playlist", lambda: model.swap_songs_in_playlist(songs[0].id, last.id), full),
+        Case("PlaylistModel.play_current_song", model.play_current_song, playback, PLAYBACK_TRACKS),
+        Case("PlaylistModel.play_entire_playlist", model.play_entire_playlist, playback, PLAYBACK_TRACKS),
+        Case("PlaylistModel.play_rest_of_playlist", model.play_rest_of_playlist, halfway_through_playback, PLAYBACK_TRACKS),
+        read("PlaylistModel.advance_track", model.advance_track),
+        read("PlaylistModel.rewind_playlist", model.rewind_playlist),
+        read("PlaylistModel.validate_song_id", lambda: model.validate_song_id(middle.id)),
+        read("PlaylistModel.validate_track_number", lambda: model.validate_track_number(middle_track)),
+        Case("song_model.get_all_songs", song_model.get_all_songs),
+        Case("song_model.get_all_songs(sort_by_play_count)", lambda: song_model.get_all_songs(sort_by_play_count=True)),
+        Case("song_model.get_song_by_compound_key",
+             lambda: song_model.get_song_by_compound_key(middle.artist, middle.title, middle.year)),
+    ]
+
+
+def time_case(case: Case, min_time: float, min_runs: int = 5) -> Dict[str, Any]:
+    """
+    Calls a benchmark until its calls add up to min_time, and returns the timings in microseconds.
+    Stops early, after min_runs calls, if untimed resets make the wall time exceed ten times that.
+    """
+    if case.setup is not None:
+        case.setup()
+    times = []
+    timed = 0.0
+    deadline = time.perf_counter() + 10 * min_time
+    while len(times) < min_runs or (timed < min_time and time.perf_counter() < deadline):
+        if case.reset is not None:
+            case.reset()
+        start = time.perf_counter()
+        case.run()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        timed += elapsed
+    times.sort()
+    return {
+        'runs': len(times),
+        'median_us': round(times[len(times) // 2] * 1e6, 3),
+        'min_us': round(times[0] * 1e6, 3),
+        'p95_us': round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1e6, 3),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Returns a line for each benchmark slower than its baseline by more than the threshold.
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        slowdown = result['median_us'] - before['median_us']
+        if slowdown > NOISE_FLOOR_US and slowdown > before['median_us'] * threshold:
+            regressions.append(f"{key}: {before['median_us']:.1f} us -> {result['median_us']:.1f} us "
+                               f"({slowdown / before['median_us'] * 100:+.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the playlist models against a real SQLite file.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000, 1000000], help="songs in the catalog")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds of calls per benchmark")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic catalog")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="fractional slowdown that fails the run")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="playlist_model_bench_")
+    os.environ["DB_PATH"] = os.path.join(workdir, "song_catalog.db")
+    os.environ.setdefault("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # The slow-query log would run EXPLAIN for slow statements inside the timed calls
+    os.environ.setdefault("SLOW_QUERY_MS", "inf")
+
+    from music_collection.models import song_model
+
+    results: Dict[str, Any] = {}
+    for scale in args.scales:
+        song_model.clear_catalog()
+        start = time.perf_counter()
+        generate_songs(os.environ["DB_PATH"], scale, args.seed)
+        print(f"Generated {scale} songs in {time.perf_counter() - start:.1f}s")
+        for case in playlist_cases(scale):
+            if args.filter not in case.name:
+                continue
+            result = dict(time_case(case, args.min_time), size=case.size or scale)
+            results[f"{case.name}@{scale}"] = result
+            print(f"  {case.name:<50} {result['size']:>8}  median {result['median_us']:12.1f} us  "
+                  f"min {result['min_us']:12.1f} us  runs {result['runs']}", flush=True)
+
+    report = {
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {'scales': args.scales, 'min_time': args.min_time, 'seed': args.seed},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        compared = len(set(results) & set(baseline))
+        if regressions:
+            print(f"{len(regressions)} of {compared} benchmarks regressed by more than {args.threshold:.0%}:")
+            print("\n".join(f"  {line}" for line in regressions))
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} in {compared} benchmarks compared with {args.baseline}")
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+
+
+if __name__ == "__main__":
+    main()
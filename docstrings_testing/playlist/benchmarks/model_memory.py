@@ -0,0 +1,151 @@
+"""
+Measures the memory taken by catalog songs held in the get_all_songs cache and in a playlist.
+
+A scratch database is filled with --songs synthetic songs by generate_catalog, and the whole
+catalog is read once per representation: the slotted CatalogSong built by the model's row factory,
+the same dataclass with a per-instance __dict__, and the dict per row the catalog used to return.
+tracemalloc measures the memory each list of songs holds once read, including its strings, and
+the songs are then loaded into a PlaylistModel, which holds the same objects, to measure what a
+playlist adds. Finally, serializing the songs to JSON is timed through each model's to_dict and
+through dataclasses.asdict, which Flask would otherwise use.
+
+Usage:
+    python -m benchmarks.model_memory --songs 1000000
+    python -m benchmarks.model_memory --songs 100000 --output memory.json
+"""
+import argparse
+from dataclasses import asdict, dataclass
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.generate_catalog import generate_songs
+
+
+# Songs serialized per timing of to_dict and asdict
+SERIALIZED_SONGS = 100000
+
+CATALOG_QUERY = """
+    SELECT id, artist, title, year, genre, duration, play_count
+    FROM songs
+    WHERE deleted = FALSE
+"""
+
+COLUMNS = ("id", "artist", "title", "year", "genre", "duration", "play_count")
+
+
+@dataclass
+class UnslottedCatalogSong:
+    """
+    A catalog song as it was before the models were slotted, for comparison.
+    """
+    id: int
+    artist: str
+    title: str
+    year: int
+    genre: str
+    duration: int
+    play_count: int
+
+
+def read_catalog(row_factory: Callable[[Any, tuple], Any]) -> List[Any]:
+    from music_collection.utils.sql_utils import get_db_connection
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = row_factory
+        cursor.execute(CATALOG_QUERY)
+        return cursor.fetchall()
+
+
+def traced_bytes(build: Callable[[], Any]) -> tuple:
+    """
+    Returns what build returns and the bytes it still holds once it has returned.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, held
+
+
+def measure(name: str, read: Callable[[], List[Any]]) -> Dict[str, Any]:
+    from music_collection.models.playlist_model import PlaylistModel
+
+    songs, cache_bytes = traced_bytes(read)
+    playlist = PlaylistModel()
+    _, playlist_bytes = traced_bytes(lambda: playlist.playlist.extend(songs))
+    count = len(songs)
+    result = {
+        'songs': count,
+        'cache_mb': round(cache_bytes / 2**20, 1),
+        'cache_bytes_per_song': round(cache_bytes / count, 1),
+        'playlist_bytes_per_song': round(playlist_bytes / count, 1),
+    }
+    print(f"  {name:<22} {result['cache_mb']:10.1f} MB  {result['cache_bytes_per_song']:8.1f} B/song  "
+          f"playlist +{result['playlist_bytes_per_song']:.1f} B/song", flush=True)
+    return result
+
+
+def time_serialization(name: str, songs: List[Any], to_dict: Callable[[Any], Dict[str, Any]]) -> float:
+    start = time.perf_counter()
+    for song in songs:
+        to_dict(song)
+    us = (time.perf_counter() - start) / len(songs) * 1e6
+    print(f"  {name:<22} {us:8.2f} us/song", flush=True)
+    return round(us, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the memory held by catalog songs.")
+    parser.add_argument("--songs", type=int, default=1000000, help="songs in the catalog")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic catalog")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="playlist_model_memory_")
+    os.environ["DB_PATH"] = os.path.join(workdir, "song_catalog.db")
+    os.environ.setdefault("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("SLOW_QUERY_MS", "inf")
+
+    from music_collection.models import song_model
+
+    song_model.clear_catalog()
+    generate_songs(os.environ["DB_PATH"], args.songs, args.seed)
+
+    print(f"Memory held by {args.songs} songs")
+    memory = {
+        'slotted': measure("slotted CatalogSong", song_model.get_all_songs),
+        'unslotted': measure("unslotted dataclass", lambda: read_catalog(lambda _, row: UnslottedCatalogSong(*row))),
+        'dict': measure("dict per row", lambda: read_catalog(lambda _, row: dict(zip(COLUMNS, row)))),
+    }
+
+    print(f"Serialization of {SERIALIZED_SONGS} songs")
+    songs = song_model.get_all_songs()[:SERIALIZED_SONGS]
+    serialization = {
+        'to_dict_us': time_serialization("to_dict", songs, lambda song: song.to_dict()),
+        'asdict_us': time_serialization("dataclasses.asdict", songs, asdict),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+                'config': {'songs': args.songs, 'seed': args.seed},
+                'memory': memory,
+                'serialization': serialization,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
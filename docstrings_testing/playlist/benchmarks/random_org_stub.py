@@ -0,0 +1,110 @@
+"""
+A local stand-in for random.org, for load tests and smoke tests that must not depend on it.
+
+Answers the two plain-text endpoints the services call, /integers/ (a random integer between the
+min and max query parameters) and /decimal-fractions/ (a random fraction with dec decimals),
+after a fixed delay that models the upstream round trip. Numbers come from a seeded generator, so
+a run draws the same sequence each time. Point a service at it with RANDOM_ORG_URL.
+
+Usage:
+    python -m benchmarks.random_org_stub --port 5097 --delay 0.05 --seed 1
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+class RandomOrgStub(ThreadingHTTPServer):
+    """
+    A threaded HTTP server answering random.org's plain-text endpoints.
+
+    Attributes:
+        delay (float): Seconds to wait before answering each request.
+        requests (int): The number of requests answered.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, port: int, delay: float = 0.0, seed: int = 1):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.delay = delay
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self, path: str, query: dict) -> Optional[str]:
+        """
+        Returns the body random.org would send for a path and query, or None for an unknown path.
+        """
+        with self._lock:
+            self.requests += 1
+            if path.startswith("/integers"):
+                return str(self._random.randint(int(query.get("min", "1")), int(query.get("max", "100"))))
+            if path.startswith("/decimal-fractions"):
+                return f"{self._random.random():.{int(query.get('dec', '2'))}f}"
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            body = self.server.draw(url.path, query)
+        except ValueError:
+            body = None
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        status, body = (200, body) if body is not None else (400, "Error: unsupported request")
+        payload = (body + "\n").encode("ascii")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_stub(port: int, delay: float = 0.0, seed: int = 1) -> RandomOrgStub:
+    """
+    Starts the stub on a daemon thread. Stop it with shutdown().
+
+    Args:
+        port (int): The port to listen on, on 127.0.0.1.
+        delay (float): Seconds to wait before answering each request.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        RandomOrgStub: The running server.
+    """
+    stub = RandomOrgStub(port, delay, seed)
+    threading.Thread(target=stub.serve_forever, name="random-org-stub", daemon=True).start()
+    return stub
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve random.org's plain-text endpoints locally.")
+    parser.add_argument("--port", type=int, default=5097, help="port to listen on")
+    parser.add_argument("--delay", type=float, default=0.0, help="response delay in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="random number generator seed")
+    args = parser.parse_args()
+
+    stub = RandomOrgStub(args.port, args.delay, args.seed)
+    print(f"random.org stub listening on http://127.0.0.1:{args.port}", flush=True)
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -13,5 +13,6 @@ else
     echo "Skipping database creation."
 fi
 
-# Start the Python application
-exec python3 app.py
+# Start the Python application on the pre-forking server, configured by WORKERS, THREADS,
+# GRACEFUL_TIMEOUT and PRELOAD_APP. Send SIGHUP to reload the workers.
+exec python3 -m music_collection.utils.server app:app
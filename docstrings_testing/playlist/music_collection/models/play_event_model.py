@@ -0,0 +1,154 @@
+from collections import Counter
+import logging
+import sqlite3
+import time
+from typing import Any, List, Optional, Tuple
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Rollup tables from finest to coarsest, with the bucket width of each in seconds
+ROLLUP_TABLES = [
+    ("song_plays_by_minute", 60),
+    ("song_plays_by_hour", 60 * 60),
+    ("song_plays_by_day", 24 * 60 * 60),
+]
+
+
+def record_plays(cursor: sqlite3.Cursor, song_ids: List[int], played_at: Optional[int] = None) -> None:
+    """
+    Appends play events and folds them into the rollup tables using the caller's cursor.
+
+    This is meant to run inside the same transaction as the play count update, so the event
+    log, the rollups and songs.play_count never disagree. Each rollup receives one upsert per
+    distinct song in the batch rather than one per play.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor of the open transaction.
+        song_ids (List[int]): The IDs of the songs that were played, one entry per play.
+        played_at (int, optional): The unix timestamp of the plays. Defaults to now.
+    """
+    if not song_ids:
+        return
+    if played_at is None:
+        played_at = int(time.time())
+
+    cursor.executemany(
+        "INSERT INTO play_events (song_id, played_at) VALUES (?, ?)",
+        [(song_id, played_at) for song_id in song_ids]
+    )
+
+    plays = Counter(song_ids)
+    for table, width in ROLLUP_TABLES:
+        bucket = played_at // width
+        cursor.executemany(f"""
+            INSERT INTO {table} (bucket, song_id, plays) VALUES (?, ?, ?)
+            ON CONFLICT (bucket, song_id) DO UPDATE SET plays = plays + excluded.plays
+        """, [(bucket, song_id, count) for song_id, count in plays.items()])
+
+    logger.debug("Recorded %d play events for %d songs", len(song_ids), len(plays))
+
+
+def split_window(start: int, end: int) -> List[Tuple[str, int, int]]:
+    """
+    Splits a time window into the fewest rollup bucket ranges that cover it exactly.
+
+    The window is widened to whole minutes. Whole days in the middle are read from the daily
+    rollup, the whole hours around them from the hourly rollup and the leftover minutes at
+    either edge from the minute rollup, so at most a few hundred rollup buckets are read
+    however long the window is.
+
+    Args:
+        start (int): The unix timestamp the window starts at (inclusive).
+        end (int): The unix timestamp the window ends at (exclusive).
+
+    Returns:
+        List[Tuple[str, int, int]]: (table, first bucket, end bucket) ranges, end bucket exclusive.
+    """
+    ranges = []
+    fine_table, fine_width = ROLLUP_TABLES[0]
+    low = start // fine_width
+    high = -(-end // fine_width)
+
+    for coarse_table, coarse_width in ROLLUP_TABLES[1:]:
+        ratio = coarse_width // fine_width
+        coarse_low = -(-low // ratio)
+        coarse_high = high // ratio
+        if coarse_low >= coarse_high:
+            break
+        if low < coarse_low * ratio:
+            ranges.append((fine_table, low, coarse_low * ratio))
+        if coarse_high * ratio < high:
+            ranges.append((fine_table, coarse_high * ratio, high))
+        fine_table, fine_width, low, high = coarse_table, coarse_width, coarse_low, coarse_high
+
+    if low < high:
+        ranges.append((fine_table, low, high))
+    return ranges
+
+
+def get_top_songs(start: int, end: int, limit: int = 10) -> List[dict[str, Any]]:
+    """
+    Retrieves the most played non-deleted songs in a time window from the rollup tables.
+
+    Args:
+        start (int): The unix timestamp the window starts at (inclusive).
+        end (int): The unix timestamp the window ends at (exclusive).
+        limit (int): The number of songs to return. Defaults to 10.
+
+    Returns:
+        List[dict[str, Any]]: The songs with their play count in the window, most played first.
+
+    Raises:
+        ValueError: If the window or limit is invalid.
+        sqlite3.Error: For database errors during query execution.
+    """
+    if end <= start:
+        raise ValueError(f"Invalid window: end {end} must be after start {start}")
+    if limit <= 0:
+        raise ValueError(f"Invalid limit: {limit} (must be a positive integer).")
+
+    ranges = split_window(start, end)
+    subqueries = " UNION ALL ".join(
+        f"SELECT song_id, plays FROM {table} WHERE bucket >= ? AND bucket < ?" for table, _, _ in ranges
+    )
+    params = [bound for _, low, high in ranges for bound in (low, high)]
+    query = f"""
+        SELECT songs.id, songs.artist, songs.title, songs.year, songs.genre, songs.duration, SUM(window_plays.plays) AS plays
+        FROM ({subqueries}) AS window_plays
+        JOIN songs ON songs.id = window_plays.song_id
+        WHERE songs.deleted = FALSE
+        GROUP BY songs.id
+        ORDER BY plays DESC
+        LIMIT ?
+    """
+    params.append(limit)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Retrieving top %d songs between %d and %d from %d rollup ranges", limit, start, end, len(ranges))
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        return [
+            {
+                "id": row[0],
+                "artist": row[1],
+                "title": row[2],
+                "year": row[3],
+                "genre": row[4],
+                "duration": row[5],
+                "plays": row[6],
+            }
+            for row in rows
+        ]
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving top songs: %s", str(e))
+        raise e
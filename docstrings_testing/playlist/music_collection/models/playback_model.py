@@ -0,0 +1,217 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+import uuid
+
+from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.recommendation_model import recommender
+from music_collection.models.song_model import update_play_counts
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Number of plays buffered before the play counts are written in one transaction
+PLAY_COUNT_BATCH_SIZE = 100
+
+# Number of finished jobs kept around so their final status can still be looked up
+MAX_FINISHED_JOBS = 100
+
+
+@dataclass
+class PlaybackJob:
+    """
+    Represents a background job that plays part of the playlist.
+    """
+
+    job_id: str
+    mode: str
+    start_track_number: int
+    total_tracks: int
+    played_tracks: int = 0
+    status: str = 'queued'  # queued, running, completed, cancelled or failed
+    cancel_requested: bool = False
+    error: Optional[str] = None
+
+    def is_finished(self) -> bool:
+        """
+        Returns True if the job is no longer queued or running.
+        """
+        return self.status in ('completed', 'cancelled', 'failed')
+
+
+class PlaybackJobManager:
+    """
+    A class to run playlist playback as background jobs on a bounded worker pool.
+
+    Attributes:
+        playlist_model (PlaylistModel): The playlist the jobs play.
+        jobs (Dict[str, PlaybackJob]): The known jobs by job ID, in submission order.
+    """
+
+    def __init__(self, playlist_model: PlaylistModel, max_workers: Optional[int] = None):
+        """
+        Initializes the PlaybackJobManager with an empty job table and a worker pool.
+
+        Args:
+            playlist_model (PlaylistModel): The playlist the jobs play.
+            max_workers (int, optional): The number of worker threads. Defaults to the
+                PLAYBACK_WORKERS environment variable, or 2.
+        """
+        if max_workers is None:
+            max_workers = int(os.getenv("PLAYBACK_WORKERS", "2"))
+        self.playlist_model = playlist_model
+        self.jobs: Dict[str, PlaybackJob] = {}
+        self._jobs_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="playback")
+
+    def play_entire_playlist(self) -> PlaybackJob:
+        """
+        Submits a job that plays the entire playlist from the first track.
+
+        Returns:
+            PlaybackJob: The submitted job.
+
+        Raises:
+            ValueError: If the playlist is empty.
+        """
+        with self.playlist_model.lock:
+            self.playlist_model.check_if_empty()
+            self.playlist_model.current_track_number = 1
+            return self._submit('entire', 1, self.playlist_model.get_playlist_length())
+
+    def play_rest_of_playlist(self) -> PlaybackJob:
+        """
+        Submits a job that plays the rest of the playlist from the current track.
+
+        Returns:
+            PlaybackJob: The submitted job.
+
+        Raises:
+            ValueError: If the playlist is empty.
+        """
+        with self.playlist_model.lock:
+            self.playlist_model.check_if_empty()
+            start_track_number = self.playlist_model.current_track_number
+            total_tracks = self.playlist_model.get_playlist_length() - start_track_number + 1
+            return self._submit('rest', start_track_number, total_tracks)
+
+    def get_job(self, job_id: str) -> PlaybackJob:
+        """
+        Retrieves a job by its ID.
+
+        Args:
+            job_id (str): The ID of the job.
+
+        Returns:
+            PlaybackJob: The job.
+
+        Raises:
+            ValueError: If no job with the given ID exists.
+        """
+        with self._jobs_lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            logger.info("Playback job %s not found", job_id)
+            raise ValueError(f"Playback job {job_id} not found")
+        return job
+
+    def cancel_job(self, job_id: str) -> PlaybackJob:
+        """
+        Requests cancellation of a job. The job stops before playing its next track.
+
+        Args:
+            job_id (str): The ID of the job to cancel.
+
+        Returns:
+            PlaybackJob: The job.
+
+        Raises:
+            ValueError: If no job with the given ID exists or the job has already finished.
+        """
+        job = self.get_job(job_id)
+        if job.is_finished():
+            logger.info("Playback job %s has already finished", job_id)
+            raise ValueError(f"Playback job {job_id} has already finished")
+        logger.info("Cancelling playback job %s", job_id)
+        job.cancel_requested = True
+        return job
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops accepting jobs and optionally waits for the running jobs to finish.
+
+        Args:
+            wait (bool): If True, blocks until all submitted jobs have finished.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _submit(self, mode: str, start_track_number: int, total_tracks: int) -> PlaybackJob:
+        """
+        Registers a new job and hands it to the worker pool.
+        """
+        job = PlaybackJob(job_id=uuid.uuid4().hex, mode=mode, start_track_number=start_track_number, total_tracks=total_tracks)
+        with self._jobs_lock:
+            self.jobs[job.job_id] = job
+            self._prune_finished_jobs()
+        logger.info("Submitted playback job %s: %d tracks from track number %d", job.job_id, total_tracks, start_track_number)
+        self._executor.submit(self._run_job, job)
+        return job
+
+    def _prune_finished_jobs(self) -> None:
+        """
+        Drops the oldest finished jobs once more than MAX_FINISHED_JOBS are kept. Must hold _jobs_lock.
+        """
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished()]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _run_job(self, job: PlaybackJob) -> None:
+        """
+        Plays the job's tracks, advancing the current track number after each one and writing
+        play counts in batches of PLAY_COUNT_BATCH_SIZE. The played sequence is handed to the
+        recommender once the job finishes, and the tracks played are counted even if it fails.
+        """
+        if job.cancel_requested:
+            job.status = 'cancelled'
+            return
+
+        job.status = 'running'
+        logger.info("Starting playback job %s", job.job_id)
+        with self.playlist_model.lock:
+            songs = list(self.playlist_model.playlist[job.start_track_number - 1:job.start_track_number - 1 + job.total_tracks])
+
+        pending: List[int] = []
+        played: List[int] = []
+        try:
+            try:
+                for song in songs:
+                    if job.cancel_requested:
+                        break
+                    self.playlist_model.advance_track()
+                    pending.append(song.id)
+                    played.append(song.id)
+                    job.played_tracks += 1
+                    if len(pending) >= PLAY_COUNT_BATCH_SIZE:
+                        batch, pending = pending, []
+                        update_play_counts(batch)
+            finally:
+                # Tracks played before a failure still count, e.g. if the playlist was cleared mid-job
+                recommender.observe_sequence(played)
+                if played:
+                    self.playlist_model.last_played_song_id = played[-1]
+                if pending:
+                    update_play_counts(pending)
+
+            job.status = 'cancelled' if job.cancel_requested else 'completed'
+            logger.info("Playback job %s %s after %d of %d tracks", job.job_id, job.status, job.played_tracks, job.total_tracks)
+
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            logger.error("Playback job %s failed: %s", job.job_id, str(e))
@@ -0,0 +1,123 @@
+from bisect import bisect_right, insort
+import logging
+from typing import List, Optional
+
+from music_collection.models.song_model import Song, get_songs_by_filters
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Upper bound on the candidates pulled from the catalog for one generated playlist
+CANDIDATE_LIMIT = 5000
+
+# Upper bound on the swap passes used to close the gap left by the greedy fill
+MAX_SWAP_ROUNDS = 50
+
+
+def fit_duration(songs: List[Song], target_duration: Optional[int] = None, max_length: Optional[int] = None) -> List[Song]:
+    """
+    Picks songs whose total duration comes as close as possible to the target without going over.
+
+    Songs are first added greedily in the order given (so more popular candidates win ties), then
+    the remaining gap is closed with bounded one-for-one swaps: each pass finds, by bisecting the
+    sorted durations of the unused songs, the swap that grows the total the most without passing
+    the target. This is O(n log n) in the number of candidates.
+
+    Args:
+        songs (List[Song]): The candidate songs, in order of preference.
+        target_duration (int, optional): The total duration to aim for in seconds. If not set,
+            the first max_length songs are returned.
+        max_length (int, optional): The maximum number of songs to pick.
+
+    Returns:
+        List[Song]: The picked songs, in order of preference.
+
+    Raises:
+        ValueError: If neither target_duration nor max_length is set, or either is not positive.
+    """
+    if target_duration is None and max_length is None:
+        raise ValueError("A target duration or a target length is required.")
+    if target_duration is not None and target_duration <= 0:
+        raise ValueError(f"Invalid target duration: {target_duration} (must be a positive integer).")
+    if max_length is not None and max_length <= 0:
+        raise ValueError(f"Invalid target length: {max_length} (must be a positive integer).")
+
+    if target_duration is None:
+        return songs[:max_length]
+
+    chosen = []
+    unused = []
+    total = 0
+    for song in songs:
+        if (max_length is None or len(chosen) < max_length) and total + song.duration <= target_duration:
+            chosen.append(song)
+            total += song.duration
+        else:
+            unused.append(song)
+
+    unused.sort(key=lambda song: song.duration)
+    unused_durations = [song.duration for song in unused]
+
+    for _ in range(MAX_SWAP_ROUNDS):
+        gap = target_duration - total
+        if gap == 0 or not unused:
+            break
+
+        best_gain, best_chosen, best_unused = 0, None, None
+        for chosen_index, song in enumerate(chosen):
+            unused_index = bisect_right(unused_durations, song.duration + gap) - 1
+            if unused_index >= 0 and unused_durations[unused_index] - song.duration > best_gain:
+                best_gain = unused_durations[unused_index] - song.duration
+                best_chosen, best_unused = chosen_index, unused_index
+
+        if best_chosen is None:
+            break
+
+        swapped_out = chosen[best_chosen]
+        chosen[best_chosen] = unused.pop(best_unused)
+        del unused_durations[best_unused]
+        insort(unused_durations, swapped_out.duration)
+        unused.insert(bisect_right(unused_durations, swapped_out.duration) - 1, swapped_out)
+        total += best_gain
+
+    logger.info("Fit %d songs into %d of %d target seconds", len(chosen), total, target_duration)
+    return chosen
+
+
+def build_smart_playlist(genre: str = None, min_year: int = None, max_year: int = None,
+                         min_play_count: int = None, max_play_count: int = None,
+                         target_duration: int = None, target_length: int = None) -> List[Song]:
+    """
+    Generates a playlist from the catalog that matches the filters and fits the target.
+
+    Args:
+        genre (str, optional): Only use songs of this genre.
+        min_year (int, optional): Only use songs released in or after this year.
+        max_year (int, optional): Only use songs released in or before this year.
+        min_play_count (int, optional): Only use songs played at least this many times.
+        max_play_count (int, optional): Only use songs played at most this many times.
+        target_duration (int, optional): The total duration to aim for in seconds.
+        target_length (int, optional): The maximum number of songs in the playlist.
+
+    Returns:
+        List[Song]: The songs for the generated playlist.
+
+    Raises:
+        ValueError: If the targets are invalid or no songs match the filters.
+        sqlite3.Error: If any database error occurs.
+    """
+    logger.info("Generating smart playlist: genre=%s, years=%s-%s, play_count=%s-%s, target_duration=%s, target_length=%s",
+                genre, min_year, max_year, min_play_count, max_play_count, target_duration, target_length)
+
+    candidates = get_songs_by_filters(genre=genre, min_year=min_year, max_year=max_year,
+                                      min_play_count=min_play_count, max_play_count=max_play_count,
+                                      limit=CANDIDATE_LIMIT)
+    songs = fit_duration(candidates, target_duration=target_duration, max_length=target_length)
+    if not songs:
+        logger.error("No songs match the smart playlist filters")
+        raise ValueError("No songs match the given filters and target.")
+
+    return songs
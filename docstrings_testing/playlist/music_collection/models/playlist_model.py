@@ -1,11 +1,16 @@
 import logging
+import threading
 from typing import List
+from music_collection.models.recommendation_model import recommender
 from music_collection.models.song_model import Song, update_play_count
-from music_collection.utils.logger import configure_logger
+from music_collection.utils.logger import SampledLogger, configure_logger
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Per-track lines logged while playing through the playlist
+track_logger = SampledLogger(logger)
+
 
 class PlaylistModel:
     """
@@ -14,6 +19,8 @@ class PlaylistModel:
     Attributes:
         current_track_number (int): The current track number being played.
         playlist (List[Song]): The list of songs in the playlist.
+        lock (threading.RLock): Guards current_track_number against concurrent playback jobs.
+        last_played_song_id (int): The ID of the song played most recently, if any.
 
     """
 
@@ -23,6 +30,8 @@ class PlaylistModel:
         """
         self.current_track_number = 1
         self.playlist: List[Song] = []
+        self.lock = threading.RLock()
+        self.last_played_song_id = None
 
     ##################################################
     # Song Management Functions
@@ -30,7 +39,8 @@ class PlaylistModel:
 
     def add_song_to_playlist(self, song: Song) -> None:
         """
-        Adds a song to the playlist.
+        Adds a song to the playlist and records it for recommendations as added next to the songs
+        before it.
 
         Args:
             song (Song): the song to add to the playlist.
@@ -45,11 +55,41 @@ class PlaylistModel:
             raise TypeError("Song is not a valid song")
 
         song_id = self.validate_song_id(song.id, check_in_playlist=False)
-        if song_id in [song_in_playlist.id for song_in_playlist in self.playlist]:
+        playlist_ids = [song_in_playlist.id for song_in_playlist in self.playlist]
+        if song_id in playlist_ids:
             logger.error("Song with ID %d already exists in the playlist", song.id)
             raise ValueError(f"Song with ID {song.id} already exists in the playlist")
 
         self.playlist.append(song)
+        recommender.observe_playlist(playlist_ids + [song_id], added_from=len(playlist_ids))
+
+    def load_playlist(self, songs: List[Song]) -> None:
+        """
+        Replaces the contents of the playlist with the given songs and rewinds to the first track.
+        The songs are recorded for recommendations as added to the same playlist.
+
+        Args:
+            songs (List[Song]): the songs to load into the playlist, in track order.
+
+        Raises:
+            TypeError: If any song is not a valid Song instance.
+            ValueError: If the same song 'id' appears more than once.
+        """
+        logger.info("Loading %d songs into the playlist", len(songs))
+        song_ids = set()
+        for song in songs:
+            if not isinstance(song, Song):
+                logger.error("Song is not a valid song")
+                raise TypeError("Song is not a valid song")
+            song_id = self.validate_song_id(song.id, check_in_playlist=False)
+            if song_id in song_ids:
+                logger.error("Song with ID %d appears more than once", song_id)
+                raise ValueError(f"Song with ID {song_id} appears more than once")
+            song_ids.add(song_id)
+
+        self.playlist = list(songs)
+        self.current_track_number = 1
+        recommender.observe_playlist([song.id for song in self.playlist])
 
     def remove_song_by_song_id(self, song_id: int) -> None:
         """
@@ -257,15 +297,19 @@ class PlaylistModel:
         Side-effects:
             Updates the current track number.
             Updates the play count for the song.
+            Records the song as played after the previous song for recommendations.
         """
         self.check_if_empty()
         current_song = self.get_song_by_track_number(self.current_track_number)
         logger.info("Playing song: %s (ID: %d) at track number: %d", current_song.title, current_song.id, self.current_track_number)
         update_play_count(current_song.id)
-        logger.info("Updated play count for song: %s (ID: %d)", current_song.title, current_song.id)
+        logger.debug("Updated play count for song: %s (ID: %d)", current_song.title, current_song.id)
+        if self.last_played_song_id is not None:
+            recommender.observe_sequence([self.last_played_song_id, current_song.id])
+        self.last_played_song_id = current_song.id
         previous_track_number = self.current_track_number
-        self.current_track_number = (self.current_track_number % self.get_playlist_length()) + 1
-        logger.info("Track number updated from %d to %d", previous_track_number, self.current_track_number)
+        current_track_number = self.advance_track()
+        logger.debug("Track number updated from %d to %d", previous_track_number, current_track_number)
 
     def play_entire_playlist(self) -> None:
         """
@@ -280,7 +324,7 @@ class PlaylistModel:
         self.current_track_number = 1
         logger.info("Reset current track number to 1.")
         for _ in range(self.get_playlist_length()):
-            logger.info("Playing track number: %d", self.current_track_number)
+            track_logger.info("Playing track number: %d", self.current_track_number)
             self.play_current_song()
         logger.info("Finished playing the entire playlist. Current track number reset to 1.")
 
@@ -295,10 +339,25 @@ class PlaylistModel:
         self.check_if_empty()
         logger.info("Starting to play the rest of the playlist from track number: %d", self.current_track_number)
         for _ in range(self.get_playlist_length() - self.current_track_number + 1):
-            logger.info("Playing track number: %d", self.current_track_number)
+            track_logger.info("Playing track number: %d", self.current_track_number)
             self.play_current_song()
         logger.info("Finished playing the rest of the playlist. Current track number reset to 1.")
 
+    def advance_track(self) -> int:
+        """
+        Atomically moves the current track number to the next track, wrapping back to 1 after the last track.
+
+        Returns:
+            int: The new current track number.
+
+        Raises:
+            ValueError: If the playlist is empty.
+        """
+        with self.lock:
+            self.check_if_empty()
+            self.current_track_number = (self.current_track_number % self.get_playlist_length()) + 1
+            return self.current_track_number
+
     def rewind_playlist(self) -> None:
         """
         Rewinds the playlist to the beginning.
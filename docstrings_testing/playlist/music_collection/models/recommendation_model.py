@@ -0,0 +1,212 @@
+from collections import Counter, defaultdict
+import heapq
+import logging
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import CACHE_REQUESTS
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Songs this many positions apart or closer in a played sequence count as co-occurring
+CO_OCCURRENCE_WINDOW = 5
+
+# Number of neighbors kept per song in the precomputed index
+NEIGHBORS_PER_SONG = 20
+
+# Co-occurrence counts kept per song; the rest are pruned on refresh so memory stays linear in songs
+CO_COUNTS_PER_SONG = 100
+
+# Songs in observations waiting for a refresh, above which new observations are dropped
+RECOMMENDER_MAX_PENDING_SONGS = int(os.getenv("RECOMMENDER_MAX_PENDING_SONGS", "1000000"))
+
+# Seconds between background refreshes of the neighbor index
+RECOMMENDER_REFRESH_SECONDS = float(os.getenv("RECOMMENDER_REFRESH_SECONDS", "5"))
+
+
+class RecommendationModel:
+    """
+    A class to recommend songs that are played together or added to the same playlist.
+
+    Co-occurrence counts are kept sparse (one Counter of neighbors per song). Similarity is the
+    cosine of the co-occurrence counts, count(a, b) / sqrt(count(a) * count(b)). Observations
+    are only queued when they are made; a background thread folds them into the counts, prunes
+    each touched song to its co_counts_per_song largest counts, recomputes its top neighbors and
+    swaps them into the index, so recommend() is a single dictionary lookup.
+
+    Attributes:
+        neighbors (Dict[int, List[Tuple[int, float]]]): The precomputed (song_id, score) neighbors per song.
+    """
+
+    def __init__(self, window: int = CO_OCCURRENCE_WINDOW, neighbors_per_song: int = NEIGHBORS_PER_SONG,
+                 co_counts_per_song: int = CO_COUNTS_PER_SONG, max_pending_songs: int = RECOMMENDER_MAX_PENDING_SONGS):
+        """
+        Initializes the RecommendationModel with no observations and an empty index.
+
+        Args:
+            window (int): The co-occurrence window in positions.
+            neighbors_per_song (int): The number of neighbors kept per song.
+            co_counts_per_song (int): The number of co-occurrence counts kept per song.
+            max_pending_songs (int): The songs in queued observations above which new ones are dropped.
+        """
+        self.window = window
+        self.neighbors_per_song = neighbors_per_song
+        self.co_counts_per_song = co_counts_per_song
+        self.max_pending_songs = max_pending_songs
+        self.neighbors: Dict[int, List[Tuple[int, float]]] = {}
+        self._co_counts: Dict[int, Counter] = defaultdict(Counter)
+        self._song_counts: Counter = Counter()
+        self._pending: List[Tuple[List[int], int]] = []
+        self._pending_songs = 0
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def observe_sequence(self, song_ids: List[int]) -> None:
+        """
+        Records the songs of a played sequence as co-occurring with their nearby songs.
+
+        Args:
+            song_ids (List[int]): The IDs of the songs in play order.
+        """
+        if len(song_ids) < 2:
+            return
+        self._enqueue(song_ids, 0)
+
+    def observe_playlist(self, song_ids: List[int], added_from: int = 0) -> None:
+        """
+        Records songs added to a playlist as co-occurring with the songs up to window positions
+        before them in the playlist.
+
+        Args:
+            song_ids (List[int]): The IDs of the songs in the playlist, in track order.
+            added_from (int): The position of the first added song. The songs before it were
+                observed when they were added.
+        """
+        if added_from >= len(song_ids):
+            return
+        start = max(0, added_from - self.window)
+        self._enqueue(song_ids[start:], added_from - start)
+
+    def _enqueue(self, song_ids: List[int], added_from: int) -> None:
+        with self._lock:
+            if self._pending_songs + len(song_ids) > self.max_pending_songs:
+                self._dropped += 1
+                return
+            self._pending.append((list(song_ids), added_from))
+            self._pending_songs += len(song_ids)
+
+    def refresh(self) -> int:
+        """
+        Folds the queued observations into the counts and recomputes the top neighbors of every
+        song they touched.
+
+        Returns:
+            int: The number of songs whose neighbors were recomputed.
+        """
+        with self._refresh_lock:
+            with self._lock:
+                pending, self._pending, self._pending_songs = self._pending, [], 0
+                dropped, self._dropped = self._dropped, 0
+            if dropped:
+                logger.warning("Dropped %d recommendation observations while waiting for a refresh", dropped)
+            if not pending:
+                return 0
+
+            dirty = set()
+            for song_ids, added_from in pending:
+                for position in range(added_from, len(song_ids)):
+                    song_id = song_ids[position]
+                    self._song_counts[song_id] += 1
+                    dirty.add(song_id)
+                    for other_id in song_ids[max(0, position - self.window):position]:
+                        if other_id == song_id:
+                            continue
+                        self._co_counts[song_id][other_id] += 1
+                        self._co_counts[other_id][song_id] += 1
+                        dirty.add(other_id)
+
+            updated = {}
+            for song_id in dirty:
+                co_counts = self._co_counts[song_id]
+                if len(co_counts) > self.co_counts_per_song:
+                    co_counts = self._co_counts[song_id] = Counter(dict(co_counts.most_common(self.co_counts_per_song)))
+                song_count = self._song_counts.get(song_id, 1)
+                scores = (
+                    (other_id, count / math.sqrt(song_count * self._song_counts.get(other_id, 1)))
+                    for other_id, count in co_counts.items()
+                )
+                updated[song_id] = heapq.nlargest(self.neighbors_per_song, scores, key=lambda neighbor: neighbor[1])
+
+            # Swap in a new dict so readers never see a partially updated index
+            neighbors = dict(self.neighbors)
+            neighbors.update(updated)
+            self.neighbors = neighbors
+
+        logger.debug("Refreshed recommendation neighbors for %d songs", len(updated))
+        return len(updated)
+
+    def recommend(self, song_id: int, limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        Returns the songs most often played together with the given song.
+
+        Args:
+            song_id (int): The ID of the song to recommend from.
+            limit (int): The maximum number of songs to return.
+
+        Returns:
+            List[Tuple[int, float]]: (song_id, score) pairs, highest score first. Empty if the song
+                has not been played in a sequence yet.
+
+        Raises:
+            ValueError: If limit is not positive.
+        """
+        if limit <= 0:
+            raise ValueError(f"Invalid limit: {limit} (must be a positive integer).")
+        neighbors = self.neighbors.get(song_id)
+        CACHE_REQUESTS.inc("recommendations", "miss" if neighbors is None else "hit")
+        return (neighbors or [])[:limit]
+
+    def start(self, interval: float = RECOMMENDER_REFRESH_SECONDS) -> None:
+        """
+        Starts the background thread that refreshes the neighbor index.
+
+        Args:
+            interval (float): Seconds between refreshes.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, args=(interval,), name="recommender", daemon=True)
+        self._thread.start()
+        logger.info("Started recommendation index refresh every %.1f seconds", interval)
+
+    def stop(self) -> None:
+        """
+        Stops the background refresh thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_loop(self, interval: float) -> None:
+        """
+        Refreshes the neighbor index every interval seconds until stopped.
+        """
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Error refreshing recommendation index: %s", str(e))
+
+
+recommender = RecommendationModel()
@@ -1,8 +1,12 @@
+from collections import Counter
 from dataclasses import dataclass
 import logging
 import os
 import sqlite3
+from typing import Any
 
+from music_collection.models.play_event_model import record_plays
+from music_collection.models.trending_model import trending_index
 from music_collection.utils.logger import configure_logger
 from music_collection.utils.random_utils import get_random
 from music_collection.utils.sql_utils import get_db_connection
@@ -12,8 +16,18 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Keys resolved per statement; 3 bound parameters each stays under SQLite's 999 variable limit
+KEYS_PER_QUERY = 300
+
+# IDs checked per statement, under the same limit
+IDS_PER_QUERY = 900
+
+
 @dataclass
 class Song:
+    # Slots instead of a per-instance __dict__, since playlists and the catalog hold millions of songs
+    __slots__ = ("id", "artist", "title", "year", "genre", "duration")
+
     id: int
     artist: str
     title: str
@@ -27,6 +41,52 @@ class Song:
         if self.year <= 1900:
             raise ValueError(f"Year must be greater than 1900, got {self.year}")
 
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the song's fields as a dict, which is how it is serialized to JSON.
+        """
+        return {name: getattr(self, name) for name in Song.__slots__}
+
+
+@dataclass
+class CatalogSong:
+    """
+    A song as listed in the catalog, with its play count.
+
+    Unlike Song, its fields are not validated: it lists songs as they are stored, and a row the
+    schema allows, such as one from 1900, must not fail the whole catalog.
+    """
+    __slots__ = ("id", "artist", "title", "year", "genre", "duration", "play_count")
+
+    id: int
+    artist: str
+    title: str
+    year: int
+    genre: str
+    duration: int  # in seconds
+    play_count: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the song's fields as a dict, which is how it is serialized to JSON.
+        """
+        return {name: getattr(self, name) for name in CatalogSong.__slots__}
+
+
+def song_row_factory(cursor: sqlite3.Cursor, row: tuple) -> Song:
+    """
+    Builds a Song from a row starting with id, artist, title, year, genre and duration. Set as a
+    cursor's row_factory, the cursor returns Songs instead of tuples.
+    """
+    return Song(*row[:6])
+
+
+def catalog_song_row_factory(cursor: sqlite3.Cursor, row: tuple) -> CatalogSong:
+    """
+    Builds a CatalogSong from a row of the Song columns followed by play_count.
+    """
+    return CatalogSong(*row[:7])
+
 
 def create_song(artist: str, title: str, year: int, genre: str, duration: int) -> None:
     """
@@ -83,6 +143,7 @@ def clear_catalog() -> None:
             cursor = conn.cursor()
             cursor.executescript(create_table_script)
             conn.commit()
+            trending_index.clear()
 
             logger.info("Catalog cleared successfully.")
 
@@ -155,7 +216,7 @@ def get_song_by_id(song_id: int) -> Song:
                     logger.info("Song with ID %s has been deleted", song_id)
                     raise ValueError(f"Song with ID {song_id} has been deleted")
                 logger.info("Song with ID %s found", song_id)
-                return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+                return song_row_factory(cursor, row)
             else:
                 logger.info("Song with ID %s not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
@@ -195,7 +256,7 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
                     logger.info("Song with artist '%s', title '%s', and year %d has been deleted", artist, title, year)
                     raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} has been deleted")
                 logger.info("Song with artist '%s', title '%s', and year %d found", artist, title, year)
-                return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+                return song_row_factory(cursor, row)
             else:
                 logger.info("Song with artist '%s', title '%s', and year %d not found", artist, title, year)
                 raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} not found")
@@ -204,7 +265,54 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
         logger.error("Database error while retrieving song by compound key (artist '%s', title '%s', year %d): %s", artist, title, year, str(e))
         raise e
 
-def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
+def get_songs_by_compound_keys(keys: list[tuple[str, str, int]]) -> dict[tuple[str, str, int], Song]:
+    """
+    Retrieves many songs from the catalog by their compound keys (artist, title, year) using one connection.
+
+    The keys are joined against a VALUES list, so each batch of up to KEYS_PER_QUERY keys is resolved
+    by a single statement instead of one query (and one connection) per song.
+
+    Args:
+        keys (list[tuple[str, str, int]]): The (artist, title, year) keys to look up.
+
+    Returns:
+        dict[tuple[str, str, int], Song]: The Song objects keyed by compound key. Keys that were not
+            found or are marked as deleted are left out of the result.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    songs = {}
+    if not unique_keys:
+        return songs
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = song_row_factory
+            logger.info("Attempting to retrieve %d songs by compound key", len(unique_keys))
+            for start in range(0, len(unique_keys), KEYS_PER_QUERY):
+                batch = unique_keys[start:start + KEYS_PER_QUERY]
+                values = ", ".join(["(?, ?, ?)"] * len(batch))
+                cursor.execute(f"""
+                    WITH keys (artist, title, year) AS (VALUES {values})
+                    SELECT songs.id, songs.artist, songs.title, songs.year, songs.genre, songs.duration
+                    FROM keys
+                    JOIN songs ON songs.artist = keys.artist AND songs.title = keys.title AND songs.year = keys.year
+                    WHERE songs.deleted = FALSE
+                """, [field for key in batch for field in key])
+                for song in cursor.fetchall():
+                    songs[(song.artist, song.title, song.year)] = song
+
+            logger.info("Found %d of %d songs by compound key", len(songs), len(unique_keys))
+            return songs
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving songs by compound key: %s", str(e))
+        raise e
+
+def get_all_songs(sort_by_play_count: bool = False) -> list[CatalogSong]:
     """
     Retrieves all songs that are not marked as deleted from the catalog.
 
@@ -212,7 +320,7 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
         sort_by_play_count (bool): If True, sort the songs by play count in descending order.
 
     Returns:
-        list[dict]: A list of dictionaries representing all non-deleted songs with play_count.
+        list[CatalogSong]: All non-deleted songs with their play counts.
 
     Logs:
         Warning: If the catalog is empty.
@@ -220,6 +328,7 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = catalog_song_row_factory
             logger.info("Attempting to retrieve all non-deleted songs from the catalog")
 
             # Determine the sort order based on the 'sort_by_play_count' flag
@@ -232,24 +341,12 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
                 query += " ORDER BY play_count DESC"
 
             cursor.execute(query)
-            rows = cursor.fetchall()
+            songs = cursor.fetchall()
 
-            if not rows:
+            if not songs:
                 logger.warning("The song catalog is empty.")
                 return []
 
-            songs = [
-                {
-                    "id": row[0],
-                    "artist": row[1],
-                    "title": row[2],
-                    "year": row[3],
-                    "genre": row[4],
-                    "duration": row[5],
-                    "play_count": row[6],
-                }
-                for row in rows
-            ]
             logger.info("Retrieved %d songs from the catalog", len(songs))
             return songs
 
@@ -257,6 +354,68 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
         logger.error("Database error while retrieving all songs: %s", str(e))
         raise e
 
+def get_songs_by_filters(genre: str = None, min_year: int = None, max_year: int = None,
+                         min_play_count: int = None, max_play_count: int = None,
+                         limit: int = 5000) -> list[Song]:
+    """
+    Retrieves non-deleted songs matching the given filters, most played first.
+
+    Only the filters that are set are added to the WHERE clause, so the lookup can use the
+    (genre, year) and play_count indexes instead of scanning the whole catalog.
+
+    Args:
+        genre (str, optional): Only return songs of this genre.
+        min_year (int, optional): Only return songs released in or after this year.
+        max_year (int, optional): Only return songs released in or before this year.
+        min_play_count (int, optional): Only return songs played at least this many times.
+        max_play_count (int, optional): Only return songs played at most this many times.
+        limit (int): The maximum number of songs to return. Defaults to 5000.
+
+    Returns:
+        list[Song]: The matching Song objects, ordered by play count in descending order.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    query = """
+        SELECT id, artist, title, year, genre, duration
+        FROM songs
+        WHERE deleted = FALSE
+    """
+    params = []
+    if genre is not None:
+        query += " AND genre = ?"
+        params.append(genre)
+    if min_year is not None:
+        query += " AND year >= ?"
+        params.append(min_year)
+    if max_year is not None:
+        query += " AND year <= ?"
+        params.append(max_year)
+    if min_play_count is not None:
+        query += " AND play_count >= ?"
+        params.append(min_play_count)
+    if max_play_count is not None:
+        query += " AND play_count <= ?"
+        params.append(max_play_count)
+    query += " ORDER BY play_count DESC LIMIT ?"
+    params.append(limit)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = song_row_factory
+            logger.info("Attempting to retrieve up to %d songs matching filters", limit)
+            cursor.execute(query, params)
+            songs = cursor.fetchall()
+
+            logger.info("Retrieved %d songs matching filters", len(songs))
+            return songs
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving songs by filters: %s", str(e))
+        raise e
+
 def get_random_song() -> Song:
     """
     Retrieves a random song from the catalog.
@@ -276,23 +435,30 @@ def get_random_song() -> Song:
 
         # Get a random index using the random.org API
         random_index = get_random(len(all_songs))
-        logger.info("Random index selected: %d (total songs: %d)", random_index, len(all_songs))
-
-        # Return the song at the random index, adjust for 0-based indexing
-        song_data = all_songs[random_index - 1]
-        return Song(
-            id=song_data["id"],
-            artist=song_data["artist"],
-            title=song_data["title"],
-            year=song_data["year"],
-            genre=song_data["genre"],
-            duration=song_data["duration"]
-        )
+        return get_song_at_random_index(all_songs, random_index)
 
     except Exception as e:
         logger.error("Error while retrieving random song: %s", str(e))
         raise e
 
+def get_song_at_random_index(all_songs: list[CatalogSong], random_index: int) -> Song:
+    """
+    Returns the song at a random index drawn for the catalog, so callers that fetch the random
+    number themselves pick songs the same way as get_random_song.
+
+    Args:
+        all_songs (list[CatalogSong]): The catalog, as returned by get_all_songs.
+        random_index (int): The random index, from 1 to the number of songs.
+
+    Returns:
+        Song: The song at the random index.
+    """
+    logger.info("Random index selected: %d (total songs: %d)", random_index, len(all_songs))
+
+    # Return the song at the random index, adjust for 0-based indexing
+    song = all_songs[random_index - 1]
+    return Song(song.id, song.artist, song.title, song.year, song.genre, song.duration)
+
 def update_play_count(song_id: int) -> None:
     """
     Increments the play count of a song by song ID.
@@ -320,12 +486,73 @@ def update_play_count(song_id: int) -> None:
                 logger.info("Song with ID %d not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
 
-            # Increment the play count
+            # Increment the play count and log the play event in the same transaction
             cursor.execute("UPDATE songs SET play_count = play_count + 1 WHERE id = ?", (song_id,))
+            record_plays(cursor, [song_id])
+            trending_scores = trending_index.record_plays(cursor, [song_id])
             conn.commit()
+            trending_index.apply(trending_scores)
 
             logger.info("Play count incremented for song with ID: %d", song_id)
 
     except sqlite3.Error as e:
         logger.error("Database error while updating play count for song with ID %d: %s", song_id, str(e))
         raise e
+
+def update_play_counts(song_ids: list[int]) -> int:
+    """
+    Increments the play counts of many songs and logs their play events in a single transaction.
+
+    Repeated IDs are counted once per occurrence. Songs that do not exist or are marked as
+    deleted are skipped rather than failing the whole batch, and get no play events or trending
+    score. The transaction takes the write lock before checking which songs can be played, so
+    a song deleted meanwhile cannot slip through.
+
+    Args:
+        song_ids (list[int]): The IDs of the songs that were played, one entry per play.
+
+    Returns:
+        int: The number of songs whose play count was updated.
+
+    Raises:
+        sqlite3.Error: If there is a database error.
+    """
+    plays = Counter(song_ids)
+    if not plays:
+        return 0
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Attempting to update play counts for %d songs", len(plays))
+            cursor.execute("BEGIN IMMEDIATE")
+
+            distinct_ids = list(plays)
+            playable = set()
+            for start in range(0, len(distinct_ids), IDS_PER_QUERY):
+                batch = distinct_ids[start:start + IDS_PER_QUERY]
+                cursor.execute(
+                    f"SELECT id FROM songs WHERE id IN ({', '.join(['?'] * len(batch))}) AND deleted = FALSE", batch
+                )
+                playable.update(song_id for song_id, in cursor.fetchall())
+
+            cursor.executemany(
+                "UPDATE songs SET play_count = play_count + ? WHERE id = ? AND deleted = FALSE",
+                [(count, song_id) for song_id, count in plays.items() if song_id in playable]
+            )
+            updated = cursor.rowcount
+
+            played = [song_id for song_id in song_ids if song_id in playable]
+            record_plays(cursor, played)
+            trending_scores = trending_index.record_plays(cursor, played)
+            conn.commit()
+            trending_index.apply(trending_scores)
+
+            if updated != len(plays):
+                logger.warning("Skipped play count updates for %d missing or deleted songs", len(plays) - updated)
+            logger.info("Play counts incremented for %d songs", updated)
+            return updated
+
+    except sqlite3.Error as e:
+        logger.error("Database error while updating play counts: %s", str(e))
+        raise e
@@ -0,0 +1,257 @@
+from bisect import bisect_left, insort
+from collections import Counter
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import CACHE_REQUESTS
+from music_collection.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Time in seconds for a play's contribution to the trending score to halve
+TRENDING_HALF_LIFE = float(os.getenv("TRENDING_HALF_LIFE", str(24 * 60 * 60)))
+
+# Ranked songs looked up per query, kept under SQLite's 999 variable limit
+TRENDING_BATCH_SIZE = 500
+
+
+def log_add_exp(a: float, b: float) -> float:
+    """
+    Returns log(exp(a) + exp(b)) without overflowing for large a or b.
+    """
+    if a == -math.inf:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+class TrendingIndex:
+    """
+    A class to keep an exponentially decaying trending score per song, ranked in memory.
+
+    Each play at time t adds exp(decay_rate * t) to the song's score. Only the log of that sum is
+    stored, so a play is an O(1) log-add-exp and the scores never need rewriting as time passes:
+    the score at time now is exp(log_score - decay_rate * now), and because every song shares the
+    same decay factor the ranking by log_score is the ranking by current score. Log scores are
+    persisted to the song_trending table and reloaded on first use after a restart.
+
+    The song_trending table is the source of truth. Plays are added to the stored scores inside
+    the play count transaction, and the ranking in memory only takes the new scores once that
+    transaction has committed. Log scores only ever grow, so the ranking keeps the higher of the
+    score it holds and the one it is given, whatever order loads and updates arrive in.
+
+    Attributes:
+        decay_rate (float): The decay rate per second, ln(2) / half life.
+    """
+
+    def __init__(self, half_life: float = TRENDING_HALF_LIFE):
+        """
+        Initializes the TrendingIndex with no scores loaded.
+
+        Args:
+            half_life (float): Time in seconds for a play's contribution to halve.
+        """
+        self.decay_rate = math.log(2) / half_life
+        self._lock = threading.Lock()
+        self._log_scores: Dict[int, float] = {}
+        self._ranked: List[Tuple[float, int]] = []  # (-log_score, song_id), ascending
+        self._loaded = False
+
+    def __len__(self) -> int:
+        """
+        Returns the number of songs with a trending score held in memory.
+        """
+        return len(self._log_scores)
+
+    def load(self, cursor: Optional[sqlite3.Cursor] = None) -> None:
+        """
+        Loads the persisted log scores into memory.
+
+        Args:
+            cursor (sqlite3.Cursor, optional): A cursor to read with. Defaults to a new connection.
+
+        Raises:
+            sqlite3.Error: If any database error occurs.
+        """
+        try:
+            if cursor is not None:
+                cursor.execute("SELECT song_id, log_score FROM song_trending")
+                rows = cursor.fetchall()
+            else:
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT song_id, log_score FROM song_trending")
+                    rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Database error while loading trending scores: %s", str(e))
+            raise e
+
+        with self._lock:
+            # Keep scores applied while the rows were being read, which are at least as high
+            log_scores = dict(self._log_scores)
+            for song_id, log_score in rows:
+                log_scores[song_id] = max(log_score, log_scores.get(song_id, -math.inf))
+            self._log_scores = log_scores
+            self._ranked = sorted((-log_score, song_id) for song_id, log_score in log_scores.items())
+            self._loaded = True
+        logger.info("Loaded trending scores for %d songs", len(rows))
+
+    def clear(self) -> None:
+        """
+        Drops all scores held in memory. The next use reloads them from the database.
+        """
+        with self._lock:
+            self._log_scores = {}
+            self._ranked = []
+            self._loaded = False
+
+    def record_plays(self, cursor: sqlite3.Cursor, song_ids: List[int], played_at: Optional[float] = None) -> Dict[int, float]:
+        """
+        Adds plays to the songs' persisted trending scores with the caller's cursor.
+
+        The log-add-exp is done by the upsert against the stored row, so plays recorded by other
+        worker processes are added to rather than overwritten. The ranking in memory is left
+        unchanged: pass the returned scores to apply once the transaction has committed.
+
+        Args:
+            cursor (sqlite3.Cursor): The cursor of the open play count transaction.
+            song_ids (List[int]): The IDs of the songs that were played, one entry per play.
+            played_at (float, optional): The unix timestamp of the plays. Defaults to now.
+
+        Returns:
+            Dict[int, float]: The new log score of each song played, as stored.
+        """
+        if not song_ids:
+            return {}
+        if played_at is None:
+            played_at = time.time()
+
+        play_log_score = self.decay_rate * played_at
+        plays = Counter(song_ids)
+        cursor.connection.create_function("log_add_exp", 2, log_add_exp, deterministic=True)
+        cursor.executemany("""
+            INSERT INTO song_trending (song_id, log_score) VALUES (?, ?)
+            ON CONFLICT (song_id) DO UPDATE SET log_score = log_add_exp(log_score, excluded.log_score)
+        """, [(song_id, play_log_score + math.log(count)) for song_id, count in plays.items()])
+
+        log_scores = {}
+        song_ids = list(plays)
+        for start in range(0, len(song_ids), TRENDING_BATCH_SIZE):
+            batch = song_ids[start:start + TRENDING_BATCH_SIZE]
+            cursor.execute(
+                f"SELECT song_id, log_score FROM song_trending WHERE song_id IN ({', '.join(['?'] * len(batch))})", batch
+            )
+            log_scores.update(cursor.fetchall())
+        return log_scores
+
+    def apply(self, log_scores: Dict[int, float]) -> None:
+        """
+        Updates the ranking in memory with committed log scores, as returned by record_plays.
+
+        Args:
+            log_scores (Dict[int, float]): The new log score of each song.
+        """
+        with self._lock:
+            for song_id, log_score in log_scores.items():
+                old_log_score = self._log_scores.get(song_id)
+                if old_log_score is not None:
+                    if old_log_score >= log_score:
+                        continue
+                    del self._ranked[bisect_left(self._ranked, (-old_log_score, song_id))]
+                insort(self._ranked, (-log_score, song_id))
+                self._log_scores[song_id] = log_score
+
+    def get_top_k(self, k: int, offset: int = 0, now: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Returns the k songs with the highest trending score, skipping the first offset songs.
+
+        Args:
+            k (int): The number of songs to return.
+            offset (int): The number of top songs to skip.
+            now (float, optional): The unix timestamp to compute scores at. Defaults to now.
+
+        Returns:
+            List[Tuple[int, float]]: (song_id, score) pairs, highest score first.
+        """
+        CACHE_REQUESTS.inc("trending", "hit" if self._loaded else "miss")
+        if not self._loaded:
+            self.load()
+        if now is None:
+            now = time.time()
+
+        decay = self.decay_rate * now
+        with self._lock:
+            ranked = self._ranked[offset:offset + k]
+        return [(song_id, math.exp(-negative_log_score - decay)) for negative_log_score, song_id in ranked]
+
+
+trending_index = TrendingIndex()
+
+
+def get_trending_songs(limit: int = 10) -> List[dict[str, Any]]:
+    """
+    Retrieves the non-deleted songs with the highest trending score.
+
+    Args:
+        limit (int): The number of songs to return. Defaults to 10.
+
+    Returns:
+        List[dict[str, Any]]: The songs with their current trending score, highest first.
+
+    Raises:
+        ValueError: If limit is not positive.
+        sqlite3.Error: For database errors during query execution.
+    """
+    if limit <= 0:
+        raise ValueError(f"Invalid limit: {limit} (must be a positive integer).")
+
+    songs = []
+    offset = 0
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # Deleted songs keep their score, so keep reading down the ranking until enough are found
+            while len(songs) < limit:
+                ranked = trending_index.get_top_k(min(limit, TRENDING_BATCH_SIZE), offset=offset)
+                if not ranked:
+                    break
+                offset += len(ranked)
+
+                placeholders = ", ".join(["?"] * len(ranked))
+                cursor.execute(f"""
+                    SELECT id, artist, title, year, genre, duration, play_count
+                    FROM songs
+                    WHERE deleted = FALSE AND id IN ({placeholders})
+                """, [song_id for song_id, _ in ranked])
+                rows = {row[0]: row for row in cursor.fetchall()}
+
+                for song_id, score in ranked:
+                    row = rows.get(song_id)
+                    if row is None:
+                        continue
+                    songs.append({
+                        "id": row[0],
+                        "artist": row[1],
+                        "title": row[2],
+                        "year": row[3],
+                        "genre": row[4],
+                        "duration": row[5],
+                        "play_count": row[6],
+                        "trending_score": score,
+                    })
+
+        logger.info("Retrieved %d trending songs", len(songs[:limit]))
+        return songs[:limit]
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving trending songs: %s", str(e))
+        raise e
@@ -0,0 +1,160 @@
+"""
+Opt-in capture of served requests, so that production traffic can be replayed in benchmarks.
+
+With CAPTURE_DIR set, every request is written as one compact JSON line: when it arrived, its
+session, method, route pattern, path, query string, body, status code and latency. Each process
+writes its own requests-<pid>.jsonl in that directory, since worker processes cannot share a
+rotating file, and rotates it at CAPTURE_MAX_BYTES, keeping CAPTURE_BACKUPS old files. Lines are
+encoded and written by a background thread, so a captured request only pays for building its
+record and enqueueing it. benchmarks.replay re-issues the captured requests against an instance.
+
+A request's session is its X-Session-Id header or, without one, the client address; a replay
+keeps the order of the requests within each session.
+"""
+import atexit
+import json
+import logging
+from logging.handlers import QueueListener, RotatingFileHandler
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Directory the captured requests are written to; capture is off when unset
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "")
+
+# Size at which a capture file is rotated, and the number of rotated files kept
+CAPTURE_MAX_BYTES = int(os.getenv("CAPTURE_MAX_BYTES", str(64 * 1024 * 1024)))
+CAPTURE_BACKUPS = int(os.getenv("CAPTURE_BACKUPS", "5"))
+
+# Larger bodies are left out of the record, which keeps only their size
+CAPTURE_MAX_BODY_BYTES = int(os.getenv("CAPTURE_MAX_BODY_BYTES", "65536"))
+
+# The debug and metrics endpoints are never captured
+EXCLUDED_PREFIXES = ("/api/debug", "/api/metrics")
+
+SESSION_HEADER = "X-Session-Id"
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, separators=(",", ":"))
+
+
+class CaptureWriter:
+    """
+    Writes request records to a rotating file from a background thread.
+
+    Attributes:
+        path (str): The file written, before rotation.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = CAPTURE_MAX_BYTES, backups: int = CAPTURE_BACKUPS):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"requests-{os.getpid()}.jsonl")
+        handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(_JsonLineFormatter())
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+        logger.info("Capturing requests to %s", self.path)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._queue.put(logging.makeLogRecord({'msg': record}))
+
+    def stop(self) -> None:
+        """
+        Writes the queued records, stops the thread and closes the file.
+        """
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+
+_writer: Optional[CaptureWriter] = None
+_writer_lock = threading.Lock()
+
+
+def capture_enabled() -> bool:
+    return bool(CAPTURE_DIR)
+
+
+def get_writer() -> CaptureWriter:
+    """
+    Returns this process's writer, opening its file on first use.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = CaptureWriter(CAPTURE_DIR)
+        return _writer
+
+
+def stop_capture() -> None:
+    """
+    Flushes and closes this process's capture file. The next captured request opens a new one.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.stop()
+        _writer = None
+
+
+atexit.register(stop_capture)
+
+
+def _reset_after_fork() -> None:
+    """
+    Makes a forked worker open its own file rather than write to the parent's, whose writer
+    thread did not survive the fork.
+    """
+    global _writer, _writer_lock
+    _writer, _writer_lock = None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def capture_request(method: str, route: str, path: str, query: str, body: Optional[bytes], session: str,
+                    status: int, seconds: float) -> None:
+    """
+    Records a served request in the capture file, if capture is on.
+
+    Args:
+        method (str): The HTTP method.
+        route (str): The route pattern, which groups the requests in replay reports.
+        path (str): The request path.
+        query (str): The query string, without the leading ?.
+        body (bytes, optional): The request body.
+        session (str): The session the request belongs to.
+        status (int): The response status code.
+        seconds (float): The time taken to serve the request.
+    """
+    if not CAPTURE_DIR or path.startswith(EXCLUDED_PREFIXES):
+        return
+    record: Dict[str, Any] = {
+        'ts': round(time.time() - seconds, 6),
+        'session': session,
+        'method': method,
+        'route': route,
+        'path': path,
+        'query': query,
+        'status': status,
+        'ms': round(seconds * 1000, 3),
+    }
+    if body:
+        if len(body) <= CAPTURE_MAX_BODY_BYTES:
+            record['body'] = body.decode("utf-8", "replace")
+        else:
+            record['body_bytes'] = len(body)
+    get_writer().write(record)
@@ -1,26 +1,183 @@
+import atexit
+import copy
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import os
+import queue
 import sys
+import threading
+from typing import Dict, Optional
 
 from flask import current_app, has_request_context
 
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Level for loggers without a more specific entry in LOG_LEVELS
+DEFAULT_LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Hot loops log one in this many repeated messages
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+
+
+class DeferredFormatQueueHandler(QueueHandler):
+    """
+    A QueueHandler that leaves formatting to the writer thread.
+
+    The message arguments are merged on the calling thread, since they may change after the
+    call returns, but the timestamp and any traceback are formatted by the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def parse_log_levels(spec: str) -> Dict[str, int]:
+    """
+    Parses per-module log levels of the form "module=LEVEL,other.module=LEVEL".
+
+    Args:
+        spec (str): The comma separated module=LEVEL pairs.
+
+    Returns:
+        Dict[str, int]: The logging level per logger name prefix.
+
+    Raises:
+        ValueError: If an entry is malformed or names an unknown level.
+    """
+    levels = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, separator, level = entry.partition("=")
+        if not separator or not isinstance(logging.getLevelName(level.strip().upper()), int):
+            raise ValueError(f"Invalid LOG_LEVELS entry: {entry}")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def get_log_level(name: str) -> int:
+    """
+    Returns the level for a logger from the LOG_LEVELS environment variable, matching the
+    longest module prefix of its name, or LOG_LEVEL if no entry matches.
+
+    Args:
+        name (str): The logger name, usually the module's __name__.
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
+    Returns:
+        int: The logging level.
+    """
+    levels = parse_log_levels(os.getenv("LOG_LEVELS", ""))
+    parts = name.split(".")
+    for end in range(len(parts), 0, -1):
+        prefix = ".".join(parts[:end])
+        if prefix in levels:
+            return levels[prefix]
+    return logging.getLevelName(DEFAULT_LOG_LEVEL.upper())
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
+def get_queue_handler() -> QueueHandler:
+    """
+    Returns the process-wide handler that hands records to the background writer, starting
+    the writer thread on first use.
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
+    Records are formatted and written to stderr by a QueueListener thread, so logging on a
+    request path only costs an enqueue.
+    """
+    global _queue_handler, _listener
+    with _setup_lock:
+        if _queue_handler is None:
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            _queue_handler = DeferredFormatQueueHandler(log_queue)
+            _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(stop_logging)
+    return _queue_handler
+
+
+def _restart_after_fork() -> None:
+    """
+    Gives a forked child process its own queue and writer thread. Only the forking thread
+    survives a fork, so without this the child's records would queue up and never be written.
+    """
+    global _listener, _setup_lock
+    _setup_lock = threading.Lock()
+    if _queue_handler is not None and _listener is not None:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _queue_handler.queue = log_queue
+        _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def stop_logging() -> None:
+    """
+    Flushes the queued records and stops the background writer. Registered to run at exit.
+    """
+    global _queue_handler, _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+        _queue_handler, _listener = None, None
+
+
+def configure_logger(logger):
+    logger.setLevel(get_log_level(logger.name))
+
+    # Attach the shared queue handler once, however many times the logger is configured
+    handler = get_queue_handler()
+    for existing in list(logger.handlers):
+        if isinstance(existing, QueueHandler) and existing is not handler:
+            logger.removeHandler(existing)
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
 
     if has_request_context():
         app_logger = current_app.logger
         for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+            if handler not in logger.handlers:
+                logger.addHandler(handler)
+
+
+class SampledLogger:
+    """
+    A wrapper that logs the first and then one in every `every` calls, for messages emitted in
+    hot loops. Disabled levels return before counting, so a sampled debug line costs one level
+    check when debug is off.
+    """
+
+    def __init__(self, logger: logging.Logger, every: int = LOG_SAMPLE_EVERY):
+        self.logger = logger
+        self.every = max(1, every)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def log(self, level: int, msg: str, *args) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        with self._lock:
+            self._count += 1
+            if (self._count - 1) % self.every:
+                return
+        if self.every > 1:
+            self.logger.log(level, msg + " (sampled 1 in %d)", *args, self.every)
+        else:
+            self.logger.log(level, msg, *args)
+
+    def debug(self, msg: str, *args) -> None:
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args) -> None:
+        self.log(logging.INFO, msg, *args)
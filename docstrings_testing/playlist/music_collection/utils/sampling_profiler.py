@@ -0,0 +1,211 @@
+"""
+An always-on sampling profiler for the threads of a worker process.
+
+A background thread reads every other thread's Python stack from sys._current_frames() at
+SAMPLING_PROFILER_HZ and counts identical stacks. The counts are dumped in the collapsed
+stack format ("root;caller;leaf count" per line) read by flamegraph.pl, speedscope and
+inferno. Samples of threads parked in a wait (a lock, select, a queue or an accept) are kept
+apart, since they show where threads sit idle rather than where they spend CPU.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from types import CodeType, FrameType
+from typing import Dict, Optional, Tuple
+
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Samples per second; 0 disables the profiler
+SAMPLING_PROFILER_HZ = float(os.getenv("SAMPLING_PROFILER_HZ", "10"))
+
+# Distinct stacks counted; samples of further new stacks are counted under one overflow stack
+MAX_STACKS = 10000
+
+# Frames kept per stack, from the leaf
+MAX_DEPTH = 128
+
+# Leaf functions, by module file name, in which a thread is waiting rather than running
+_IDLE_LEAVES = {
+    "threading.py": {"wait", "_wait_for_tstate_lock", "join"},
+    "selectors.py": {"select"},
+    "socket.py": {"accept", "readinto"},
+    "socketserver.py": {"serve_forever"},
+    "queue.py": {"get"},
+    "thread.py": {"_worker"},
+    "base_events.py": {"_run_once"},
+    "handlers.py": {"dequeue"},
+}
+
+_STDLIB = os.path.dirname(os.__file__) + os.sep
+_WORKDIR = os.getcwd() + os.sep
+
+_THREAD_NUMBER = re.compile(r"[-_]?\d+(_\d+)?$")
+
+Stack = Tuple[CodeType, ...]
+
+
+class SamplingProfiler:
+    """
+    A class that periodically samples the stacks of all threads and counts them.
+
+    Attributes:
+        samples (int): The number of thread stacks sampled.
+        sampling_seconds (float): The time spent taking samples.
+    """
+
+    def __init__(self):
+        self._counts: Dict[Tuple[str, Stack, bool], int] = {}
+        self._labels: Dict[CodeType, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.started_at = time.time()
+
+    def sample(self) -> None:
+        """
+        Counts the current stack of every thread except the profiler's own.
+        """
+        start = time.perf_counter()
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                stack = self._stack(frame)
+                key = (_thread_group(names.get(thread_id, "unknown")), stack, _is_idle(frame))
+                if key not in self._counts and len(self._counts) >= MAX_STACKS:
+                    key = (key[0], (), key[2])
+                self._counts[key] = self._counts.get(key, 0) + 1
+                self.samples += 1
+            self.sampling_seconds += time.perf_counter() - start
+
+    def collapsed(self, include_idle: bool = False) -> str:
+        """
+        Returns the counted stacks in the collapsed stack format, one "thread;root;...;leaf count"
+        line per stack, most frequent first.
+
+        Args:
+            include_idle (bool): Whether to include samples of threads that were waiting.
+
+        Returns:
+            str: The collapsed stacks.
+        """
+        with self._lock:
+            counts = list(self._counts.items())
+        totals: Dict[str, int] = {}
+        for (thread_group, stack, idle), count in counts:
+            if idle and not include_idle:
+                continue
+            frames = [self._label(code) for code in stack] if stack else ["[other stacks]"]
+            line = ";".join([thread_group] + frames)
+            totals[line] = totals.get(line, 0) + count
+        return "".join(f"{line} {count}\n" for line, count in sorted(totals.items(), key=lambda item: -item[1]))
+
+    def overhead(self) -> float:
+        """
+        Returns the fraction of wall-clock time spent sampling since the profiler was reset.
+        """
+        elapsed = time.time() - self.started_at
+        return self.sampling_seconds / elapsed if elapsed > 0 else 0.0
+
+    def reset(self) -> None:
+        """
+        Discards the counted stacks.
+        """
+        with self._lock:
+            self._counts.clear()
+            self.samples = 0
+            self.sampling_seconds = 0.0
+            self.started_at = time.time()
+
+    def start(self, hz: float = SAMPLING_PROFILER_HZ) -> None:
+        """
+        Starts the background sampling thread.
+
+        Args:
+            hz (float): Samples per second. Does nothing if 0.
+        """
+        if hz <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self.reset()
+        self._thread = threading.Thread(target=self._sample_loop, args=(1 / hz,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info("Started sampling profiler at %.1f Hz", hz)
+
+    def stop(self) -> None:
+        """
+        Stops the background sampling thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample_loop(self, interval: float) -> None:
+        """
+        Samples every interval seconds until stopped.
+        """
+        while not self._stop.wait(interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error("Error sampling thread stacks: %s", str(e))
+
+    def _stack(self, frame: Optional[FrameType]) -> Stack:
+        """
+        Returns the code objects of a thread's frames, root first.
+        """
+        codes = []
+        while frame is not None and len(codes) < MAX_DEPTH:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        return tuple(codes)
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+
+def _is_idle(frame: FrameType) -> bool:
+    return frame.f_code.co_name in _IDLE_LEAVES.get(os.path.basename(frame.f_code.co_filename), ())
+
+
+def _thread_group(name: str) -> str:
+    """
+    Returns a thread name without its pool number, so that the threads of a pool share a root.
+    """
+    return _THREAD_NUMBER.sub("", name) or name
+
+
+def _short_path(filename: str) -> str:
+    """
+    Returns a file name relative to site-packages, the standard library or the working
+    directory where possible.
+    """
+    site_packages = os.sep + "site-packages" + os.sep
+    if site_packages in filename:
+        return filename.rsplit(site_packages, 1)[1]
+    for prefix in (_STDLIB, _WORKDIR):
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,456 @@
+"""
+A pre-forking production server for the Flask app.
+
+The master process binds the listening socket, optionally imports the app, and forks WORKERS
+worker processes that share the socket. Each worker serves requests on a pool of THREADS
+threads, so a slow request only ties up one thread rather than the whole server.
+
+Signals handled by the master:
+    SIGHUP           Starts a new set of workers, then drains and stops the old ones. Without
+                     preloading the new workers import the app afresh, picking up code changes.
+    SIGTERM, SIGINT  Stops accepting connections, lets in-flight requests finish for up to
+                     GRACEFUL_TIMEOUT seconds, then exits.
+
+State kept in memory by the models (the current playlist, playback jobs, the recommendation
+index) is per worker process, so WORKERS defaults to 1 and concurrency comes from threads.
+
+Usage:
+    python -m music_collection.utils.server app:app --workers 1 --threads 8
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from dotenv import load_dotenv
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from music_collection.utils.capture import stop_capture
+from music_collection.utils.logger import configure_logger, stop_logging
+from music_collection.utils.metrics import Counter, Histogram
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "5000"))
+
+# Worker processes and request threads per worker
+WORKERS = int(os.getenv("WORKERS", "1"))
+THREADS = int(os.getenv("THREADS", "8"))
+
+# Seconds a stopping worker gets to finish its in-flight requests before it is killed
+GRACEFUL_TIMEOUT = float(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+# Import the app once in the master before forking, instead of once in every worker
+PRELOAD_APP = os.getenv("PRELOAD_APP", "true").lower() == "true"
+
+# Exit code of a worker that could not load the app; the master stops instead of respawning it
+WORKER_BOOT_ERROR = 3
+
+REQUESTS = Counter("http_requests_total", "Requests served, by route, method and status code.", ["route", "method", "status"])
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency, by route and method.", ["route", "method"])
+POOL_WAIT_SECONDS = Histogram("pool_wait_seconds", "Time work waited for a free thread, by thread pool.", ["pool"])
+
+_worker_init_hooks: List[Callable[[int], None]] = []
+
+
+def on_worker_start(func: Callable[[int], None]) -> Callable[[int], None]:
+    """
+    Registers a function to run in every worker process before it starts serving.
+
+    Use it for anything that must not be shared across a fork: background threads,
+    connection pools and caches. The function receives the worker's index, from 0 to
+    WORKERS - 1, so work that should only run once can be limited to worker 0.
+
+    Args:
+        func (Callable[[int], None]): The function to run with the worker index.
+
+    Returns:
+        Callable[[int], None]: The function, unchanged, so this can be used as a decorator.
+    """
+    _worker_init_hooks.append(func)
+    return func
+
+
+def run_worker_init_hooks(worker_id: int) -> None:
+    """
+    Runs the registered worker initialization hooks in registration order.
+
+    Args:
+        worker_id (int): The index of the worker.
+    """
+    for hook in _worker_init_hooks:
+        hook(worker_id)
+
+
+def record_request(route: str, method: str, status: int, seconds: float) -> None:
+    """
+    Records a served request in the request count and latency metrics.
+
+    Args:
+        route (str): The route pattern, such as /api/get-song-by-id/<int:song_id>, so that
+            requests for different IDs share a series.
+        method (str): The HTTP method.
+        status (int): The response status code.
+        seconds (float): The time taken to serve the request.
+    """
+    REQUESTS.inc(route, method, status)
+    REQUEST_SECONDS.observe(seconds, route, method)
+
+
+def load_app(app_spec: str) -> Callable:
+    """
+    Imports a WSGI app given as "module:attribute".
+
+    Args:
+        app_spec (str): The module and attribute of the app, e.g. "app:app".
+
+    Returns:
+        Callable: The WSGI app.
+
+    Raises:
+        ValueError: If app_spec is not of the form "module:attribute".
+    """
+    module_name, separator, attribute = app_spec.partition(":")
+    if not separator or not module_name or not attribute:
+        raise ValueError(f"Invalid app spec: {app_spec}, expected module:attribute")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class CloseConnectionRequestHandler(WSGIRequestHandler):
+    """
+    A request handler that closes the connection after every response. A keep-alive
+    connection would hold one of the pool's threads for as long as the client kept it open.
+    """
+
+    protocol_version = "HTTP/1.0"
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    A WSGI server that handles requests on a fixed pool of threads.
+
+    The accept loop waits for a free thread before accepting the next connection, so
+    connections that cannot be served yet stay in the listen backlog, where another
+    worker process can pick them up.
+    """
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, host: str, port: int, app: Callable, threads: int = THREADS, fd: Optional[int] = None):
+        super().__init__(host, port, app, handler=CloseConnectionRequestHandler, fd=fd)
+        self._slots = threading.BoundedSemaphore(threads)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="request")
+
+    def process_request(self, request, client_address) -> None:
+        accepted_at = time.perf_counter()
+        self._slots.acquire()
+        self._executor.submit(self._process_request_thread, request, client_address, accepted_at)
+
+    def _process_request_thread(self, request, client_address, accepted_at: float) -> None:
+        POOL_WAIT_SECONDS.observe(time.perf_counter() - accepted_at, "request")
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self) -> None:
+        """
+        Closes the socket and waits for the requests already accepted to finish. Called by
+        serve_forever when it returns.
+        """
+        super().server_close()
+        # The base class also calls this on a placeholder socket, before the pool exists
+        executor = getattr(self, "_executor", None)
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class PreforkServer:
+    """
+    A master process that forks and supervises the worker processes.
+
+    Attributes:
+        workers (Dict[int, int]): The worker index of each live worker, by process ID.
+    """
+
+    def __init__(
+        self,
+        app: Union[str, Callable],
+        host: str = HOST,
+        port: int = PORT,
+        workers: int = WORKERS,
+        threads: int = THREADS,
+        preload: bool = PRELOAD_APP,
+        graceful_timeout: float = GRACEFUL_TIMEOUT
+    ):
+        """
+        Initializes the PreforkServer without binding or forking.
+
+        Args:
+            app (Union[str, Callable]): The WSGI app, or its "module:attribute" spec. An app
+                object is always preloaded.
+            host (str): The address to listen on.
+            port (int): The port to listen on.
+            workers (int): The number of worker processes.
+            threads (int): The number of request threads per worker.
+            preload (bool): Whether to import the app in the master before forking.
+            graceful_timeout (float): Seconds stopping workers get to finish their requests.
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, workers)
+        self.threads = max(1, threads)
+        self.preload = preload
+        self.graceful_timeout = graceful_timeout
+        self.workers: Dict[int, int] = {}
+        self._retiring: Dict[int, float] = {}  # deadline by process ID
+        self._signals: List[int] = []
+        self._socket: Optional[socket.socket] = None
+        self._wakeup_read, self._wakeup_write = -1, -1
+
+    def run(self) -> int:
+        """
+        Binds the socket, forks the workers and supervises them until stopped.
+
+        Returns:
+            int: The exit code, 0 after a graceful stop or WORKER_BOOT_ERROR if a worker
+                could not load the app.
+        """
+        self._socket = socket.create_server((self.host, self.port), backlog=2048)
+        self._socket.set_inheritable(True)
+        if self.preload and isinstance(self.app, str):
+            self.app = load_app(self.app)
+
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_write, False)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, self._handle_signal)
+
+        logger.info(
+            "Listening on %s:%d with %d workers of %d threads (preload %s)",
+            self.host, self.port, self.num_workers, self.threads, self.preload
+        )
+        exit_code = 0
+        try:
+            self._spawn_missing_workers()
+            while True:
+                select.select([self._wakeup_read], [], [], 1.0)
+                try:
+                    os.read(self._wakeup_read, 512)
+                except BlockingIOError:
+                    pass
+                if self._reap_workers():
+                    exit_code = WORKER_BOOT_ERROR
+                    break
+
+                signals, self._signals = self._signals, []
+                if signal.SIGTERM in signals or signal.SIGINT in signals:
+                    break
+                if signal.SIGHUP in signals:
+                    self._reload()
+                self._kill_overdue_workers()
+                self._spawn_missing_workers()
+        finally:
+            self._stop_workers()
+            self._socket.close()
+            os.close(self._wakeup_read)
+            os.close(self._wakeup_write)
+        logger.info("Server stopped")
+        return exit_code
+
+    def _handle_signal(self, signum: int, frame) -> None:
+        self._signals.append(signum)
+        try:
+            os.write(self._wakeup_write, b".")
+        except BlockingIOError:
+            pass
+
+    def _spawn_missing_workers(self) -> None:
+        """
+        Forks a worker for every worker index without a live process.
+        """
+        running = set(self.workers.values())
+        for worker_id in range(self.num_workers):
+            if worker_id not in running:
+                self._spawn_worker(worker_id)
+
+    def _spawn_worker(self, worker_id: int) -> None:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = worker_id
+            logger.info("Started worker %d with pid %d", worker_id, pid)
+            return
+        self._run_worker(worker_id)
+
+    def _run_worker(self, worker_id: int) -> None:
+        """
+        Serves requests in the forked child until it receives SIGTERM. Never returns.
+        """
+        exit_code = 0
+        try:
+            for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            # Ctrl-C reaches the whole process group; the master drains the workers instead
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            os.close(self._wakeup_read)
+            os.close(self._wakeup_write)
+
+            try:
+                app = load_app(self.app) if isinstance(self.app, str) else self.app
+                run_worker_init_hooks(worker_id)
+                server = PooledWSGIServer(self.host, self.port, app, threads=self.threads, fd=self._socket.fileno())
+            except Exception as e:
+                logger.error("Worker %d failed to start: %s", worker_id, str(e))
+                exit_code = WORKER_BOOT_ERROR
+                return
+
+            def drain(signum, frame):
+                logger.info("Worker %d draining", worker_id)
+                # shutdown() waits for serve_forever to return, so it cannot run in the handler itself
+                threading.Thread(target=server.shutdown).start()
+
+            signal.signal(signal.SIGTERM, drain)
+            # Once shut down, serve_forever closes the server, waiting for in-flight requests
+            server.serve_forever()
+        except Exception as e:
+            logger.error("Worker %d crashed: %s", worker_id, str(e))
+            exit_code = 1
+        finally:
+            # os._exit skips atexit, which would otherwise write the records still queued for capture
+            try:
+                stop_capture()
+            except Exception as e:
+                logger.error("Worker %d failed to flush its capture file: %s", worker_id, str(e))
+            stop_logging()
+            # Skip the master's cleanup further up the stack
+            os._exit(exit_code)
+
+    def _reap_workers(self) -> bool:
+        """
+        Collects exited workers.
+
+        Returns:
+            bool: True if a worker exited because it could not load the app.
+        """
+        boot_error = False
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            exit_code = os.waitstatus_to_exitcode(status)
+            if pid in self._retiring:
+                del self._retiring[pid]
+                logger.info("Worker with pid %d stopped", pid)
+            elif pid in self.workers:
+                worker_id = self.workers.pop(pid)
+                logger.warning("Worker %d with pid %d exited with code %s", worker_id, pid, exit_code)
+                boot_error = boot_error or exit_code == WORKER_BOOT_ERROR
+        return boot_error
+
+    def _reload(self) -> None:
+        """
+        Replaces every worker: the new workers start serving before the old ones drain.
+        """
+        logger.info("Reloading %d workers", len(self.workers))
+        old_workers, self.workers = self.workers, {}
+        self._spawn_missing_workers()
+        self._retire(old_workers)
+
+    def _retire(self, pids) -> None:
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            self._retiring[pid] = deadline
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _kill_overdue_workers(self) -> None:
+        now = time.monotonic()
+        for pid, deadline in list(self._retiring.items()):
+            if now >= deadline:
+                logger.warning("Killing worker with pid %d after %.0f seconds of draining", pid, self.graceful_timeout)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self._retiring[pid] = float("inf")
+
+    def _stop_workers(self) -> None:
+        """
+        Drains every worker and waits for them to exit, killing those that overrun the
+        graceful timeout.
+        """
+        workers, self.workers = self.workers, {}
+        self._retire(workers)
+        logger.info("Stopping %d workers", len(self._retiring))
+        while self._retiring:
+            self._reap_workers()
+            self._kill_overdue_workers()
+            time.sleep(0.05)
+
+
+def serve(app: Union[str, Callable], **kwargs) -> int:
+    """
+    Runs the app on a PreforkServer until it is stopped.
+
+    Args:
+        app (Union[str, Callable]): The WSGI app, or its "module:attribute" spec.
+        **kwargs: Options passed on to PreforkServer.
+
+    Returns:
+        int: The server's exit code.
+    """
+    return PreforkServer(app, **kwargs).run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the app with pre-forked worker processes.")
+    parser.add_argument("app", nargs="?", default="app:app", help="the app to serve as module:attribute")
+    parser.add_argument("--host", default=HOST, help="the address to listen on")
+    parser.add_argument("--port", type=int, default=PORT, help="the port to listen on")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes")
+    parser.add_argument("--threads", type=int, default=THREADS, help="request threads per worker")
+    parser.add_argument("--graceful-timeout", type=float, default=GRACEFUL_TIMEOUT, help="seconds to drain a worker")
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=PRELOAD_APP,
+                        help="import the app before forking")
+    args = parser.parse_args()
+
+    # DB_PATH is read when sql_utils is imported, so load the .env file first
+    load_dotenv()
+
+    sys.exit(serve(
+        args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        threads=args.threads,
+        preload=args.preload,
+        graceful_timeout=args.graceful_timeout
+    ))
+
+
+if __name__ == "__main__":
+    # Run the importable copy of this module, whose hooks are the ones the app registers with
+    from music_collection.utils import server
+    server.main()
@@ -0,0 +1,232 @@
+"""
+Per-request traces of the SQL statements a request runs.
+
+A request starts a trace, and every connection opened by get_db_connection while it is
+active reports its statements through sqlite3's trace callback, which also sees the
+transaction control and script statements that never pass through a cursor. The cursor
+timing wrappers attach a duration to each statement they ran. Finished traces are kept in
+memory, most recent last, and requests over the query budget or repeating the same
+statement (an N+1 pattern) are flagged and logged.
+"""
+from collections import Counter, deque
+from contextvars import ContextVar
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Deque, Dict, List, Optional
+
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Whether requests are traced at all
+SQL_TRACE = os.getenv("SQL_TRACE", "true").lower() in ("1", "true", "yes")
+
+# Queries a request may run before it is flagged
+QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "20"))
+
+# Times the same statement, with literals removed, may run in a request before it is flagged
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+# Finished traces kept for the debug endpoint
+TRACE_HISTORY = int(os.getenv("SQL_TRACE_HISTORY", "100"))
+
+# Statements kept per trace; later ones are still counted
+MAX_TRACE_STATEMENTS = 200
+
+_TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "END")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("current_sql_trace", default=None)
+_finished: Deque[Dict[str, Any]] = deque(maxlen=TRACE_HISTORY)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Replaces string and number literals with ? and collapses whitespace, so that the same
+    statement run for different rows has the same text.
+    """
+    return _WHITESPACE.sub(" ", _LITERALS.sub("?", sql)).strip()
+
+
+class RequestTrace:
+    """
+    The SQL statements run while serving one request.
+
+    Attributes:
+        endpoint (str): The route pattern of the request.
+        method (str): The HTTP method.
+        statements (List[list]): [SQL text, duration in ms or None] per statement, in order.
+        query_count (int): The number of statements other than transaction control.
+        connections (int): The number of connections opened.
+    """
+
+    def __init__(self, endpoint: str, method: str):
+        self.endpoint = endpoint
+        self.method = method
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.statements: List[list] = []
+        self.dropped = 0
+        self.query_count = 0
+        self.connections = 0
+        self._templates: Counter = Counter()
+        self._last_event: Optional[str] = None
+
+    def on_statement(self, sql: str) -> None:
+        """
+        The sqlite3 trace callback: records a statement as SQLite starts it.
+        """
+        # Newer sqlite3 modules report each trigger step with the text of the statement that fired it
+        if sql == self._last_event:
+            return
+        self._last_event = sql
+        if not sql.startswith("--") and not sql.lstrip().upper().startswith(_TRANSACTION_CONTROL + ("EXPLAIN",)):
+            self.query_count += 1
+            self._templates[normalize_sql(sql)] += 1
+        if len(self.statements) < MAX_TRACE_STATEMENTS:
+            self.statements.append([sql, None])
+        else:
+            self.dropped += 1
+
+    def repeated_statements(self) -> List[Dict[str, Any]]:
+        """
+        Returns the statements run at least N_PLUS_ONE_THRESHOLD times, most frequent first.
+        """
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in self._templates.most_common()
+            if count >= N_PLUS_ONE_THRESHOLD
+        ]
+
+    def to_dict(self, status: int) -> Dict[str, Any]:
+        repeated = self.repeated_statements()
+        return {
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'status': status,
+            'started_at': self.started_at,
+            'duration_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'connections': self.connections,
+            'query_count': self.query_count,
+            'over_budget': self.query_count > QUERY_BUDGET,
+            'repeated_statements': repeated,
+            'statements': [{'sql': sql, 'duration_ms': ms} for sql, ms in self.statements],
+            'statements_dropped': self.dropped,
+        }
+
+
+def start_trace(endpoint: str, method: str) -> None:
+    """
+    Starts tracing the SQL statements of the current request.
+
+    Args:
+        endpoint (str): The route pattern of the request.
+        method (str): The HTTP method.
+    """
+    if SQL_TRACE:
+        _current_trace.set(RequestTrace(endpoint, method))
+
+
+def finish_trace(status: int) -> None:
+    """
+    Stores the current request's trace and logs a warning if it was flagged.
+
+    Args:
+        status (int): The response status code.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    _current_trace.set(None)
+
+    finished = trace.to_dict(status)
+    _finished.append(finished)
+    if finished['over_budget']:
+        logger.warning("%s %s ran %d queries over %d connections (budget %d)",
+                       trace.method, trace.endpoint, trace.query_count, trace.connections, QUERY_BUDGET)
+    for repeated in finished['repeated_statements']:
+        logger.warning("%s %s ran the same statement %d times: %s",
+                       trace.method, trace.endpoint, repeated['count'], repeated['sql'])
+
+
+def trace_connection(conn: sqlite3.Connection) -> None:
+    """
+    Reports a new connection's statements to the current request's trace, if there is one.
+
+    Args:
+        conn (sqlite3.Connection): The connection just opened.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.connections += 1
+        conn.set_trace_callback(trace.on_statement)
+
+
+def statement_started() -> Optional[int]:
+    """
+    Marks the start of a statement run through a cursor.
+
+    Returns:
+        Optional[int]: The position to pass to statement_finished, or None if the request is not traced.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    trace._last_event = None
+    return len(trace.statements)
+
+
+def statement_finished(sql: str, seconds: float, mark: Optional[int]) -> None:
+    """
+    Attaches a cursor statement's duration to the first statement SQLite reported for it.
+
+    Args:
+        sql (str): The SQL passed to the cursor.
+        seconds (float): The time the cursor call took.
+        mark (Optional[int]): The value returned by statement_started.
+    """
+    trace = _current_trace.get()
+    if mark is None or trace is None:
+        return
+    trace._last_event = None
+    ms = round(seconds * 1000, 3)
+    for statement in trace.statements[mark:]:
+        if not statement[0].lstrip().upper().startswith(_TRANSACTION_CONTROL):
+            statement[1] = ms
+            return
+    # SQLite reported nothing, e.g. the statement failed to prepare
+    if len(trace.statements) < MAX_TRACE_STATEMENTS:
+        trace.statements.append([sql, ms])
+
+
+def get_traces(limit: int = TRACE_HISTORY, flagged_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Returns the most recent finished traces, most recent first.
+
+    Args:
+        limit (int): The maximum number of traces to return.
+        flagged_only (bool): Whether to return only traces over the budget or with repeated statements.
+
+    Returns:
+        List[Dict[str, Any]]: The traces.
+    """
+    traces = list(_finished)
+    traces.reverse()
+    if flagged_only:
+        traces = [trace for trace in traces if trace['over_budget'] or trace['repeated_statements']]
+    return traces[:limit]
+
+
+def clear_traces() -> None:
+    """
+    Discards the finished traces.
+    """
+    _finished.clear()
@@ -2,8 +2,14 @@ from contextlib import contextmanager
 import logging
 import os
 import sqlite3
+import threading
+import time
+from typing import Optional
 
 from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import Counter, Histogram
+from music_collection.utils import slow_query
+from music_collection.utils.sql_trace import statement_finished, statement_started, trace_connection
 
 
 logger = logging.getLogger(__name__)
@@ -13,6 +19,100 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/song_catalog.db")
 
+DB_QUERIES = Counter("db_queries_total", "SQLite statements executed, by statement type.", ["statement"])
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "Time spent executing SQLite statements, by statement type.", ["statement"])
+
+_open_connections = 0
+_open_connections_lock = threading.Lock()
+
+
+def statement_type(sql: str) -> str:
+    """
+    Returns the leading keyword of a SQL statement, such as SELECT or INSERT.
+    """
+    words = sql.split(None, 1)
+    return words[0].upper() if words else "EMPTY"
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    A cursor that records the count and execution time of its statements by statement type,
+    their durations in the current request's SQL trace, and those slower than SLOW_QUERY_MS
+    in the slow-query log.
+    """
+
+    def execute(self, sql, parameters=()):
+        mark = statement_started()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(self, sql, parameters, statement_type(sql), time.perf_counter() - start, mark)
+
+    def executemany(self, sql, seq_of_parameters):
+        mark = statement_started()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(self, sql, _first_row(seq_of_parameters), statement_type(sql), time.perf_counter() - start, mark)
+
+    def executescript(self, sql_script):
+        mark = statement_started()
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record_query(self, sql_script, None, "SCRIPT", time.perf_counter() - start, mark)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    A connection whose cursors are instrumented. The execute shortcuts are routed through
+    them, since the built-in ones bypass the cursor's Python methods.
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def open_connection_count() -> int:
+    """
+    Returns the number of connections opened by get_db_connection and not yet closed.
+    """
+    return _open_connections
+
+
+def _count_connection(change: int) -> None:
+    global _open_connections
+    with _open_connections_lock:
+        _open_connections += change
+
+
+def _record_query(cursor: sqlite3.Cursor, sql: str, parameters, statement: str, seconds: float, mark: Optional[int]) -> None:
+    DB_QUERIES.inc(statement)
+    DB_QUERY_SECONDS.observe(seconds, statement)
+    statement_finished(sql, seconds, mark)
+    slow_query.record_statement(cursor.connection, sql, parameters, seconds)
+
+
+def _first_row(seq_of_parameters):
+    """
+    Returns the first parameter row of an executemany call, or None if it was an iterator.
+    """
+    if isinstance(seq_of_parameters, (list, tuple)):
+        return seq_of_parameters[0] if seq_of_parameters else None
+    return None
+
 
 def check_database_connection():
     """Check the database connection
@@ -60,7 +160,9 @@ def get_db_connection():
     """
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(DB_PATH, factory=InstrumentedConnection)
+        _count_connection(1)
+        trace_connection(conn)
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
@@ -68,4 +170,5 @@ def get_db_connection():
     finally:
         if conn:
             conn.close()
+            _count_connection(-1)
             logger.info("Database connection closed.")
@@ -9,4 +9,43 @@ CREATE TABLE songs (
     play_count INTEGER DEFAULT 0,
     deleted BOOLEAN DEFAULT FALSE,
     UNIQUE(artist, title, year)
-);
\ No newline at end of file
+);
+CREATE INDEX idx_songs_genre_year ON songs (genre, year);
+CREATE INDEX idx_songs_play_count ON songs (play_count);
+
+DROP TABLE IF EXISTS play_events;
+CREATE TABLE play_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    song_id INTEGER NOT NULL,
+    played_at INTEGER NOT NULL  -- unix timestamp in seconds
+);
+
+DROP TABLE IF EXISTS song_plays_by_minute;
+CREATE TABLE song_plays_by_minute (
+    bucket INTEGER NOT NULL,  -- minutes since the unix epoch
+    song_id INTEGER NOT NULL,
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (bucket, song_id)
+) WITHOUT ROWID;
+
+DROP TABLE IF EXISTS song_plays_by_hour;
+CREATE TABLE song_plays_by_hour (
+    bucket INTEGER NOT NULL,  -- hours since the unix epoch
+    song_id INTEGER NOT NULL,
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (bucket, song_id)
+) WITHOUT ROWID;
+
+DROP TABLE IF EXISTS song_plays_by_day;
+CREATE TABLE song_plays_by_day (
+    bucket INTEGER NOT NULL,  -- days since the unix epoch
+    song_id INTEGER NOT NULL,
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (bucket, song_id)
+) WITHOUT ROWID;
+
+DROP TABLE IF EXISTS song_trending;
+CREATE TABLE song_trending (
+    song_id INTEGER PRIMARY KEY,
+    log_score REAL NOT NULL  -- log of the sum of exp(decay_rate * played_at) over all plays
+);
@@ -0,0 +1,93 @@
+import pytest
+
+import app as playlist_app
+from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.song_model import Song
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def client(mocker):
+    """A test client whose playlist starts empty and whose catalog holds one song."""
+    mocker.patch.object(playlist_app, "playlist_model", PlaylistModel())
+    song = Song(1, "Artist A", "Song A", 2020, "Rock", 210)
+    mocker.patch(
+        "music_collection.models.song_model.get_songs_by_compound_keys",
+        side_effect=lambda keys: {key: song for key in keys if key == ("Artist A", "Song A", 2020)}
+    )
+    return playlist_app.app.test_client()
+
+######################################################
+#
+#    Add songs to playlist
+#
+######################################################
+
+def test_add_songs_to_playlist(client):
+    """Test that a batch with some valid songs adds them and reports the rest."""
+    response = client.post("/api/add-songs-to-playlist", json={'songs': [
+        {'artist': "Artist A", 'title': "Song A", 'year': 2020},
+        {'artist': "Artist B", 'title': "Song B", 'year': 2021},
+    ]})
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [song['id'] for song in body['added']] == [1]
+    assert [error['index'] for error in body['errors']] == [1]
+    assert playlist_app.playlist_model.get_playlist_length() == 1
+
+def test_add_songs_to_playlist_none_added(client):
+    """Test that a batch in which every song fails is rejected with the per-song errors."""
+    response = client.post("/api/add-songs-to-playlist", json={'songs': [
+        {'artist': "Artist B", 'title': "Song B", 'year': 2021},
+        {'artist': "Artist A", 'title': "Song A"},
+        {'artist': "Artist A", 'title': "Song A", 'year': "recent"},
+    ]})
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['added'] == []
+    assert [error['index'] for error in body['errors']] == [0, 1, 2]
+    assert playlist_app.playlist_model.get_playlist_length() == 0
+
+######################################################
+#
+#    Recommendations
+#
+######################################################
+
+@pytest.mark.parametrize("limit", ["0", "-1"])
+def test_recommend_invalid_limit(client, mocker, limit):
+    """Test that a limit below 1 is rejected as a bad request."""
+    mocker.patch.object(playlist_app.recommender, "neighbors", {1: [(2, 0.9), (3, 0.5)]})
+
+    response = client.get("/api/recommend", query_string={'song_id': 1, 'limit': limit})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f"Invalid limit: {limit} (must be a positive integer)."
+
+######################################################
+#
+#    Debug routes
+#
+######################################################
+
+@pytest.mark.parametrize("route", ["/api/debug/sql-traces", "/api/debug/slow-queries"])
+def test_sql_debug_routes_require_token(client, mocker, route):
+    """Test that the SQL debug routes, which show the statements this worker ran, need a valid X-Profile-Token."""
+    mocker.patch("music_collection.utils.profiling.PROFILE_TOKEN", "secret")
+
+    assert client.get(route).status_code == 403
+    assert client.get(route, headers={'X-Profile-Token': "wrong"}).status_code == 403
+    assert client.get(route, headers={'X-Profile-Token': "secret"}).status_code == 200
+
+def test_sql_debug_routes_disabled_without_token(client, mocker):
+    """Test that the SQL debug routes are closed when no PROFILE_TOKEN is configured."""
+    mocker.patch("music_collection.utils.profiling.PROFILE_TOKEN", "")
+
+    assert client.get("/api/debug/sql-traces", headers={'X-Profile-Token': ""}).status_code == 403
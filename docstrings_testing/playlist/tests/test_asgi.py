@@ -0,0 +1,104 @@
+import asyncio
+
+from flask import Flask, jsonify, request
+import pytest
+
+from music_collection.utils.asgi import AsyncApp
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def async_app():
+    flask_app = Flask(__name__)
+
+    @flask_app.route('/api/echo', methods=['POST'])
+    def echo():
+        return jsonify({'query': request.args.get('q'), 'body': request.get_json(), 'agent': request.headers.get('User-Agent')})
+
+    async_app = AsyncApp(flask_app, threads=2)
+    yield async_app
+    async_app.executor.shutdown(wait=True)
+
+def call(app, method, path, query_string=b"", body=b"", headers=()):
+    """Sends one HTTP request through the ASGI interface and returns (status, headers, body)."""
+    scope = {
+        "type": "http", "method": method, "path": path, "query_string": query_string,
+        "headers": list(headers), "http_version": "1.1", "scheme": "http",
+        "server": ("testserver", 80), "client": ("127.0.0.1", 1234),
+    }
+    messages = [{"type": "http.request", "body": body[:3], "more_body": True}, {"type": "http.request", "body": body[3:]}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], dict(sent[0]["headers"]), sent[1]["body"]
+
+######################################################
+#
+#    Requests
+#
+######################################################
+
+def test_flask_route(async_app):
+    """Test that routes without an async handler are served by the Flask app."""
+    status, headers, body = call(
+        async_app, "POST", "/api/echo", query_string=b"q=rock", body=b'{"id": 1}',
+        headers=[(b"content-type", b"application/json"), (b"user-agent", b"pytest")]
+    )
+
+    assert status == 200
+    assert headers[b"content-type"] == b"application/json"
+    assert async_app.flask_app.json.loads(body) == {'query': 'rock', 'body': {'id': 1}, 'agent': 'pytest'}
+
+def test_flask_route_not_found(async_app):
+    """Test that the Flask app's 404 is passed through."""
+    status, _, _ = call(async_app, "GET", "/api/missing")
+
+    assert status == 404
+
+def test_async_route(async_app):
+    """Test that a registered coroutine serves its path instead of the Flask app."""
+    @async_app.route('/api/echo', methods=['POST'])
+    async def echo(scope):
+        value = await async_app.run_sync(lambda: "from the pool")
+        return 201, {'status': 'success', 'value': value}
+
+    status, _, body = call(async_app, "POST", "/api/echo")
+
+    assert status == 201
+    assert body == b'{"status": "success", "value": "from the pool"}\n'
+
+def test_body_too_large(async_app, mocker):
+    """Test that request bodies over MAX_BODY_BYTES are rejected."""
+    mocker.patch("music_collection.utils.asgi.MAX_BODY_BYTES", 4)
+
+    status, _, _ = call(async_app, "POST", "/api/echo", body=b'{"id": 1}')
+
+    assert status == 413
+
+def test_lifespan_runs_worker_init_hooks(async_app, mocker):
+    """Test that startup runs the worker initialization hooks as worker 0."""
+    mock_hooks = mocker.patch("music_collection.utils.asgi.run_worker_init_hooks")
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(async_app({"type": "lifespan"}, receive, send))
+
+    mock_hooks.assert_called_once_with(0)
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+
+from music_collection.utils import capture
+from music_collection.utils.capture import CaptureWriter, capture_request, stop_capture
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def capture_dir(tmp_path, mocker):
+    """Captures requests into a temporary directory, closing the file after the test."""
+    mocker.patch("music_collection.utils.capture.CAPTURE_DIR", str(tmp_path))
+    yield tmp_path
+    stop_capture()
+
+def read_records(directory) -> list:
+    stop_capture()
+    with open(os.path.join(directory, f"requests-{os.getpid()}.jsonl")) as f:
+        return [json.loads(line) for line in f]
+
+######################################################
+#
+#    Capture
+#
+######################################################
+
+def test_capture_off_by_default(mocker):
+    """Test that nothing is written while CAPTURE_DIR is unset."""
+    mocker.patch("music_collection.utils.capture.CAPTURE_DIR", "")
+    get_writer = mocker.patch("music_collection.utils.capture.get_writer")
+
+    capture_request("GET", "/api/health", "/api/health", "", None, "client", 200, 0.001)
+
+    get_writer.assert_not_called()
+
+def test_capture_request(capture_dir):
+    """Test that a request is written as one compact JSON line."""
+    body = b'{"artist": "Artist"}'
+    capture_request("POST", "/api/create-song", "/api/create-song", "", body, "session-1", 201, 0.0125)
+
+    records = read_records(capture_dir)
+
+    assert len(records) == 1
+    record = records[0]
+    assert record['session'] == "session-1"
+    assert record['method'] == "POST"
+    assert record['route'] == "/api/create-song"
+    assert record['path'] == "/api/create-song"
+    assert record['query'] == ""
+    assert record['body'] == body.decode()
+    assert record['status'] == 201
+    assert record['ms'] == 12.5
+    assert isinstance(record['ts'], float)
+
+def test_capture_query_without_body(capture_dir):
+    """Test that the query string is kept and a request without a body has no body field."""
+    capture_request("GET", "/api/get-all-songs-from-catalog", "/api/get-all-songs-from-catalog",
+                    "sort_by_play_count=true", b"", "127.0.0.1", 200, 0.002)
+
+    record = read_records(capture_dir)[0]
+
+    assert record['query'] == "sort_by_play_count=true"
+    assert 'body' not in record
+
+def test_capture_skips_large_body(capture_dir, mocker):
+    """Test that a body over CAPTURE_MAX_BODY_BYTES is replaced by its size."""
+    mocker.patch("music_collection.utils.capture.CAPTURE_MAX_BODY_BYTES", 10)
+
+    capture_request("POST", "/api/create-song", "/api/create-song", "", b"x" * 11, "session-1", 201, 0.001)
+
+    record = read_records(capture_dir)[0]
+    assert 'body' not in record
+    assert record['body_bytes'] == 11
+
+def test_capture_skips_debug_routes(capture_dir):
+    """Test that the debug and metrics endpoints are not captured."""
+    capture_request("GET", "/api/metrics", "/api/metrics", "", None, "client", 200, 0.001)
+    capture_request("GET", "/api/debug/memory", "/api/debug/memory", "", None, "client", 200, 0.001)
+    capture_request("GET", "/api/health", "/api/health", "", None, "client", 200, 0.001)
+
+    assert [record['path'] for record in read_records(capture_dir)] == ["/api/health"]
+
+def test_capture_file_rotates(tmp_path):
+    """Test that the capture file is rotated at its size limit, keeping the given number of backups."""
+    writer = CaptureWriter(str(tmp_path), max_bytes=200, backups=2)
+    for i in range(20):
+        writer.write({'i': i, 'padding': "x" * 50})
+    writer.stop()
+
+    names = sorted(os.listdir(tmp_path))
+    path = os.path.basename(writer.path)
+    assert names == [path, f"{path}.1", f"{path}.2"]
+    with open(writer.path) as f:
+        assert json.loads(f.readlines()[-1])['i'] == 19
+
+def test_writer_reset_after_fork(capture_dir):
+    """Test that a forked process opens its own capture file instead of the parent's writer."""
+    capture_request("GET", "/api/health", "/api/health", "", None, "client", 200, 0.001)
+    parent_writer = capture._writer
+
+    capture._reset_after_fork()
+
+    assert capture._writer is None
+    parent_writer.stop()
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+import json
+
+from flask import Flask, jsonify
+import pytest
+
+from music_collection.models.song_model import CatalogSong, Song
+from music_collection.utils.json_provider import ModelJSONProvider
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.json = ModelJSONProvider(app)
+    return app
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+######################################################
+#
+#    Serialization
+#
+######################################################
+
+def test_models_serialized_with_to_dict(app, mocker):
+    """Test that models in a response are serialized by their to_dict method."""
+    to_dict = mocker.spy(CatalogSong, "to_dict")
+    songs = [CatalogSong(1, "Artist A", "Song A", 2020, "Rock", 210, 10), CatalogSong(2, "Artist B", "Song B", 2021, "Pop", 180, 0)]
+
+    with app.app_context():
+        body = json.loads(jsonify({'status': 'success', 'songs': songs}).get_data())
+
+    assert to_dict.call_count == 2
+    assert body['songs'] == [song.to_dict() for song in songs]
+
+def test_song_json(app):
+    """Test that a song serializes to the same JSON as its dataclass fields."""
+    song = Song(1, "Artist A", "Song A", 2020, "Rock", 210)
+
+    assert json.loads(app.json.dumps(song)) == {
+        "id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210
+    }
+
+def test_other_dataclasses_unchanged(app):
+    """Test that dataclasses without to_dict are still serialized by Flask's default."""
+    assert json.loads(app.json.dumps(Point(1, 2))) == {"x": 1, "y": 2}
@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+from music_collection.utils.logger import (
+    SampledLogger,
+    configure_logger,
+    get_log_level,
+    get_queue_handler,
+    parse_log_levels
+)
+
+
+def test_parse_log_levels():
+    """Test parsing comma separated module=LEVEL pairs."""
+    levels = parse_log_levels("music_collection.models=debug, music_collection.utils.sql_utils=WARNING")
+
+    assert levels == {"music_collection.models": logging.DEBUG, "music_collection.utils.sql_utils": logging.WARNING}
+
+def test_parse_log_levels_invalid():
+    """Test error on an entry with an unknown level."""
+    with pytest.raises(ValueError, match="Invalid LOG_LEVELS entry: music_collection=LOUD"):
+        parse_log_levels("music_collection=LOUD")
+
+def test_get_log_level_longest_prefix(monkeypatch):
+    """Test that the most specific LOG_LEVELS entry wins and other loggers use the default."""
+    monkeypatch.setenv("LOG_LEVELS", "music_collection=WARNING,music_collection.models.song_model=DEBUG")
+
+    assert get_log_level("music_collection.models.song_model") == logging.DEBUG
+    assert get_log_level("music_collection.models.playlist_model") == logging.WARNING
+    assert get_log_level("other") == logging.getLevelName("INFO")
+
+def test_configure_logger_once():
+    """Test that configuring a logger repeatedly attaches the shared queue handler only once."""
+    logger = logging.getLogger("music_collection.tests.configure_once")
+
+    configure_logger(logger)
+    configure_logger(logger)
+
+    assert logger.handlers == [get_queue_handler()]
+
+def test_sampled_logger(mocker):
+    """Test that a sampled logger emits the first call and then one in every N calls."""
+    logger = mocker.Mock()
+    logger.isEnabledFor.return_value = True
+    sampled = SampledLogger(logger, every=3)
+
+    for track_number in range(1, 8):
+        sampled.info("Playing track number: %d", track_number)
+
+    assert [call[0][2] for call in logger.log.call_args_list] == [1, 4, 7]
+    logger.log.assert_called_with(logging.INFO, "Playing track number: %d (sampled 1 in %d)", 7, 3)
+
+def test_sampled_logger_disabled_level(mocker):
+    """Test that a sampled logger skips disabled levels without logging."""
+    logger = mocker.Mock()
+    logger.isEnabledFor.return_value = False
+    sampled = SampledLogger(logger, every=1)
+
+    sampled.debug("Playing track number: %d", 1)
+
+    logger.log.assert_not_called()
@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+
+import pytest
+
+from music_collection.utils import metrics
+from music_collection.utils.metrics import Counter, Histogram, render_metrics, reset_metrics
+from music_collection.utils.sql_utils import InstrumentedConnection, statement_type
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Gives each test an empty metric registry and zeroed values."""
+    monkeypatch.setattr(metrics, "_registry", [])
+    reset_metrics()
+    yield
+    reset_metrics()
+
+######################################################
+#
+#    Rendering
+#
+######################################################
+
+def test_counter(registry):
+    """Test that counters are summed per label values and rendered with HELP and TYPE lines."""
+    counter = Counter("test_total", "Test counter.", ["result"])
+
+    counter.inc("hit")
+    counter.inc("hit", amount=2)
+    counter.inc("miss")
+
+    assert render_metrics() == (
+        "# HELP test_total Test counter.\n"
+        "# TYPE test_total counter\n"
+        'test_total{result="hit"} 3\n'
+        'test_total{result="miss"} 1\n'
+    )
+
+def test_counter_wrong_labels(registry):
+    """Test error when the label values do not match the label names."""
+    counter = Counter("test_total", "Test counter.", ["result"])
+
+    with pytest.raises(ValueError, match="test_total expects labels"):
+        counter.inc()
+
+def test_histogram(registry):
+    """Test that histogram buckets are rendered cumulatively with the sum and count."""
+    histogram = Histogram("test_seconds", "Test histogram.", buckets=(0.1, 1.0))
+
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.observe(0.5)
+    histogram.observe(2.0)
+
+    assert render_metrics() == (
+        "# HELP test_seconds Test histogram.\n"
+        "# TYPE test_seconds histogram\n"
+        'test_seconds_bucket{le="0.1"} 2\n'
+        'test_seconds_bucket{le="1"} 3\n'
+        'test_seconds_bucket{le="+Inf"} 4\n'
+        "test_seconds_sum 2.65\n"
+        "test_seconds_count 4\n"
+    )
+
+def test_label_escaping(registry):
+    """Test that quotes and backslashes in label values are escaped."""
+    counter = Counter("test_total", "Test counter.", ["route"])
+
+    counter.inc('a"b\\c')
+
+    assert 'test_total{route="a\\"b\\\\c"} 1' in render_metrics()
+
+######################################################
+#
+#    Threads
+#
+######################################################
+
+def test_values_from_exited_threads(registry):
+    """Test that values recorded by threads that have exited are kept."""
+    counter = Counter("test_total", "Test counter.")
+
+    threads = [threading.Thread(target=lambda: [counter.inc() for _ in range(100)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc()
+
+    assert "test_total 401\n" in render_metrics()
+    assert "test_total 401\n" in render_metrics()
+
+######################################################
+#
+#    SQLite instrumentation
+#
+######################################################
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT 1", "SELECT"),
+    ("\n    insert into songs VALUES (1)", "INSERT"),
+    ("", "EMPTY"),
+])
+def test_statement_type(sql, expected):
+    """Test that statements are labelled by their leading keyword."""
+    assert statement_type(sql) == expected
+
+def test_instrumented_connection():
+    """Test that statements run through the connection shortcuts and cursors are counted."""
+    reset_metrics()
+    conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+
+    conn.execute("CREATE TABLE songs (id INTEGER)")
+    conn.executemany("INSERT INTO songs VALUES (?)", [(1,), (2,)])
+    conn.cursor().execute("SELECT * FROM songs")
+    conn.close()
+
+    page = render_metrics()
+    for statement in ("CREATE", "INSERT", "SELECT"):
+        assert f'db_queries_total{{statement="{statement}"}} 1\n' in page
+    assert 'db_query_duration_seconds_count{statement="SELECT"} 1\n' in page
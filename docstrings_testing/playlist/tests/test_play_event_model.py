@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+import re
+
+import pytest
+
+from music_collection.models.play_event_model import get_top_songs, record_plays, split_window
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+def normalize_whitespace(sql_query: str) -> str:
+    return re.sub(r'\s+', ' ', sql_query).strip()
+
+# Mocking the database connection for tests
+@pytest.fixture
+def mock_cursor(mocker):
+    mock_conn = mocker.Mock()
+    mock_cursor = mocker.Mock()
+
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+
+    @contextmanager
+    def mock_get_db_connection():
+        yield mock_conn
+
+    mocker.patch("music_collection.models.play_event_model.get_db_connection", mock_get_db_connection)
+
+    return mock_cursor
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+######################################################
+#
+#    Recording plays
+#
+######################################################
+
+def test_record_plays(mocker):
+    """Test that plays are appended to the log and folded into every rollup."""
+    cursor = mocker.Mock()
+
+    record_plays(cursor, [1, 2, 1], played_at=DAY + HOUR + MINUTE)
+
+    assert cursor.executemany.call_count == 4
+    log_call, minute_call, hour_call, day_call = cursor.executemany.call_args_list
+
+    assert normalize_whitespace(log_call[0][0]) == "INSERT INTO play_events (song_id, played_at) VALUES (?, ?)"
+    assert log_call[0][1] == [(1, DAY + HOUR + MINUTE), (2, DAY + HOUR + MINUTE), (1, DAY + HOUR + MINUTE)]
+
+    # Rollups receive one upsert per distinct song in the batch
+    assert minute_call[0][1] == [(24 * 60 + 61, 1, 2), (24 * 60 + 61, 2, 1)]
+    assert hour_call[0][1] == [(25, 1, 2), (25, 2, 1)]
+    assert day_call[0][1] == [(1, 1, 2), (1, 2, 1)]
+    assert "ON CONFLICT (bucket, song_id) DO UPDATE SET plays = plays + excluded.plays" in normalize_whitespace(day_call[0][0])
+
+def test_record_plays_empty(mocker):
+    """Test that nothing is written when there are no plays."""
+    cursor = mocker.Mock()
+    record_plays(cursor, [])
+    cursor.executemany.assert_not_called()
+
+######################################################
+#
+#    Window splitting
+#
+######################################################
+
+def test_split_window_minutes_only():
+    """Test that a window shorter than an hour boundary is read from the minute rollup."""
+    assert split_window(10 * MINUTE, 20 * MINUTE + 30) == [("song_plays_by_minute", 10, 21)]
+
+def test_split_window_hours_and_minutes():
+    """Test that whole hours come from the hourly rollup and the edges from the minute rollup."""
+    ranges = split_window(HOUR - 5 * MINUTE, 3 * HOUR + 5 * MINUTE)
+    assert sorted(ranges) == sorted([
+        ("song_plays_by_minute", 55, 60),
+        ("song_plays_by_minute", 180, 185),
+        ("song_plays_by_hour", 1, 3),
+    ])
+
+def test_split_window_days():
+    """Test that whole days come from the daily rollup."""
+    ranges = split_window(DAY - HOUR - MINUTE, 3 * DAY + HOUR + MINUTE)
+    assert sorted(ranges) == sorted([
+        ("song_plays_by_minute", 24 * 60 - 61, 24 * 60 - 60),
+        ("song_plays_by_minute", 3 * 24 * 60 + 60, 3 * 24 * 60 + 61),
+        ("song_plays_by_hour", 23, 24),
+        ("song_plays_by_hour", 72, 73),
+        ("song_plays_by_day", 1, 3),
+    ])
+
+def test_split_window_covers_exactly():
+    """Test that the ranges cover every minute of the window exactly once."""
+    widths = {"song_plays_by_minute": 1, "song_plays_by_hour": 60, "song_plays_by_day": 24 * 60}
+    for start, end in [(0, 7 * DAY), (123 * MINUTE, 5 * DAY + 17 * MINUTE), (DAY + 1, DAY + 2 * HOUR)]:
+        minutes = []
+        for table, low, high in split_window(start, end):
+            width = widths[table]
+            minutes.extend(range(low * width, high * width))
+        assert sorted(minutes) == list(range(start // MINUTE, -(-end // MINUTE)))
+
+######################################################
+#
+#    Top songs
+#
+######################################################
+
+def test_get_top_songs(mock_cursor):
+    """Test retrieving the top songs in a window from the rollups only."""
+    mock_cursor.fetchall.return_value = [(2, "Artist B", "Song B", 2021, "Pop", 180, 7)]
+
+    result = get_top_songs(HOUR, 3 * HOUR, limit=5)
+
+    assert result == [{"id": 2, "artist": "Artist B", "title": "Song B", "year": 2021, "genre": "Pop", "duration": 180, "plays": 7}]
+
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert "play_events" not in actual_query, "Window queries must not read the raw event log."
+    assert "FROM (SELECT song_id, plays FROM song_plays_by_hour WHERE bucket >= ? AND bucket < ?) AS window_plays" in actual_query
+    assert mock_cursor.execute.call_args[0][1] == [1, 3, 5]
+
+def test_get_top_songs_invalid_window(mock_cursor):
+    """Test error when the window ends before it starts."""
+    with pytest.raises(ValueError, match="Invalid window: end 10 must be after start 20"):
+        get_top_songs(20, 10)
@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+
+from music_collection.models.playback_model import PlaybackJobManager
+from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.song_model import Song
+
+
+@pytest.fixture()
+def playlist_model():
+    """Fixture to provide a PlaylistModel with three songs."""
+    playlist_model = PlaylistModel()
+    playlist_model.playlist.extend([
+        Song(1, 'Artist 1', 'Song 1', 2022, 'Pop', 180),
+        Song(2, 'Artist 2', 'Song 2', 2021, 'Rock', 155),
+        Song(3, 'Artist 3', 'Song 3', 2020, 'Jazz', 200),
+    ])
+    return playlist_model
+
+@pytest.fixture()
+def playback_jobs(playlist_model):
+    """Fixture to provide a PlaybackJobManager with a single worker."""
+    return PlaybackJobManager(playlist_model, max_workers=1)
+
+@pytest.fixture
+def mock_update_play_counts(mocker):
+    """Mock the batched play count update."""
+    return mocker.patch("music_collection.models.playback_model.update_play_counts")
+
+
+##################################################
+# Playback Job Test Cases
+##################################################
+
+def test_play_entire_playlist(playback_jobs, playlist_model, mock_update_play_counts):
+    """Test that a job plays every track and writes the play counts in one batch."""
+    playlist_model.current_track_number = 2
+
+    job = playback_jobs.play_entire_playlist()
+    playback_jobs.shutdown()
+
+    assert job.status == 'completed', f"Expected job to complete, got {job.status}"
+    assert job.played_tracks == 3
+    mock_update_play_counts.assert_called_once_with([1, 2, 3])
+    assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
+
+def test_play_rest_of_playlist(playback_jobs, playlist_model, mock_update_play_counts):
+    """Test that a job plays from the current track to the end of the playlist."""
+    playlist_model.current_track_number = 2
+
+    job = playback_jobs.play_rest_of_playlist()
+    playback_jobs.shutdown()
+
+    assert job.total_tracks == 2
+    assert job.played_tracks == 2
+    mock_update_play_counts.assert_called_once_with([2, 3])
+    assert playlist_model.current_track_number == 1
+
+def test_play_count_batches(playback_jobs, mock_update_play_counts, mocker):
+    """Test that play counts are flushed every PLAY_COUNT_BATCH_SIZE plays."""
+    mocker.patch("music_collection.models.playback_model.PLAY_COUNT_BATCH_SIZE", 2)
+
+    playback_jobs.play_entire_playlist()
+    playback_jobs.shutdown()
+
+    assert mock_update_play_counts.call_args_list == [mocker.call([1, 2]), mocker.call([3])]
+
+def test_cancel_running_job(playback_jobs, mock_update_play_counts, mocker):
+    """Test that a cancelled job stops before playing its next track."""
+    mocker.patch("music_collection.models.playback_model.PLAY_COUNT_BATCH_SIZE", 1)
+
+    # Hold the job inside its first play count write until it has been cancelled
+    first_write = threading.Event()
+    release = threading.Event()
+    def block_first_write(song_ids):
+        first_write.set()
+        release.wait(timeout=5)
+    mock_update_play_counts.side_effect = block_first_write
+
+    job = playback_jobs.play_entire_playlist()
+    assert first_write.wait(timeout=5)
+    playback_jobs.cancel_job(job.job_id)
+    release.set()
+    playback_jobs.shutdown()
+
+    assert job.status == 'cancelled', f"Expected job to be cancelled, got {job.status}"
+    assert job.played_tracks == 1
+    mock_update_play_counts.assert_called_once_with([1])
+
+def test_cancel_finished_job(playback_jobs, mock_update_play_counts):
+    """Test error when cancelling a job that has already finished."""
+    job = playback_jobs.play_entire_playlist()
+    playback_jobs.shutdown()
+
+    with pytest.raises(ValueError, match=f"Playback job {job.job_id} has already finished"):
+        playback_jobs.cancel_job(job.job_id)
+
+def test_job_failure(playback_jobs, mock_update_play_counts):
+    """Test that a database error marks the job as failed."""
+    mock_update_play_counts.side_effect = Exception("database is locked")
+
+    job = playback_jobs.play_entire_playlist()
+    playback_jobs.shutdown()
+
+    assert job.status == 'failed'
+    assert job.error == "database is locked"
+
+def test_job_failure_counts_played_tracks(playback_jobs, playlist_model, mock_update_play_counts, mocker):
+    """Test that the tracks played before a job fails are still counted and observed."""
+    observe_sequence = mocker.patch("music_collection.models.playback_model.recommender.observe_sequence")
+    mocker.patch.object(playlist_model, "advance_track", side_effect=[2, ValueError("Playlist is empty")])
+
+    job = playback_jobs.play_entire_playlist()
+    playback_jobs.shutdown()
+
+    assert job.status == 'failed'
+    assert job.error == "Playlist is empty"
+    assert job.played_tracks == 1
+    mock_update_play_counts.assert_called_once_with([1])
+    observe_sequence.assert_called_once_with([1])
+    assert playlist_model.last_played_song_id == 1
+
+def test_get_job_not_found(playback_jobs):
+    """Test error when looking up an unknown job."""
+    with pytest.raises(ValueError, match="Playback job missing not found"):
+        playback_jobs.get_job("missing")
+
+def test_play_empty_playlist(mock_update_play_counts):
+    """Test error when starting a job on an empty playlist."""
+    playback_jobs = PlaybackJobManager(PlaylistModel(), max_workers=1)
+    with pytest.raises(ValueError, match="Playlist is empty"):
+        playback_jobs.play_entire_playlist()
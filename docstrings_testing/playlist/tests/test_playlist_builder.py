@@ -0,0 +1,77 @@
+import pytest
+
+from music_collection.models.playlist_builder import build_smart_playlist, fit_duration
+from music_collection.models.song_model import Song
+
+
+@pytest.fixture
+def candidates():
+    """Fixture providing candidate songs in order of preference."""
+    return [
+        Song(1, 'Artist 1', 'Song 1', 1991, 'Rock', 200),
+        Song(2, 'Artist 2', 'Song 2', 1992, 'Rock', 300),
+        Song(3, 'Artist 3', 'Song 3', 1993, 'Rock', 150),
+        Song(4, 'Artist 4', 'Song 4', 1994, 'Rock', 240),
+    ]
+
+@pytest.fixture
+def mock_get_songs_by_filters(mocker, candidates):
+    """Mock the catalog lookup used to pull candidate songs."""
+    return mocker.patch("music_collection.models.playlist_builder.get_songs_by_filters", return_value=candidates)
+
+
+##################################################
+# Duration Fit Test Cases
+##################################################
+
+def test_fit_duration_exact(candidates):
+    """Test that swaps close the gap left by the greedy fill."""
+    # Greedy picks 200 + 300 = 500; swapping 200 for 240 reaches the target exactly
+    songs = fit_duration(candidates, target_duration=540)
+    assert sum(song.duration for song in songs) == 540
+    assert [song.id for song in songs] == [4, 2]
+
+def test_fit_duration_never_exceeds_target(candidates):
+    """Test that the picked songs never go over the target duration."""
+    for target in range(100, 1000, 7):
+        songs = fit_duration(candidates, target_duration=target)
+        assert sum(song.duration for song in songs) <= target
+
+def test_fit_duration_max_length(candidates):
+    """Test that the target length caps the number of songs picked."""
+    songs = fit_duration(candidates, target_duration=10000, max_length=2)
+    assert len(songs) == 2
+
+def test_fit_duration_length_only(candidates):
+    """Test that the most preferred songs are picked when only a length is given."""
+    songs = fit_duration(candidates, max_length=3)
+    assert [song.id for song in songs] == [1, 2, 3]
+
+def test_fit_duration_no_target(candidates):
+    """Test error when neither a duration nor a length is given."""
+    with pytest.raises(ValueError, match="A target duration or a target length is required."):
+        fit_duration(candidates)
+
+def test_fit_duration_invalid_target(candidates):
+    """Test error when the target duration is not positive."""
+    with pytest.raises(ValueError, match="Invalid target duration: 0"):
+        fit_duration(candidates, target_duration=0)
+
+
+##################################################
+# Smart Playlist Test Cases
+##################################################
+
+def test_build_smart_playlist(mock_get_songs_by_filters):
+    """Test that filters are passed to the catalog lookup and the result is fit to the target."""
+    songs = build_smart_playlist(genre='Rock', min_year=1990, max_year=1999, target_duration=450)
+
+    mock_get_songs_by_filters.assert_called_once_with(genre='Rock', min_year=1990, max_year=1999,
+                                                      min_play_count=None, max_play_count=None, limit=5000)
+    assert sum(song.duration for song in songs) == 450
+
+def test_build_smart_playlist_no_matches(mock_get_songs_by_filters):
+    """Test error when no songs match the filters."""
+    mock_get_songs_by_filters.return_value = []
+    with pytest.raises(ValueError, match="No songs match the given filters and target."):
+        build_smart_playlist(genre='Polka', target_length=10)
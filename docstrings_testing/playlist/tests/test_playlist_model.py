@@ -44,6 +44,34 @@ def test_add_duplicate_song_to_playlist(playlist_model, sample_song1):
     with pytest.raises(ValueError, match="Song with ID 1 already exists in the playlist"):
         playlist_model.add_song_to_playlist(sample_song1)
 
+def test_load_playlist(playlist_model, sample_song1, sample_playlist):
+    """Test replacing the playlist contents and rewinding to the first track."""
+    playlist_model.add_song_to_playlist(sample_song1)
+    playlist_model.current_track_number = 2
+
+    playlist_model.load_playlist(list(reversed(sample_playlist)))
+    assert [song.id for song in playlist_model.playlist] == [2, 1]
+    assert playlist_model.current_track_number == 1
+
+def test_load_playlist_duplicate_song(playlist_model, sample_song1):
+    """Test error when loading the same song twice."""
+    with pytest.raises(ValueError, match="Song with ID 1 appears more than once"):
+        playlist_model.load_playlist([sample_song1, sample_song1])
+
+def test_playlist_contents_observed(playlist_model, sample_song1, sample_song2, mocker):
+    """Test that added and loaded songs are recorded for recommendations as playlist members."""
+    mock_recommender = mocker.patch("music_collection.models.playlist_model.recommender")
+
+    playlist_model.add_song_to_playlist(sample_song1)
+    playlist_model.add_song_to_playlist(sample_song2)
+    assert mock_recommender.observe_playlist.call_args_list == [
+        mocker.call([1], added_from=0),
+        mocker.call([1, 2], added_from=1),
+    ]
+
+    playlist_model.load_playlist([sample_song2, sample_song1])
+    mock_recommender.observe_playlist.assert_called_with([2, 1])
+
 ##################################################
 # Remove Song Management Test Cases
 ##################################################
@@ -268,6 +296,25 @@ def test_play_current_song(playlist_model, sample_playlist, mock_update_play_cou
     # Assert that update_play_count was called with the id of the second song
     mock_update_play_count.assert_called_with(2)
 
+def test_advance_track(playlist_model, sample_playlist):
+    """Test advancing the current track wraps back to the first track."""
+    playlist_model.playlist.extend(sample_playlist)
+
+    assert playlist_model.advance_track() == 2
+    assert playlist_model.advance_track() == 1
+    assert playlist_model.current_track_number == 1
+
+def test_play_current_song_observes_sequence(playlist_model, sample_playlist, mock_update_play_count, mocker):
+    """Test that consecutive plays are recorded for recommendations."""
+    mock_recommender = mocker.patch("music_collection.models.playlist_model.recommender")
+    playlist_model.playlist.extend(sample_playlist)
+
+    playlist_model.play_current_song()
+    mock_recommender.observe_sequence.assert_not_called()
+
+    playlist_model.play_current_song()
+    mock_recommender.observe_sequence.assert_called_once_with([1, 2])
+
 def test_rewind_playlist(playlist_model, sample_playlist):
     """Test rewinding the iterator to the beginning of the playlist."""
     playlist_model.playlist.extend(sample_playlist)
@@ -1,7 +1,9 @@
+import asyncio
+
 import pytest
 import requests
 
-from music_collection.utils.random_utils import get_random
+from music_collection.utils.random_utils import _fetch_text, get_random, get_random_async
 
 
 RANDOM_NUMBER = 42
@@ -47,4 +49,55 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random(NUM_SONGS)
\ No newline at end of file
+        get_random(NUM_SONGS)
+
+def test_get_random_async(mocker):
+    """Test retrieving a random number from random.org without blocking the event loop."""
+    mock_fetch = mocker.patch("music_collection.utils.random_utils._fetch_text", mocker.AsyncMock(return_value=f"{RANDOM_NUMBER}\n"))
+
+    assert asyncio.run(get_random_async(NUM_SONGS)) == RANDOM_NUMBER
+    mock_fetch.assert_called_once_with("https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new")
+
+def test_get_random_async_request_failure(mocker):
+    """Simulate a connection failure in the async client."""
+    mocker.patch("music_collection.utils.random_utils._fetch_text", mocker.AsyncMock(side_effect=OSError("Connection error")))
+
+    with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
+        asyncio.run(get_random_async(NUM_SONGS))
+
+def test_get_random_async_timeout(mocker):
+    """Simulate a timeout in the async client."""
+    mocker.patch("music_collection.utils.random_utils._fetch_text", mocker.AsyncMock(side_effect=asyncio.TimeoutError))
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        asyncio.run(get_random_async(NUM_SONGS))
+
+def test_get_random_async_invalid_response(mocker):
+    """Simulate an invalid response in the async client."""
+    mocker.patch("music_collection.utils.random_utils._fetch_text", mocker.AsyncMock(return_value="invalid_response"))
+
+    with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
+        asyncio.run(get_random_async(NUM_SONGS))
+
+def test_fetch_text():
+    """Test the async HTTP client against a local server, including an error status."""
+    async def handle(reader, writer):
+        request_line = await reader.readline()
+        await reader.readuntil(b"\r\n\r\n")
+        if b"/missing" in request_line:
+            writer.write(b"HTTP/1.0 404 Not Found\r\n\r\n")
+        else:
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain\r\n\r\n42\n")
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            body = await _fetch_text(f"http://127.0.0.1:{port}/integers/?num=1")
+            with pytest.raises(OSError, match="Unexpected response: HTTP/1.0 404 Not Found"):
+                await _fetch_text(f"http://127.0.0.1:{port}/missing")
+        return body
+
+    assert asyncio.run(run()) == "42\n"
@@ -0,0 +1,110 @@
+import math
+
+import pytest
+
+from music_collection.models.recommendation_model import RecommendationModel
+
+
+@pytest.fixture()
+def recommendation_model():
+    """Fixture to provide a new RecommendationModel with a window of two positions."""
+    return RecommendationModel(window=2, neighbors_per_song=2)
+
+
+##################################################
+# Co-occurrence Test Cases
+##################################################
+
+def test_observe_sequence_window(recommendation_model):
+    """Test that only songs within the window are counted as co-occurring."""
+    recommendation_model.observe_sequence([1, 2, 3, 4])
+    recommendation_model.refresh()
+
+    assert {song_id for song_id, _ in recommendation_model.recommend(1)} == {2, 3}
+    assert {song_id for song_id, _ in recommendation_model.recommend(4)} == {2, 3}
+
+def test_recommend_scores_by_cosine(recommendation_model):
+    """Test that neighbors are ranked by cosine similarity of co-occurrence counts."""
+    recommendation_model.observe_sequence([1, 2])
+    recommendation_model.observe_sequence([1, 2])
+    recommendation_model.observe_sequence([1, 3])
+    recommendation_model.refresh()
+
+    # count(1) = 3, count(2) = 2, count(3) = 1
+    assert recommendation_model.recommend(1) == [
+        (2, pytest.approx(2 / math.sqrt(3 * 2))),
+        (3, pytest.approx(1 / math.sqrt(3 * 1))),
+    ]
+
+def test_observe_playlist(recommendation_model):
+    """Test that songs added to a playlist co-occur with the songs up to the window before them."""
+    recommendation_model.observe_playlist([1, 2])
+    recommendation_model.observe_playlist([1, 2, 3, 4], added_from=2)
+    recommendation_model.refresh()
+
+    assert {song_id for song_id, _ in recommendation_model.recommend(1)} == {2, 3}
+    assert {song_id for song_id, _ in recommendation_model.recommend(4)} == {2, 3}
+    # The pair (1, 2) was observed once, when 2 was added
+    assert recommendation_model._co_counts[1][2] == 1
+
+def test_refresh_prunes_co_counts():
+    """Test that each song keeps only its largest co-occurrence counts."""
+    recommendation_model = RecommendationModel(window=1, neighbors_per_song=1, co_counts_per_song=2)
+    recommendation_model.observe_sequence([1, 2, 1, 2, 1, 2, 1, 3, 1, 3, 1, 4])
+    recommendation_model.refresh()
+
+    assert set(recommendation_model._co_counts[1]) == {2, 3}
+    assert [song_id for song_id, _ in recommendation_model.recommend(1)] == [2]
+
+def test_pending_observations_capped(caplog):
+    """Test that observations beyond the pending limit are dropped and reported on refresh."""
+    recommendation_model = RecommendationModel(window=2, max_pending_songs=3)
+    recommendation_model.observe_sequence([1, 2])
+    recommendation_model.observe_sequence([3, 4])
+
+    assert recommendation_model.refresh() == 2
+    assert "Dropped 1 recommendation observations" in caplog.text
+
+def test_recommend_limit(recommendation_model):
+    """Test that the number of recommendations is capped by the limit and the index size."""
+    recommendation_model.observe_sequence([1, 2, 3])
+    recommendation_model.refresh()
+
+    assert len(recommendation_model.recommend(1, limit=1)) == 1
+    assert len(recommendation_model.recommend(2, limit=10)) == 2
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_recommend_invalid_limit(recommendation_model, limit):
+    """Test error when the limit is not positive, which would otherwise slice the neighbors from the end."""
+    recommendation_model.observe_sequence([1, 2, 3])
+    recommendation_model.refresh()
+
+    with pytest.raises(ValueError, match=f"Invalid limit: {limit}"):
+        recommendation_model.recommend(2, limit=limit)
+
+def test_recommend_before_refresh(recommendation_model):
+    """Test that observations only show up after the index is refreshed."""
+    recommendation_model.observe_sequence([1, 2])
+    assert recommendation_model.recommend(1) == []
+
+    assert recommendation_model.refresh() == 2
+    assert recommendation_model.refresh() == 0
+    assert recommendation_model.recommend(1) != []
+
+def test_recommend_unknown_song(recommendation_model):
+    """Test that an unknown song has no recommendations."""
+    assert recommendation_model.recommend(99) == []
+
+def test_background_refresh(recommendation_model):
+    """Test that the background thread refreshes the index."""
+    recommendation_model.observe_sequence([1, 2])
+    recommendation_model.start(interval=0.01)
+    try:
+        for _ in range(200):
+            if recommendation_model.recommend(1):
+                break
+            recommendation_model._stop.wait(0.01)
+    finally:
+        recommendation_model.stop()
+
+    assert [song_id for song_id, _ in recommendation_model.recommend(1)] == [2]
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from music_collection.utils.sampling_profiler import SamplingProfiler, _thread_group
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def profiler():
+    return SamplingProfiler()
+
+@pytest.fixture
+def parked_thread():
+    """A thread named like a pool thread, parked in busy_function until released."""
+    release = threading.Event()
+    parked = threading.Event()
+
+    def busy_function():
+        parked.set()
+        release.wait()
+
+    thread = threading.Thread(target=busy_function, name="request_3", daemon=True)
+    thread.start()
+    parked.wait()
+    yield thread
+    release.set()
+    thread.join()
+
+######################################################
+#
+#    Sampling
+#
+######################################################
+
+@pytest.mark.parametrize("name, group", [
+    ("request_3", "request"),
+    ("ThreadPoolExecutor-0_12", "ThreadPoolExecutor"),
+    ("recommender", "recommender"),
+])
+def test_thread_group(name, group):
+    """Test that pool numbers are stripped from thread names."""
+    assert _thread_group(name) == group
+
+def test_sample_counts_stacks(profiler, parked_thread):
+    """Test that repeated samples of the same stack are counted on one collapsed line."""
+    profiler.sample()
+    profiler.sample()
+
+    lines = [line for line in profiler.collapsed(include_idle=True).splitlines() if line.startswith("request;")]
+
+    assert len(lines) == 1
+    stack, count = lines[0].rsplit(" ", 1)
+    assert count == "2"
+    assert "busy_function (tests/test_sampling_profiler.py:" in stack
+    # Event.wait, then Condition.wait (qualified names only exist from Python 3.11)
+    assert all("wait (threading.py:" in frame for frame in stack.split(";")[-2:])
+
+def test_idle_samples_excluded(profiler, parked_thread):
+    """Test that samples of waiting threads are only dumped when asked for."""
+    profiler.sample()
+
+    assert "busy_function" not in profiler.collapsed()
+    assert "busy_function" in profiler.collapsed(include_idle=True)
+
+def test_own_thread_not_sampled(profiler):
+    """Test that the sampling thread does not sample itself."""
+    profiler.sample()
+
+    assert "test_own_thread_not_sampled" not in profiler.collapsed(include_idle=True)
+
+def test_stack_overflow(profiler, parked_thread, mocker):
+    """Test that new stacks beyond MAX_STACKS are counted under one overflow stack."""
+    mocker.patch("music_collection.utils.sampling_profiler.MAX_STACKS", 0)
+
+    profiler.sample()
+
+    assert "request;[other stacks] 1\n" in profiler.collapsed(include_idle=True)
+
+def test_reset(profiler, parked_thread):
+    """Test that resetting discards the counts."""
+    profiler.sample()
+
+    profiler.reset()
+
+    assert profiler.collapsed(include_idle=True) == ""
+    assert profiler.samples == 0
+
+def test_start_stop(profiler):
+    """Test that the background thread samples until stopped and is not sampled itself."""
+    profiler.start(hz=200)
+    try:
+        while profiler.samples == 0:
+            threading.Event().wait(0.01)
+    finally:
+        profiler.stop()
+
+    assert profiler.samples > 0
+    assert "sampling-profiler" not in profiler.collapsed(include_idle=True)
+    assert 0 < profiler.overhead() < 1
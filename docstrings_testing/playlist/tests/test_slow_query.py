@@ -0,0 +1,95 @@
+import pytest
+
+from music_collection.utils import sql_utils
+from music_collection.utils.slow_query import clear_slow_queries, describe_parameters, get_slow_queries, index_advice
+from music_collection.utils.sql_utils import get_db_connection
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def database(tmp_path, monkeypatch, mocker):
+    """Points get_db_connection at a songs table and logs every statement as slow."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "slow.db"))
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY, artist TEXT, title TEXT, year INTEGER, play_count INTEGER)")
+        conn.execute("CREATE INDEX idx_songs_artist ON songs (artist)")
+        conn.commit()
+    mocker.patch("music_collection.utils.slow_query.SLOW_QUERY_MS", 0)
+    clear_slow_queries()
+    yield
+    clear_slow_queries()
+
+def run(sql, parameters=()):
+    with get_db_connection() as conn:
+        conn.execute(sql, parameters).fetchall()
+
+######################################################
+#
+#    Slow query log
+#
+######################################################
+
+def test_describe_parameters():
+    """Test that parameter shapes hold types but not values."""
+    assert describe_parameters(("Artist", 1999)) == "(str, int)"
+    assert describe_parameters({"title": "Song"}) == "{title: str}"
+    assert describe_parameters(None) == ""
+
+def test_fast_statements_not_logged(database, mocker):
+    """Test that statements under the threshold are not recorded."""
+    mocker.patch("music_collection.utils.slow_query.SLOW_QUERY_MS", 1000)
+
+    run("SELECT * FROM songs WHERE id = ?", (1,))
+
+    assert get_slow_queries() == []
+
+def test_slow_queries_aggregated(database):
+    """Test that slow statements are aggregated by normalized SQL with their shapes and plans."""
+    run("SELECT * FROM songs WHERE id = ?", (1,))
+    run("SELECT * FROM songs WHERE id = ?", ("1",))
+    run("SELECT * FROM songs WHERE id = 2")
+
+    slow_queries = {entry['sql']: entry for entry in get_slow_queries()}
+    by_id = slow_queries["SELECT * FROM songs WHERE id = ?"]
+    assert by_id['count'] == 3
+    assert by_id['parameter_shapes'] == ["(int)", "(str)", "()"]
+    assert by_id['plan'][0].startswith("SEARCH songs USING INTEGER PRIMARY KEY")
+    assert by_id['max_ms'] >= by_id['mean_ms'] > 0
+
+######################################################
+#
+#    Index advice
+#
+######################################################
+
+def test_index_advice_scan(database):
+    """Test that a full table scan is flagged with an index on the compared columns, equality first."""
+    run("SELECT * FROM songs WHERE year > ? AND title = ?", (1990, "Song"))
+
+    assert index_advice() == [{
+        'sql': "SELECT * FROM songs WHERE year > ? AND title = ?",
+        'step': "SCAN songs",
+        'problem': "full table scan",
+        'suggestion': "CREATE INDEX idx_songs_title_year ON songs (title, year)",
+    }]
+
+def test_index_advice_temp_b_tree(database):
+    """Test that a sort into a temporary B-tree is flagged with an index on the filter and sort columns."""
+    run("SELECT id, play_count * 2 AS score FROM songs WHERE artist = ? ORDER BY score DESC", ("Artist",))
+
+    advice = index_advice()
+
+    assert len(advice) == 1
+    assert advice[0]['problem'] == "temporary B-tree for ORDER BY"
+    assert advice[0]['suggestion'] == "CREATE INDEX idx_songs_artist_play_count ON songs (artist, play_count * 2 DESC)"
+
+def test_index_advice_indexed_lookup(database):
+    """Test that statements using an index are not flagged."""
+    run("SELECT * FROM songs WHERE artist = ?", ("Artist",))
+
+    assert index_advice() == []
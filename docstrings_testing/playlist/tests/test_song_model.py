@@ -1,19 +1,27 @@
 from contextlib import contextmanager
+import os
 import re
 import sqlite3
 
 import pytest
 
 from music_collection.models.song_model import (
+    CatalogSong,
     Song,
+    catalog_song_row_factory,
     create_song,
     clear_catalog,
     delete_song,
     get_song_by_id,
     get_song_by_compound_key,
+    get_songs_by_compound_keys,
+    get_songs_by_filters,
     get_all_songs,
     get_random_song,
-    update_play_count
+    get_song_at_random_index,
+    song_row_factory,
+    update_play_count,
+    update_play_counts
 )
 
 ######################################################
@@ -35,6 +43,11 @@ def mock_cursor(mocker):
     mock_conn.cursor.return_value = mock_cursor
     mock_cursor.fetchone.return_value = None  # Default return for queries
     mock_cursor.fetchall.return_value = []
+    # Like sqlite3, pass the fetched rows through the cursor's row_factory when one is set
+    mock_cursor.row_factory = None
+    mock_cursor.fetchall.side_effect = lambda: [
+        mock_cursor.row_factory(mock_cursor, row) if mock_cursor.row_factory else row for row in mock_cursor.fetchall.return_value
+    ]
     mock_conn.commit.return_value = None
 
     # Mock the get_db_connection context manager from sql_utils
@@ -243,6 +256,57 @@ def test_get_song_by_compound_key(mock_cursor):
     expected_arguments = ("Artist Name", "Song Title", 2022)
     assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
 
+def test_get_songs_by_compound_keys(mock_cursor):
+    """Test retrieving several songs by compound key with a single query."""
+
+    # Simulate that only the first two keys match non-deleted songs
+    mock_cursor.fetchall.return_value = [
+        (1, "Artist A", "Song A", 2020, "Rock", 210),
+        (2, "Artist B", "Song B", 2021, "Pop", 180)
+    ]
+
+    keys = [("Artist A", "Song A", 2020), ("Artist B", "Song B", 2021), ("Artist C", "Song C", 2022)]
+    result = get_songs_by_compound_keys(keys)
+
+    expected_result = {
+        ("Artist A", "Song A", 2020): Song(1, "Artist A", "Song A", 2020, "Rock", 210),
+        ("Artist B", "Song B", 2021): Song(2, "Artist B", "Song B", 2021, "Pop", 180)
+    }
+    assert result == expected_result, f"Expected {expected_result}, got {result}"
+
+    # Ensure all keys were resolved with one statement joined against a VALUES list
+    mock_cursor.execute.assert_called_once()
+    expected_query = normalize_whitespace("""
+        WITH keys (artist, title, year) AS (VALUES (?, ?, ?), (?, ?, ?), (?, ?, ?))
+        SELECT songs.id, songs.artist, songs.title, songs.year, songs.genre, songs.duration
+        FROM keys
+        JOIN songs ON songs.artist = keys.artist AND songs.title = keys.title AND songs.year = keys.year
+        WHERE songs.deleted = FALSE
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+    expected_arguments = ["Artist A", "Song A", 2020, "Artist B", "Song B", 2021, "Artist C", "Song C", 2022]
+    actual_arguments = mock_cursor.execute.call_args[0][1]
+    assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
+
+def test_get_songs_by_compound_keys_batches(mock_cursor, mocker):
+    """Test that large key lists are split into batches on the same connection."""
+
+    mocker.patch("music_collection.models.song_model.KEYS_PER_QUERY", 2)
+
+    keys = [(f"Artist {i}", f"Song {i}", 2000 + i) for i in range(5)]
+    get_songs_by_compound_keys(keys + keys[:1])
+
+    # Duplicate keys are only looked up once: 5 unique keys in batches of 2
+    assert mock_cursor.execute.call_count == 3, f"Expected 3 queries, got {mock_cursor.execute.call_count}"
+
+def test_get_songs_by_compound_keys_empty(mock_cursor):
+    """Test that no query is run when there are no keys to look up."""
+
+    assert get_songs_by_compound_keys([]) == {}
+    mock_cursor.execute.assert_not_called()
+
 def test_get_all_songs(mock_cursor):
     """Test retrieving all songs that are not marked as deleted."""
 
@@ -258,9 +322,9 @@ def test_get_all_songs(mock_cursor):
 
     # Ensure the results match the expected output
     expected_result = [
-        {"id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210, "play_count": 10},
-        {"id": 2, "artist": "Artist B", "title": "Song B", "year": 2021, "genre": "Pop", "duration": 180, "play_count": 20},
-        {"id": 3, "artist": "Artist C", "title": "Song C", "year": 2022, "genre": "Jazz", "duration": 200, "play_count": 5}
+        CatalogSong(1, "Artist A", "Song A", 2020, "Rock", 210, 10),
+        CatalogSong(2, "Artist B", "Song B", 2021, "Pop", 180, 20),
+        CatalogSong(3, "Artist C", "Song C", 2022, "Jazz", 200, 5)
     ]
 
     assert songs == expected_result, f"Expected {expected_result}, but got {songs}"
@@ -312,9 +376,9 @@ def test_get_all_songs_ordered_by_play_count(mock_cursor):
 
     # Ensure the results are sorted by play count
     expected_result = [
-        {"id": 2, "artist": "Artist B", "title": "Song B", "year": 2021, "genre": "Pop", "duration": 180, "play_count": 20},
-        {"id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210, "play_count": 10},
-        {"id": 3, "artist": "Artist C", "title": "Song C", "year": 2022, "genre": "Jazz", "duration": 200, "play_count": 5}
+        CatalogSong(2, "Artist B", "Song B", 2021, "Pop", 180, 20),
+        CatalogSong(1, "Artist A", "Song A", 2020, "Rock", 210, 10),
+        CatalogSong(3, "Artist C", "Song C", 2022, "Jazz", 200, 5)
     ]
 
     assert songs == expected_result, f"Expected {expected_result}, but got {songs}"
@@ -330,6 +394,33 @@ def test_get_all_songs_ordered_by_play_count(mock_cursor):
 
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
+def test_get_songs_by_filters(mock_cursor):
+    """Test retrieving songs matching filters, most played first."""
+
+    mock_cursor.fetchall.return_value = [
+        (2, "Artist B", "Song B", 1995, "Rock", 180),
+        (1, "Artist A", "Song A", 1991, "Rock", 210)
+    ]
+
+    songs = get_songs_by_filters(genre="Rock", min_year=1990, max_year=1999, min_play_count=5, limit=100)
+
+    expected_result = [Song(2, "Artist B", "Song B", 1995, "Rock", 180), Song(1, "Artist A", "Song A", 1991, "Rock", 210)]
+    assert songs == expected_result, f"Expected {expected_result}, but got {songs}"
+
+    # Only the filters that were set should be in the query
+    expected_query = normalize_whitespace("""
+        SELECT id, artist, title, year, genre, duration
+        FROM songs
+        WHERE deleted = FALSE AND genre = ? AND year >= ? AND year <= ? AND play_count >= ?
+        ORDER BY play_count DESC LIMIT ?
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+    expected_arguments = ["Rock", 1990, 1999, 5, 100]
+    actual_arguments = mock_cursor.execute.call_args[0][1]
+    assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
+
 def test_get_random_song(mock_cursor, mocker):
     """Test retrieving a random song from the catalog."""
 
@@ -362,6 +453,72 @@ def test_get_random_song(mock_cursor, mocker):
     # Assert that the SQL query was correct
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
+def test_get_song_at_random_index():
+    """Test picking a song with a random index fetched by the caller."""
+    all_songs = [
+        CatalogSong(1, "Artist A", "Song A", 2020, "Rock", 210, 10),
+        CatalogSong(2, "Artist B", "Song B", 2021, "Pop", 180, 20),
+    ]
+
+    assert get_song_at_random_index(all_songs, 1) == Song(1, "Artist A", "Song A", 2020, "Rock", 210)
+
+######################################################
+#
+#    Row mapping and serialization
+#
+######################################################
+
+def test_song_has_no_instance_dict():
+    """Test that songs store their fields in slots rather than a per-instance dict."""
+    song = CatalogSong(1, "Artist A", "Song A", 2020, "Rock", 210, 10)
+
+    assert not hasattr(song, "__dict__")
+    with pytest.raises(AttributeError):
+        song.rating = 5
+
+def test_song_to_dict():
+    """Test that a song serializes to its fields, with the play count for catalog songs."""
+    assert Song(1, "Artist A", "Song A", 2020, "Rock", 210).to_dict() == {
+        "id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210
+    }
+    assert CatalogSong(1, "Artist A", "Song A", 2020, "Rock", 210, 10).to_dict() == {
+        "id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210, "play_count": 10
+    }
+
+def test_row_factories():
+    """Test that a sqlite3 cursor with a song row factory returns songs."""
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    row = "SELECT 1, 'Artist A', 'Song A', 2020, 'Rock', 210, 10"
+
+    cursor.row_factory = song_row_factory
+    assert cursor.execute(row).fetchall() == [Song(1, "Artist A", "Song A", 2020, "Rock", 210)]
+
+    cursor.row_factory = catalog_song_row_factory
+    assert cursor.execute(row).fetchone() == CatalogSong(1, "Artist A", "Song A", 2020, "Rock", 210, 10)
+
+def test_get_all_songs_lists_songs_from_1900(tmp_path, mocker):
+    """Test that a song from 1900, which the schema and create_song accept, is listed in the catalog."""
+    db_path = str(tmp_path / "song_catalog.db")
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", db_path)
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql")) as f:
+        create_table_script = f.read()
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(create_table_script)
+
+    create_song("Artist A", "Song A", 1900, "Rock", 200)
+    create_song("Artist B", "Song B", 2021, "Pop", 180)
+
+    assert get_all_songs() == [
+        CatalogSong(1, "Artist A", "Song A", 1900, "Rock", 200, 0),
+        CatalogSong(2, "Artist B", "Song B", 2021, "Pop", 180, 0)
+    ]
+
+def test_row_factory_validates():
+    """Test that rows are validated like songs built by hand."""
+    with pytest.raises(ValueError, match="Duration must be greater than 0"):
+        song_row_factory(None, (1, "Artist A", "Song A", 2020, "Rock", 0))
+
 def test_get_random_song_empty_catalog(mock_cursor, mocker):
     """Test retrieving a random song when the catalog is empty."""
 
@@ -423,3 +580,49 @@ def test_update_play_count_deleted_song(mock_cursor):
 
     # Ensure that no SQL query for updating play count was executed
     mock_cursor.execute.assert_called_once_with("SELECT deleted FROM songs WHERE id = ?", (1,))
+
+def test_update_play_counts(mock_cursor, mocker):
+    """Test updating the play counts of several songs in one batch."""
+    mocker.patch("music_collection.models.song_model.trending_index")
+
+    mock_cursor.fetchall.return_value = [(1,), (2,)]
+    mock_cursor.rowcount = 2
+
+    updated = update_play_counts([1, 2, 1])
+    assert updated == 2
+
+    # Repeated plays of the same song are folded into one update
+    expected_query = normalize_whitespace("UPDATE songs SET play_count = play_count + ? WHERE id = ? AND deleted = FALSE")
+    actual_query = normalize_whitespace(mock_cursor.executemany.call_args_list[0][0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+    expected_arguments = [(2, 1), (1, 2)]
+    actual_arguments = mock_cursor.executemany.call_args_list[0][0][1]
+    assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
+
+def test_update_play_counts_empty(mock_cursor):
+    """Test that no query is run when there are no plays to record."""
+
+    assert update_play_counts([]) == 0
+    mock_cursor.executemany.assert_not_called()
+
+def test_update_play_counts_skips_missing_and_deleted(tmp_path, mocker):
+    """Test that only existing, non-deleted songs are counted and get play events and trending scores."""
+    db_path = str(tmp_path / "song_catalog.db")
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", db_path)
+    record_trending = mocker.patch("music_collection.models.song_model.trending_index.record_plays", return_value={})
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql")) as f:
+        create_table_script = f.read()
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(create_table_script)
+        conn.executemany("INSERT INTO songs (artist, title, year, genre, duration, deleted) VALUES (?, ?, ?, ?, ?, ?)", [
+            ("Artist A", "Song A", 2020, "Rock", 210, False),
+            ("Artist B", "Song B", 2021, "Pop", 180, True),
+        ])
+
+    assert update_play_counts([1, 1, 2, 99]) == 1
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT id, play_count FROM songs ORDER BY id").fetchall() == [(1, 2), (2, 0)]
+        assert conn.execute("SELECT song_id FROM play_events").fetchall() == [(1,), (1,)]
+    assert record_trending.call_args[0][1] == [1, 1]
@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+import math
+import sqlite3
+
+import pytest
+
+from music_collection.models import trending_model
+from music_collection.models.trending_model import TrendingIndex, get_trending_songs, log_add_exp
+
+
+HALF_LIFE = 100.0
+
+
+@pytest.fixture()
+def trending_index(mocker):
+    """Fixture to provide an empty, already loaded TrendingIndex."""
+    cursor = mocker.Mock()
+    cursor.fetchall.return_value = []
+    trending_index = TrendingIndex(half_life=HALF_LIFE)
+    trending_index.load(cursor)
+    return trending_index
+
+@pytest.fixture
+def conn():
+    """An in-memory database with the song_trending table."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE song_trending (song_id INTEGER PRIMARY KEY, log_score REAL NOT NULL)")
+    yield conn
+    conn.close()
+
+def play(trending_index, conn, song_ids, played_at):
+    """Records plays in a committed transaction and applies them, as the play count updates do."""
+    log_scores = trending_index.record_plays(conn.cursor(), song_ids, played_at=played_at)
+    conn.commit()
+    trending_index.apply(log_scores)
+
+@pytest.fixture
+def mock_cursor(mocker):
+    """Mock the database connection used to look up trending songs."""
+    mock_conn = mocker.Mock()
+    mock_cursor = mocker.Mock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+
+    @contextmanager
+    def mock_get_db_connection():
+        yield mock_conn
+
+    mocker.patch("music_collection.models.trending_model.get_db_connection", mock_get_db_connection)
+    return mock_cursor
+
+
+##################################################
+# Score Test Cases
+##################################################
+
+def test_log_add_exp():
+    """Test that log_add_exp matches the direct computation and does not overflow."""
+    assert log_add_exp(math.log(2), math.log(3)) == pytest.approx(math.log(5))
+    assert log_add_exp(-math.inf, 1.5) == 1.5
+    assert log_add_exp(10000.0, 10000.0) == pytest.approx(10000.0 + math.log(2))
+
+def test_score_decays_by_half_life(trending_index, conn):
+    """Test that a play's score halves every half life."""
+    play(trending_index, conn, [1], played_at=1000.0)
+
+    assert trending_index.get_top_k(1, now=1000.0) == [(1, pytest.approx(1.0))]
+    assert trending_index.get_top_k(1, now=1000.0 + HALF_LIFE) == [(1, pytest.approx(0.5))]
+
+def test_recent_plays_outrank_old_plays(trending_index, conn):
+    """Test that a few recent plays beat many old plays."""
+    play(trending_index, conn, [1] * 10, played_at=0.0)
+    play(trending_index, conn, [2, 2], played_at=10 * HALF_LIFE)
+
+    top = trending_index.get_top_k(2, now=10 * HALF_LIFE)
+    assert [song_id for song_id, _ in top] == [2, 1]
+    assert top[0][1] == pytest.approx(2.0)
+    assert top[1][1] == pytest.approx(10 / 1024)
+
+def test_record_plays_persists_log_scores(trending_index, conn):
+    """Test that the plays are added to the stored log scores and the new scores returned."""
+    log_scores = trending_index.record_plays(conn.cursor(), [1, 1, 2], played_at=HALF_LIFE)
+
+    assert log_scores == {1: pytest.approx(math.log(2) + math.log(2)), 2: pytest.approx(math.log(2))}
+    assert dict(conn.execute("SELECT song_id, log_score FROM song_trending").fetchall()) == log_scores
+
+def test_record_plays_adds_to_other_workers_scores(trending_index, conn):
+    """Test that plays are added to a stored score written by another worker, not overwrite it."""
+    other_worker = TrendingIndex(half_life=HALF_LIFE)
+    play(other_worker, conn, [1, 1, 1], played_at=0.0)
+
+    play(trending_index, conn, [1], played_at=0.0)
+
+    stored = conn.execute("SELECT log_score FROM song_trending WHERE song_id = 1").fetchone()[0]
+    assert stored == pytest.approx(math.log(4))
+    assert trending_index.get_top_k(1, now=0.0) == [(1, pytest.approx(4.0))]
+
+def test_rolled_back_plays_not_ranked(trending_index, conn):
+    """Test that plays whose transaction rolls back never reach the ranking in memory."""
+    trending_index.record_plays(conn.cursor(), [1], played_at=0.0)
+    conn.rollback()
+
+    assert trending_index.get_top_k(1, now=0.0) == []
+    assert conn.execute("SELECT COUNT(*) FROM song_trending").fetchone()[0] == 0
+
+def test_apply_keeps_higher_score(trending_index):
+    """Test that an older score applied late does not move a song down the ranking."""
+    trending_index.apply({1: 2.0})
+    trending_index.apply({1: 1.0})
+
+    assert trending_index.get_top_k(1, now=0.0) == [(1, pytest.approx(math.exp(2.0)))]
+
+def test_load_ranks_persisted_scores(mocker):
+    """Test that persisted scores are ranked on load after a restart."""
+    cursor = mocker.Mock()
+    cursor.fetchall.return_value = [(1, 0.5), (2, 2.0), (3, 1.0)]
+
+    trending_index = TrendingIndex(half_life=HALF_LIFE)
+    trending_index.load(cursor)
+
+    assert [song_id for song_id, _ in trending_index.get_top_k(3, now=0.0)] == [2, 3, 1]
+
+
+##################################################
+# Trending Songs Test Cases
+##################################################
+
+def test_get_trending_songs_skips_deleted(trending_index, mock_cursor, mocker):
+    """Test that deleted songs are skipped and the ranking is read further down."""
+    mocker.patch.object(trending_model, "trending_index", trending_index)
+    trending_index.apply({1: math.log(3), 2: math.log(2), 3: 0.0})
+
+    # Song 1 is deleted, so only song 2 is found in the first batch of two
+    mock_cursor.fetchall.side_effect = [
+        [(2, "Artist B", "Song B", 2021, "Pop", 180, 2)],
+        [(3, "Artist C", "Song C", 2022, "Jazz", 200, 1)],
+    ]
+
+    songs = get_trending_songs(limit=2)
+
+    assert [song["id"] for song in songs] == [2, 3]
+    assert mock_cursor.execute.call_count == 2
+
+def test_get_trending_songs_invalid_limit():
+    """Test error when the limit is not positive."""
+    with pytest.raises(ValueError, match="Invalid limit: 0"):
+        get_trending_songs(limit=0)